@@ -0,0 +1,44 @@
+"""Add occupancy_timeline table
+
+Revision ID: 0ccup4ncy
+Revises: mkt5ubk3y
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0ccup4ncy"
+down_revision = "mkt5ubk3y"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. Rows are not backfilled here: the occupancy_timeline refresh
+    # job fills the whole window shortly after startup, then nightly. Until
+    # then reads compute missing days without storing them.
+    inspector = sa.inspect(op.get_bind())
+    if "occupancy_timeline" in inspector.get_table_names():
+        return
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+    op.create_table(
+        "occupancy_timeline",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("timeline_date", sa.Date(), nullable=False, unique=True),
+        sa.Column("slot_minutes", sa.Integer(), nullable=False),
+        sa.Column("total_json", json_type, nullable=False),
+        sa.Column("secondary_json", json_type, nullable=False),
+        sa.Column("peak_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("peak_secondary", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("secondary_dropoffs", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("secondary_pickups", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("occupancy_timeline")
@@ -0,0 +1,73 @@
+"""Convert audit_logs.event_data to JSONB and index it
+
+Revision ID: 3v3ntjsb
+Revises: fnn3ls3ss
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "3v3ntjsb"
+down_revision = "fnn3ls3ss"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # SQLite stores JSON as text already; nothing to convert or index.
+        return
+
+    column = next(
+        c for c in sa.inspect(bind).get_columns("audit_logs") if c["name"] == "event_data"
+    )
+    if column["type"].__class__.__name__ != "JSONB":
+        # Rows written before every writer produced JSON may hold plain
+        # text; keep those as a JSON string instead of failing the cast.
+        op.execute("""
+            CREATE OR REPLACE FUNCTION pg_temp.audit_event_data_jsonb(value text) RETURNS jsonb AS $$
+            BEGIN
+                RETURN value::jsonb;
+            EXCEPTION WHEN others THEN
+                RETURN to_jsonb(value);
+            END;
+            $$ LANGUAGE plpgsql IMMUTABLE
+        """)
+        op.execute("""
+            ALTER TABLE audit_logs
+            ALTER COLUMN event_data TYPE jsonb
+            USING CASE WHEN event_data IS NULL OR event_data = '' THEN NULL
+                       ELSE pg_temp.audit_event_data_jsonb(event_data) END
+        """)
+        # json.dumps(None) used to be stored for some events.
+        op.execute("UPDATE audit_logs SET event_data = NULL WHERE event_data = 'null'::jsonb")
+
+    # Containment (@>) lookups on any key.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_audit_logs_event_data_gin
+        ON audit_logs USING gin (event_data jsonb_path_ops)
+    """)
+    # The QA dashboard's email filter.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_audit_logs_event_data_email
+        ON audit_logs (lower(event_data->>'email'))
+    """)
+    # Abandoned-cart / forecast reads: funnel events for a session in a window.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_audit_logs_event_session_created
+        ON audit_logs (event, session_id, created_at)
+        WHERE session_id IS NOT NULL
+    """)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_event_session_created")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_event_data_email")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_event_data_gin")
+    op.execute("ALTER TABLE audit_logs ALTER COLUMN event_data TYPE text USING event_data::text")
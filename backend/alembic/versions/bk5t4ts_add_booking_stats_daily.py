@@ -0,0 +1,45 @@
+"""Add booking_stats_daily rollup
+
+Revision ID: bk5t4ts
+Revises: d3pslots
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "bk5t4ts"
+down_revision = "d3pslots"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. Rows are not backfilled here: the stats endpoint rebuilds an
+    # empty rollup on first read (booking_stats.load_booking_stats_rows).
+    inspector = sa.inspect(op.get_bind())
+    if "booking_stats_daily" in inspector.get_table_names():
+        return
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+    op.create_table(
+        "booking_stats_daily",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("stat_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("booking_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("paid_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue_pence", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("trip_days_json", json_type, nullable=True),
+        sa.Column("dropoff_hours_json", json_type, nullable=True),
+        sa.Column("pickup_hours_json", json_type, nullable=True),
+        sa.Column("created_hours_json", json_type, nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("stat_date", "status", name="uq_booking_stats_daily_date_status"),
+    )
+
+
+def downgrade():
+    op.drop_table("booking_stats_daily")
@@ -0,0 +1,40 @@
+"""Add booking_forecasts table
+
+Revision ID: bkf0r3c4st
+Revises: 3v3ntjsb
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "bkf0r3c4st"
+down_revision = "3v3ntjsb"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. The first forecast is stored by the nightly job, by
+    # `python booking_forecast.py --refresh`, or by the first dashboard load.
+    inspector = sa.inspect(op.get_bind())
+    if "booking_forecasts" in inspector.get_table_names():
+        return
+    op.create_table(
+        "booking_forecasts",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("horizon_days", sa.Integer(), nullable=False),
+        sa.Column("model_version", sa.String(length=40), nullable=False),
+        sa.Column("payload", sa.JSON().with_variant(postgresql.JSONB(), "postgresql"), nullable=False),
+    )
+    op.create_index("ix_booking_forecasts_as_of", "booking_forecasts", ["as_of"])
+    op.create_index("ix_booking_forecasts_generated_at", "booking_forecasts", ["generated_at"])
+
+
+def downgrade():
+    op.drop_table("booking_forecasts")
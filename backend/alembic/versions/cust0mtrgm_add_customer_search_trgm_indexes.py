@@ -0,0 +1,57 @@
+"""Add pg_trgm indexes for the admin customers search
+
+Revision ID: cust0mtrgm
+Revises: p0stc0d3
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "cust0mtrgm"
+down_revision = "p0stc0d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite has no pg_trgm; the search falls back to a scan there.
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Substring (ILIKE '%...%') search on /api/admin/customers. The name
+    # expression must match _customer_full_name_expr() in main.py.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_customers_full_name_trgm
+        ON customers USING gin ((coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_customers_email_trgm
+        ON customers USING gin (email gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_customers_phone_trgm
+        ON customers USING gin (phone gin_trgm_ops)
+    """)
+    # Registrations are matched ignoring case and spaces; must match
+    # _vehicle_registration_search_expr() in main.py.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_vehicles_registration_trgm
+        ON vehicles USING gin ((replace(upper(registration), ' ', '')) gin_trgm_ops)
+    """)
+    # Keyset pages of the directory, newest first.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_customers_created_at_id
+        ON customers (created_at DESC, id DESC)
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_customers_created_at_id")
+    op.execute("DROP INDEX IF EXISTS ix_vehicles_registration_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_customers_phone_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_customers_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_customers_full_name_trgm")
@@ -0,0 +1,54 @@
+"""Add departure_slots drop-off slot catalogue
+
+Revision ID: d3pslots
+Revises: fl1ghtd3l4y
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d3pslots"
+down_revision = "fl1ghtd3l4y"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. Rows are not backfilled here; run
+    # `python import_departures_capacity.py --backfill-slots` after upgrading.
+    # Until then availability reads compute missing rows in memory
+    # (db_service.get_departure_slots_for_date) without writing them.
+    inspector = sa.inspect(op.get_bind())
+    if "departure_slots" in inspector.get_table_names():
+        return
+    op.create_table(
+        "departure_slots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "departure_id", sa.Integer(),
+            sa.ForeignKey("flight_departures.id", ondelete="CASCADE"), nullable=False,
+        ),
+        sa.Column("slot_id", sa.String(length=10), nullable=False),
+        sa.Column("capacity_key", sa.String(length=10), nullable=False),
+        sa.Column("flight_date", sa.Date(), nullable=False),
+        sa.Column("departure_time", sa.Time(), nullable=False),
+        sa.Column("drop_off_date", sa.Date(), nullable=False),
+        sa.Column("drop_off_time", sa.Time(), nullable=False),
+        sa.Column("label", sa.String(length=50), nullable=False),
+        sa.Column("is_clamped", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("remaining", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("departure_id", "slot_id", name="uq_departure_slots_departure_slot"),
+    )
+    op.create_index("ix_departure_slots_id", "departure_slots", ["id"])
+    op.create_index(
+        "ix_departure_slots_flight_date_departure",
+        "departure_slots",
+        ["flight_date", "departure_id"],
+    )
+
+
+def downgrade():
+    op.drop_table("departure_slots")
@@ -0,0 +1,41 @@
+"""Add (date, time, id) keyset indexes to flight_departures/flight_arrivals
+
+Revision ID: f1tk3yst
+Revises: c4ps3tt
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f1tk3yst"
+down_revision = "c4ps3tt"
+branch_labels = None
+depends_on = None
+
+
+def _existing_indexes(table_name):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table_name)}
+
+
+def upgrade():
+    # Idempotent: main.py startup runs Base.metadata.create_all(), which may
+    # already have built these on a fresh database.
+    if "ix_flight_departures_date_time_id" not in _existing_indexes("flight_departures"):
+        op.create_index(
+            "ix_flight_departures_date_time_id",
+            "flight_departures",
+            ["date", "departure_time", "id"],
+        )
+    if "ix_flight_arrivals_date_time_id" not in _existing_indexes("flight_arrivals"):
+        op.create_index(
+            "ix_flight_arrivals_date_time_id",
+            "flight_arrivals",
+            ["date", "arrival_time", "id"],
+        )
+
+
+def downgrade():
+    op.drop_index("ix_flight_arrivals_date_time_id", table_name="flight_arrivals")
+    op.drop_index("ix_flight_departures_date_time_id", table_name="flight_departures")
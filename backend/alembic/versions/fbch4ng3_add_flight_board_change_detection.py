@@ -0,0 +1,51 @@
+"""Add change-detection columns to flight_board_snapshots
+
+Revision ID: fbch4ng3
+Revises: f1tk3yst
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fbch4ng3"
+down_revision = "f1tk3yst"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # flight_board_snapshots was created by Base.metadata.create_all() rather
+    # than a revision, so a fresh database may already carry these columns.
+    inspector = sa.inspect(op.get_bind())
+    existing = {col["name"] for col in inspector.get_columns("flight_board_snapshots")}
+    if "content_hash" not in existing:
+        op.add_column(
+            "flight_board_snapshots",
+            sa.Column("content_hash", sa.String(length=64), nullable=True),
+        )
+        op.create_index(
+            "ix_flight_board_snapshots_content_hash",
+            "flight_board_snapshots",
+            ["content_hash"],
+        )
+    if "diff_json" not in existing:
+        op.add_column(
+            "flight_board_snapshots",
+            sa.Column("diff_json", postgresql.JSONB(), nullable=True),
+        )
+    if "last_seen_at" not in existing:
+        op.add_column(
+            "flight_board_snapshots",
+            sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.execute("UPDATE flight_board_snapshots SET last_seen_at = created_at")
+
+
+def downgrade():
+    op.drop_column("flight_board_snapshots", "last_seen_at")
+    op.drop_column("flight_board_snapshots", "diff_json")
+    op.drop_index("ix_flight_board_snapshots_content_hash", table_name="flight_board_snapshots")
+    op.drop_column("flight_board_snapshots", "content_hash")
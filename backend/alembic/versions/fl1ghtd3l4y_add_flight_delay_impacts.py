@@ -0,0 +1,72 @@
+"""Add flight_delay_impacts and the booking pickup-flight index
+
+Revision ID: fl1ghtd3l4y
+Revises: fbch4ng3
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "fl1ghtd3l4y"
+down_revision = "fbch4ng3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so either object may
+    # already exist on a database that booted before this revision ran.
+    inspector = sa.inspect(op.get_bind())
+    if "flight_delay_impacts" not in inspector.get_table_names():
+        op.create_table(
+            "flight_delay_impacts",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column(
+                "snapshot_id", sa.Integer(),
+                sa.ForeignKey("flight_board_snapshots.id", ondelete="SET NULL"),
+                nullable=True,
+            ),
+            sa.Column("impact_type", sa.String(length=10), nullable=False),
+            sa.Column(
+                "booking_id", sa.Integer(),
+                sa.ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True,
+            ),
+            sa.Column(
+                "shift_id", sa.Integer(),
+                sa.ForeignKey("roster_shifts.id", ondelete="CASCADE"), nullable=True,
+            ),
+            sa.Column("flight_number", sa.String(length=16), nullable=True),
+            sa.Column("flight_date", sa.Date(), nullable=False),
+            sa.Column("board_status", sa.String(length=64), nullable=True),
+            sa.Column("booked_arrival_at", sa.DateTime(), nullable=True),
+            sa.Column("revised_arrival_at", sa.DateTime(), nullable=True),
+            sa.Column("delay_minutes", sa.Integer(), nullable=True),
+            sa.Column("still_covered", sa.Boolean(), nullable=True),
+            sa.Column("overrun_minutes", sa.Integer(), nullable=True),
+            sa.Column("detail_json", postgresql.JSONB(), nullable=True),
+            sa.Column("consumed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_flight_delay_impacts_snapshot_id", "flight_delay_impacts", ["snapshot_id"])
+        op.create_index("ix_flight_delay_impacts_booking_id", "flight_delay_impacts", ["booking_id"])
+        op.create_index("ix_flight_delay_impacts_shift_id", "flight_delay_impacts", ["shift_id"])
+        op.create_index("ix_flight_delay_impacts_flight_date", "flight_delay_impacts", ["flight_date"])
+        op.create_index(
+            "idx_flight_delay_impacts_pending", "flight_delay_impacts", ["consumed_at", "id"],
+        )
+
+    booking_indexes = {ix["name"] for ix in inspector.get_indexes("bookings")}
+    if "ix_bookings_pickup_flight_arrival_date" not in booking_indexes:
+        op.create_index(
+            "ix_bookings_pickup_flight_arrival_date",
+            "bookings",
+            ["pickup_flight_number", "flight_arrival_date"],
+        )
+
+
+def downgrade():
+    op.drop_index("ix_bookings_pickup_flight_arrival_date", table_name="bookings")
+    op.drop_table("flight_delay_impacts")
@@ -0,0 +1,51 @@
+"""Add funnel_sessions table
+
+Revision ID: fnn3ls3ss
+Revises: bk5t4ts
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "fnn3ls3ss"
+down_revision = "bk5t4ts"
+branch_labels = None
+depends_on = None
+
+STAGE_COLUMNS = (
+    "dates_selected_at",
+    "flight_selected_at",
+    "customer_entered_at",
+    "payment_initiated_at",
+    "booking_confirmed_at",
+)
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. Existing audit rows are loaded with
+    # `python funnel_sessions.py --backfill` after deploying.
+    inspector = sa.inspect(op.get_bind())
+    if "funnel_sessions" in inspector.get_table_names():
+        return
+    op.create_table(
+        "funnel_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("session_key", sa.String(length=120), nullable=False, unique=True),
+        sa.Column("session_id", sa.String(length=100), nullable=True),
+        sa.Column("booking_reference", sa.String(length=20), nullable=True),
+        sa.Column("source", sa.String(length=20), nullable=False, server_default="web"),
+        sa.Column("outcome", sa.String(length=20), nullable=False, server_default="open"),
+        sa.Column("first_event_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_event_at", sa.DateTime(timezone=True), nullable=False),
+        *[sa.Column(name, sa.DateTime(timezone=True), nullable=True) for name in STAGE_COLUMNS],
+    )
+    op.create_index("ix_funnel_sessions_booking_reference", "funnel_sessions", ["booking_reference"])
+    for name in STAGE_COLUMNS:
+        op.create_index(f"ix_funnel_sessions_{name}", "funnel_sessions", [name])
+
+
+def downgrade():
+    op.drop_table("funnel_sessions")
@@ -0,0 +1,36 @@
+"""Add keyset/filter indexes to marketing_subscribers
+
+Revision ID: mkt5ubk3y
+Revises: cust0mtrgm
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "mkt5ubk3y"
+down_revision = "cust0mtrgm"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ("ix_marketing_subscribers_subscribed_at_id", ["subscribed_at", "id"]),
+    ("ix_marketing_subscribers_source_subscribed_at", ["source", "subscribed_at", "id"]),
+    ("ix_marketing_subscribers_unsubscribed_subscribed_at", ["unsubscribed", "subscribed_at", "id"]),
+)
+
+
+def upgrade():
+    # Idempotent: main.py startup runs Base.metadata.create_all(), which may
+    # already have built these on a fresh database.
+    existing = {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("marketing_subscribers")}
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, "marketing_subscribers", columns)
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="marketing_subscribers")
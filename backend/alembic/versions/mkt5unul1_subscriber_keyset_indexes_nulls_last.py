@@ -0,0 +1,45 @@
+"""Rebuild the marketing_subscribers keyset indexes as DESC NULLS LAST
+
+Revision ID: mkt5unul1
+Revises: p00lr0llup
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+revision = "mkt5unul1"
+down_revision = "p00lr0llup"
+branch_labels = None
+depends_on = None
+
+
+# The admin list pages subscribed_at DESC NULLS LAST, id DESC so subscribers
+# without a subscribed_at come last instead of breaking the cursor. An
+# ascending index scanned backwards gives NULLS FIRST on Postgres, so each
+# index is rebuilt in the order the query asks for.
+INDEXES = (
+    ("ix_marketing_subscribers_subscribed_at_id", ""),
+    ("ix_marketing_subscribers_source_subscribed_at", "source, "),
+    ("ix_marketing_subscribers_unsubscribed_subscribed_at", "unsubscribed, "),
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        # SQLite sorts NULL lowest, so its ascending indexes already fit.
+        return
+    for name, prefix in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute(f"""
+            CREATE INDEX {name}
+            ON marketing_subscribers ({prefix}subscribed_at DESC NULLS LAST, id DESC)
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name, prefix in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute(f"CREATE INDEX {name} ON marketing_subscribers ({prefix}subscribed_at, id)")
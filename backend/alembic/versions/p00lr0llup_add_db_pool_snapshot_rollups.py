@@ -0,0 +1,50 @@
+"""Add db_pool_snapshot_rollups table
+
+Revision ID: p00lr0llup
+Revises: 0ccup4ncy
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "p00lr0llup"
+down_revision = "0ccup4ncy"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. The first retention run rolls up the raw snapshots still on hand.
+    bind = op.get_bind()
+    if "db_pool_snapshot_rollups" in sa.inspect(bind).get_table_names():
+        return
+    # Shared with db_pool_snapshots, which create_all() normally creates first.
+    health_status = postgresql.ENUM("HEALTHY", "WARNING", "CRITICAL", name="poolhealthstatus", create_type=False)
+    health_status.create(bind, checkfirst=True)
+    op.create_table(
+        "db_pool_snapshot_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("resolution_seconds", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("pool_size", sa.Integer(), nullable=False),
+        sa.Column("max_overflow", sa.Integer(), nullable=False),
+        sa.Column("usage_min", sa.Numeric(5, 1), nullable=False),
+        sa.Column("usage_max", sa.Numeric(5, 1), nullable=False),
+        sa.Column("usage_avg", sa.Numeric(5, 1), nullable=False),
+        sa.Column("checked_out_min", sa.Integer(), nullable=False),
+        sa.Column("checked_out_max", sa.Integer(), nullable=False),
+        sa.Column("checked_out_avg", sa.Numeric(7, 2), nullable=False),
+        sa.Column("overflow_max", sa.Integer(), nullable=False),
+        sa.Column("checked_in_min", sa.Integer(), nullable=False),
+        sa.Column("health_status", health_status, nullable=False),
+        sa.UniqueConstraint("resolution_seconds", "bucket_start", name="uq_db_pool_snapshot_rollups_bucket"),
+    )
+
+
+def downgrade():
+    op.drop_table("db_pool_snapshot_rollups")
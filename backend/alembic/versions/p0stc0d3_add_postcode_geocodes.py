@@ -0,0 +1,39 @@
+"""Add postcode_geocodes table
+
+Revision ID: p0stc0d3
+Revises: bkf0r3c4st
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "p0stc0d3"
+down_revision = "bkf0r3c4st"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db() runs Base.metadata.create_all() too, so the table may already
+    # exist. Full postcodes fill in on first lookup; load the outward-code
+    # centroids with `python postcode_geocoder.py --import-centroids FILE`.
+    inspector = sa.inspect(op.get_bind())
+    if "postcode_geocodes" in inspector.get_table_names():
+        return
+    op.create_table(
+        "postcode_geocodes",
+        sa.Column("postcode", sa.String(length=10), primary_key=True),
+        sa.Column("kind", sa.String(length=10), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("admin_district", sa.String(length=100), nullable=True),
+        sa.Column("source", sa.String(length=20), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("postcode_geocodes")
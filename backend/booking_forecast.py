@@ -0,0 +1,825 @@
+"""Nightly bookings forecast (booking_forecasts).
+
+/api/admin/reports/bookings-forecast used to rebuild its payload from raw
+bookings and audit events on the request path whenever the report cache
+expired. refresh_booking_forecast() now runs nightly from the scheduler and
+stores one booking_forecasts row; the endpoint serves the newest row.
+
+The payload keeps the pattern report the dashboard already draws
+(destinations, weekday, seasonality, airline and flight-time splits,
+abandoned-search signals) and adds "projection": expected drop-offs for
+each of the next FORECAST_HORIZON_DAYS days, computed with NumPy from
+
+- a pace curve: the share of a day's bookings usually made before the day
+  was N days away, learned from the drop-offs of the training window;
+- a seasonal baseline: the weekday mean scaled by the month's share of the
+  last year, then by how the last TREND_DAYS ran against that year
+  (year-over-year growth);
+- the bookings already on the books for the day.
+
+The pace projection (on the books / pace) and the baseline are blended by
+the pace itself, so near days lean on what is booked and far days on the
+season. The 80% band comes from the baseline's residual spread and narrows
+as the day fills; its lower edge never drops below what is on the books.
+
+backtest_booking_forecast() replays the projection as of past dates using
+only bookings made before each date and scores it against the drop-offs
+that happened. Bookings cancelled since are not in the history, so a
+replay sees slightly fewer bookings on the books than there were then.
+
+    python booking_forecast.py --refresh
+    python booking_forecast.py --backtest --start 2026-01-01 --end 2026-06-30
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+
+from booking_stats import UK_TIMEZONE, effective_uk_datetime, uk_datetime
+
+logger = logging.getLogger(__name__)
+
+FORECAST_HORIZON_DAYS = 30
+# Seasonal baseline: 52 weeks, then the trend window straight after it.
+SEASONAL_DAYS = 364
+TREND_DAYS = 28
+TRAINING_DAYS = SEASONAL_DAYS + TREND_DAYS
+TREND_LIMITS = (0.5, 2.0)
+# Leads beyond this are counted as "booked at least this far ahead".
+MAX_LEAD_DAYS = 180
+# Below this pace, what is on the books says too little to scale up.
+MIN_PACE = 0.05
+BAND_LEVEL = 0.8
+BAND_Z = 1.2816  # two-sided 80% normal interval
+MODEL_VERSION = "pace-seasonal-1"
+# Stored runs older than this are pruned by each refresh.
+KEEP_FORECAST_DAYS = 90
+HISTORY_YIELD_PER = 1000
+BACKTEST_STEP_DAYS = 7
+BACKTEST_LEAD_BUCKETS = ((0, 6), (7, 13), (14, 29))
+# Nightly refresh, Europe/London: after the booking stats reconcile.
+BOOKING_FORECAST_HOUR = 3
+BOOKING_FORECAST_MINUTE = 45
+
+# date.toordinal() of 1970-01-01, for ordinal <-> datetime64 conversion.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# ---------------------------------------------------------------------------
+# Projection
+# ---------------------------------------------------------------------------
+
+def load_history(db, start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+    """Confirmed/completed bookings dropping off in [start, end).
+
+    Returns (drop-off, booked) date ordinals; booked is the effective UK
+    date (payment-success day, else created_at) as in every booking report.
+    """
+    from db_models import Booking, BookingStatus, Payment
+
+    rows = (
+        db.query(Booking.dropoff_date, Booking.created_at, Payment.paid_at)
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .filter(
+            Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]),
+            Booking.dropoff_date >= start,
+            Booking.dropoff_date < end,
+        )
+        .yield_per(HISTORY_YIELD_PER)
+    )
+    dropoff, booked = [], []
+    for dropoff_date, created_at, paid_at in rows:
+        effective = effective_uk_datetime(created_at, paid_at)
+        if not isinstance(dropoff_date, date) or effective is None:
+            continue
+        dropoff.append(dropoff_date.toordinal())
+        booked.append(effective.date().toordinal())
+    return np.array(dropoff, dtype=np.int64), np.array(booked, dtype=np.int64)
+
+
+def _weekdays(ordinals: np.ndarray) -> np.ndarray:
+    # Ordinal 1 (0001-01-01) was a Monday.
+    return (ordinals - 1) % 7
+
+
+def _months(ordinals: np.ndarray) -> np.ndarray:
+    """Zero-based month (0 = January) of each date ordinal."""
+    months = (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+    return months.astype(np.int64) % 12
+
+
+def project(dropoff: np.ndarray, booked: np.ndarray, as_of: date, horizon: int = FORECAST_HORIZON_DAYS) -> dict:
+    """Expected drop-offs for as_of and the following days, as seen on as_of.
+
+    Only bookings made before as_of are used, so the same call replays a
+    past forecast for the backtest. Returns NumPy arrays indexed by days
+    ahead ("on_books", "baseline", "pace", "pace_projection" (NaN where the
+    pace is below MIN_PACE), "forecast", "lower", "upper") and the fitted
+    "pace_curve", "weekday_baseline", "month_factors", "trend", "residual_sd"
+    and "training_bookings".
+    """
+    origin = as_of.toordinal()
+    known = booked < origin
+    dropoff, booked = dropoff[known], booked[known]
+
+    in_training = (dropoff >= origin - TRAINING_DAYS) & (dropoff < origin)
+    first_day = max(origin - TRAINING_DAYS, int(dropoff[in_training].min())) if in_training.any() else origin
+    train_days = np.arange(first_day, origin)
+    daily = np.bincount(dropoff[in_training] - first_day, minlength=train_days.size).astype(float)
+
+    # Pace: booked_by[k] = share of training bookings made k or more days
+    # ahead; a day d days away has its bookings from d + 1 days ahead on.
+    lead = np.clip(dropoff[in_training] - booked[in_training], 0, MAX_LEAD_DAYS + 1)
+    lead_counts = np.bincount(lead, minlength=MAX_LEAD_DAYS + 2)
+    booked_by = lead_counts[::-1].cumsum()[::-1] / max(int(lead_counts.sum()), 1)
+    pace_curve = booked_by[1:]
+
+    # Seasonal baseline from the year before the trend window.
+    seasonal = train_days < origin - TREND_DAYS
+    weekdays, months = _weekdays(train_days), _months(train_days)
+    weekday_days = np.bincount(weekdays[seasonal], minlength=7)
+    weekday_baseline = np.bincount(weekdays[seasonal], weights=daily[seasonal], minlength=7) / np.maximum(weekday_days, 1)
+    month_days = np.bincount(months[seasonal], minlength=12)
+    month_mean = np.bincount(months[seasonal], weights=daily[seasonal], minlength=12) / np.maximum(month_days, 1)
+    overall = daily[seasonal].mean() if seasonal.any() else 0.0
+    month_factors = np.where((month_days > 0) & (overall > 0), month_mean / (overall or 1.0), 1.0)
+
+    fitted = weekday_baseline[weekdays] * month_factors[months]
+    recent_fitted = fitted[~seasonal].sum()
+    trend = float(np.clip(daily[~seasonal].sum() / recent_fitted, *TREND_LIMITS)) if recent_fitted > 0 else 1.0
+    residuals = daily - fitted * np.where(seasonal, 1.0, trend)
+    residual_sd = float(residuals.std(ddof=1)) if residuals.size > 1 else 0.0
+
+    ahead = np.arange(horizon)
+    targets = origin + ahead
+    upcoming = (dropoff >= origin) & (dropoff < origin + horizon)
+    on_books = np.bincount(dropoff[upcoming] - origin, minlength=horizon).astype(float)
+    baseline = weekday_baseline[_weekdays(targets)] * month_factors[_months(targets)] * trend
+
+    pace = pace_curve[np.minimum(ahead, MAX_LEAD_DAYS)]
+    usable = pace >= MIN_PACE
+    pace_projection = np.where(usable, on_books / np.maximum(pace, MIN_PACE), np.nan)
+    weight = np.where(usable, pace, 0.0)
+    forecast = weight * np.nan_to_num(pace_projection) + (1 - weight) * baseline
+    forecast = np.maximum(forecast, on_books)
+    spread = BAND_Z * residual_sd * np.sqrt(1 - weight)
+
+    return {
+        "as_of": as_of,
+        "on_books": on_books,
+        "baseline": baseline,
+        "pace": pace,
+        "pace_projection": pace_projection,
+        "forecast": forecast,
+        "lower": np.maximum(forecast - spread, on_books),
+        "upper": forecast + spread,
+        "pace_curve": pace_curve,
+        "weekday_baseline": weekday_baseline,
+        "month_factors": month_factors,
+        "trend": trend,
+        "residual_sd": residual_sd,
+        "training_bookings": int(in_training.sum()),
+    }
+
+
+def _rounded(values: Iterable, digits: int = 1) -> list:
+    return [None if np.isnan(value) else round(float(value), digits) for value in values]
+
+
+def projection_payload(result: dict) -> dict:
+    """JSON-ready form of a project() result for the stored payload."""
+    as_of = result["as_of"]
+    days = [
+        {
+            "date": (as_of + timedelta(days=ahead)).isoformat(),
+            "display_date": (as_of + timedelta(days=ahead)).strftime("%a %d %b"),
+            "days_ahead": ahead,
+            "on_books": int(result["on_books"][ahead]),
+            "pace": round(float(result["pace"][ahead]), 3),
+            "baseline": baseline,
+            "pace_projection": pace_projection,
+            "forecast": forecast,
+            "lower": lower,
+            "upper": upper,
+        }
+        for ahead, (baseline, pace_projection, forecast, lower, upper) in enumerate(zip(
+            _rounded(result["baseline"]),
+            _rounded(result["pace_projection"]),
+            _rounded(result["forecast"]),
+            _rounded(result["lower"]),
+            _rounded(result["upper"]),
+        ))
+    ]
+    return {
+        "as_of": as_of.isoformat(),
+        "horizon_days": len(days),
+        "model_version": MODEL_VERSION,
+        "band_level": BAND_LEVEL,
+        "days": days,
+        "totals": {
+            "on_books": int(result["on_books"].sum()),
+            "forecast": round(float(result["forecast"].sum()), 1),
+            "lower": round(float(result["lower"].sum()), 1),
+            "upper": round(float(result["upper"].sum()), 1),
+        },
+        "pace_curve": _rounded(result["pace_curve"][:FORECAST_HORIZON_DAYS * 2], 3),
+        "weekday_baseline": _rounded(result["weekday_baseline"], 2),
+        "month_factors": _rounded(result["month_factors"], 3),
+        "trend": round(result["trend"], 3),
+        "residual_sd": round(result["residual_sd"], 2),
+        "training_bookings": result["training_bookings"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pattern report
+# ---------------------------------------------------------------------------
+
+def pattern_report(db, now: datetime) -> dict:
+    """Booking and abandoned-search patterns behind the forecast dashboard.
+
+    Everything in the payload except "projection": destinations scored by
+    bookings and recent searches, weekday/seasonality/airline/flight-time
+    splits, and the next 30 days scored by those patterns.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import aliased
+
+    from db_models import AuditLog, AuditLogEvent, Booking, BookingStatus
+
+    today = now.date()
+
+    # Get historical bookings (last 6 months of completed/confirmed bookings)
+    six_months_ago = now - timedelta(days=180)
+
+    historical_bookings = db.query(Booking).filter(
+        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]),
+        Booking.created_at >= six_months_ago
+    ).all()
+
+    # Analyze booking patterns
+    destination_bookings = defaultdict(int)
+    day_of_week_bookings = defaultdict(int)  # 0=Monday, 6=Sunday (dropoff/travel day)
+    pickup_day_of_week_bookings = defaultdict(int)  # 0=Monday, 6=Sunday (pickup/return day)
+    airline_bookings = defaultdict(int)
+    travel_month_bookings = defaultdict(int)  # Month of dropoff (when they travel)
+    booking_month_bookings = defaultdict(int)  # Month of booking creation (when they booked)
+    destination_by_dow = defaultdict(lambda: defaultdict(int))  # destination -> dow -> count
+    departure_time_bookings = defaultdict(int)  # Hour of departure (0-23)
+    arrival_time_bookings = defaultdict(int)  # Hour of arrival (0-23)
+
+    for booking in historical_bookings:
+        # Departure destination
+        if booking.dropoff_destination:
+            dest = booking.dropoff_destination.strip().title()
+            destination_bookings[dest] += 1
+
+            # Track day of week for this destination
+            if booking.dropoff_date:
+                dow = booking.dropoff_date.weekday()
+                destination_by_dow[dest][dow] += 1
+
+        # Day of week patterns (dropoff = travel day)
+        if booking.dropoff_date:
+            dow = booking.dropoff_date.weekday()
+            day_of_week_bookings[dow] += 1
+            travel_month_bookings[booking.dropoff_date.month] += 1
+
+        # Day of week patterns (pickup = return day)
+        if booking.pickup_date:
+            pickup_dow = booking.pickup_date.weekday()
+            pickup_day_of_week_bookings[pickup_dow] += 1
+
+        # Month the booking was placed (effective paid month, UK time)
+        payment = getattr(booking, "payment", None)
+        eff = effective_uk_datetime(booking.created_at, getattr(payment, "paid_at", None))
+        if eff:
+            booking_month_bookings[eff.month] += 1
+
+        # Airline patterns (merge Ryanair UK into Ryanair)
+        if booking.dropoff_airline_name:
+            airline_name = booking.dropoff_airline_name
+            if airline_name.lower() in ['ryanair uk', 'ryanair uk ltd']:
+                airline_name = 'Ryanair'
+            airline_bookings[airline_name] += 1
+
+        # Departure time patterns
+        if booking.flight_departure_time:
+            hour = booking.flight_departure_time.hour
+            departure_time_bookings[hour] += 1
+
+        # Arrival time patterns
+        if booking.flight_arrival_time:
+            hour = booking.flight_arrival_time.hour
+            arrival_time_bookings[hour] += 1
+
+    # Get abandoned cart data (last 30 days)
+    thirty_days_ago = now - timedelta(days=30)
+
+    # Searches from sessions that did not complete a booking; the exclusion
+    # and the event_data fields are evaluated by the database.
+    completed = aliased(AuditLog)
+    data = AuditLog.event_data
+    abandoned_logs = db.query(
+        AuditLog.session_id,
+        data["departure_destination"].as_string().label("destination"),
+        data["dropoff_date"].as_string().label("dropoff_date"),
+        data["departure_airline"].as_string().label("airline"),
+    ).filter(
+        AuditLog.created_at >= thirty_days_ago,
+        AuditLog.event == AuditLogEvent.FLIGHT_SELECTED,
+        AuditLog.session_id.isnot(None),
+        ~select(completed.id).where(
+            completed.session_id == AuditLog.session_id,
+            completed.created_at >= thirty_days_ago,
+            completed.event.in_([AuditLogEvent.PAYMENT_SUCCEEDED, AuditLogEvent.BOOKING_CONFIRMED]),
+        ).exists(),
+    ).all()
+
+    # Analyze abandoned cart searches
+    searched_destinations = defaultdict(set)  # destination -> set of session_ids
+    searched_dates = defaultdict(set)  # date string -> set of session_ids
+    searched_airlines = defaultdict(set)
+    abandoned_month_sessions = defaultdict(set)  # month (1-12) -> set of session_ids
+
+    for log in abandoned_logs:
+        if log.destination:
+            searched_destinations[log.destination.strip().title()].add(log.session_id)
+
+        dropoff_date = log.dropoff_date
+        if dropoff_date:
+            searched_dates[dropoff_date].add(log.session_id)
+            # Track abandoned by month of intended travel
+            try:
+                month = int(dropoff_date.split('-')[1])
+                abandoned_month_sessions[month].add(log.session_id)
+            except (IndexError, ValueError):
+                pass
+
+        airline = log.airline
+        if airline:
+            # Merge Ryanair UK into Ryanair
+            if airline.lower() in ['ryanair uk', 'ryanair uk ltd']:
+                airline = 'Ryanair'
+            searched_airlines[airline].add(log.session_id)
+
+    # Calculate totals for normalization
+    total_bookings = len(historical_bookings) or 1
+    total_searches = len(set(s for sessions in searched_destinations.values() for s in sessions)) or 1
+
+    # Build destination forecast with demand scores
+    destination_forecast = []
+    all_destinations = set(destination_bookings.keys()) | set(searched_destinations.keys())
+
+    for dest in all_destinations:
+        bookings_count = destination_bookings.get(dest, 0)
+        search_count = len(searched_destinations.get(dest, set()))
+
+        # Calculate base scores (normalized 0-100)
+        booking_score = min(100, (bookings_count / total_bookings) * 500)  # Historical booking strength
+        search_score = min(100, (search_count / total_searches) * 300)  # Recent search interest
+
+        # Model 1: Balanced (60% bookings, 40% searches)
+        score_balanced = round((booking_score * 0.6) + (search_score * 0.4), 1)
+
+        # Model 2: Momentum (30% bookings, 70% searches) - catches emerging trends
+        score_momentum = round((booking_score * 0.3) + (search_score * 0.7), 1)
+
+        # Model 3: Established (80% bookings, 20% searches) - conservative, proven patterns
+        score_established = round((booking_score * 0.8) + (search_score * 0.2), 1)
+
+        # Calculate model agreement/confidence
+        scores = [score_balanced, score_momentum, score_established]
+        score_range = max(scores) - min(scores)
+        if score_range <= 10:
+            confidence = "high"
+            confidence_icon = "✓✓✓"
+        elif score_range <= 25:
+            confidence = "medium"
+            confidence_icon = "✓✓"
+        else:
+            confidence = "low"
+            confidence_icon = "⚠️"
+
+        # Conversion indicator
+        if bookings_count > 0 and search_count > 0:
+            conversion_rate = round((bookings_count / (bookings_count + search_count)) * 100, 1)
+        elif bookings_count > 0:
+            conversion_rate = 100
+        else:
+            conversion_rate = 0
+
+        # Best day of week for this destination
+        dest_dow = destination_by_dow.get(dest, {})
+        best_dow = max(dest_dow.keys(), key=lambda x: dest_dow[x]) if dest_dow else None
+        dow_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+        # Determine trend: is momentum higher or lower than established?
+        if score_momentum > score_established + 10:
+            trend = "rising"  # Gaining popularity
+        elif score_established > score_momentum + 10:
+            trend = "stable"  # Reliable but not trending
+        else:
+            trend = "neutral"
+
+        destination_forecast.append({
+            "destination": dest,
+            "bookings_6m": bookings_count,
+            "searches_30d": search_count,
+            "score_balanced": score_balanced,
+            "score_momentum": score_momentum,
+            "score_established": score_established,
+            "confidence": confidence,
+            "confidence_icon": confidence_icon,
+            "trend": trend,
+            "conversion_rate": conversion_rate,
+            "best_day": dow_names[best_dow] if best_dow is not None else None,
+            "status": "high_demand" if score_balanced >= 50 else "moderate" if score_balanced >= 20 else "low"
+        })
+
+    # Sort by demand score
+    destination_forecast.sort(key=lambda x: x['score_balanced'], reverse=True)
+
+    # Day of week analysis
+    dow_names_full = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    dow_forecast = []
+    for dow in range(7):
+        count = day_of_week_bookings.get(dow, 0)
+        dow_forecast.append({
+            "day": dow_names_full[dow],
+            "day_short": dow_names_full[dow][:3],
+            "bookings": count,
+            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+
+    # Pickup day of week analysis (when do customers return?)
+    pickup_dow_forecast = []
+    for dow in range(7):
+        count = pickup_day_of_week_bookings.get(dow, 0)
+        pickup_dow_forecast.append({
+            "day": dow_names_full[dow],
+            "day_short": dow_names_full[dow][:3],
+            "bookings": count,
+            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+
+    # Airline analysis
+    airline_forecast = []
+    for airline, count in sorted(airline_bookings.items(), key=lambda x: x[1], reverse=True)[:10]:
+        search_count = len(searched_airlines.get(airline, set()))
+        airline_forecast.append({
+            "airline": airline,
+            "bookings_6m": count,
+            "searches_30d": search_count,
+            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+
+    # Month analysis (seasonality) - travel month, booking month, and abandoned month
+    month_names = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    travel_month_forecast = []
+    booking_month_forecast = []
+    abandoned_month_forecast = []
+    for month in range(1, 13):
+        travel_count = travel_month_bookings.get(month, 0)
+        booking_count = booking_month_bookings.get(month, 0)
+        abandoned_count = len(abandoned_month_sessions.get(month, set()))
+        travel_month_forecast.append({
+            "month": month_names[month],
+            "month_num": month,
+            "bookings": travel_count,
+            "percentage": round((travel_count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+        booking_month_forecast.append({
+            "month": month_names[month],
+            "month_num": month,
+            "bookings": booking_count,
+            "percentage": round((booking_count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+        abandoned_month_forecast.append({
+            "month": month_names[month],
+            "month_num": month,
+            "count": abandoned_count,
+            "percentage": round((abandoned_count / total_searches) * 100, 1) if total_searches else 0
+        })
+
+    # Upcoming dates with search interest (next 30 days)
+    upcoming_demand = []
+    for i in range(30):
+        future_date = today + timedelta(days=i)
+        date_str = future_date.strftime("%Y-%m-%d")
+        search_count = len(searched_dates.get(date_str, set()))
+
+        if search_count > 0:
+            upcoming_demand.append({
+                "date": date_str,
+                "display_date": future_date.strftime("%a %d %b"),
+                "searches": search_count,
+                "day_of_week": dow_names_full[future_date.weekday()]
+            })
+
+    # Sort by search count
+    upcoming_demand.sort(key=lambda x: x['searches'], reverse=True)
+
+    # Predicted dates - next 30 days scored by day-of-week pattern + month pattern + searches
+    predicted_dates = []
+    for i in range(30):
+        future_date = today + timedelta(days=i)
+        date_str = future_date.strftime("%Y-%m-%d")
+        dow = future_date.weekday()
+        month = future_date.month
+
+        # Score based on historical patterns
+        dow_score = (day_of_week_bookings.get(dow, 0) / total_bookings * 100) if total_bookings else 0
+        month_score = (travel_month_bookings.get(month, 0) / total_bookings * 100) if total_bookings else 0
+        search_score = len(searched_dates.get(date_str, set())) * 10  # Boost for active searches
+
+        # Combined prediction score
+        prediction_score = round((dow_score * 0.4) + (month_score * 0.3) + (search_score * 0.3), 1)
+
+        predicted_dates.append({
+            "date": date_str,
+            "display_date": future_date.strftime("%a %d %b"),
+            "day_of_week": dow_names_full[dow],
+            "prediction_score": prediction_score,
+            "searches": len(searched_dates.get(date_str, set())),
+            "likelihood": "high" if prediction_score >= 15 else "medium" if prediction_score >= 8 else "low"
+        })
+
+    # Sort by prediction score
+    predicted_dates.sort(key=lambda x: x['prediction_score'], reverse=True)
+
+    # Departure time analysis
+    departure_time_forecast = []
+    for hour in range(0, 24):  # Full day coverage
+        count = departure_time_bookings.get(hour, 0)
+        time_label = f"{hour:02d}:00"
+        departure_time_forecast.append({
+            "hour": hour,
+            "time": time_label,
+            "bookings": count,
+            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+
+    # Arrival time analysis
+    arrival_time_forecast = []
+    for hour in range(0, 24):  # Full day coverage
+        count = arrival_time_bookings.get(hour, 0)
+        time_label = f"{hour:02d}:00"
+        arrival_time_forecast.append({
+            "hour": hour,
+            "time": time_label,
+            "bookings": count,
+            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
+        })
+
+    # Search vs booking gap (high searches, low conversions = opportunity)
+    opportunity_gaps = []
+    for dest in destination_forecast:
+        if dest['searches_30d'] >= 2 and dest['conversion_rate'] < 50:
+            opportunity_gaps.append({
+                "destination": dest['destination'],
+                "searches": dest['searches_30d'],
+                "bookings": dest['bookings_6m'],
+                "gap_score": dest['searches_30d'] * (100 - dest['conversion_rate']) / 100
+            })
+    opportunity_gaps.sort(key=lambda x: x['gap_score'], reverse=True)
+
+    result = {
+        "generated_at": now.isoformat(),
+        "data_range": {
+            "bookings_from": six_months_ago.strftime("%Y-%m-%d"),
+            "searches_from": thirty_days_ago.strftime("%Y-%m-%d"),
+            "total_bookings_analyzed": total_bookings,
+            "total_abandoned_sessions": total_searches
+        },
+        "destinations": destination_forecast[:20],
+        "day_of_week": dow_forecast,
+        "pickup_day_of_week": pickup_dow_forecast,
+        "airlines": airline_forecast,
+        "seasonality_travel": travel_month_forecast,
+        "seasonality_booking": booking_month_forecast,
+        "seasonality_abandoned": abandoned_month_forecast,
+        "departure_times": departure_time_forecast,
+        "arrival_times": arrival_time_forecast,
+        "predicted_dates": predicted_dates[:15],
+        "upcoming_demand": upcoming_demand[:15],
+        "opportunity_gaps": opportunity_gaps[:10]
+    }
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Stored forecasts
+# ---------------------------------------------------------------------------
+
+def build_booking_forecast(db, now: Optional[datetime] = None) -> dict:
+    """The full forecast payload as of now (UK time). Read-only."""
+    now = now or datetime.now(UK_TIMEZONE)
+    as_of = now.date()
+    payload = pattern_report(db, now)
+    dropoff, booked = load_history(
+        db, as_of - timedelta(days=TRAINING_DAYS), as_of + timedelta(days=FORECAST_HORIZON_DAYS)
+    )
+    payload["projection"] = projection_payload(project(dropoff, booked, as_of))
+    return payload
+
+
+def store_booking_forecast(db, payload: dict):
+    """Add a booking_forecasts row for payload and prune old runs. Does not commit."""
+    from db_models import BookingForecast
+
+    projection = payload["projection"]
+    as_of = date.fromisoformat(projection["as_of"])
+    row = BookingForecast(
+        as_of=as_of,
+        generated_at=datetime.now(timezone.utc),
+        horizon_days=projection["horizon_days"],
+        model_version=projection["model_version"],
+        payload=payload,
+    )
+    db.add(row)
+    db.query(BookingForecast).filter(
+        BookingForecast.as_of < as_of - timedelta(days=KEEP_FORECAST_DAYS)
+    ).delete(synchronize_session=False)
+    db.flush()
+    return row
+
+
+def latest_booking_forecast(db, refresh: bool = False) -> dict:
+    """The newest stored forecast as an API response.
+
+    A new one is computed and stored (and committed) when refresh is set or
+    nothing has been stored yet. Stored responses carry "cached": True and
+    their age in "cache_age_minutes", as the report cache used to.
+    """
+    from db_models import BookingForecast
+
+    row = None
+    if not refresh:
+        row = db.query(BookingForecast).order_by(BookingForecast.generated_at.desc()).first()
+    if row is None:
+        payload = build_booking_forecast(db)
+        store_booking_forecast(db, payload)
+        db.commit()
+        response = dict(payload)
+        response["cached"] = False
+        return response
+
+    response = dict(row.payload)
+    response["cached"] = True
+    generated_at = uk_datetime(row.generated_at)
+    if generated_at is not None:
+        age = datetime.now(timezone.utc) - generated_at
+        response["cache_age_minutes"] = round(age.total_seconds() / 60, 1)
+    return response
+
+
+def refresh_booking_forecast(session_factory) -> dict:
+    """Nightly job: compute today's forecast and store it."""
+    db = session_factory()
+    try:
+        payload = build_booking_forecast(db)
+        row = store_booking_forecast(db, payload)
+        db.commit()
+        totals = payload["projection"]["totals"]
+        logger.info(
+            "booking forecast stored as_of=%s forecast=%s on_books=%s",
+            row.as_of, totals["forecast"], totals["on_books"],
+        )
+        return {"as_of": row.as_of.isoformat(), **totals}
+    except Exception as e:
+        logger.exception("booking forecast refresh failed error=%s", e)
+        db.rollback()
+        return {"failed": True, "error": str(e)}
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Backtest
+# ---------------------------------------------------------------------------
+
+def _scores(errors: list) -> dict:
+    """MAE, MAPE (days with drop-offs), bias and band coverage for (forecast,
+    baseline, lower, upper, actual) rows."""
+    if not errors:
+        return {"days": 0, "mae": None, "mape": None, "bias": None, "coverage": None, "baseline_mae": None}
+    forecast, baseline, lower, upper, actual = np.array(errors, dtype=float).T
+    busy = actual > 0
+    return {
+        "days": int(actual.size),
+        "mae": round(float(np.abs(forecast - actual).mean()), 3),
+        "mape": round(float((np.abs(forecast - actual)[busy] / actual[busy]).mean()), 3) if busy.any() else None,
+        "bias": round(float((forecast - actual).mean()), 3),
+        "coverage": round(float(((actual >= lower) & (actual <= upper)).mean()), 3),
+        "baseline_mae": round(float(np.abs(baseline - actual).mean()), 3),
+    }
+
+
+def backtest_booking_forecast(
+    db,
+    start: date,
+    end: date,
+    horizon: int = FORECAST_HORIZON_DAYS,
+    step_days: int = BACKTEST_STEP_DAYS,
+    today: Optional[date] = None,
+) -> dict:
+    """Replay the projection as of every step_days from start to end and
+    score it against the drop-offs that happened.
+
+    Only days before today are scored. Returns {"runs", "overall", "by_days_ahead":
+    [{"days_ahead": "0-6", **scores}, ...]} where each score set has days, mae,
+    mape, bias (forecast minus actual), coverage (share inside the band) and
+    baseline_mae (the seasonal baseline alone, for comparison).
+    """
+    today = today or datetime.now(UK_TIMEZONE).date()
+    dropoff, booked = load_history(
+        db, start - timedelta(days=TRAINING_DAYS), end + timedelta(days=horizon)
+    )
+    first_ordinal = start.toordinal()
+    actual_counts = np.bincount(
+        dropoff[dropoff >= first_ordinal] - first_ordinal,
+        minlength=(end - start).days + horizon + 1,
+    )
+
+    by_ahead = defaultdict(list)
+    runs = 0
+    as_of = start
+    while as_of <= end and as_of < today:
+        result = project(dropoff, booked, as_of, horizon)
+        offset = (as_of - start).days
+        scored = min(horizon, (today - as_of).days)
+        for ahead in range(scored):
+            by_ahead[ahead].append((
+                result["forecast"][ahead], result["baseline"][ahead],
+                result["lower"][ahead], result["upper"][ahead],
+                actual_counts[offset + ahead],
+            ))
+        runs += 1
+        as_of += timedelta(days=step_days)
+
+    buckets = []
+    for low, high in BACKTEST_LEAD_BUCKETS:
+        if low >= horizon:
+            continue
+        rows = [row for ahead in range(low, min(high, horizon - 1) + 1) for row in by_ahead[ahead]]
+        buckets.append({"days_ahead": f"{low}-{min(high, horizon - 1)}", **_scores(rows)})
+    return {
+        "runs": runs,
+        "overall": _scores([row for rows in by_ahead.values() for row in rows]),
+        "by_days_ahead": buckets,
+    }
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain and score the booking forecast")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--refresh", action="store_true", help="Compute today's forecast and store it")
+    action.add_argument("--backtest", action="store_true", help="Score past forecasts against actual drop-offs")
+    parser.add_argument("--start", type=date.fromisoformat, help="First as-of date (default: 180 days ago)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last as-of date (default: yesterday)")
+    parser.add_argument("--step", type=int, default=BACKTEST_STEP_DAYS, help="Days between as-of dates")
+    parser.add_argument("--horizon", type=int, default=FORECAST_HORIZON_DAYS)
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    if args.refresh:
+        result = refresh_booking_forecast(SessionLocal)
+        if result.get("failed"):
+            print(f"Forecast refresh failed: {result['error']}")
+            sys.exit(1)
+        print(f"Stored forecast as of {result['as_of']}: {result['forecast']} drop-offs "
+              f"({result['lower']}-{result['upper']}), {result['on_books']} on the books")
+        return
+
+    today = datetime.now(UK_TIMEZONE).date()
+    end = args.end or today - timedelta(days=1)
+    start = args.start or end - timedelta(days=180)
+    db = SessionLocal()
+    try:
+        result = backtest_booking_forecast(db, start, end, args.horizon, args.step)
+    finally:
+        db.close()
+
+    print(f"{result['runs']} forecasts from {start} to {end}, every {args.step} days")
+    print(f"{'days ahead':<12}{'days':>6}{'MAE':>8}{'MAPE':>8}{'bias':>8}{'in band':>9}{'baseline MAE':>14}")
+    for label, scores in [(b["days_ahead"], b) for b in result["by_days_ahead"]] + [("all", result["overall"])]:
+        if not scores["days"]:
+            print(f"{label:<12}{0:>6}")
+            continue
+        mape = f"{scores['mape']:.1%}" if scores["mape"] is not None else "-"
+        print(f"{label:<12}{scores['days']:>6}{scores['mae']:>8.2f}{mape:>8}{scores['bias']:>8.2f}"
+              f"{scores['coverage']:>9.0%}{scores['baseline_mae']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
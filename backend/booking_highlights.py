@@ -0,0 +1,384 @@
+"""Booking highlights: popular airlines/destinations and fun facts in one pass.
+
+/api/admin/reports/popular and /api/admin/reports/fun-facts each loaded every
+confirmed/completed booking (with its payment and customer, one lazy load
+each) and counted what they needed on their own. build_highlights() now
+streams the columns both need once, ordered by effective booking time, and
+feeds every row to accumulate(); the result is one document per period that
+the main module caches and both endpoints format from.
+
+A new fact is another field in _new_state(), a few lines in accumulate() and
+its formatting in _fun_facts(); it never needs another query.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from booking_stats import effective_uk_datetime, uk_datetime
+
+HIGHLIGHTS_YIELD_PER = 1000
+POPULAR_TOP_CHOICES = (5, 10, 20)
+# Ladder of "Xth booking" milestones surfaced on Admin → Insights.
+# 1–500 in fine-grained steps (early growth, every 25–50); 500–1000 in
+# steps of 50; 1000+ in round 250s (later growth, less interesting to
+# mark every 50). Each milestone only appears once it has been reached.
+MILESTONE_NUMBERS = (
+    1, 25, 50, 75, 100, 125, 150, 175, 200, 250, 300, 350, 400, 450, 500,
+    550, 600, 650, 700, 750, 800, 850, 900, 950, 1000,
+    1250, 1500, 1750, 2000,
+)
+
+
+def _source_query(db, start_date: Optional[date], end_date: Optional[date]):
+    """Confirmed/completed bookings with payment and customer name, oldest first.
+
+    Ordered by the effective time (paid_at, else created_at) so the Nth row
+    is the Nth booking to settle. A date range is pre-filtered a day wide in
+    UTC; the exact UK-date check happens per row.
+    """
+    from sqlalchemy import func
+
+    from db_models import Booking, BookingStatus, Customer, Payment
+
+    effective_at = func.coalesce(Payment.paid_at, Booking.created_at)
+    query = (
+        db.query(
+            Booking.reference,
+            Booking.created_at,
+            Booking.dropoff_date,
+            Booking.dropoff_time,
+            Booking.pickup_date,
+            Booking.dropoff_destination,
+            Booking.pickup_origin,
+            Booking.dropoff_airline_name,
+            Booking.pickup_airline_name,
+            func.coalesce(func.nullif(Booking.customer_first_name, ""), Customer.first_name).label("customer_first_name"),
+            func.coalesce(func.nullif(Booking.customer_last_name, ""), Customer.last_name).label("customer_last_name"),
+            Payment.paid_at,
+            Payment.amount_pence,
+        )
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+        .outerjoin(Customer, Customer.id == Booking.customer_id)
+        .filter(Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]))
+    )
+    if start_date:
+        query = query.filter(effective_at >= datetime.combine(start_date - timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc))
+    if end_date:
+        query = query.filter(effective_at < datetime.combine(end_date + timedelta(days=2), datetime.min.time(), tzinfo=timezone.utc))
+    return query.order_by(effective_at, Booking.id)
+
+
+def _new_state() -> dict:
+    return {
+        "bookings": 0,
+        "airlines": Counter(),
+        "destinations": Counter(),
+        "routes": Counter(),
+        # Confirmed (paid, UK) date -> bookings, for the busiest day/streak/week/month.
+        "paid_days": Counter(),
+        "longest_trip": None,  # (days, row)
+        "highest_transaction": None,  # (amount_pence, row)
+        "latest_time": None,  # (effective time of day, effective, row)
+        "earliest_time": None,
+        "last_minute": None,  # (gap days, effective, row)
+        "advance": None,
+        # Bookings with an effective time so far; the Nth is milestone N.
+        "settled": 0,
+        "milestones": [],
+    }
+
+
+def accumulate(state: dict, row, effective: Optional[datetime]) -> None:
+    """Add one booking row (see _source_query) to every statistic."""
+    state["bookings"] += 1
+
+    # Each booking counts once per unique airline name, destination and
+    # (airline, destination) route across its two legs; names only, so
+    # "Jet2 (UNK)" and "Jet2 (LS)" style code variants do not split.
+    state["airlines"].update({name for name in (row.dropoff_airline_name, row.pickup_airline_name) if name})
+    state["destinations"].update({name for name in (row.dropoff_destination, row.pickup_origin) if name})
+    state["routes"].update({
+        route for route in (
+            (row.dropoff_airline_name, row.dropoff_destination),
+            (row.pickup_airline_name, row.pickup_origin),
+        )
+        if route[0] and route[1]
+    })
+
+    paid = uk_datetime(row.paid_at)
+    if paid is not None:
+        state["paid_days"][paid.date()] += 1
+
+    if row.dropoff_date and row.pickup_date:
+        trip_days = (row.pickup_date - row.dropoff_date).days
+        if trip_days > (state["longest_trip"] or (0,))[0]:
+            state["longest_trip"] = (trip_days, row)
+
+    if row.amount_pence and row.amount_pence > (state["highest_transaction"] or (0,))[0]:
+        state["highest_transaction"] = (row.amount_pence, row)
+
+    if effective is None:
+        return
+    state["settled"] += 1
+    if state["settled"] in MILESTONE_NUMBERS:
+        state["milestones"].append((state["settled"], effective, row))
+
+    time_of_day = effective.time()
+    if state["latest_time"] is None or time_of_day > state["latest_time"][0]:
+        state["latest_time"] = (time_of_day, effective, row)
+    if state["earliest_time"] is None or time_of_day < state["earliest_time"][0]:
+        state["earliest_time"] = (time_of_day, effective, row)
+
+    if row.dropoff_date:
+        gap_days = (row.dropoff_date - effective.date()).days
+        if state["last_minute"] is None or gap_days < state["last_minute"][0]:
+            state["last_minute"] = (gap_days, effective, row)
+        if state["advance"] is None or gap_days > state["advance"][0]:
+            state["advance"] = (gap_days, effective, row)
+
+
+def build_highlights(db, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+    """One pass over bookings whose effective UK date is in [start_date, end_date].
+
+    Returns {"startDate", "endDate", "totalBookings", "airlines",
+    "destinations", "routes" (full rankings), "funFacts"}; popular_report()
+    and the fun-facts endpoint format from it.
+    """
+    state = _new_state()
+    for row in _source_query(db, start_date, end_date).yield_per(HIGHLIGHTS_YIELD_PER):
+        effective = effective_uk_datetime(row.created_at, row.paid_at)
+        if start_date or end_date:
+            if effective is None:
+                continue
+            if (start_date and effective.date() < start_date) or (end_date and effective.date() > end_date):
+                continue
+        accumulate(state, row, effective)
+
+    return {
+        "startDate": start_date.isoformat() if start_date else None,
+        "endDate": end_date.isoformat() if end_date else None,
+        "totalBookings": state["bookings"],
+        "airlines": state["airlines"].most_common(),
+        "destinations": state["destinations"].most_common(),
+        "routes": [[airline, destination, count] for (airline, destination), count in state["routes"].most_common()],
+        "funFacts": _fun_facts(state),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Formatting
+# ---------------------------------------------------------------------------
+
+def _ranked(items: list, top: int, fields) -> tuple[list, int]:
+    total = sum(item[-1] for item in items)
+    ranked = []
+    for item in items[:top]:
+        count = item[-1]
+        entry = dict(zip(fields, item[:-1]))
+        entry["count"] = count
+        entry["percent"] = round((count / total) * 100, 1) if total > 0 else 0
+        ranked.append(entry)
+    return ranked, total
+
+
+def popular_report(highlights: dict, top: int) -> dict:
+    """The /api/admin/reports/popular body for a highlights document."""
+    if top not in POPULAR_TOP_CHOICES:
+        top = 10
+    top_airlines, total_airline_bookings = _ranked(highlights["airlines"], top, ("airlineName",))
+    top_destinations, total_destination_bookings = _ranked(highlights["destinations"], top, ("destination",))
+    top_routes, total_route_bookings = _ranked(highlights["routes"], top, ("airlineName", "destination"))
+    for route in top_routes:
+        route["route"] = f"{route['airlineName']} to {route['destination']}"
+    return {
+        "meta": {
+            "startDate": highlights["startDate"],
+            "endDate": highlights["endDate"],
+            "top": top,
+            "totalBookings": highlights["totalBookings"],
+            "totalAirlineBookings": total_airline_bookings,
+            "totalDestinationBookings": total_destination_bookings,
+            "totalRouteBookings": total_route_bookings,
+        },
+        "popularAirlines": top_airlines,
+        "popularDestinations": top_destinations,
+        "popularRoutes": top_routes,
+    }
+
+
+def _customer_name(row) -> Optional[str]:
+    first, last = row.customer_first_name, row.customer_last_name
+    return f"{first} {last}" if first and last else None
+
+
+def _busiest_facts(day_counter: Counter) -> dict:
+    """Busiest day, streak, ISO week and month from bookings per paid UK date."""
+    max_count = max(day_counter.values())
+    busiest_dates = sorted(d for d, c in day_counter.items() if c == max_count)
+    facts = {
+        "busiestDay": {
+            "dates": [d.strftime("%a %d %b %Y") for d in busiest_dates],  # e.g., ["Mon 24 Feb 2026"]
+            "count": max_count,
+        },
+    }
+
+    # Longest run of consecutive days with at least one booking; the
+    # earliest wins a tie.
+    sorted_dates = sorted(day_counter)
+    longest = (1, sorted_dates[0], sorted_dates[0])
+    run_start = sorted_dates[0]
+    for previous, current in zip(sorted_dates, sorted_dates[1:] + [None]):
+        if current is not None and current == previous + timedelta(days=1):
+            continue
+        run = (previous - run_start).days + 1
+        if run > longest[0]:
+            longest = (run, run_start, previous)
+        run_start = current
+    days, streak_start, streak_end = longest
+    facts["busiestStreak"] = {
+        "days": days,
+        "startDate": streak_start.strftime("%d %b"),  # e.g., "24 Feb"
+        "endDate": streak_end.strftime("%d %b %Y"),   # e.g., "28 Feb 2026"
+        "bookings": sum(c for d, c in day_counter.items() if streak_start <= d <= streak_end),
+    }
+
+    # Busiest ISO week (Mon-Sun) and calendar month; the most recent wins a tie.
+    week_counter, month_counter = Counter(), Counter()
+    for day, count in day_counter.items():
+        iso_year, iso_week, _ = day.isocalendar()
+        week_counter[(iso_year, iso_week)] += count
+        month_counter[(day.year, day.month)] += count
+
+    max_week_count = max(week_counter.values())
+    year, week = max(key for key, c in week_counter.items() if c == max_week_count)
+    facts["busiestWeek"] = {
+        "bookings": max_week_count,
+        "startDate": date.fromisocalendar(year, week, 1).strftime("%d %b"),
+        "endDate": date.fromisocalendar(year, week, 7).strftime("%d %b %Y"),
+        "weekNumber": week,
+        "year": year,
+    }
+
+    max_month_count = max(month_counter.values())
+    year, month = max(key for key, c in month_counter.items() if c == max_month_count)
+    facts["busiestMonth"] = {
+        "bookings": max_month_count,
+        "month": date(year, month, 1).strftime("%b %Y"),  # e.g., "May 2026"
+        "monthNumber": month,
+        "year": year,
+    }
+    return facts
+
+
+def _gap_fact(gap_days: int, effective: datetime, row) -> dict:
+    return {
+        "gapDays": gap_days,
+        "reference": row.reference,
+        "bookedOn": effective.strftime("%d %b %Y"),
+        "dropoffDate": row.dropoff_date.strftime("%d %b %Y"),
+        "customerName": _customer_name(row),
+    }
+
+
+def _time_before_dropoff(effective: datetime, row) -> Optional[timedelta]:
+    # The drop-off is naive UK local time; compare with the effective time as naive UK.
+    if not row.dropoff_time:
+        return None
+    time_diff = datetime.combine(row.dropoff_date, row.dropoff_time) - effective.replace(tzinfo=None)
+    return time_diff if time_diff.total_seconds() > 0 else None
+
+
+def _fun_facts(state: dict) -> dict:
+    result = {
+        "busiestDay": None,
+        "busiestWeek": None,
+        "busiestMonth": None,
+        "busiestStreak": None,
+        "longestTrip": None,
+        "highestTransaction": None,
+        "latestTimeOfNight": None,
+        "earliestTimeOfDay": None,
+        "lastMinuteBooking": None,
+        "advanceBooking": None,
+        "milestones": [],
+    }
+    if not state["bookings"]:
+        return result
+
+    if state["paid_days"]:
+        result.update(_busiest_facts(state["paid_days"]))
+
+    if state["longest_trip"]:
+        days, row = state["longest_trip"]
+        result["longestTrip"] = {
+            "days": days,
+            "reference": row.reference,
+            "destination": row.dropoff_destination or "Unknown",
+            "customerName": _customer_name(row),
+            "dates": f"{row.dropoff_date.strftime('%d %b')} - {row.pickup_date.strftime('%d %b %Y')}",
+        }
+
+    if state["highest_transaction"]:
+        amount_pence, row = state["highest_transaction"]
+        result["highestTransaction"] = {
+            "amount": f"£{amount_pence / 100:.2f}",
+            "reference": row.reference,
+            "days": (row.pickup_date - row.dropoff_date).days if row.pickup_date and row.dropoff_date else None,
+            "customerName": _customer_name(row),
+        }
+
+    # Who booked latest at night / earliest in the morning (effective UK time).
+    for key, candidate in (("latestTimeOfNight", state["latest_time"]), ("earliestTimeOfDay", state["earliest_time"])):
+        if candidate:
+            _, effective, row = candidate
+            result[key] = {
+                "time": effective.strftime("%H:%M:%S"),
+                "date": effective.strftime("%d %b %Y"),
+                "reference": row.reference,
+                "customerName": _customer_name(row),
+            }
+
+    result["milestones"] = [
+        {
+            "number": number,
+            "label": "1st" if number == 1 else f"{number}th",
+            "date": effective.strftime("%d %b %Y"),
+            "time": effective.strftime("%H:%M"),
+            "reference": row.reference,
+            "customerName": _customer_name(row),
+            "customerFirstName": row.customer_first_name,
+        }
+        for number, effective, row in state["milestones"]
+    ]
+
+    # Shortest and longest gap between the effective booking date and drop-off.
+    if state["last_minute"]:
+        gap_days, effective, row = state["last_minute"]
+        last_minute = _gap_fact(gap_days, effective, row)
+        time_diff = _time_before_dropoff(effective, row) if gap_days == 0 else None
+        if time_diff is not None:
+            hours, remainder = divmod(int(time_diff.total_seconds()), 3600)
+            minutes, seconds = divmod(remainder, 60)
+            last_minute["gapTime"] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        result["lastMinuteBooking"] = last_minute
+
+    if state["advance"]:
+        gap_days, effective, row = state["advance"]
+        advance = _gap_fact(gap_days, effective, row)
+        time_diff = _time_before_dropoff(effective, row)
+        if time_diff is not None:
+            hours, remainder = divmod(int(time_diff.total_seconds()) % 86400, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            advance["gapDetailed"] = {
+                "months": time_diff.days // 30,
+                "days": time_diff.days % 30,
+                "hours": hours,
+                "minutes": minutes,
+                "seconds": seconds,
+            }
+        result["advanceBooking"] = advance
+
+    return result
@@ -0,0 +1,410 @@
+"""Daily booking statistics rollup (booking_stats_daily).
+
+/api/admin/bookings/stats used to load every booking with its payment and
+count, sum and bucket them in Python on each dashboard load. It now reads
+booking_stats_daily: one row per (effective UK date, status) carrying the
+count, paid revenue and the small distributions the charts need.
+
+The rollup is kept current by recomputing affected days rather than by
++1/-1 deltas. install_booking_stats_tracking() hooks a sessionmaker so a
+flush touching a booking's status/dates/times, or a payment's amount or
+paid_at, records every UK date the booking sat on before and after the
+change. Once the booking transaction has committed, those days are
+recomputed from bookings in a short transaction of their own: a few rows
+per day, and a booking that changes twice in one transaction cannot be
+counted twice. That transaction takes a per-date advisory lock before
+reading, so two commits touching the same day recompute one after the
+other and the second sees the first's booking, and it upserts on
+(stat_date, status). A failure is retried once, then logged; the booking
+write is already committed either way.
+
+Writes that bypass the ORM (maintenance SQL, one-off scripts) are caught by
+the nightly reconcile_booking_stats(), which rebuilds the table from
+scratch and logs every (date, status) that had drifted.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+UK_TIMEZONE = ZoneInfo("Europe/London")
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SUCCESSFUL_STATUSES = ("confirmed", "completed")
+REBUILD_YIELD_PER = 1000
+# Drifted keys logged individually by the reconcile job; the rest are counted.
+MAX_LOGGED_DRIFT = 50
+# Nightly reconcile, Europe/London: after the 03:00 jobs, before the day starts.
+BOOKING_STATS_RECONCILE_HOUR = 3
+BOOKING_STATS_RECONCILE_MINUTE = 30
+
+_PENDING_DATES_KEY = "booking_stats_dates"
+_BOOKING_FIELDS = ("status", "created_at", "dropoff_date", "pickup_date", "dropoff_time", "pickup_time")
+_PAYMENT_FIELDS = ("paid_at", "amount_pence", "booking_id")
+
+
+def uk_datetime(stamp) -> Optional[datetime]:
+    """Stored timestamp (naive = UTC) in UK time; None for anything else."""
+    if not isinstance(stamp, datetime):
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(UK_TIMEZONE)
+
+
+def effective_uk_datetime(created_at, paid_at) -> Optional[datetime]:
+    """Same rule as main.booking_effective_datetime: paid_at, else created_at."""
+    return uk_datetime(paid_at) or uk_datetime(created_at)
+
+
+def _empty_bucket() -> dict:
+    return {
+        "booking_count": 0,
+        "paid_count": 0,
+        "revenue_pence": 0,
+        "trip_days": Counter(),
+        "dropoff_hours": [0] * 24,
+        "pickup_hours": [0] * 24,
+        "created_hours": {day: [0] * 24 for day in DAY_NAMES},
+    }
+
+
+def accumulate(buckets: dict, row) -> None:
+    """Add one booking (see _source_query for the row shape) to its bucket."""
+    effective = effective_uk_datetime(row.created_at, row.paid_at)
+    if effective is None:
+        return
+    status = row.status.value if row.status else "unknown"
+    bucket = buckets.setdefault((effective.date(), status), _empty_bucket())
+    bucket["booking_count"] += 1
+    # Only count actual payments (excludes free promo bookings with £0 payment)
+    if row.amount_pence and row.amount_pence > 0:
+        bucket["paid_count"] += 1
+        bucket["revenue_pence"] += row.amount_pence
+    if row.dropoff_date and row.pickup_date:
+        days = (row.pickup_date - row.dropoff_date).days
+        if days >= 0:
+            bucket["trip_days"][days] += 1
+    if row.dropoff_time:
+        bucket["dropoff_hours"][row.dropoff_time.hour] += 1
+    if row.pickup_time:
+        bucket["pickup_hours"][row.pickup_time.hour] += 1
+    created = uk_datetime(row.created_at)
+    if created:
+        bucket["created_hours"][DAY_NAMES[created.weekday()]][created.hour] += 1
+
+
+def build_buckets(rows: Iterable) -> dict:
+    buckets: dict = {}
+    for row in rows:
+        accumulate(buckets, row)
+    return buckets
+
+
+def _row_values(bucket: dict) -> dict:
+    return {
+        "booking_count": bucket["booking_count"],
+        "paid_count": bucket["paid_count"],
+        "revenue_pence": bucket["revenue_pence"],
+        "trip_days_json": {str(days): count for days, count in sorted(bucket["trip_days"].items())},
+        "dropoff_hours_json": list(bucket["dropoff_hours"]),
+        "pickup_hours_json": list(bucket["pickup_hours"]),
+        "created_hours_json": {day: list(hours) for day, hours in bucket["created_hours"].items()},
+    }
+
+
+def _stats_rows(buckets: dict) -> list:
+    from db_models import BookingStatsDaily
+
+    return [
+        BookingStatsDaily(stat_date=stat_date, status=status, **_row_values(bucket))
+        for (stat_date, status), bucket in sorted(buckets.items())
+    ]
+
+
+def stats_rows_for_bookings(bookings: Iterable) -> list:
+    """Unsaved rollup rows for bookings already in memory (with .payment).
+
+    Values that are not real dates/times/amounts are treated as missing, as
+    the stats endpoint always did for half-filled bookings.
+    """
+    def _typed(value, kind):
+        return value if isinstance(value, kind) else None
+
+    rows = []
+    for booking in bookings:
+        payment = booking.payment
+        rows.append(SimpleNamespace(
+            status=booking.status,
+            created_at=booking.created_at,
+            paid_at=getattr(payment, "paid_at", None) if payment is not None else None,
+            amount_pence=_typed(getattr(payment, "amount_pence", None), int) if payment is not None else None,
+            dropoff_date=_typed(booking.dropoff_date, date),
+            pickup_date=_typed(booking.pickup_date, date),
+            dropoff_time=_typed(booking.dropoff_time, time),
+            pickup_time=_typed(booking.pickup_time, time),
+        ))
+    return _stats_rows(build_buckets(rows))
+
+
+def _source_query(db):
+    """Booking columns the rollup needs, with the payment's paid_at/amount."""
+    from db_models import Booking, Payment
+
+    return (
+        db.query(
+            Booking.status,
+            Booking.created_at,
+            Booking.dropoff_date,
+            Booking.pickup_date,
+            Booking.dropoff_time,
+            Booking.pickup_time,
+            Payment.paid_at,
+            Payment.amount_pence,
+        )
+        .outerjoin(Payment, Payment.booking_id == Booking.id)
+    )
+
+
+def _utc_day_window(stat_date: date) -> tuple[datetime, datetime]:
+    # A UK day lies inside the surrounding UTC days whatever the DST offset.
+    start = datetime.combine(stat_date - timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=3)
+
+
+def recompute_booking_stats_days(db, dates: Iterable[date]) -> int:
+    """Recompute the rollup rows for the given UK dates. Does not commit.
+
+    Rows are upserted on (stat_date, status) and statuses no longer present
+    on a date are deleted. Returns the number of rollup rows written.
+    """
+    from sqlalchemy import and_, or_
+
+    from db_models import Booking, BookingStatsDaily, Payment
+
+    written = 0
+    for stat_date in sorted(set(dates)):
+        start, end = _utc_day_window(stat_date)
+        candidates = _source_query(db).filter(
+            or_(
+                and_(Payment.paid_at >= start, Payment.paid_at < end),
+                and_(Payment.paid_at.is_(None), Booking.created_at >= start, Booking.created_at < end),
+            )
+        )
+        buckets = {
+            key: bucket for key, bucket in build_buckets(candidates).items()
+            if key[0] == stat_date
+        }
+        statuses = [status for _, status in buckets]
+        db.query(BookingStatsDaily).filter(
+            BookingStatsDaily.stat_date == stat_date,
+            BookingStatsDaily.status.notin_(statuses),
+        ).delete(synchronize_session=False)
+        _upsert_stats_rows(db, buckets)
+        written += len(buckets)
+    db.flush()
+    return written
+
+
+def _upsert_stats_rows(db, buckets: dict) -> None:
+    """INSERT ... ON CONFLICT (stat_date, status) DO UPDATE for each bucket."""
+    from sqlalchemy import func
+
+    from db_models import BookingStatsDaily
+
+    if not buckets:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(BookingStatsDaily.__table__).values([
+        {"stat_date": stat_date, "status": status, **_row_values(bucket)}
+        for (stat_date, status), bucket in sorted(buckets.items())
+    ])
+    columns = _row_values(next(iter(buckets.values()))).keys()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["stat_date", "status"],
+        set_={
+            **{column: stmt.excluded[column] for column in columns},
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def refresh_booking_stats_days(bind, dates: Iterable[date]) -> bool:
+    """Recompute `dates` in a transaction of their own and commit.
+
+    Each date's advisory lock (booking_stats:DATE) is held until commit, so
+    concurrent refreshes of the same day run one after the other and each
+    reads every booking committed before it. Returns False if every attempt
+    failed; the nightly reconcile repairs whatever this missed.
+    """
+    from session_hooks import run_locked
+
+    dates = sorted(set(dates))
+    return run_locked(
+        bind,
+        [f"booking_stats:{stat_date.isoformat()}" for stat_date in dates],
+        lambda db: recompute_booking_stats_days(db, dates),
+        label=f"booking_stats update dates={[d.isoformat() for d in dates]}",
+    )
+
+
+def _comparable(row) -> tuple:
+    values = _row_values(row) if isinstance(row, dict) else {
+        "booking_count": row.booking_count,
+        "paid_count": row.paid_count,
+        "revenue_pence": row.revenue_pence,
+        "trip_days_json": row.trip_days_json or {},
+        "dropoff_hours_json": row.dropoff_hours_json or [0] * 24,
+        "pickup_hours_json": row.pickup_hours_json or [0] * 24,
+        "created_hours_json": row.created_hours_json or {day: [0] * 24 for day in DAY_NAMES},
+    }
+    return (
+        values["booking_count"],
+        values["paid_count"],
+        values["revenue_pence"],
+        tuple(sorted(values["trip_days_json"].items())),
+        tuple(values["dropoff_hours_json"]),
+        tuple(values["pickup_hours_json"]),
+        tuple((day, tuple(values["created_hours_json"].get(day, [0] * 24))) for day in DAY_NAMES),
+    )
+
+
+def rebuild_booking_stats(db) -> dict:
+    """Rebuild the whole rollup from bookings and report drift. Does not commit.
+
+    Bookings are streamed (yield_per), so memory is bounded by the number of
+    (date, status) buckets, not bookings.
+
+    Returns {"rows": rows written, "drift": [{"stat_date", "status",
+    "stored", "actual"}, ...]} where stored/actual are booking counts
+    (0 when the row is missing on that side).
+    """
+    from db_models import BookingStatsDaily
+
+    buckets = build_buckets(_source_query(db).yield_per(REBUILD_YIELD_PER))
+    stored = {(row.stat_date, row.status): row for row in db.query(BookingStatsDaily).all()}
+
+    drift = []
+    for key in sorted(stored.keys() | buckets.keys()):
+        before, after = stored.get(key), buckets.get(key)
+        if before is not None and after is not None and _comparable(before) == _comparable(after):
+            continue
+        drift.append({
+            "stat_date": key[0].isoformat(),
+            "status": key[1],
+            "stored": before.booking_count if before is not None else 0,
+            "actual": after["booking_count"] if after is not None else 0,
+        })
+
+    db.query(BookingStatsDaily).delete(synchronize_session="evaluate")
+    rows = _stats_rows(buckets)
+    db.add_all(rows)
+    db.flush()
+    return {"rows": len(rows), "drift": drift}
+
+
+def load_booking_stats_rows(db) -> list:
+    """All rollup rows; an empty rollup with bookings present is rebuilt first."""
+    from db_models import Booking, BookingStatsDaily
+
+    rows = db.query(BookingStatsDaily).all()
+    if rows or db.query(Booking.id).first() is None:
+        return rows
+    rebuild_booking_stats(db)
+    db.commit()
+    return db.query(BookingStatsDaily).all()
+
+
+def reconcile_booking_stats(session_factory) -> dict:
+    """Nightly job: rebuild booking_stats_daily and log any drift found."""
+    db = session_factory()
+    try:
+        result = rebuild_booking_stats(db)
+        db.commit()
+        drift = result["drift"]
+        for item in drift[:MAX_LOGGED_DRIFT]:
+            logger.warning(
+                "booking_stats drift stat_date=%s status=%s stored=%s actual=%s",
+                item["stat_date"], item["status"], item["stored"], item["actual"],
+            )
+        logger.info(
+            "booking_stats reconcile complete rows=%s drifted=%s",
+            result["rows"], len(drift),
+        )
+        return {"rows": result["rows"], "drifted": len(drift)}
+    except Exception as e:
+        logger.exception("booking_stats reconcile failed error=%s", e)
+        db.rollback()
+        return {"rows": 0, "drifted": 0, "failed": True, "error": str(e)}
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Session tracking
+# ---------------------------------------------------------------------------
+
+def _dates_of(*stamps) -> set:
+    return {dt.date() for dt in map(uk_datetime, stamps) if dt is not None}
+
+
+def _collect_booking_stats_dates(session, flush_context, instances) -> None:
+    from db_models import Booking, Payment
+    from session_hooks import attr_values, changed
+
+    pending = session.info.setdefault(_PENDING_DATES_KEY, set())
+    with session.no_autoflush:
+        for obj in [*session.new, *session.dirty, *session.deleted]:
+            is_new_or_deleted = obj in session.new or obj in session.deleted
+            if isinstance(obj, Booking):
+                if not (is_new_or_deleted or changed(obj, _BOOKING_FIELDS)):
+                    continue
+                payment = obj.payment
+                pending |= _dates_of(
+                    *attr_values(obj, "created_at"),
+                    *(attr_values(payment, "paid_at") if payment is not None else ()),
+                )
+                if is_new_or_deleted and obj.created_at is None:
+                    # created_at is filled by the column default at insert time.
+                    pending.add(datetime.now(UK_TIMEZONE).date())
+            elif isinstance(obj, Payment):
+                if not (is_new_or_deleted or changed(obj, _PAYMENT_FIELDS)):
+                    continue
+                booking = obj.booking
+                pending |= _dates_of(
+                    *attr_values(obj, "paid_at"),
+                    getattr(booking, "created_at", None),
+                )
+
+
+def _apply_booking_stats_dates(session) -> None:
+    dates = session.info.pop(_PENDING_DATES_KEY, None)
+    if dates:
+        refresh_booking_stats_days(session.get_bind(), dates)
+
+
+def _discard_booking_stats_dates(session) -> None:
+    session.info.pop(_PENDING_DATES_KEY, None)
+
+
+def install_booking_stats_tracking(target) -> None:
+    """Keep booking_stats_daily current for sessions from `target`."""
+    from session_hooks import install_session_hooks
+
+    install_session_hooks(
+        target,
+        _collect_booking_stats_dates,
+        _apply_booking_stats_dates,
+        _discard_booking_stats_dates,
+    )
@@ -4,13 +4,15 @@ SQLAlchemy database models for TAG booking system.
 from sqlalchemy import (
     Column, Integer, BigInteger, String, DateTime, Date, Time,
     ForeignKey, Enum, Boolean, Text, Numeric, UniqueConstraint, Index,
-    CheckConstraint, JSON
+    CheckConstraint, Float, JSON
 )
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from database import Base
 import enum
+import json
 
 
 class BookingStatus(enum.Enum):
@@ -295,6 +297,12 @@ class Booking(Base):
     override_gross_pence = Column(Integer, nullable=True)  # Original price before discount
     override_discount_pence = Column(Integer, nullable=True)  # Discount amount
 
+    # Board-change matching: flight_delay_propagation looks bookings up by
+    # (pickup flight, landing date) for the handful of flights that moved.
+    __table_args__ = (
+        Index("ix_bookings_pickup_flight_arrival_date", "pickup_flight_number", "flight_arrival_date"),
+    )
+
     # Relationships
     customer = relationship("Customer", back_populates="bookings")
     vehicle = relationship("Vehicle", back_populates="bookings")
@@ -344,6 +352,10 @@ class Payment(Base):
 class FlightDeparture(Base):
     """Departure flights - used for drop-off scheduling."""
     __tablename__ = "flight_departures"
+    __table_args__ = (
+        # Keyset order for the admin flights table.
+        Index("ix_flight_departures_date_time_id", "date", "departure_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -423,9 +435,48 @@ class FlightDeparture(Base):
         return self.late_slots_available == 1 and self.early_slots_available == 0
 
 
+class DepartureSlot(Base):
+    """Drop-off slot catalogue: one row per (departure, slot).
+
+    Materialised from time_slots.departure_slot_catalogue when departures
+    are imported or created, so availability reads are one indexed select
+    instead of re-applying SLOT_OFFSETS and the DROP_OFF_FLOOR clamp per
+    request. Rebuilt only when the departure's date or time changes
+    (departure_time is the time the row was computed from); `remaining`
+    mirrors the departure's early/late counters and is refreshed whenever
+    they move.
+    """
+    __tablename__ = "departure_slots"
+    __table_args__ = (
+        UniqueConstraint("departure_id", "slot_id", name="uq_departure_slots_departure_slot"),
+        Index("ix_departure_slots_flight_date_departure", "flight_date", "departure_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    departure_id = Column(
+        Integer, ForeignKey("flight_departures.id", ondelete="CASCADE"), nullable=False,
+    )
+    slot_id = Column(String(10), nullable=False)  # SlotType value: '165' | '120' | '90'
+    capacity_key = Column(String(10), nullable=False)  # 'early' | 'late' counter it draws on
+    flight_date = Column(Date, nullable=False)
+    departure_time = Column(Time, nullable=False)
+    drop_off_date = Column(Date, nullable=False)
+    drop_off_time = Column(Time, nullable=False)
+    label = Column(String(50), nullable=False)
+    is_clamped = Column(Boolean, nullable=False, default=False)  # raised to DROP_OFF_FLOOR
+    remaining = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DepartureSlot {self.departure_id}/{self.slot_id} at {self.drop_off_date} {self.drop_off_time}>"
+
+
 class FlightArrival(Base):
     """Arrival flights - used for pickup scheduling."""
     __tablename__ = "flight_arrivals"
+    __table_args__ = (
+        # Keyset order for the admin flights table.
+        Index("ix_flight_arrivals_date_time_id", "date", "arrival_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -552,6 +603,31 @@ class AuditLogEvent(enum.Enum):
     ADMIN_SQL_QUERY = "admin_sql_query"
 
 
+class AuditEventData(TypeDecorator):
+    """JSONB on Postgres (JSON elsewhere) that also accepts JSON text.
+
+    Older writers pass json.dumps(...) output (some with default=str for
+    datetimes); it is decoded before binding so the column holds a real
+    document rather than a JSON string. Text that is not valid JSON is kept
+    as a JSON string. Reads always return the decoded value.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value
+        return value
+
+
 class AuditLog(Base):
     """Audit trail for booking events - tracks every step of the booking process."""
     __tablename__ = "audit_logs"
@@ -571,7 +647,9 @@ class AuditLog(Base):
         nullable=False,
         index=True
     )
-    event_data = Column(Text)  # JSON blob with event-specific data
+    # Event-specific data. On Postgres it is JSONB with a GIN index and an
+    # index on lower(event_data->>'email') (alembic revision 3v3ntjsb).
+    event_data = Column(AuditEventData, nullable=True)
 
     # User context
     ip_address = Column(String(45))  # IPv6 compatible
@@ -584,6 +662,36 @@ class AuditLog(Base):
         return f"<AuditLog {self.event.value} - {self.booking_reference or self.session_id}>"
 
 
+class FunnelSession(Base):
+    """One booking-flow session, materialised from its funnel AuditLog events.
+
+    Behind /api/admin/reports/session-tracking. Each *_at column is the first
+    time the session reached that step. Rows are updated by funnel_sessions
+    whenever a funnel event is committed and can be rebuilt from audit_logs
+    with `python funnel_sessions.py --backfill`.
+    """
+    __tablename__ = "funnel_sessions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Frontend session_id, else "ref_<booking_reference>", else "anon_<audit id>".
+    session_key = Column(String(120), nullable=False, unique=True)
+    session_id = Column(String(100), nullable=True)
+    booking_reference = Column(String(20), nullable=True, index=True)
+    # Where the session was first seen: "web" (booking page), "checkout"
+    # (server-side step with a session) or "webhook" (Stripe, reference only).
+    source = Column(String(20), nullable=False, default="web")
+    # "open", "payment_failed" or "confirmed".
+    outcome = Column(String(20), nullable=False, default="open")
+    first_event_at = Column(DateTime(timezone=True), nullable=False)
+    last_event_at = Column(DateTime(timezone=True), nullable=False)
+
+    dates_selected_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    flight_selected_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    customer_entered_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    payment_initiated_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    booking_confirmed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+
 class ErrorSeverity(enum.Enum):
     """Severity levels for error logs."""
     DEBUG = "debug"
@@ -661,6 +769,15 @@ class MarketingSubscriber(Base):
     promo_10_booking = relationship("Booking", foreign_keys=[promo_10_used_booking_id])
     promo_free_booking = relationship("Booking", foreign_keys=[promo_free_used_booking_id])
 
+    __table_args__ = (
+        # Keyset pages of the admin list, whole table or one source/state.
+        # Postgres rebuilds these as (subscribed_at DESC NULLS LAST, id DESC)
+        # in migration mkt5unul1; SQLite cannot declare NULLS LAST here.
+        Index("ix_marketing_subscribers_subscribed_at_id", "subscribed_at", "id"),
+        Index("ix_marketing_subscribers_source_subscribed_at", "source", "subscribed_at", "id"),
+        Index("ix_marketing_subscribers_unsubscribed_subscribed_at", "unsubscribed", "subscribed_at", "id"),
+    )
+
     def __repr__(self):
         return f"<MarketingSubscriber {self.first_name} {self.last_name} ({self.email})>"
 
@@ -1316,7 +1433,8 @@ class FlightBoardSnapshot(Base):
 
     Full rows including live status text ("Expected 20:00", "Wait In Lounge").
     Historical demand analysis lives in FlightScheduleHistory; these snapshots
-    are debugging/display state and get pruned after ~30 days.
+    are debugging/display state and get pruned ~30 days after last sighting.
+    A new row is only written when the board content changes.
     """
     __tablename__ = "flight_board_snapshots"
 
@@ -1327,6 +1445,12 @@ class FlightBoardSnapshot(Base):
     departures_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
     source_url = Column(Text, nullable=True)
     error = Column(Text, nullable=True)
+    # sha256 of the canonicalised board; an identical re-scrape only bumps
+    # last_seen_at instead of writing a new row.
+    content_hash = Column(String(64), nullable=True, index=True)
+    # Per-flight changes vs the previous ok snapshot (None for the first).
+    diff_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
 
@@ -1358,6 +1482,141 @@ class FlightScheduleHistory(Base):
     last_seen_at = Column(DateTime(timezone=True), nullable=False)
 
 
+class FlightDelayImpact(Base):
+    """What one board change means for one booking or one roster shift.
+
+    Written by flight_delay_propagation when a changed arrival on the board
+    moves a confirmed booking's expected landing. `impact_type` is 'booking'
+    (one row per affected booking) or 'shift' (one row per roster shift
+    linked to any affected booking, summarising all of them). Append-only;
+    the planner reads unconsumed rows and stamps consumed_at.
+    """
+    __tablename__ = "flight_delay_impacts"
+    __table_args__ = (
+        Index("idx_flight_delay_impacts_pending", "consumed_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_id = Column(
+        Integer, ForeignKey("flight_board_snapshots.id", ondelete="SET NULL"),
+        nullable=True, index=True,
+    )
+    impact_type = Column(String(10), nullable=False)  # 'booking' | 'shift'
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True, index=True)
+    shift_id = Column(Integer, ForeignKey("roster_shifts.id", ondelete="CASCADE"), nullable=True, index=True)
+    flight_number = Column(String(16), nullable=True)
+    flight_date = Column(Date, nullable=False, index=True)
+    board_status = Column(String(64), nullable=True)
+    # Booked landing vs what the board now expects. revised_* is NULL when the
+    # board gives no time (cancelled / diverted).
+    booked_arrival_at = Column(DateTime, nullable=True)
+    revised_arrival_at = Column(DateTime, nullable=True)
+    delay_minutes = Column(Integer, nullable=True)
+    # Shift rows: whether the shift still covers every affected pickup, and
+    # by how much the latest revised handoff overruns the shift end.
+    still_covered = Column(Boolean, nullable=True)
+    overrun_minutes = Column(Integer, nullable=True)
+    detail_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    consumed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class BookingStatsDaily(Base):
+    """Per-day, per-status booking rollup behind /api/admin/bookings/stats.
+
+    `stat_date` is the booking's effective UK date (payment-success day,
+    falling back to created_at), the same basis as every other booking
+    report. Rows for a date are recomputed by booking_stats whenever a
+    booking or payment touching that date is committed, and the whole table
+    is rebuilt nightly by the reconcile job, which logs any drift.
+    """
+    __tablename__ = "booking_stats_daily"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "status", name="uq_booking_stats_daily_date_status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    stat_date = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False)
+    booking_count = Column(Integer, nullable=False, default=0)
+    # Bookings with a non-zero payment, and what they paid (free promo
+    # bookings with a £0 payment are excluded, as in the stats endpoint).
+    paid_count = Column(Integer, nullable=False, default=0)
+    revenue_pence = Column(BigInteger, nullable=False, default=0)
+    # Distributions the dashboard charts: {"7": 3} trip length in days,
+    # 24 hourly counts for drop-off / pick-up times, and
+    # {"Monday": [24 counts]} for when (UK time) the booking was created.
+    trip_days_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    dropoff_hours_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    pickup_hours_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    created_hours_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class BookingForecast(Base):
+    """One run of the bookings forecast behind /api/admin/reports/bookings-forecast.
+
+    Written nightly by booking_forecast.refresh_booking_forecast (or on an
+    admin refresh); the endpoint serves the newest row. `payload` is the full
+    response: the pattern report plus the NumPy drop-off projection for the
+    `horizon_days` days from `as_of`. Runs older than 90 days are pruned.
+    """
+    __tablename__ = "booking_forecasts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    as_of = Column(Date, nullable=False, index=True)
+    generated_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    horizon_days = Column(Integer, nullable=False)
+    model_version = Column(String(40), nullable=False)
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+
+
+class PostcodeGeocode(Base):
+    """Persistent geocode cache for the admin booking-locations map.
+
+    Keyed by the normalised postcode ("BH7 6AW") or outward code ("BH7").
+    Full postcodes are filled from postcodes.io on first lookup and expire
+    after a year (misses after 30 days); outward-code centroids come from the
+    offline CSV import and never expire (expires_at is NULL). A row with no
+    coordinates records a postcode postcodes.io could not find.
+    """
+    __tablename__ = "postcode_geocodes"
+
+    postcode = Column(String(10), primary_key=True)
+    kind = Column(String(10), nullable=False)  # "postcode" or "outward"
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    admin_district = Column(String(100), nullable=True)
+    source = Column(String(20), nullable=False)  # "postcodes.io" or "centroid_csv"
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class OccupancyTimeline(Base):
+    """Intraday car park occupancy for one day at 15-minute resolution.
+
+    Behind the secondary car park report and the staff occupancy timeline.
+    `total_json` / `secondary_json` hold one count per slot (96 for a
+    15-minute day): cars on site at the slot's start, and how many of them
+    qualify for the secondary car park. Days in the rolling window are
+    recomputed by occupancy_timeline whenever a booking touching them is
+    committed, and the whole window is rebuilt nightly.
+    """
+    __tablename__ = "occupancy_timeline"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    timeline_date = Column(Date, nullable=False, unique=True)
+    slot_minutes = Column(Integer, nullable=False)
+    total_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    secondary_json = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    peak_total = Column(Integer, nullable=False, default=0)
+    peak_secondary = Column(Integer, nullable=False, default=0)
+    # Secondary-qualifying drop-offs / pick-ups handed over that day.
+    secondary_dropoffs = Column(Integer, nullable=False, default=0)
+    secondary_pickups = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class AirportQuoteConversionLog(Base):
     """Per-quote airport comparison funnel log."""
     __tablename__ = "airport_quote_conversion_log"
@@ -2112,3 +2371,42 @@ class DbPoolSnapshot(Base):
 
     def __repr__(self):
         return f"<DbPoolSnapshot {self.created_at} - {self.health_status.value} ({self.usage_percent}%)>"
+
+
+class DbPoolSnapshotRollup(Base):
+    """Downsampled connection pool history behind /api/admin/db-health/history.
+
+    db_pool_history rolls raw db_pool_snapshots into 1-minute buckets and
+    those into 1-hour buckets (`resolution_seconds` 60 / 3600), keeping the
+    min/max/avg of each metric and the worst health status seen. Raw rows
+    are dropped after 48 hours, minute buckets after 14 days and hour
+    buckets after 400 days.
+    """
+    __tablename__ = "db_pool_snapshot_rollups"
+    __table_args__ = (
+        UniqueConstraint("resolution_seconds", "bucket_start", name="uq_db_pool_snapshot_rollups_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    resolution_seconds = Column(Integer, nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    sample_count = Column(Integer, nullable=False)
+
+    # Configuration at the bucket's last sample
+    pool_size = Column(Integer, nullable=False)
+    max_overflow = Column(Integer, nullable=False)
+
+    usage_min = Column(Numeric(5, 1), nullable=False)
+    usage_max = Column(Numeric(5, 1), nullable=False)
+    usage_avg = Column(Numeric(5, 1), nullable=False)
+    checked_out_min = Column(Integer, nullable=False)
+    checked_out_max = Column(Integer, nullable=False)
+    checked_out_avg = Column(Numeric(7, 2), nullable=False)
+    overflow_max = Column(Integer, nullable=False)
+    checked_in_min = Column(Integer, nullable=False)
+
+    # Worst health status seen in the bucket
+    health_status = Column(Enum(PoolHealthStatus), nullable=False)
+
+    def __repr__(self):
+        return f"<DbPoolSnapshotRollup {self.resolution_seconds}s {self.bucket_start} ({self.usage_max}% max)>"
@@ -0,0 +1,286 @@
+"""Downsampled retention for database pool health history.
+
+db_pool_snapshots gets a row on every pool threshold crossing and circuit
+breaker state change, and /api/admin/db-health/history used to read those
+raw rows for any window, so the table (and the chart query) grew without
+bound. apply_pool_snapshot_retention() now runs every few minutes from the
+scheduler and:
+
+1. rolls raw snapshots into 1-minute buckets (db_pool_snapshot_rollups,
+   resolution_seconds=60) with min/max/avg usage and checked-out counts,
+   the peak overflow, the lowest checked-in count and the worst health
+   status seen;
+2. rolls 1-minute buckets into 1-hour buckets the same way, averages
+   weighted by sample count;
+3. drops raw rows older than RAW_RETENTION, minute buckets older than
+   MINUTE_RETENTION and hour buckets older than HOUR_RETENTION.
+
+Each level restarts from its newest stored bucket, which is recomputed
+(it may have been partial), so a run is idempotent and cheap. The history
+endpoint never returns more than HISTORY_MAX_POINTS entries: it picks the
+finest bucket size that fits the requested window (see
+resolution_for_hours()), merging hour buckets on read for the longest
+windows, instead of cutting the oldest part of the window off.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 3600
+RAW_RETENTION = timedelta(hours=48)
+MINUTE_RETENTION = timedelta(days=14)
+HOUR_RETENTION = timedelta(days=400)
+# Windows up to RAW_WINDOW_HOURS read raw snapshots while they fit in
+# HISTORY_MAX_POINTS; anything else reads rollups (rollup_resolution()).
+RAW_WINDOW_HOURS = 48
+MAX_HISTORY_HOURS = 90 * 24
+HISTORY_MAX_POINTS = 1000
+RETENTION_INTERVAL_MINUTES = 5
+
+_SEVERITY = {"healthy": 0, "warning": 1, "critical": 2}
+
+
+def rollup_resolution(hours: int) -> int:
+    """Finest bucket size in seconds that keeps `hours` within HISTORY_MAX_POINTS.
+
+    Minute or hour buckets where they fit, otherwise a whole number of hours
+    (hour buckets merged on read). One point is kept spare for the partial
+    bucket the window starts in.
+    """
+    needed = math.ceil(hours * HOUR / (HISTORY_MAX_POINTS - 1))
+    if needed <= MINUTE:
+        return MINUTE
+    return HOUR * math.ceil(needed / HOUR)
+
+
+def resolution_for_hours(hours: int) -> Optional[int]:
+    """Bucket size in seconds for a window of `hours`; None means raw rows."""
+    if hours <= RAW_WINDOW_HOURS:
+        return None
+    return rollup_resolution(hours)
+
+
+def _utc(stamp: datetime) -> datetime:
+    """Stored timestamp (naive = UTC) as an aware UTC datetime."""
+    return stamp.replace(tzinfo=timezone.utc) if stamp.tzinfo is None else stamp.astimezone(timezone.utc)
+
+
+def _naive_utc(stamp: datetime) -> datetime:
+    # db_pool_snapshots.created_at is compared as naive UTC, as it always was.
+    return _utc(stamp).replace(tzinfo=None)
+
+
+def _bucket_start(stamp: datetime, resolution: int) -> datetime:
+    stamp = _utc(stamp)
+    epoch = int(stamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution, tz=timezone.utc)
+
+
+def _worst(statuses: Iterable):
+    return max(statuses, key=lambda status: _SEVERITY.get(status.value, 0))
+
+
+def bucket_raw_snapshots(snapshots: Iterable, resolution: int = MINUTE) -> list[dict]:
+    """Rollup column values for raw DbPoolSnapshot rows, one dict per bucket."""
+    buckets: dict = {}
+    for s in snapshots:
+        if s.created_at is None:
+            continue
+        buckets.setdefault(_bucket_start(s.created_at, resolution), []).append(s)
+
+    rows = []
+    for start, samples in sorted(buckets.items()):
+        samples.sort(key=lambda s: _utc(s.created_at))
+        usage = [float(s.usage_percent) for s in samples]
+        checked_out = [s.checked_out for s in samples]
+        rows.append({
+            "resolution_seconds": resolution,
+            "bucket_start": start,
+            "sample_count": len(samples),
+            "pool_size": samples[-1].pool_size,
+            "max_overflow": samples[-1].max_overflow,
+            "usage_min": min(usage),
+            "usage_max": max(usage),
+            "usage_avg": round(sum(usage) / len(usage), 1),
+            "checked_out_min": min(checked_out),
+            "checked_out_max": max(checked_out),
+            "checked_out_avg": round(sum(checked_out) / len(checked_out), 2),
+            "overflow_max": max(s.overflow for s in samples),
+            "checked_in_min": min(s.checked_in for s in samples),
+            "health_status": _worst(s.health_status for s in samples),
+        })
+    return rows
+
+
+def bucket_rollups(rollups: Iterable, resolution: int = HOUR) -> list[dict]:
+    """Coarser rollup values from finer rollup rows, averages weighted by samples."""
+    buckets: dict = {}
+    for r in rollups:
+        buckets.setdefault(_bucket_start(r.bucket_start, resolution), []).append(r)
+
+    rows = []
+    for start, parts in sorted(buckets.items()):
+        parts.sort(key=lambda r: _utc(r.bucket_start))
+        samples = sum(r.sample_count for r in parts)
+        rows.append({
+            "resolution_seconds": resolution,
+            "bucket_start": start,
+            "sample_count": samples,
+            "pool_size": parts[-1].pool_size,
+            "max_overflow": parts[-1].max_overflow,
+            "usage_min": min(float(r.usage_min) for r in parts),
+            "usage_max": max(float(r.usage_max) for r in parts),
+            "usage_avg": round(sum(float(r.usage_avg) * r.sample_count for r in parts) / samples, 1),
+            "checked_out_min": min(r.checked_out_min for r in parts),
+            "checked_out_max": max(r.checked_out_max for r in parts),
+            "checked_out_avg": round(sum(float(r.checked_out_avg) * r.sample_count for r in parts) / samples, 2),
+            "overflow_max": max(r.overflow_max for r in parts),
+            "checked_in_min": min(r.checked_in_min for r in parts),
+            "health_status": _worst(r.health_status for r in parts),
+        })
+    return rows
+
+
+def _latest_bucket(db, resolution: int) -> Optional[datetime]:
+    from sqlalchemy import func
+
+    from db_models import DbPoolSnapshotRollup
+
+    return db.query(func.max(DbPoolSnapshotRollup.bucket_start)).filter(
+        DbPoolSnapshotRollup.resolution_seconds == resolution
+    ).scalar()
+
+
+def _replace_buckets(db, resolution: int, since: Optional[datetime], rows: list) -> None:
+    from db_models import DbPoolSnapshotRollup
+
+    stale = db.query(DbPoolSnapshotRollup).filter(DbPoolSnapshotRollup.resolution_seconds == resolution)
+    if since is not None:
+        stale = stale.filter(DbPoolSnapshotRollup.bucket_start >= since)
+    stale.delete(synchronize_session=False)
+    db.add_all(DbPoolSnapshotRollup(**row) for row in rows)
+    db.flush()
+
+
+def roll_up_pool_snapshots(db) -> dict:
+    """Roll new raw snapshots into minute buckets and those into hour buckets. Does not commit."""
+    from db_models import DbPoolSnapshot, DbPoolSnapshotRollup
+
+    since = _latest_bucket(db, MINUTE)
+    raw = db.query(DbPoolSnapshot)
+    if since is not None:
+        raw = raw.filter(DbPoolSnapshot.created_at >= _naive_utc(since))
+    minute_rows = bucket_raw_snapshots(raw.all(), MINUTE)
+    _replace_buckets(db, MINUTE, since, minute_rows)
+
+    since = _latest_bucket(db, HOUR)
+    minutes = db.query(DbPoolSnapshotRollup).filter(DbPoolSnapshotRollup.resolution_seconds == MINUTE)
+    if since is not None:
+        minutes = minutes.filter(DbPoolSnapshotRollup.bucket_start >= since)
+    hour_rows = bucket_rollups(minutes.all(), HOUR)
+    _replace_buckets(db, HOUR, since, hour_rows)
+
+    return {"minute_buckets": len(minute_rows), "hour_buckets": len(hour_rows)}
+
+
+def prune_pool_history(db, now: Optional[datetime] = None) -> dict:
+    """Drop raw rows and buckets past their retention. Does not commit."""
+    from db_models import DbPoolSnapshot, DbPoolSnapshotRollup
+
+    now = now or datetime.now(timezone.utc)
+
+    def prune_rollups(resolution: int, keep: timedelta) -> int:
+        return db.query(DbPoolSnapshotRollup).filter(
+            DbPoolSnapshotRollup.resolution_seconds == resolution,
+            DbPoolSnapshotRollup.bucket_start < now - keep,
+        ).delete(synchronize_session=False)
+
+    return {
+        "raw_deleted": db.query(DbPoolSnapshot).filter(
+            DbPoolSnapshot.created_at < _naive_utc(now - RAW_RETENTION)
+        ).delete(synchronize_session=False),
+        "minute_deleted": prune_rollups(MINUTE, MINUTE_RETENTION),
+        "hour_deleted": prune_rollups(HOUR, HOUR_RETENTION),
+    }
+
+
+def apply_pool_snapshot_retention(db, now: Optional[datetime] = None) -> dict:
+    """Roll up, then prune (raw rows are only dropped once rolled). Does not commit."""
+    return {**roll_up_pool_snapshots(db), **prune_pool_history(db, now)}
+
+
+def _serialize_raw(s) -> dict:
+    return {
+        "id": s.id,
+        "timestamp": s.created_at.isoformat() if s.created_at else None,
+        "pool_size": s.pool_size,
+        "max_overflow": s.max_overflow,
+        "checked_out": s.checked_out,
+        "overflow": s.overflow,
+        "checked_in": s.checked_in,
+        "usage_percent": float(s.usage_percent),
+        "health_status": s.health_status.value,
+        "trigger": s.trigger,
+    }
+
+
+def _serialize_rollup(r) -> dict:
+    """A bucket in the raw snapshot shape (worst-case values) plus its spread."""
+    return {
+        "id": r.id,
+        "timestamp": r.bucket_start.isoformat() if r.bucket_start else None,
+        "pool_size": r.pool_size,
+        "max_overflow": r.max_overflow,
+        "checked_out": r.checked_out_max,
+        "overflow": r.overflow_max,
+        "checked_in": r.checked_in_min,
+        "usage_percent": float(r.usage_max),
+        "health_status": r.health_status.value,
+        "trigger": f"rollup_{r.resolution_seconds}s",
+        "sample_count": r.sample_count,
+        "usage_min": float(r.usage_min),
+        "usage_avg": float(r.usage_avg),
+        "usage_max": float(r.usage_max),
+        "checked_out_min": r.checked_out_min,
+        "checked_out_avg": float(r.checked_out_avg),
+    }
+
+
+def load_pool_history(db, hours: int, now: Optional[datetime] = None) -> dict:
+    """Newest-first history for the last `hours`, at most HISTORY_MAX_POINTS entries.
+
+    Returns {"resolution_seconds": None for raw, "snapshots": [...]}; every
+    entry has the raw snapshot keys, so charts read either resolution. Raw
+    rows are written per event, so a short window that holds more of them
+    than fit falls back to rollups covering the whole window (those trail
+    the raw rows by up to RETENTION_INTERVAL_MINUTES).
+    """
+    from db_models import DbPoolSnapshot, DbPoolSnapshotRollup
+
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=hours)
+    resolution = resolution_for_hours(hours)
+    if resolution is None:
+        rows = db.query(DbPoolSnapshot).filter(
+            DbPoolSnapshot.created_at >= _naive_utc(cutoff)
+        ).order_by(DbPoolSnapshot.created_at.desc()).limit(HISTORY_MAX_POINTS + 1).all()
+        if len(rows) <= HISTORY_MAX_POINTS:
+            return {"resolution_seconds": None, "snapshots": [_serialize_raw(s) for s in rows]}
+        resolution = rollup_resolution(hours)
+
+    stored = MINUTE if resolution == MINUTE else HOUR
+    rows = db.query(DbPoolSnapshotRollup).filter(
+        DbPoolSnapshotRollup.resolution_seconds == stored,
+        DbPoolSnapshotRollup.bucket_start >= _bucket_start(cutoff, resolution),
+    ).order_by(DbPoolSnapshotRollup.bucket_start.desc()).all()
+    if resolution != stored:
+        rows = [SimpleNamespace(id=None, **row) for row in reversed(bucket_rollups(rows, resolution))]
+    return {"resolution_seconds": resolution, "snapshots": [_serialize_rollup(r) for r in rows]}
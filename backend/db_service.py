@@ -13,7 +13,7 @@ import string
 
 from db_models import (
     Customer, Vehicle, Booking, Payment, FlightDeparture, FlightArrival,
-    FlightDepartureHistory, FlightArrivalHistory,
+    FlightDepartureHistory, FlightArrivalHistory, DepartureSlot,
     BookingStatus, PaymentStatus, ServiceType, ParkingCapacitySetting
 )
 
@@ -827,9 +827,11 @@ def record_refund(
         payment.refunded_at = datetime.utcnow()
 
         if refund_amount_pence >= payment.amount_pence:
+            was_refunded = payment.status == PaymentStatus.REFUNDED
             payment.status = PaymentStatus.REFUNDED
             # Update booking status
             booking = get_booking_by_id(db, payment.booking_id)
+            release_refunded_booking_slot(db, booking, was_refunded)
             if booking:
                 booking.status = BookingStatus.REFUNDED
                 try:
@@ -871,10 +873,27 @@ def get_departure_by_number_and_date(
     ).first()
 
 
+# Counter column per bookable slot type. 'standard' (2h) shares the late
+# counter on FlightDeparture but is not bookable on its own here.
+DEPARTURE_SLOT_COUNTERS = {
+    'early': FlightDeparture.slots_booked_early,
+    'late': FlightDeparture.slots_booked_late,
+}
+
+
+def _slot_type_for_dropoff(dropoff_slot: Optional[str]) -> str:
+    """Capacity counter for a stored dropoff_slot ("150"/"165"/"early" -> early)."""
+    return 'early' if dropoff_slot in ('150', '165', 'early') else 'late'
+
+
 def book_departure_slot(db: Session, flight_id: int, slot_type: str) -> dict:
     """
     Book a slot on a departure flight.
 
+    The increment is a single conditional UPDATE (counter < capacity_tier // 2)
+    with RETURNING, so concurrent checkouts for the same flight serialise on
+    the row in the database instead of racing a read-check-write in Python.
+
     Args:
         db: Database session
         flight_id: The departure flight ID
@@ -883,6 +902,8 @@ def book_departure_slot(db: Session, flight_id: int, slot_type: str) -> dict:
     Returns:
         dict with 'success' (bool), 'message' (str), and optionally 'slots_remaining' (int)
     """
+    from sqlalchemy import update
+
     flight = db.query(FlightDeparture).filter(FlightDeparture.id == flight_id).first()
     if not flight:
         return {"success": False, "message": "Flight not found"}
@@ -891,21 +912,35 @@ def book_departure_slot(db: Session, flight_id: int, slot_type: str) -> dict:
     if flight.capacity_tier == 0:
         return {"success": False, "message": "This flight requires calling to book", "call_us": True}
 
+    counter = DEPARTURE_SLOT_COUNTERS.get(slot_type)
+    if counter is None:
+        return {"success": False, "message": "Invalid slot type. Use 'early' or 'late'"}
+
+    full = {"success": False, "message": f"No {slot_type} slots available", "slots_remaining": 0}
     max_per_slot = flight.max_slots_per_time
+    # Cheap early exit; the UPDATE below is what actually enforces capacity.
+    if getattr(flight, counter.key) >= max_per_slot:
+        return full
+
+    booked = db.execute(
+        update(FlightDeparture)
+        .where(
+            FlightDeparture.id == flight_id,
+            counter < FlightDeparture.capacity_tier // 2,
+        )
+        .values({counter: counter + 1})
+        .returning(counter)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if booked is None:
+        return full
 
-    if slot_type == 'early':
-        if flight.slots_booked_early >= max_per_slot:
-            return {"success": False, "message": "No early slots available", "slots_remaining": 0}
-        flight.slots_booked_early += 1
-        slots_remaining = max_per_slot - flight.slots_booked_early
-    elif slot_type == 'late':
-        if flight.slots_booked_late >= max_per_slot:
-            return {"success": False, "message": "No late slots available", "slots_remaining": 0}
-        flight.slots_booked_late += 1
-        slots_remaining = max_per_slot - flight.slots_booked_late
-    else:
-        return {"success": False, "message": "Invalid slot type. Use 'early' or 'late'"}
+    # Reload the row this transaction now holds so the slot catalogue and
+    # history snapshot see the new counter.
+    db.refresh(flight)
+    slots_remaining = flight.max_slots_per_time - getattr(flight, counter.key)
 
+    sync_departure_slot_remaining(db, flight)
     # Record history snapshot after slot booking
     record_departure_history(db, flight, 'updated', 'system')
 
@@ -921,6 +956,11 @@ def release_departure_slot(db: Session, flight_id: int, slot_type: str) -> dict:
     """
     Release a previously booked slot on a departure flight.
 
+    Mirrors book_departure_slot: one conditional UPDATE (counter > 0), so a
+    release never drives the counter negative or overwrites a concurrent
+    booking. Does not commit: the release belongs to the caller's
+    cancellation or refund.
+
     Args:
         db: Database session
         flight_id: The departure flight ID
@@ -929,30 +969,218 @@ def release_departure_slot(db: Session, flight_id: int, slot_type: str) -> dict:
     Returns:
         dict with 'success' (bool) and 'message' (str)
     """
+    from sqlalchemy import update
+
     flight = db.query(FlightDeparture).filter(FlightDeparture.id == flight_id).first()
     if not flight:
         return {"success": False, "message": "Flight not found"}
 
-    if slot_type == 'early':
-        if flight.slots_booked_early > 0:
-            flight.slots_booked_early -= 1
-        else:
-            return {"success": False, "message": "No early slots to release"}
-    elif slot_type == 'late':
-        if flight.slots_booked_late > 0:
-            flight.slots_booked_late -= 1
-        else:
-            return {"success": False, "message": "No late slots to release"}
-    else:
+    counter = DEPARTURE_SLOT_COUNTERS.get(slot_type)
+    if counter is None:
         return {"success": False, "message": "Invalid slot type. Use 'early' or 'late'"}
 
+    nothing_booked = {"success": False, "message": f"No {slot_type} slots to release"}
+    if getattr(flight, counter.key) <= 0:
+        return nothing_booked
+
+    released = db.execute(
+        update(FlightDeparture)
+        .where(FlightDeparture.id == flight_id, counter > 0)
+        .values({counter: counter - 1})
+        .returning(counter)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if released is None:
+        return nothing_booked
+
+    db.refresh(flight)
+    sync_departure_slot_remaining(db, flight)
     # Record history snapshot after slot release
     record_departure_history(db, flight, 'updated', 'system')
 
-    db.commit()
+    db.flush()
     return {"success": True, "message": "Slot released successfully"}
 
 
+def release_booking_departure_slot(db: Session, booking: Booking) -> bool:
+    """
+    Give back the departure slot a booking holds, for cancellations, deletes
+    and full refunds. Does not commit.
+
+    Returns:
+        True if a slot was released
+    """
+    departure_id = getattr(booking, "departure_id", None)
+    dropoff_slot = getattr(booking, "dropoff_slot", None)
+    if not (departure_id and dropoff_slot):
+        return False
+    result = release_departure_slot(db, departure_id, _slot_type_for_dropoff(dropoff_slot))
+    return result.get("success", False)
+
+
+def release_refunded_booking_slot(db: Session, booking: Optional[Booking], was_refunded: bool) -> bool:
+    """
+    Give back the departure slot of a booking whose payment has just become
+    fully refunded. Every refund path (record_refund, the Stripe refund
+    webhooks, the admin refund and refund sync) calls this after a full
+    refund; `was_refunded` is whether the payment was already REFUNDED, so
+    a refund reported twice releases once. Cancelled bookings already gave
+    their slot back. Does not commit.
+
+    Returns:
+        True if a slot was released
+    """
+    if was_refunded or booking is None or booking.status == BookingStatus.CANCELLED:
+        return False
+    return release_booking_departure_slot(db, booking)
+
+
+# ============== DEPARTURE SLOT CATALOGUE ==============
+
+# Keeps IN (...) lists for bulk imports well inside driver parameter limits.
+DEPARTURE_SLOT_BATCH_SIZE = 500
+
+
+def _departure_slot_remaining(flight: FlightDeparture, capacity_key: str) -> int:
+    if capacity_key == "early":
+        return flight.early_slots_available
+    return flight.late_slots_available
+
+
+def _catalogue_slots(flight: FlightDeparture) -> list[DepartureSlot]:
+    """Unsaved slot rows for a departure, computed from its current date and time."""
+    from time_slots import departure_slot_catalogue
+
+    return [
+        DepartureSlot(
+            departure_id=flight.id,
+            remaining=_departure_slot_remaining(flight, spec["capacity_key"]),
+            **spec,
+        )
+        for spec in departure_slot_catalogue(flight.date, flight.departure_time)
+    ]
+
+
+def materialize_departure_slots(db: Session, departures: List[FlightDeparture]) -> int:
+    """
+    Bring departure_slots in line with the given departures.
+
+    A departure whose rows were computed from its current date and time only
+    has `remaining` refreshed; one with no rows, or whose date/time has moved,
+    gets its rows rebuilt. Departures must be flushed (have ids). Does not
+    commit.
+
+    Returns:
+        Number of departures whose slot rows were (re)built
+    """
+    departures = [d for d in departures if d.id is not None]
+    if not departures:
+        return 0
+
+    existing: dict[int, list[DepartureSlot]] = {}
+    for start in range(0, len(departures), DEPARTURE_SLOT_BATCH_SIZE):
+        ids = [d.id for d in departures[start:start + DEPARTURE_SLOT_BATCH_SIZE]]
+        for row in db.query(DepartureSlot).filter(DepartureSlot.departure_id.in_(ids)).all():
+            existing.setdefault(row.departure_id, []).append(row)
+
+    stale: list[DepartureSlot] = []
+    to_build: list[FlightDeparture] = []
+    for flight in departures:
+        rows = existing.get(flight.id, [])
+        current = bool(rows) and all(
+            row.flight_date == flight.date and row.departure_time == flight.departure_time
+            for row in rows
+        )
+        if current:
+            for row in rows:
+                row.remaining = _departure_slot_remaining(flight, row.capacity_key)
+            continue
+        stale.extend(rows)
+        to_build.append(flight)
+
+    for row in stale:
+        db.delete(row)
+    if stale:
+        # Clear the (departure_id, slot_id) unique keys before re-inserting.
+        db.flush()
+    for flight in to_build:
+        db.add_all(_catalogue_slots(flight))
+    return len(to_build)
+
+
+def backfill_departure_slots(db: Session, since: Optional[date] = None) -> int:
+    """
+    Materialise departure_slots for every departure (from `since` on), in
+    batches of DEPARTURE_SLOT_BATCH_SIZE. Does not commit.
+
+    Returns:
+        Number of departures whose slot rows were (re)built
+    """
+    query = db.query(FlightDeparture).order_by(FlightDeparture.id)
+    if since is not None:
+        query = query.filter(FlightDeparture.date >= since)
+    built = 0
+    last_id = 0
+    while True:
+        batch = query.filter(FlightDeparture.id > last_id).limit(DEPARTURE_SLOT_BATCH_SIZE).all()
+        if not batch:
+            return built
+        built += materialize_departure_slots(db, batch)
+        db.flush()
+        last_id = batch[-1].id
+
+
+def sync_departure_slot_remaining(db: Session, flight: FlightDeparture) -> None:
+    """Refresh `remaining` on a departure's slot rows after its counters moved."""
+    from sqlalchemy import case
+
+    db.query(DepartureSlot).filter(DepartureSlot.departure_id == flight.id).update(
+        {
+            DepartureSlot.remaining: case(
+                (DepartureSlot.capacity_key == "early", flight.early_slots_available),
+                else_=flight.late_slots_available,
+            )
+        },
+        synchronize_session=False,
+    )
+
+
+def get_departure_slots_for_date(
+    db: Session, flight_date: date, departures: List[FlightDeparture]
+) -> dict[int, list[DepartureSlot]]:
+    """
+    Slot rows for a day's departures, keyed by departure id.
+
+    One indexed select on (flight_date, departure_id), and read-only: rows
+    are written on import and admin edits only. A departure with no rows,
+    or whose time has moved since they were built (edited outside those
+    paths), gets unsaved rows computed from the catalogue instead.
+    """
+    rows = (
+        db.query(DepartureSlot)
+        .filter(DepartureSlot.flight_date == flight_date)
+        .order_by(DepartureSlot.departure_id, DepartureSlot.drop_off_date, DepartureSlot.drop_off_time)
+        .all()
+    )
+    by_departure: dict[int, list[DepartureSlot]] = {}
+    for row in rows:
+        by_departure.setdefault(row.departure_id, []).append(row)
+
+    for d in departures:
+        rows = by_departure.get(d.id)
+        if not rows or any(row.departure_time != d.departure_time for row in rows):
+            by_departure[d.id] = _catalogue_slots(d)
+    return by_departure
+
+
+def get_departure_slot(db: Session, departure_id: int, slot_id: str) -> Optional[DepartureSlot]:
+    """The catalogue row for one (departure, slot), or None if not materialised."""
+    return db.query(DepartureSlot).filter(
+        DepartureSlot.departure_id == departure_id,
+        DepartureSlot.slot_id == slot_id,
+    ).first()
+
+
 # ============== FLIGHT ARRIVAL OPERATIONS ==============
 
 def get_arrivals_by_date(db: Session, flight_date: date) -> List[FlightArrival]:
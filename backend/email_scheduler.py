@@ -1017,18 +1017,15 @@ def process_template_roster_window_trim(target_date=None):
 
 
 def cleanup_old_snapshots():
-    """Remove pool snapshots older than 7 days to prevent table bloat."""
+    """Roll pool snapshots up into 1-minute/1-hour buckets and apply retention."""
     try:
         db = get_db()
         try:
-            from db_models import DbPoolSnapshot
-            cutoff = datetime.utcnow() - timedelta(days=7)
-            deleted = db.query(DbPoolSnapshot).filter(
-                DbPoolSnapshot.created_at < cutoff
-            ).delete()
+            from db_pool_history import apply_pool_snapshot_retention
+            result = apply_pool_snapshot_retention(db)
             db.commit()
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old pool snapshots")
+            if result["raw_deleted"] > 0:
+                logger.info(f"Rolled up and cleaned up {result['raw_deleted']} old pool snapshots")
         finally:
             db.close()
     except Exception as e:
@@ -1053,12 +1050,14 @@ def start_scheduler():
     # Pool snapshots are now event-driven (recorded when thresholds are crossed)
     # See database.py for threshold-based snapshot recording
 
-    # Add job to cleanup old snapshots once per day
+    # Roll pool snapshots up and apply retention every few minutes, so the
+    # rollups the history endpoint reads stay current.
+    from db_pool_history import RETENTION_INTERVAL_MINUTES
     scheduler.add_job(
         cleanup_old_snapshots,
-        trigger=IntervalTrigger(hours=24),
+        trigger=IntervalTrigger(minutes=RETENTION_INTERVAL_MINUTES),
         id="cleanup_pool_snapshots",
-        name="Cleanup old pool snapshots",
+        name="Roll up and clean up pool snapshots",
         replace_existing=True,
     )
 
@@ -1149,6 +1148,92 @@ def start_scheduler():
         HOMEPAGE_AIRPORT_QUOTE_REFRESH_MINUTE,
     )
 
+    from booking_stats import (
+        BOOKING_STATS_RECONCILE_HOUR,
+        BOOKING_STATS_RECONCILE_MINUTE,
+        reconcile_booking_stats,
+    )
+
+    scheduler.add_job(
+        lambda: reconcile_booking_stats(SessionLocal),
+        trigger=CronTrigger(
+            hour=BOOKING_STATS_RECONCILE_HOUR,
+            minute=BOOKING_STATS_RECONCILE_MINUTE,
+            timezone=pytz.timezone("Europe/London"),
+        ),
+        id="booking_stats_reconcile",
+        name="Rebuild booking stats rollup and log drift",
+        replace_existing=True,
+        misfire_grace_time=3600,
+    )
+    logger.info(
+        "Booking stats reconcile scheduled at %02d:%02d Europe/London",
+        BOOKING_STATS_RECONCILE_HOUR,
+        BOOKING_STATS_RECONCILE_MINUTE,
+    )
+
+    from occupancy_timeline import (
+        OCCUPANCY_TIMELINE_REFRESH_HOUR,
+        OCCUPANCY_TIMELINE_REFRESH_MINUTE,
+        refresh_occupancy_timeline,
+    )
+
+    scheduler.add_job(
+        lambda: refresh_occupancy_timeline(SessionLocal),
+        trigger=CronTrigger(
+            hour=OCCUPANCY_TIMELINE_REFRESH_HOUR,
+            minute=OCCUPANCY_TIMELINE_REFRESH_MINUTE,
+            timezone=pytz.timezone("Europe/London"),
+        ),
+        id="occupancy_timeline_refresh",
+        name="Rebuild the intraday occupancy timeline window",
+        replace_existing=True,
+        misfire_grace_time=3600,
+        # Also fill the window shortly after startup: reads never store
+        # rows, so a fresh deploy would otherwise wait for the night.
+        next_run_time=datetime.now() + timedelta(minutes=2),
+    )
+    logger.info(
+        "Occupancy timeline refresh scheduled at %02d:%02d Europe/London",
+        OCCUPANCY_TIMELINE_REFRESH_HOUR,
+        OCCUPANCY_TIMELINE_REFRESH_MINUTE,
+    )
+
+    from booking_forecast import (
+        BOOKING_FORECAST_HOUR,
+        BOOKING_FORECAST_MINUTE,
+        refresh_booking_forecast,
+    )
+
+    scheduler.add_job(
+        lambda: refresh_booking_forecast(SessionLocal),
+        trigger=CronTrigger(
+            hour=BOOKING_FORECAST_HOUR,
+            minute=BOOKING_FORECAST_MINUTE,
+            timezone=pytz.timezone("Europe/London"),
+        ),
+        id="booking_forecast_refresh",
+        name="Compute and store the bookings forecast",
+        replace_existing=True,
+        misfire_grace_time=3600,
+    )
+    logger.info(
+        "Booking forecast refresh scheduled at %02d:%02d Europe/London",
+        BOOKING_FORECAST_HOUR,
+        BOOKING_FORECAST_MINUTE,
+    )
+
+    # Admin report warm-up: one staggered job per standard view, first run
+    # shortly after startup so a deploy never leaves the cache cold.
+    from report_warmup import WARMUP_CHECK_MINUTES, schedule_report_warmup
+
+    warmed = schedule_report_warmup(scheduler, SessionLocal)
+    logger.info(
+        "Report warm-up scheduled for %d views every %d min",
+        warmed,
+        WARMUP_CHECK_MINUTES,
+    )
+
     from flight_board_service import (
         FLIGHT_BOARD_SCRAPE_INTERVAL_MINUTES,
         FLIGHT_BOARD_SCRAPE_JITTER_SECONDS,
@@ -0,0 +1,206 @@
+"""Keeping blocking work off the event loop, and noticing when it isn't.
+
+Almost every handler in main.py used to be declared `async def` while doing
+synchronous SQLAlchemy queries, Stripe SDK calls and SendGrid sends, so all
+of it ran on the event loop and one slow query stalled every other request
+in the process. Handlers are now split two ways:
+
+- Plain `def`: anything that uses the request Session or a blocking SDK and
+  has nothing to await. FastAPI runs these on its worker threads, capped at
+  REQUEST_THREADS (the DB pool's size plus overflow by default: a thread
+  beyond that would only queue for a connection). SMS sends, which mix
+  httpx with session writes, run their coroutine there with asyncio.run().
+- `async def`: handlers that await real async I/O (the raw request body,
+  httpx, the SSE streams, the report cache). Their blocking
+  parts go through run_blocking(), which runs them on BLOCKING_EXECUTOR, a
+  dedicated pool of BLOCKING_THREADS threads, so a burst of them cannot
+  take every request thread. The report cache runs synchronous computes
+  there too.
+
+tests/mocked/test_event_loop_blocking.py fails when a new async route or
+async dependency takes a database session.
+
+LoopLagMonitor watches the loop itself. A heartbeat task sleeps
+LOOP_LAG_CHECK_SECONDS at a time and measures how late it wakes; a watchdog
+thread notices a late heartbeat while the stall is still happening and
+samples the loop thread's stack, so the warning names the route (and the
+app frame) that held the loop. Counts and the worst stalls are served by
+/api/admin/event-loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BLOCKING_THREADS = int(os.environ.get("BLOCKING_THREADS", "16"))
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get("LOOP_LAG_THRESHOLD_MS", "250"))
+LOOP_LAG_CHECK_SECONDS = 0.1
+
+BLOCKING_EXECUTOR = ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="blocking")
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Set by configure_request_threads(); None until the app has started.
+request_threads: Optional[int] = None
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on BLOCKING_EXECUTOR and await its result."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(BLOCKING_EXECUTOR, contextvars.copy_context().run, call)
+
+
+def configure_request_threads(limit: Optional[int] = None) -> int:
+    """Cap the worker threads FastAPI runs plain `def` handlers on.
+
+    Must be called on the event loop. Defaults to REQUEST_THREADS, or the
+    DB pool's size plus overflow when that is unset.
+    """
+    import anyio.to_thread
+
+    global request_threads
+    if limit is None:
+        from database import MAX_OVERFLOW, POOL_SIZE
+
+        limit = int(os.environ.get("REQUEST_THREADS", POOL_SIZE + MAX_OVERFLOW))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = limit
+    request_threads = limit
+    return limit
+
+
+def _is_app_code(filename: str) -> bool:
+    return filename.startswith(_APP_DIR) and os.path.basename(filename) != "event_loop_guard.py"
+
+
+class LoopLagMonitor:
+    """Logs the route holding the event loop whenever it stalls."""
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_THRESHOLD_MS, interval: float = LOOP_LAG_CHECK_SECONDS):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self._endpoints: dict = {}  # endpoint code object -> "METHODS /path"
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._beat = 0.0
+        self._suspect: Optional[tuple] = None  # (beat, route, location) of the current stall
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+        self.by_route: Counter = Counter()
+        self.last_stall: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register_routes(self, routes: Iterable) -> None:
+        """Map each route's endpoint code to its path, for attributing stalls."""
+        for route in routes:
+            code = getattr(getattr(route, "endpoint", None), "__code__", None)
+            if code is not None:
+                methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+                self._endpoints[code] = f"{methods} {route.path}".strip()
+
+    def start(self) -> None:
+        """Start the heartbeat and watchdog. Must be called on the event loop."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            slept_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = self._beat - slept_at - self.interval
+            if lag >= self.threshold:
+                self.record_stall(lag)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            if time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            with self._lock:
+                if self._suspect is not None and self._suspect[0] == beat:
+                    continue  # this stall is already sampled
+            route, location = self.blocked_at()
+            with self._lock:
+                self._suspect = (beat, route, location)
+
+    def blocked_at(self) -> tuple:
+        """(route, "file:line in function") the loop thread is executing now."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        route = location = None
+        while frame is not None and route is None:
+            code = frame.f_code
+            if location is None and _is_app_code(code.co_filename):
+                location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+            route = self._endpoints.get(code)
+            frame = frame.f_back
+        return route, location
+
+    def record_stall(self, lag: float) -> None:
+        """Count and log a stall of `lag` seconds, blamed on the sampled route."""
+        with self._lock:
+            suspect, self._suspect = self._suspect, None
+        route, location = suspect[1:] if suspect else (None, None)
+        lag_ms = round(lag * 1000, 1)
+        self.stalls += 1
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.by_route[route or "unknown"] += 1
+        self.last_stall = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "lag_ms": lag_ms,
+            "route": route,
+            "location": location,
+        }
+        logger.warning(
+            "Event loop blocked for %.0f ms by %s at %s",
+            lag_ms, route or "an unknown route", location or "an unknown location",
+        )
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "check_seconds": self.interval,
+            "stalls": self.stalls,
+            "max_lag_ms": self.max_lag_ms,
+            "stalls_by_route": dict(self.by_route.most_common(20)),
+            "last_stall": self.last_stall,
+            "request_threads": request_threads,
+            "blocking_threads": BLOCKING_THREADS,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -1,18 +1,30 @@
 """Persistence + scheduling helpers for the BOH arrivals/departures board.
 
 The 30-minute scheduler job (registered in email_scheduler.start_scheduler,
-gated by FLIGHT_BOARD_SCRAPE_ENABLED) calls the quote worker, then:
-  1. stores a FlightBoardSnapshot — the live board /employee displays;
-  2. upserts FlightScheduleHistory — SCHEDULED times only, one row per
-     (direction, flight_date, flight_number), the long-term demand signal;
-  3. prunes snapshots older than 30 days (history is never pruned).
+gated by FLIGHT_BOARD_SCRAPE_ENABLED) calls the quote worker, then hashes the
+canonicalised board and compares it with the latest ok snapshot:
+  - unchanged: only the latest snapshot's last_seen_at is bumped — no new
+    row, no history upsert, no prune;
+  - changed:
+    1. stores a FlightBoardSnapshot — the live board /employee displays —
+       with its content hash and a per-flight diff against the previous one;
+    2. upserts FlightScheduleHistory — SCHEDULED times only, one row per
+       (direction, flight_date, flight_number), the long-term demand signal;
+    3. prunes snapshots not seen for 30 days (history is never pruned);
+    4. after commit, publishes to the in-memory live board and hands the
+       diff to flight_delay_propagation for booking/shift impacts.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
+import threading
+from collections import deque
 from datetime import date, datetime, timedelta, timezone
+from typing import Optional
 
 import pytz
 
@@ -27,6 +39,12 @@ FLIGHT_BOARD_SCRAPE_INTERVAL_MINUTES = 30
 FLIGHT_BOARD_SCRAPE_JITTER_SECONDS = 240
 FLIGHT_BOARD_SNAPSHOT_RETENTION_DAYS = 30
 
+# Row fields whose change is reported in a snapshot's diff. The BOH widget
+# has no gate column today; "gate" is carried so a board that grows one is
+# diffed without a code change.
+BOARD_DIFF_FIELDS = ("scheduled", "status", "gate")
+BOARD_KEYS = (("arrival", "arrivals"), ("departure", "departures"))
+
 UK_TZ = pytz.timezone("Europe/London")
 
 
@@ -70,6 +88,202 @@ def build_history_rows(board: dict, *, today: date, now: datetime) -> list[dict]
     return list(by_key.values())
 
 
+def _canonical_value(value):
+    if isinstance(value, str):
+        return " ".join(value.split()) or None
+    return value
+
+
+def canonicalize_board(board: dict) -> dict:
+    """Order- and whitespace-insensitive form of a board, for hashing.
+
+    Rows are sorted so the airport re-ordering an identical board (it does
+    when two flights share a scheduled time) does not count as a change.
+    `source_url` and other transport metadata are left out.
+    """
+    canonical = {}
+    for _, board_key in BOARD_KEYS:
+        rows = [
+            {key: _canonical_value(value) for key, value in sorted(row.items())}
+            for row in board.get(board_key) or []
+        ]
+        rows.sort(key=lambda row: json.dumps(row, sort_keys=True))
+        canonical[board_key] = rows
+    return canonical
+
+
+def board_content_hash(board: dict) -> str:
+    payload = json.dumps(canonicalize_board(board), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _rows_by_flight(board: dict) -> dict[tuple, dict]:
+    by_key: dict[tuple, dict] = {}
+    for direction, board_key in BOARD_KEYS:
+        for row in board.get(board_key) or []:
+            flight = _canonical_value(row.get("flight"))
+            if not flight:
+                continue
+            by_key[(direction, _canonical_value(row.get("date")), flight)] = row
+    return by_key
+
+
+def diff_boards(previous: dict, current: dict) -> list[dict]:
+    """Per-flight changes between two boards.
+
+    Flights are matched on (direction, board date, flight number). Each entry
+    is one of ``added`` / ``removed`` / ``changed``; ``changed`` entries list
+    only the BOARD_DIFF_FIELDS that moved as ``{field: {"from", "to"}}``.
+    Pure so the matching rules are unit-testable.
+    """
+    before = _rows_by_flight(previous)
+    after = _rows_by_flight(current)
+    changes = []
+    for key in sorted(before.keys() | after.keys(), key=lambda k: tuple(part or "" for part in k)):
+        direction, board_date, flight = key
+        entry = {"direction": direction, "date": board_date, "flight": flight}
+        old_row, new_row = before.get(key), after.get(key)
+        if old_row is None:
+            changes.append({**entry, "change": "added", "row": new_row})
+        elif new_row is None:
+            changes.append({**entry, "change": "removed", "row": old_row})
+        else:
+            fields = {
+                field: {"from": old_row.get(field), "to": new_row.get(field)}
+                for field in BOARD_DIFF_FIELDS
+                if _canonical_value(old_row.get(field)) != _canonical_value(new_row.get(field))
+            }
+            if fields:
+                changes.append({**entry, "change": "changed", "fields": fields})
+    return changes
+
+
+# How many board versions of per-flight changes the live board keeps for
+# incremental catch-up; a client further behind than this gets a full resync.
+LIVE_BOARD_CHANGE_HISTORY = 48
+
+
+class LiveFlightBoard:
+    """Process-local copy of the latest ok board for /employee.
+
+    Versioned by snapshot id, so a version is the same across restarts and
+    workers and a client's `since` stays meaningful after a deploy. The
+    scrape job publishes into it after committing; the employee endpoints
+    read from it and only touch the database to prime it on a cold start.
+    Thread-safe: the scrape runs on the APScheduler thread, readers on the
+    event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.version: Optional[int] = None
+            self.arrivals: list = []
+            self.departures: list = []
+            self.scraped_at: Optional[datetime] = None
+            self._changes: deque = deque(maxlen=LIVE_BOARD_CHANGE_HISTORY)
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def prime(self, snapshot) -> None:
+        """Load from a FlightBoardSnapshot row unless a newer board is held."""
+        with self._lock:
+            if self.version is not None and self.version >= snapshot.id:
+                return
+            self._load(snapshot.id, _snapshot_board(snapshot), _snapshot_seen_at(snapshot))
+            self._changes.clear()
+
+    def publish(self, version: int, board: dict, scraped_at: datetime, diff: Optional[list]) -> None:
+        """Install a changed board and record which flights moved."""
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return
+            previous_version = self.version
+            self._load(version, board, scraped_at)
+            if previous_version is None or diff is None:
+                self._changes.clear()
+                return
+            rows = _rows_by_flight(board)
+            updates = []
+            for change in diff:
+                update = {key: change[key] for key in ("direction", "date", "flight", "change")}
+                if change["change"] != "removed":
+                    update["row"] = rows.get((change["direction"], change["date"], change["flight"]))
+                updates.append(update)
+            self._changes.append((previous_version, version, updates))
+
+    def touch(self, version: int, scraped_at: datetime) -> None:
+        """An unchanged re-scrape: the board is fresher, the version is not."""
+        with self._lock:
+            if self.version == version:
+                self.scraped_at = scraped_at
+
+    def _load(self, version: int, board: dict, scraped_at: Optional[datetime]) -> None:
+        self.version = version
+        self.arrivals = list(board.get("arrivals") or [])
+        self.departures = list(board.get("departures") or [])
+        self.scraped_at = scraped_at
+
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "arrivals": self.arrivals,
+                "departures": self.departures,
+                "scraped_at": self.scraped_at,
+            }
+
+    def changes_since(self, since: Optional[int]) -> Optional[list]:
+        """Flight updates from `since` to the current version, oldest first.
+
+        None means the chain from `since` is not held (unknown or too old
+        version) and the caller must send the full board instead.
+        """
+        with self._lock:
+            if since is None or self.version is None:
+                return None
+            if since == self.version:
+                return []
+            updates = []
+            cursor = since
+            for from_version, to_version, batch in self._changes:
+                if from_version == cursor:
+                    updates.extend(batch)
+                    cursor = to_version
+            return updates if cursor == self.version else None
+
+
+live_flight_board = LiveFlightBoard()
+
+
+def _snapshot_seen_at(snapshot) -> Optional[datetime]:
+    # last_seen_at is NULL on snapshots written before change detection.
+    return snapshot.last_seen_at or snapshot.created_at
+
+
+def _latest_ok_snapshot(db):
+    from db_models import FlightBoardSnapshot
+
+    return (
+        db.query(FlightBoardSnapshot)
+        .filter(FlightBoardSnapshot.status == "ok")
+        .order_by(FlightBoardSnapshot.created_at.desc())
+        .first()
+    )
+
+
+def _snapshot_board(snapshot) -> dict:
+    return {
+        "arrivals": snapshot.arrivals_json or [],
+        "departures": snapshot.departures_json or [],
+    }
+
+
 def upsert_flight_schedule_history(db, board: dict) -> int:
     """Upsert history rows; a re-timed flight updates scheduled_time and
     last_seen_at while first_seen_at keeps the original sighting."""
@@ -97,6 +311,14 @@ def upsert_flight_schedule_history(db, board: dict) -> int:
 
 
 def prune_old_flight_snapshots(db) -> int:
+    """Delete snapshots last seen more than the retention window ago.
+
+    Keyed on last_seen_at (falling back to created_at for rows written before
+    change detection) so a board that stays identical for weeks is never
+    pruned out from under /employee.
+    """
+    from sqlalchemy import func
+
     from db_models import FlightBoardSnapshot
 
     cutoff = datetime.now(timezone.utc) - timedelta(
@@ -104,17 +326,44 @@ def prune_old_flight_snapshots(db) -> int:
     )
     return (
         db.query(FlightBoardSnapshot)
-        .filter(FlightBoardSnapshot.created_at < cutoff)
+        .filter(
+            func.coalesce(FlightBoardSnapshot.last_seen_at, FlightBoardSnapshot.created_at)
+            < cutoff
+        )
         .delete(synchronize_session=False)
     )
 
 
+def _propagate_board_changes(db, snapshot_id: int, board: dict, diff: list) -> None:
+    """Turn a committed board diff into booking/shift impacts.
+
+    Its own commit, after the snapshot's: a propagation failure must never
+    cost us the board itself.
+    """
+    from flight_delay_propagation import propagate_board_changes
+
+    try:
+        summary = propagate_board_changes(
+            db, snapshot_id=snapshot_id, board=board, diff=diff, today=uk_today(),
+        )
+        db.commit()
+        logger.info(
+            "flight_board_propagation: snapshot_id=%s flights=%s bookings=%s shifts=%s",
+            snapshot_id, summary["flights"], summary["bookings"], summary["shifts"],
+        )
+    except Exception:
+        db.rollback()
+        logger.exception("flight_board_propagation failed: snapshot_id=%s", snapshot_id)
+
+
 def process_flight_board_scrape(session_factory) -> None:
     """Scheduler entry point: scrape via the worker and persist results.
 
     Failures store an `error` snapshot for observability but never touch
     history and never remove the last good board — /employee keeps serving
-    the most recent `ok` snapshot with its age displayed.
+    the most recent `ok` snapshot with its age displayed. A board whose hash
+    matches the latest ok snapshot only refreshes that snapshot's
+    last_seen_at.
     """
     from airport_quote_worker_client import (
         fetch_flight_board_via_worker,
@@ -140,21 +389,57 @@ def process_flight_board_scrape(session_factory) -> None:
         if board is None:
             db.add(FlightBoardSnapshot(status="error", error=error))
         else:
-            db.add(
-                FlightBoardSnapshot(
+            now = datetime.now(timezone.utc)
+            content_hash = board_content_hash(board)
+            previous = _latest_ok_snapshot(db)
+            previous_hash = previous.content_hash if previous is not None else None
+            if previous is not None and previous_hash is None:
+                # Snapshot stored before change detection — hash it in place.
+                previous_hash = board_content_hash(_snapshot_board(previous))
+            if previous is not None and previous_hash == content_hash:
+                previous.last_seen_at = now
+                published = ("touch", previous.id)
+                logger.info(
+                    "flight_board_scrape unchanged: snapshot_id=%s hash=%s",
+                    previous.id, content_hash[:12],
+                )
+            else:
+                if previous is not None:
+                    # Cold process: hold the previous board so this scrape's
+                    # diff can be served as changes rather than a resync.
+                    live_flight_board.prime(previous)
+                diff = (
+                    diff_boards(_snapshot_board(previous), board)
+                    if previous is not None else None
+                )
+                snapshot = FlightBoardSnapshot(
                     status="ok",
                     arrivals_json=board["arrivals"],
                     departures_json=board["departures"],
                     source_url=board.get("source_url"),
+                    content_hash=content_hash,
+                    diff_json=diff,
+                    last_seen_at=now,
+                )
+                db.add(snapshot)
+                published = ("publish", snapshot, diff)
+                upserted = upsert_flight_schedule_history(db, board)
+                pruned = prune_old_flight_snapshots(db)
+                logger.info(
+                    "flight_board_scrape ok: arrivals=%s departures=%s changes=%s "
+                    "history_upserts=%s pruned=%s",
+                    len(board["arrivals"]), len(board["departures"]),
+                    len(diff) if diff is not None else "initial", upserted, pruned,
                 )
-            )
-            upserted = upsert_flight_schedule_history(db, board)
-            pruned = prune_old_flight_snapshots(db)
-            logger.info(
-                "flight_board_scrape ok: arrivals=%s departures=%s history_upserts=%s pruned=%s",
-                len(board["arrivals"]), len(board["departures"]), upserted, pruned,
-            )
         db.commit()
+        if board is not None:
+            # Only after commit, so drivers never see a board that rolled back.
+            if published[0] == "touch":
+                live_flight_board.touch(published[1], now)
+            else:
+                live_flight_board.publish(published[1].id, board, now, published[2])
+                if published[2]:
+                    _propagate_board_changes(db, published[1].id, board, published[2])
     except Exception:
         db.rollback()
         logger.exception("flight_board_scrape persistence failed")
@@ -0,0 +1,345 @@
+"""Carry arrival changes on the BOH flight board through to bookings and shifts.
+
+Fed by each changed scrape's diff (FlightBoardSnapshot.diff_json), never by
+the whole board: only arrivals whose status or scheduled time moved are
+looked at, matched to confirmed bookings through the
+(pickup_flight_number, flight_arrival_date) index, and only those bookings
+and the roster shifts linked to them are touched.
+
+For each matched booking the board's expected landing ("Expected 20:40",
+"Landed 14:41", or the scheduled time) is compared with the booked landing.
+A booking impact is written when the difference reaches
+FLIGHT_DELAY_IMPACT_MINUTES, when the flight is cancelled/diverted, or when
+a booking that already has an impact moves again (including back on time,
+so the planner sees the delay clear). Each roster shift linked to an
+impacted booking gets one shift impact saying whether it still covers the
+revised pickups and by how much it overruns.
+
+Departures are ignored: a departure delay does not move the customer's
+drop-off.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from flight_board_scraper import parse_board_hhmm, resolve_board_date
+
+logger = logging.getLogger(__name__)
+
+FLIGHT_DELAY_IMPACT_MINUTES = 15
+# Standard arrival -> handoff offset, same as auto_roster._events_for_booking.
+PICKUP_HANDOFF_MINUTES = 30
+
+# The board shows ICAO prefixes for some carriers where bookings carry the
+# IATA code the customer sees on their ticket (TUI: TOM on the board, BY on
+# the booking).
+BOARD_AIRLINE_ALIASES = {"TOM": ("BY",)}
+
+_BOARD_TIME_RE = re.compile(r"(\d{1,2}:\d{2})")
+_FLIGHT_RE = re.compile(r"([A-Z0-9]{2}[A-Z]?)\s*(\d{1,5}[A-Z]?)$")
+
+
+def normalize_flight_number(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    normalized = "".join(value.split()).upper()
+    return normalized or None
+
+
+def board_flight_candidates(flight: str) -> list[str]:
+    """Every spelling a booking might store for a board flight number.
+
+    Bookings made from the flights table store the carrier-prefixed number;
+    manual ones sometimes carry a space ("U2 4567"), the IATA alias, or the
+    bare number with the carrier in pickup_airline_code.
+    """
+    normalized = normalize_flight_number(flight)
+    if not normalized:
+        return []
+    candidates = {normalized}
+    match = _FLIGHT_RE.match(normalized)
+    if match:
+        prefix, number = match.groups()
+        for code in (prefix, *BOARD_AIRLINE_ALIASES.get(prefix, ())):
+            candidates.add(f"{code}{number}")
+            candidates.add(f"{code} {number}")
+        candidates.add(number)
+    return sorted(candidates)
+
+
+def _booking_flight_keys(booking) -> set[str]:
+    normalized = normalize_flight_number(booking.pickup_flight_number)
+    if not normalized:
+        return set()
+    keys = {normalized}
+    if normalized.isdigit() and booking.pickup_airline_code:
+        keys.add(normalize_flight_number(booking.pickup_airline_code) + normalized)
+    return keys
+
+
+def _board_flight_keys(flight: str) -> set[str]:
+    # A bare number only matches once the booking's airline code is prefixed
+    # (see _booking_flight_keys), never on its own.
+    return {
+        normalize_flight_number(c) for c in board_flight_candidates(flight)
+        if not c.isdigit()
+    }
+
+
+def parse_board_arrival_status(status: Optional[str]) -> tuple[Optional[time], Optional[str]]:
+    """(expected landing time, 'cancelled' | 'diverted' | None) from status text."""
+    text = (status or "").lower()
+    if "cancel" in text:
+        return None, "cancelled"
+    if "divert" in text:
+        return None, "diverted"
+    match = _BOARD_TIME_RE.search(status or "")
+    return (parse_board_hhmm(match.group(1)) if match else None), None
+
+
+def revised_arrival_at(flight_date: date, scheduled: time, expected: Optional[time]) -> datetime:
+    """Expected landing as a datetime on the right side of midnight.
+
+    The board gives bare HH:MM; an expected time more than 12h before the
+    scheduled one is the next day (23:50 running to 00:30), more than 12h
+    after is the previous day (00:10 landing early at 23:55).
+    """
+    scheduled_at = datetime.combine(flight_date, scheduled)
+    if expected is None:
+        return scheduled_at
+    revised = datetime.combine(flight_date, expected)
+    if revised - scheduled_at < -timedelta(hours=12):
+        revised += timedelta(days=1)
+    elif revised - scheduled_at > timedelta(hours=12):
+        revised -= timedelta(days=1)
+    return revised
+
+
+def changed_arrivals(board: dict, diff: list, *, today: date) -> list[dict]:
+    """Arrivals from the diff whose landing may have moved, with the current row."""
+    from flight_board_service import _rows_by_flight
+
+    rows = _rows_by_flight(board)
+    out = []
+    for change in diff or []:
+        if change.get("direction") != "arrival" or change.get("change") == "removed":
+            continue
+        if change.get("change") == "changed" and not (
+            {"status", "scheduled"} & set(change.get("fields") or {})
+        ):
+            continue
+        row = rows.get((change["direction"], change["date"], change["flight"]))
+        if not row:
+            continue
+        flight_date = resolve_board_date(row.get("date"), today)
+        scheduled = parse_board_hhmm(row.get("scheduled"))
+        if not (flight_date and scheduled and change["flight"]):
+            continue
+        expected, flag = parse_board_arrival_status(row.get("status"))
+        out.append({
+            "flight": change["flight"],
+            "flight_date": flight_date,
+            "status": " ".join((row.get("status") or "").split()) or None,
+            "revised_at": None if flag else revised_arrival_at(flight_date, scheduled, expected),
+            "flag": flag,
+        })
+    return out
+
+
+def _booked_landing(booking) -> Optional[datetime]:
+    from auto_roster import _events_for_booking
+
+    for event_type, start_anchor, _ in _events_for_booking(booking):
+        if event_type == "pick_up":
+            return start_anchor
+    return None
+
+
+def _minutes(delta: timedelta) -> int:
+    return int(delta.total_seconds() // 60)
+
+
+def propagate_board_changes(db, *, snapshot_id: Optional[int], board: dict, diff: list,
+                            today: date) -> dict:
+    """Write booking and shift impacts for one board diff. Caller commits.
+
+    Three reads regardless of how busy the day is: the matching bookings,
+    their latest earlier impacts, and the shifts linked to them.
+    """
+    from sqlalchemy import and_, or_
+
+    from auto_roster import _shift_window
+    from db_models import (
+        Booking,
+        BookingStatus,
+        FlightDelayImpact,
+        RosterShift,
+        ShiftBookingLink,
+        ShiftStatus,
+    )
+
+    summary = {"flights": 0, "bookings": 0, "shifts": 0}
+    arrivals = changed_arrivals(board, diff, today=today)
+    summary["flights"] = len(arrivals)
+    if not arrivals:
+        return summary
+
+    candidates = sorted({c for a in arrivals for c in board_flight_candidates(a["flight"])})
+    dates = {a["flight_date"] for a in arrivals}
+    # Legacy rows without flight_arrival_date: pickup_date is the landing day
+    # or, after an overnight rollover, the day after.
+    legacy_dates = dates | {d + timedelta(days=1) for d in dates}
+    bookings = (
+        db.query(Booking)
+        .filter(
+            Booking.pickup_flight_number.in_(candidates),
+            Booking.status == BookingStatus.CONFIRMED,
+            or_(
+                Booking.flight_arrival_date.in_(dates),
+                and_(Booking.flight_arrival_date.is_(None), Booking.pickup_date.in_(legacy_dates)),
+            ),
+        )
+        .all()
+    )
+
+    matches = []
+    for arrival in arrivals:
+        keys = _board_flight_keys(arrival["flight"])
+        for booking in bookings:
+            booked_at = _booked_landing(booking)
+            if booked_at is None or booked_at.date() != arrival["flight_date"]:
+                continue
+            if keys & _booking_flight_keys(booking):
+                matches.append((arrival, booking, booked_at))
+    if not matches:
+        return summary
+
+    previous = {}
+    for impact in (
+        db.query(FlightDelayImpact)
+        .filter(
+            FlightDelayImpact.impact_type == "booking",
+            FlightDelayImpact.booking_id.in_([b.id for _, b, _ in matches]),
+        )
+        .order_by(FlightDelayImpact.id)
+        .all()
+    ):
+        previous[impact.booking_id] = impact
+
+    impacted = {}
+    for arrival, booking, booked_at in matches:
+        revised_at = arrival["revised_at"]
+        delay = _minutes(revised_at - booked_at) if revised_at else None
+        prior = previous.get(booking.id)
+        if prior is None:
+            if arrival["flag"] is None and abs(delay) < FLIGHT_DELAY_IMPACT_MINUTES:
+                continue
+        elif prior.revised_arrival_at == revised_at and prior.board_status == arrival["status"]:
+            continue
+        db.add(FlightDelayImpact(
+            snapshot_id=snapshot_id,
+            impact_type="booking",
+            booking_id=booking.id,
+            flight_number=arrival["flight"],
+            flight_date=arrival["flight_date"],
+            board_status=arrival["status"],
+            booked_arrival_at=booked_at,
+            revised_arrival_at=revised_at,
+            delay_minutes=delay,
+            detail_json={
+                "reference": booking.reference,
+                "flag": arrival["flag"],
+                "revised_pickup_at": (
+                    (revised_at + timedelta(minutes=PICKUP_HANDOFF_MINUTES)).isoformat()
+                    if revised_at else None
+                ),
+            },
+        ))
+        impacted[booking.id] = (arrival, booking, revised_at, delay)
+    summary["bookings"] = len(impacted)
+    if not impacted:
+        return summary
+
+    # Columns only: loading RosterShift entities would pull every shift's
+    # full booking list through the selectin relationship.
+    links = (
+        db.query(
+            RosterShift.id, RosterShift.date, RosterShift.start_time,
+            RosterShift.end_time, ShiftBookingLink.booking_id,
+        )
+        .join(ShiftBookingLink, ShiftBookingLink.shift_id == RosterShift.id)
+        .filter(
+            ShiftBookingLink.booking_id.in_(list(impacted)),
+            RosterShift.status != ShiftStatus.CANCELLED,
+        )
+        .all()
+    )
+    shift_bookings: dict[int, tuple] = {}
+    for shift in links:
+        shift_bookings.setdefault(shift.id, (shift, set()))[1].add(shift.booking_id)
+
+    for shift, booking_ids in shift_bookings.values():
+        span_start, span_end = _shift_window(shift)
+        covered = True
+        overrun = 0
+        affected = []
+        for booking_id in sorted(booking_ids):
+            arrival, booking, revised_at, delay = impacted[booking_id]
+            affected.append({
+                "booking_id": booking_id,
+                "reference": booking.reference,
+                "flight": arrival["flight"],
+                "delay_minutes": delay,
+                "flag": arrival["flag"],
+            })
+            if revised_at is None:
+                continue
+            handoff_at = revised_at + timedelta(minutes=PICKUP_HANDOFF_MINUTES)
+            if not (span_start <= revised_at and handoff_at <= span_end):
+                covered = False
+            overrun = max(overrun, _minutes(handoff_at - span_end))
+        first = impacted[min(booking_ids)][0]
+        db.add(FlightDelayImpact(
+            snapshot_id=snapshot_id,
+            impact_type="shift",
+            shift_id=shift.id,
+            flight_date=first["flight_date"],
+            still_covered=covered,
+            overrun_minutes=overrun,
+            detail_json={"bookings": affected},
+        ))
+    summary["shifts"] = len(shift_bookings)
+    return summary
+
+
+def pending_flight_impacts(db, *, limit: int = 500) -> list:
+    """Unconsumed impacts, oldest first, for the planner."""
+    from db_models import FlightDelayImpact
+
+    return (
+        db.query(FlightDelayImpact)
+        .filter(FlightDelayImpact.consumed_at.is_(None))
+        .order_by(FlightDelayImpact.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def mark_flight_impacts_consumed(db, impact_ids: list[int], *, now: datetime) -> int:
+    """Stamp consumed_at on the given impacts. Caller commits."""
+    from db_models import FlightDelayImpact
+
+    if not impact_ids:
+        return 0
+    return (
+        db.query(FlightDelayImpact)
+        .filter(
+            FlightDelayImpact.id.in_(impact_ids),
+            FlightDelayImpact.consumed_at.is_(None),
+        )
+        .update({FlightDelayImpact.consumed_at: now}, synchronize_session=False)
+    )
@@ -0,0 +1,296 @@
+"""Materialised booking-flow funnel (funnel_sessions).
+
+/api/admin/reports/session-tracking used to load every funnel AuditLog row
+since the start of the range and rebuild each session's steps in Python on
+every request, so its cost grew with total traffic. It now reads
+funnel_sessions: one row per booking-flow session holding the first time it
+reached each step, its booking reference, source and outcome. The report
+is a grouped count per step and UK day.
+
+Sessions are keyed like the old report deduplicated them: the frontend
+session_id, else "ref_<booking_reference>", else "anon_<audit id>". A
+Stripe webhook confirmation carries no session_id, so it is matched to the
+session whose payment_initiated event carried the same booking reference.
+BOOKING_CONFIRMED rows with neither a session nor a reference are ghosts
+(see test_session_tracking_ghost_hueb.py) and are skipped.
+
+install_funnel_tracking() hooks a sessionmaker so every funnel AuditLog row
+written through it updates its session row before commit, inside a
+savepoint: a failure is logged and leaves the audit write alone. Existing
+audit rows are loaded with the backfill command:
+
+    python funnel_sessions.py --backfill
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+FUNNEL_STAGES = [
+    ("dates_selected", "Dates Selected"),
+    ("flight_selected", "Flight Selected"),
+    ("customer_entered", "Details Entered"),
+    ("payment_initiated", "Payment Started"),
+    ("booking_confirmed", "Booking Confirmed"),
+]
+STAGE_COLUMNS = {stage: f"{stage}_at" for stage, _ in FUNNEL_STAGES}
+# Steps logged by the booking page itself; the rest are logged server-side.
+_WEB_STAGES = {"dates_selected", "flight_selected"}
+BACKFILL_YIELD_PER = 1000
+
+_PENDING_EVENTS_KEY = "funnel_session_events"
+
+
+def _event_name(event) -> str:
+    return event.value if hasattr(event, "value") else str(event)
+
+
+def _tracked_events() -> list:
+    from db_models import AuditLogEvent
+
+    return [AuditLogEvent(stage) for stage in STAGE_COLUMNS] + [AuditLogEvent.PAYMENT_FAILED]
+
+
+def session_key(session_id, booking_reference, audit_id) -> str:
+    return session_id or (f"ref_{booking_reference}" if booking_reference else f"anon_{audit_id}")
+
+
+def _as_utc(stamp: Optional[datetime]) -> datetime:
+    if stamp is None:
+        return datetime.now(timezone.utc)
+    if stamp.tzinfo is None:
+        return stamp.replace(tzinfo=timezone.utc)
+    return stamp
+
+
+def _earliest(current, stamp):
+    return stamp if current is None or stamp < _as_utc(current) else current
+
+
+def _latest(current, stamp):
+    return stamp if current is None or stamp > _as_utc(current) else current
+
+
+class _RowFinder:
+    """Looks up funnel rows by key or booking reference.
+
+    Rows touched in this batch are remembered, so a commit carrying several
+    events for one session does not insert it twice (autoflush may be off).
+    With `from_db=False` (the backfill) nothing is read from the database.
+    """
+
+    def __init__(self, db, from_db: bool = True):
+        self.db = db
+        self.from_db = from_db
+        self.rows = {}
+        self.by_reference = {}
+
+    def by_key(self, key):
+        row = self.rows.get(key)
+        if row is None and self.from_db:
+            from db_models import FunnelSession
+
+            row = self.db.query(FunnelSession).filter(FunnelSession.session_key == key).first()
+            if row is not None:
+                self.rows[key] = row
+        return row
+
+    def for_reference(self, reference):
+        row = self.by_reference.get(reference)
+        if row is None and self.from_db:
+            from db_models import FunnelSession
+
+            row = (
+                self.db.query(FunnelSession)
+                .filter(FunnelSession.booking_reference == reference)
+                .order_by(FunnelSession.first_event_at.desc())
+                .first()
+            )
+            if row is not None:
+                self.rows.setdefault(row.session_key, row)
+        return row
+
+    def add(self, row):
+        self.rows[row.session_key] = row
+        if self.from_db:
+            self.db.add(row)
+
+    def remember_reference(self, row):
+        if row.booking_reference:
+            self.by_reference.setdefault(row.booking_reference, row)
+
+
+def apply_funnel_event(finder: _RowFinder, event, session_id, booking_reference, occurred_at, audit_id):
+    """Fold one audit event into its funnel_sessions row. Returns the row, or None if skipped."""
+    from db_models import FunnelSession
+
+    name = _event_name(event)
+    stage = name if name in STAGE_COLUMNS else None
+    if stage is None and name != "payment_failed":
+        return None
+    if stage == "booking_confirmed" and not booking_reference:
+        return None
+    occurred_at = _as_utc(occurred_at)
+
+    row = None
+    if session_id:
+        row = finder.by_key(session_id)
+    elif booking_reference:
+        row = finder.for_reference(booking_reference) or finder.by_key(session_key(None, booking_reference, audit_id))
+    if row is None:
+        if stage is None:
+            # A payment failure for a session we never saw.
+            return None
+        if stage in _WEB_STAGES:
+            source = "web"
+        else:
+            source = "checkout" if session_id else "webhook"
+        row = FunnelSession(
+            session_key=session_key(session_id, booking_reference, audit_id),
+            session_id=session_id,
+            source=source,
+            outcome="open",
+            first_event_at=occurred_at,
+            last_event_at=occurred_at,
+        )
+        finder.add(row)
+
+    row.first_event_at = _earliest(row.first_event_at, occurred_at)
+    row.last_event_at = _latest(row.last_event_at, occurred_at)
+    if booking_reference and not row.booking_reference:
+        row.booking_reference = booking_reference
+        finder.remember_reference(row)
+    if stage is not None:
+        column = STAGE_COLUMNS[stage]
+        setattr(row, column, _earliest(getattr(row, column), occurred_at))
+    if row.booking_confirmed_at is not None:
+        row.outcome = "confirmed"
+    elif stage is None:
+        row.outcome = "payment_failed"
+    return row
+
+
+def backfill_funnel_sessions(db) -> dict:
+    """Rebuild funnel_sessions from audit_logs. Does not commit.
+
+    Audit rows are streamed oldest first (yield_per); memory is bounded by
+    the number of sessions, not events.
+    """
+    from db_models import AuditLog, FunnelSession
+
+    finder = _RowFinder(db, from_db=False)
+    events = 0
+    audit_rows = (
+        db.query(AuditLog.id, AuditLog.event, AuditLog.session_id, AuditLog.booking_reference, AuditLog.created_at)
+        .filter(AuditLog.event.in_(_tracked_events()))
+        .order_by(AuditLog.created_at, AuditLog.id)
+        .yield_per(BACKFILL_YIELD_PER)
+    )
+    for audit_id, event, session_id, booking_reference, created_at in audit_rows:
+        if apply_funnel_event(finder, event, session_id, booking_reference, created_at, audit_id) is not None:
+            events += 1
+
+    db.query(FunnelSession).delete(synchronize_session=False)
+    db.add_all(finder.rows.values())
+    db.flush()
+    return {"sessions": len(finder.rows), "events": events}
+
+
+def funnel_stage_day_counts(db, start, day_of) -> dict:
+    """{stage: [(uk_day, sessions), ...]} for steps first reached since `start`.
+
+    `day_of(column)` is the SQL expression for a timestamp's UK day. One
+    grouped query per step.
+    """
+    from sqlalchemy import func
+    from db_models import FunnelSession
+
+    counts = {}
+    for stage in STAGE_COLUMNS:
+        column = getattr(FunnelSession, STAGE_COLUMNS[stage])
+        day = day_of(column)
+        counts[stage] = (
+            db.query(day, func.count(FunnelSession.id))
+            .filter(column >= start)
+            .group_by(day)
+            .all()
+        )
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Session tracking
+# ---------------------------------------------------------------------------
+
+def _collect_funnel_events(session, flush_context, instances) -> None:
+    from db_models import AuditLog
+
+    tracked = set(STAGE_COLUMNS) | {"payment_failed"}
+    pending = session.info.setdefault(_PENDING_EVENTS_KEY, [])
+    for obj in session.new:
+        if isinstance(obj, AuditLog) and _event_name(obj.event) in tracked:
+            pending.append(obj)
+
+
+def _apply_funnel_events(session) -> None:
+    session.flush()
+    logs = session.info.pop(_PENDING_EVENTS_KEY, None)
+    if not logs:
+        return
+    try:
+        with session.begin_nested():
+            finder = _RowFinder(session)
+            for log in logs:
+                apply_funnel_event(finder, log.event, log.session_id, log.booking_reference, log.created_at, log.id)
+            session.flush()
+    except Exception as e:
+        # The backfill command rebuilds whatever this missed.
+        logger.warning("funnel_sessions update skipped audit_ids=%s error=%s", [log.id for log in logs], e)
+
+
+def _discard_funnel_events(session) -> None:
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+def install_funnel_tracking(target) -> None:
+    """Keep funnel_sessions current for sessions from `target`."""
+    from session_hooks import install_session_hooks
+
+    install_session_hooks(
+        target,
+        _collect_funnel_events,
+        _apply_funnel_events,
+        _discard_funnel_events,
+        apply_on="before_commit",
+    )
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the funnel_sessions table")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Rebuild funnel_sessions from every funnel event in audit_logs")
+    args = parser.parse_args(argv)
+    if not args.backfill:
+        parser.print_usage()
+        sys.exit(1)
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = backfill_funnel_sessions(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Backfilled {result['sessions']} sessions from {result['events']} funnel events")
+
+
+if __name__ == "__main__":
+    main()
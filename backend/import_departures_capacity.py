@@ -10,23 +10,47 @@ This script reads the departure data and populates flight_departures with:
 - slots_booked_early = 0
 - slots_booked_late = 0
 
+and materialises each imported departure's drop-off slots into
+departure_slots (see db_service.materialize_departure_slots).
+
+Rows are streamed, never loaded as a whole: xlsx through openpyxl's
+read-only mode, csv/tsv line by line. Each row is validated on its own and
+failures are reported by sheet and row number. Departures are written in
+batches of IMPORT_BATCH_SIZE inside one transaction, so a full season
+imports in flat memory and a failed import leaves the table untouched.
+--dry-run validates everything and prints what would change without writing.
+
 Usage:
-    python import_departures_capacity.py <csv_or_xlsx_file>
+    python import_departures_capacity.py <csv_tsv_or_xlsx_file> [--dry-run] [--keep-existing]
+    python import_departures_capacity.py --stdin  (reads TSV from stdin)
+    python import_departures_capacity.py --backfill-slots  (materialise departure_slots
+        for departures already in the table, e.g. after the d3pslots migration)
 
 Or from Python:
-    from import_departures_capacity import import_from_csv_string
-    import_from_csv_string(csv_data)
+    from import_departures_capacity import import_from_tsv_string
+    import_from_tsv_string(tsv_data)
 """
+import csv
+import io
 import sys
 import os
-from datetime import datetime
+from datetime import date, datetime, time
 import re
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import SessionLocal, engine
-from db_models import FlightDeparture, Base
+from db_models import DepartureSlot, FlightDeparture, Base
+from db_service import backfill_departure_slots, materialize_departure_slots
+
+
+IMPORT_BATCH_SIZE = 500
+CAPACITY_TIERS = (0, 2, 4, 6, 8)
+REQUIRED_COLUMNS = ('Date', 'Flight', 'Dep Time')
+# Errors listed in the returned result; error_count has the full total.
+MAX_REPORTED_ERRORS = 10
+MAX_REPORTED_CHANGES = 10
 
 
 # Known airport code mappings
@@ -118,245 +142,423 @@ def parse_time(time_str: str) -> str:
     return time_str
 
 
-def get_capacity_tier(row_data: dict) -> int:
+def _capacity_flags(row_data: dict) -> list:
+    """Tiers whose capacity column is TRUE (bool or 'TRUE' text)."""
+    flagged = []
+    for tier in CAPACITY_TIERS:
+        for name in (f'{tier} Spaces', f'{tier}_spaces', f'{tier}spaces', f'{tier} spaces'):
+            if name not in row_data:
+                continue
+            val = row_data[name]
+            if val is True or (isinstance(val, str) and val.strip().upper() == 'TRUE'):
+                flagged.append(tier)
+            break
+    return flagged
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_date_cell(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid Date '{text}' (expected YYYY-MM-DD)")
+
+
+def _parse_time_cell(value) -> time:
+    if isinstance(value, datetime):
+        return value.time().replace(second=0, microsecond=0)
+    if isinstance(value, time):
+        return value.replace(second=0, microsecond=0)
+    text = str(value).strip()
+    try:
+        return datetime.strptime(parse_time(text), '%H:%M').time()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid Dep Time '{text}' (expected HH:MM)")
+
+
+def _parse_flight_cell(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_departure_row(row_data: dict) -> dict:
     """
-    Determine capacity tier from the boolean columns.
-    Exactly one of 0/2/4/6/8 Spaces should be TRUE.
+    Validate one source row and return FlightDeparture column values.
+
+    Accepts text cells (csv/tsv) and typed cells (xlsx: int flight numbers,
+    date/time objects, booleans). Raises ValueError describing the first
+    problem found.
     """
-    for tier in [0, 2, 4, 6, 8]:
-        col_name = f'{tier} Spaces' if tier > 0 else '0 Spaces'
-        # Also check alternate names
-        alt_names = [col_name, f'{tier}_spaces', f'{tier}spaces', f'{tier} spaces']
-
-        for name in alt_names:
-            if name in row_data:
-                val = row_data[name]
-                if isinstance(val, bool):
-                    if val:
-                        return tier
-                elif isinstance(val, str):
-                    if val.upper() == 'TRUE':
-                        return tier
-
-    # Default to 0 if no TRUE found
-    return 0
-
-
-def import_from_tsv_string(tsv_data: str, clear_existing: bool = True) -> dict:
+    missing = [col for col in REQUIRED_COLUMNS if _blank(row_data.get(col))]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+
+    flags = _capacity_flags(row_data)
+    if len(flags) > 1:
+        raise ValueError(
+            f"More than one capacity column is TRUE ({', '.join(f'{t} Spaces' for t in flags)})"
+        )
+
+    airline_code, airline_name = parse_airline(str(row_data.get('Op Al') or ''))
+    dest_name = str(row_data.get('Dest') or '').strip()
+    return {
+        "date": _parse_date_cell(row_data['Date']),
+        "flight_number": _parse_flight_cell(row_data['Flight']),
+        "airline_code": airline_code,
+        "airline_name": airline_name,
+        "departure_time": _parse_time_cell(row_data['Dep Time']),
+        "destination_code": get_airport_code(dest_name),
+        "destination_name": dest_name[:100] if dest_name else None,
+        # No TRUE column means "Call Us only", as before.
+        "capacity_tier": flags[0] if flags else 0,
+    }
+
+
+def _missing_columns(header: list) -> list:
+    return [col for col in REQUIRED_COLUMNS if col not in header]
+
+
+def iter_delimited_rows(stream, delimiter: str = ',', sheet: str = 'csv'):
     """
-    Import departure data from a TSV (tab-separated) string.
+    Yield (sheet, row_number, row_dict) from a csv/tsv text stream.
 
-    Returns dict with counts.
+    Blank lines are skipped. If the header lacks a required column a single
+    (sheet, 1, ValueError) is yielded instead of rows.
     """
-    db = SessionLocal()
-    try:
-        if clear_existing:
-            db.query(FlightDeparture).delete()
-            db.commit()
-            print("Cleared existing departure data")
-
-        lines = tsv_data.strip().split('\n')
-        if not lines:
-            return {"error": "No data provided"}
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [h.strip() for h in header]
+    missing = _missing_columns(header)
+    if missing:
+        yield sheet, 1, ValueError(f"Header is missing {', '.join(missing)}")
+        return
+    for row_number, values in enumerate(reader, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        yield sheet, row_number, dict(zip(header, values))
+
+
+def iter_xlsx_rows(xlsx_path: str):
+    """
+    Yield (sheet, row_number, row_dict) from every worksheet of a workbook.
 
-        # Parse header
-        header = lines[0].split('\t')
-        header = [h.strip() for h in header]
+    Uses openpyxl read-only mode, which streams rows from the file instead
+    of building the whole workbook in memory. Sheets whose header lacks a
+    required column yield a single (sheet, 1, ValueError).
+    """
+    from openpyxl import load_workbook
 
-        count = 0
-        errors = []
+    workbook = load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            header = [str(h).strip() if h is not None else '' for h in header]
+            missing = _missing_columns(header)
+            if missing:
+                yield worksheet.title, 1, ValueError(f"Header is missing {', '.join(missing)}")
+                continue
+            for row_number, values in enumerate(rows, start=2):
+                if all(_blank(v) for v in values):
+                    continue
+                yield worksheet.title, row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
 
-        for line_num, line in enumerate(lines[1:], start=2):
-            try:
-                values = line.split('\t')
-                row = dict(zip(header, values))
 
-                # Parse date
-                date_str = row.get('Date', '').strip()
-                if not date_str:
-                    continue
-                flight_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+def format_row_error(error: dict) -> str:
+    return f"{error['sheet']} row {error['row']}: {error['message']}"
 
-                # Parse airline
-                airline_code, airline_name = parse_airline(row.get('Op Al', ''))
 
-                # Parse flight number
-                flight_num = row.get('Flight', '').strip()
+def _departure_key(values: dict) -> tuple:
+    return (values['date'], values['airline_code'], values['flight_number'])
 
-                # Parse departure time
-                dep_time_str = parse_time(row.get('Dep Time', ''))
-                if not dep_time_str:
-                    continue
-                dep_time = datetime.strptime(dep_time_str, '%H:%M').time()
-
-                # Parse destination
-                dest_name = row.get('Dest', '').strip()
-                dest_code = get_airport_code(dest_name)
-
-                # Get capacity tier
-                capacity_tier = get_capacity_tier(row)
-
-                departure = FlightDeparture(
-                    date=flight_date,
-                    flight_number=flight_num,
-                    airline_code=airline_code,
-                    airline_name=airline_name,
-                    departure_time=dep_time,
-                    destination_code=dest_code,
-                    destination_name=dest_name[:100] if dest_name else None,
-                    capacity_tier=capacity_tier,
-                    slots_booked_early=0,
-                    slots_booked_late=0,
-                )
-                db.add(departure)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Line {line_num}: {str(e)}")
-                continue
 
-        db.commit()
+def _existing_departures(db) -> dict:
+    """(date, airline, flight) -> (time, destination, tier) for the dry-run diff."""
+    return {
+        (row.date, row.airline_code, row.flight_number): (
+            row.departure_time, row.destination_code, row.capacity_tier,
+        )
+        for row in db.query(
+            FlightDeparture.date,
+            FlightDeparture.airline_code,
+            FlightDeparture.flight_number,
+            FlightDeparture.departure_time,
+            FlightDeparture.destination_code,
+            FlightDeparture.capacity_tier,
+        )
+    }
 
-        return {
-            "success": True,
-            "departures_imported": count,
-            "errors": errors[:10] if errors else []  # Return first 10 errors
-        }
 
-    finally:
-        db.close()
+def _write_batch(db, batch: list) -> None:
+    db.add_all(batch)
+    db.flush()
+    materialize_departure_slots(db, batch)
+    db.flush()
+    batch.clear()
 
 
-def import_from_xlsx(xlsx_path: str, clear_existing: bool = True) -> dict:
-    """
-    Import departure data from an Excel file.
+def import_departure_rows(
+    rows,
+    clear_existing: bool = True,
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    db=None,
+) -> dict:
     """
-    try:
-        import pandas as pd
-    except ImportError:
-        return {"error": "pandas not installed. Run: pip install pandas openpyxl"}
+    Validate and import a stream of (sheet, row_number, row_dict) tuples.
 
-    try:
-        df = pd.read_excel(xlsx_path)
-    except Exception as e:
-        return {"error": f"Failed to read Excel file: {str(e)}"}
+    Invalid rows (and repeats of a date/airline/flight already seen in the
+    file) are skipped and reported; valid ones are flushed every batch_size
+    rows and committed together at the end. With dry_run nothing is written
+    and the result carries a "diff" of the file against flight_departures.
 
-    db = SessionLocal()
+    Returns dict with counts, the first MAX_REPORTED_ERRORS errors and
+    error_count / errors_by_sheet totals.
+    """
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
     try:
-        if clear_existing:
-            db.query(FlightDeparture).delete()
-            db.commit()
+        existing = _existing_departures(db) if dry_run else None
+        if clear_existing and not dry_run:
+            db.query(DepartureSlot).delete(synchronize_session=False)
+            db.query(FlightDeparture).delete(synchronize_session=False)
             print("Cleared existing departure data")
 
+        rows_read = 0
         count = 0
         errors = []
-
-        for idx, row in df.iterrows():
+        error_count = 0
+        errors_by_sheet = {}
+        seen = {}
+        batch = []
+        diff = {"new": 0, "changed": 0, "unchanged": 0, "changes": []}
+
+        def record_error(sheet, row_number, message):
+            nonlocal error_count
+            error_count += 1
+            errors_by_sheet[sheet] = errors_by_sheet.get(sheet, 0) + 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"sheet": sheet, "row": row_number, "message": message})
+
+        for sheet, row_number, row_data in rows:
+            if isinstance(row_data, Exception):
+                record_error(sheet, row_number, str(row_data))
+                continue
+            rows_read += 1
             try:
-                # Parse date
-                date_val = row.get('Date')
-                if pd.isna(date_val):
-                    continue
-                if isinstance(date_val, str):
-                    flight_date = datetime.strptime(date_val, '%Y-%m-%d').date()
-                else:
-                    flight_date = date_val.date() if hasattr(date_val, 'date') else date_val
-
-                # Parse airline
-                airline_code, airline_name = parse_airline(str(row.get('Op Al', '')))
-
-                # Parse flight number
-                flight_num = str(int(row.get('Flight'))) if pd.notna(row.get('Flight')) else ''
+                values = parse_departure_row(row_data)
+            except ValueError as e:
+                record_error(sheet, row_number, str(e))
+                continue
 
-                # Parse departure time
-                dep_time_val = row.get('Dep Time')
-                if pd.isna(dep_time_val):
-                    continue
-                if hasattr(dep_time_val, 'strftime'):
-                    dep_time_str = dep_time_val.strftime('%H:%M')
+            key = _departure_key(values)
+            if key in seen:
+                first_sheet, first_row = seen[key]
+                record_error(sheet, row_number, f"Duplicate of {first_sheet} row {first_row}")
+                continue
+            seen[key] = (sheet, row_number)
+            count += 1
+
+            if dry_run:
+                current = existing.get(key)
+                incoming = (values['departure_time'], values['destination_code'], values['capacity_tier'])
+                if current is None:
+                    diff["new"] += 1
+                elif current == incoming:
+                    diff["unchanged"] += 1
                 else:
-                    dep_time_str = parse_time(str(dep_time_val))
-                dep_time = datetime.strptime(dep_time_str, '%H:%M').time()
-
-                # Parse destination
-                dest_name = str(row.get('Dest', '')) if pd.notna(row.get('Dest')) else ''
-                dest_code = get_airport_code(dest_name)
-
-                # Get capacity tier from boolean columns
-                capacity_tier = 0
-                for tier in [0, 2, 4, 6, 8]:
-                    col_name = f'{tier} Spaces'
-                    if col_name in row and pd.notna(row[col_name]):
-                        val = row[col_name]
-                        if val is True or (isinstance(val, str) and val.upper() == 'TRUE'):
-                            capacity_tier = tier
-                            break
-
-                departure = FlightDeparture(
-                    date=flight_date,
-                    flight_number=flight_num,
-                    airline_code=airline_code,
-                    airline_name=airline_name,
-                    departure_time=dep_time,
-                    destination_code=dest_code,
-                    destination_name=dest_name[:100] if dest_name else None,
-                    capacity_tier=capacity_tier,
-                    slots_booked_early=0,
-                    slots_booked_late=0,
-                )
-                db.add(departure)
-                count += 1
-
-            except Exception as e:
-                errors.append(f"Row {idx + 2}: {str(e)}")
+                    diff["changed"] += 1
+                    if len(diff["changes"]) < MAX_REPORTED_CHANGES:
+                        diff["changes"].append({
+                            "flight": f"{values['airline_code']}{values['flight_number']}",
+                            "date": values['date'].isoformat(),
+                            "before": _describe_departure(current),
+                            "after": _describe_departure(incoming),
+                        })
                 continue
 
-        db.commit()
+            batch.append(FlightDeparture(slots_booked_early=0, slots_booked_late=0, **values))
+            if len(batch) >= batch_size:
+                _write_batch(db, batch)
 
-        return {
+        result = {
             "success": True,
-            "departures_imported": count,
-            "errors": errors[:10] if errors else []
+            "dry_run": dry_run,
+            "rows_read": rows_read,
+            "departures_imported": 0 if dry_run else count,
+            "errors": [format_row_error(e) for e in errors],
+            "error_count": error_count,
+            "errors_by_sheet": errors_by_sheet,
         }
-
+        if dry_run:
+            diff["missing_from_file"] = len(existing.keys() - seen.keys())
+            result["departures_valid"] = count
+            result["would_delete"] = len(existing) if clear_existing else 0
+            result["diff"] = diff
+            db.rollback()
+            return result
+
+        if batch:
+            _write_batch(db, batch)
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
+        if owns_session:
+            db.close()
+
+
+def _describe_departure(values: tuple) -> str:
+    departure_time, destination_code, capacity_tier = values
+    return f"{departure_time.strftime('%H:%M')} {destination_code} tier {capacity_tier}"
+
+
+def import_from_tsv_string(tsv_data: str, clear_existing: bool = True, dry_run: bool = False) -> dict:
+    """
+    Import departure data from a TSV (tab-separated) string.
+
+    Returns dict with counts.
+    """
+    if not tsv_data or not tsv_data.strip():
+        return {"error": "No data provided"}
+    rows = iter_delimited_rows(io.StringIO(tsv_data.strip()), delimiter='\t', sheet='TSV')
+    return import_departure_rows(rows, clear_existing=clear_existing, dry_run=dry_run)
+
+
+def import_from_delimited_file(path: str, clear_existing: bool = True, dry_run: bool = False) -> dict:
+    """
+    Import departure data from a .csv or .tsv file, streamed line by line.
+    """
+    delimiter = '\t' if path.lower().endswith('.tsv') else ','
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            rows = iter_delimited_rows(stream, delimiter=delimiter, sheet=os.path.basename(path))
+            return import_departure_rows(rows, clear_existing=clear_existing, dry_run=dry_run)
+    except OSError as e:
+        return {"error": f"Failed to read file: {str(e)}"}
+
+
+def import_from_xlsx(xlsx_path: str, clear_existing: bool = True, dry_run: bool = False) -> dict:
+    """
+    Import departure data from an Excel file, streamed in read-only mode.
+    """
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return {"error": "openpyxl not installed. Run: pip install openpyxl"}
+
+    try:
+        rows = iter_xlsx_rows(xlsx_path)
+        # Open the workbook now so a bad file is a clean error, not a
+        # failure halfway through the import.
+        first = next(rows, None)
+    except Exception as e:
+        return {"error": f"Failed to read Excel file: {str(e)}"}
+
+    def all_rows():
+        if first is not None:
+            yield first
+        yield from rows
+
+    return import_departure_rows(all_rows(), clear_existing=clear_existing, dry_run=dry_run)
+
+
+def print_dry_run_summary(result: dict) -> None:
+    diff = result["diff"]
+    print("\nDry run - nothing was written.")
+    print(f"  Rows read: {result['rows_read']}")
+    print(f"  Valid departures: {result['departures_valid']}")
+    print(f"  New: {diff['new']}  Changed: {diff['changed']}  Unchanged: {diff['unchanged']}")
+    print(f"  In database but not in file: {diff['missing_from_file']}")
+    if result["would_delete"]:
+        print(f"  Existing departures that would be cleared: {result['would_delete']}")
+    for change in diff["changes"]:
+        print(f"    {change['date']} {change['flight']}: {change['before']} -> {change['after']}")
 
 
 def main():
     """Main entry point for command line usage."""
-    if len(sys.argv) < 2:
-        print("Usage: python import_departures_capacity.py <xlsx_file>")
-        print("       python import_departures_capacity.py --stdin  (reads TSV from stdin)")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import departures with capacity tiers")
+    parser.add_argument("source", nargs="?", help=".xlsx, .csv or .tsv file")
+    parser.add_argument("--stdin", action="store_true", help="Read TSV from stdin")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Validate and print what would change without writing")
+    parser.add_argument("--keep-existing", action="store_true",
+                        help="Add to flight_departures instead of replacing it")
+    parser.add_argument("--backfill-slots", action="store_true",
+                        help="Materialise departure_slots for the departures already stored")
+    args = parser.parse_args()
+    if not (args.source or args.stdin or args.backfill_slots):
+        parser.print_usage()
         sys.exit(1)
 
+    if args.backfill_slots:
+        db = SessionLocal()
+        try:
+            built = backfill_departure_slots(db)
+            db.commit()
+        finally:
+            db.close()
+        print(f"Materialised drop-off slots for {built} departures")
+        return
+
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
 
-    arg = sys.argv[1]
+    arg = args.source or ''
+    clear_existing = not args.keep_existing
 
-    if arg == '--stdin':
+    if args.stdin:
         # Read from stdin (TSV format)
         tsv_data = sys.stdin.read()
-        result = import_from_tsv_string(tsv_data)
+        result = import_from_tsv_string(tsv_data, clear_existing, dry_run=args.dry_run)
     elif arg.endswith('.xlsx'):
-        result = import_from_xlsx(arg)
+        result = import_from_xlsx(arg, clear_existing, dry_run=args.dry_run)
+    elif arg.lower().endswith(('.csv', '.tsv')):
+        result = import_from_delimited_file(arg, clear_existing, dry_run=args.dry_run)
     else:
         print(f"Unsupported file format: {arg}")
-        print("Supported formats: .xlsx or --stdin for TSV")
+        print("Supported formats: .xlsx, .csv, .tsv or --stdin for TSV")
         sys.exit(1)
 
     if result.get('error'):
         print(f"Error: {result['error']}")
         sys.exit(1)
 
-    print(f"\nImport complete!")
-    print(f"  Departures imported: {result['departures_imported']}")
-    if result.get('errors'):
-        print(f"  Errors ({len(result['errors'])}):")
+    if result.get('error_count'):
+        print(f"Errors ({result['error_count']}, first {len(result['errors'])} shown):")
+        for sheet, cnt in result['errors_by_sheet'].items():
+            print(f"  {sheet}: {cnt} rows")
         for err in result['errors']:
             print(f"    - {err}")
 
+    if result.get('dry_run'):
+        print_dry_run_summary(result)
+        return
+
+    print(f"\nImport complete!")
+    print(f"  Departures imported: {result['departures_imported']}")
+
     # Verify counts
     db = SessionLocal()
     try:
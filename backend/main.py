@@ -142,7 +142,7 @@ from fastapi import FastAPI, HTTPException, Query, Request, Header, Depends, Bod
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, PlainTextResponse
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import text, or_, case, func
 
 from models import (
@@ -185,8 +185,32 @@ from stripe_service import (
 from database import get_db, init_db, get_sql_console_db, SessionLocal
 from db_models import BookingStatus, PaymentStatus, FlightDeparture, FlightArrival, AuditLog, AuditLogEvent, ErrorLog, ErrorSeverity, MarketingSubscriber, Booking as DbBooking, Vehicle as DbVehicle, User, LoginCode, Session as DbSession, VehicleInspection, InspectionType, BlockedDate, BookingDraft, AirportQuoteSnapshot
 import db_service
+from event_loop_guard import configure_request_threads, loop_lag_monitor, run_blocking
 import json
 import traceback
+import booking_forecast
+import booking_highlights
+import booking_stats
+import db_pool_history
+import map_clusters
+import occupancy_timeline
+import postcode_geocoder
+from funnel_sessions import install_funnel_tracking
+from report_cache import install_report_cache_invalidation, report_cache
+from report_warmup import report_warmer
+
+# One tile index per (map type, zoom): keep the most recently used ones only.
+report_cache.set_max_entries("booking_location_tiles", map_clusters.TILE_INDEX_CACHE_MAX_ENTRIES)
+
+# Keep the booking stats rollup current on every request-session commit.
+booking_stats.install_booking_stats_tracking(SessionLocal)
+# Recompute the intraday occupancy timeline for days a booking commit touched.
+occupancy_timeline.install_occupancy_timeline_tracking(SessionLocal)
+# Fold funnel audit events into funnel_sessions as they are committed.
+install_funnel_tracking(SessionLocal)
+# Admin reports share one in-memory cache (single-flight, stale-while-
+# revalidate); booking/payment/customer commits invalidate tagged entries.
+install_report_cache_invalidation(SessionLocal)
 
 logger = logging.getLogger(__name__)
 
@@ -202,13 +226,6 @@ from email_service import send_booking_confirmation_email, send_login_code_email
 # Routers
 from routers.roster import router as roster_router
 
-# Simple in-memory cache for expensive reports
-_forecast_cache = {
-    "data": None,
-    "cached_at": None,
-}
-FORECAST_CACHE_DURATION_SECONDS = 3600  # 1 hour
-
 # Flight data cache (3 months - reference only, rarely changes)
 _flight_departures_cache = {
     "data": None,
@@ -224,21 +241,9 @@ _flight_filters_cache = {
 }
 FLIGHT_CACHE_DURATION_SECONDS = 7776000  # 3 months (90 days)
 
-# Reports cache (1 hour - same as forecast)
-_booking_locations_cache = {
-    "bookings": {"data": None, "cached_at": None},
-    "origins": {"data": None, "cached_at": None},
-}
-# Keyed by view ('daily'/'weekly'/'monthly') — a single shared slot served
-# the cached DAILY payload to weekly/monthly requests for up to an hour,
-# making the view switcher appear dead (2026-06-13).
-_occupancy_cache = {}
-_popular_cache = {"data": None, "cached_at": None}
-_fun_facts_cache = {"data": None, "cached_at": None}
-_financial_cache = {"data": None, "cached_at": None}
-_session_tracking_cache = {"data": None, "cached_at": None}
-_abandoned_carts_cache = {"data": None, "cached_at": None}
-REPORT_CACHE_DURATION_SECONDS = 3600  # 1 hour
+# The financial report is aggregated in SQL and cheap to recompute; its cache
+# can be switched off so figures are always live.
+FINANCIAL_REPORT_CACHE_ENABLED = os.getenv("FINANCIAL_REPORT_CACHE_ENABLED", "true").lower() not in {"0", "false", "no"}
 
 
 class ParkingCapacitySettingRequest(BaseModel):
@@ -671,12 +676,16 @@ async def startup_event():
     init_db()
     run_migrations()
     start_scheduler()
+    configure_request_threads()
+    loop_lag_monitor.register_routes(app.routes)
+    loop_lag_monitor.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Stop background scheduler on shutdown."""
+    """Stop background scheduler and the event loop lag monitor on shutdown."""
     stop_scheduler()
+    loop_lag_monitor.stop()
 
 
 # Path to flight schedule
@@ -710,7 +719,7 @@ def log_audit_event(
         request: FastAPI request object (for IP/user agent)
         session_id: Frontend session ID for tracking incomplete bookings
         booking_reference: Booking reference if available
-        event_data: Dictionary of event-specific data (will be JSON serialized)
+        event_data: Dictionary of event-specific data (stored as JSONB)
     """
     try:
         ip_address = None
@@ -729,7 +738,7 @@ def log_audit_event(
             session_id=session_id,
             booking_reference=booking_reference,
             event=event.value,
-            event_data=json.dumps(event_data) if event_data else None,
+            event_data=event_data or None,
             ip_address=ip_address,
             user_agent=user_agent,
         )
@@ -871,13 +880,13 @@ class BookingResponse(BaseModel):
 # API Endpoints
 
 @app.get("/")
-async def root():
+def root():
     """Health check endpoint."""
     return {"status": "healthy", "service": "TAG Parking Booking API"}
 
 
 @app.get("/robots.txt", response_class=PlainTextResponse)
-async def robots_txt():
+def robots_txt():
     """Return crawler policy for requests that hit the API host directly."""
     return (
         "User-agent: *\n"
@@ -888,7 +897,7 @@ async def robots_txt():
 
 
 @app.post("/api/slots/available", response_model=AvailableSlotsResponse)
-async def get_available_slots(request: SlotAvailabilityRequest):
+def get_available_slots(request: SlotAvailabilityRequest):
     """
     Get available time slots for a specific flight.
 
@@ -910,7 +919,7 @@ async def get_available_slots(request: SlotAvailabilityRequest):
 
 
 @app.post("/api/slots/summary")
-async def get_drop_off_info(request: DropOffSummaryRequest):
+def get_drop_off_info(request: DropOffSummaryRequest):
     """
     Get detailed drop-off information for a selected slot.
 
@@ -929,7 +938,7 @@ async def get_drop_off_info(request: DropOffSummaryRequest):
 
 
 @app.post("/api/pickup/summary")
-async def get_pickup_info(request: PickupSummaryRequest):
+def get_pickup_info(request: PickupSummaryRequest):
     """
     Get detailed pickup information for a return flight.
 
@@ -949,7 +958,7 @@ async def get_pickup_info(request: PickupSummaryRequest):
 
 
 @app.post("/api/capacity/check")
-async def check_capacity(request: CapacityCheckRequest):
+def check_capacity(request: CapacityCheckRequest):
     """
     Legacy capacity check — uses BookingService's in-memory counter and
     therefore does NOT reflect real prod occupancy. Kept for compatibility
@@ -964,7 +973,7 @@ async def check_capacity(request: CapacityCheckRequest):
 
 
 @app.get("/api/capacity/daily")
-async def get_daily_capacity(
+def get_daily_capacity(
     date_from: date,
     date_to: date,
     db: Session = Depends(get_db),
@@ -1050,7 +1059,7 @@ async def get_daily_capacity(
 
 
 @app.get("/api/capacity/check-slot")
-async def check_capacity_for_slot(
+def check_capacity_for_slot(
     dropoff_date: date,
     dropoff_time: str,
     pickup_date: date,
@@ -1144,7 +1153,7 @@ class CheckSlotsRequest(BaseModel):
 
 
 @app.post("/api/capacity/check-slots")
-async def check_capacity_for_slots(
+def check_capacity_for_slots(
     request: CheckSlotsRequest,
     db: Session = Depends(get_db),
 ):
@@ -1259,7 +1268,7 @@ class PriceCalculationResponse(BaseModel):
 
 
 @app.post("/api/pricing/calculate", response_model=PriceCalculationResponse)
-async def calculate_price(request: PriceCalculationRequest):
+def calculate_price(request: PriceCalculationRequest):
     """
     Calculate booking price based on dates.
 
@@ -1346,7 +1355,7 @@ async def calculate_price(request: PriceCalculationRequest):
 
 
 @app.get("/api/pricing/tiers")
-async def get_pricing_tiers():
+def get_pricing_tiers():
     """
     Get all pricing tiers for display on the frontend.
     """
@@ -1375,7 +1384,7 @@ async def get_pricing_tiers():
 
 
 @app.get("/api/prices/durations")
-async def get_duration_prices():
+def get_duration_prices():
     """
     Get all flexible duration prices for display on frontend.
 
@@ -1606,7 +1615,7 @@ class PromoCodeValidateResponse(BaseModel):
 
 
 @app.post("/api/promo/validate", response_model=PromoCodeValidateResponse)
-async def validate_promo_code(
+def validate_promo_code(
     request: PromoCodeValidateRequest,
     db: Session = Depends(get_db),
 ):
@@ -1784,7 +1793,7 @@ async def validate_promo_code(
 
 
 @app.get("/api/referrals/respond", response_class=HTMLResponse)
-async def respond_to_referral_invite(
+def respond_to_referral_invite(
     token: str = Query(...),
     decision: str = Query(...),
     db: Session = Depends(get_db),
@@ -1832,7 +1841,7 @@ async def respond_to_referral_invite(
 # Admin Authentication Dependencies
 # =============================================================================
 
-async def get_current_user(
+def get_current_user(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> User:
@@ -2106,7 +2115,7 @@ def _verify_sms_webhook_secret(secret: str) -> None:
 
 
 @app.delete("/api/bookings/{booking_id}", response_model=BookingResponse)
-async def cancel_booking(
+def cancel_booking(
     booking_id: str,
     current_user: User = Depends(require_admin),
 ):
@@ -2131,7 +2140,7 @@ async def cancel_booking(
 
 
 @app.get("/api/admin/bookings")
-async def get_all_bookings(
+def get_all_bookings(
     date_filter: Optional[date] = Query(None, description="Filter by parking date"),
     include_cancelled: bool = Query(True, description="Include cancelled bookings"),
     days: Optional[int] = Query(30, description="Number of days to include (None or 0 for all)"),
@@ -2319,7 +2328,7 @@ async def get_all_bookings(
 
 
 @app.get("/api/admin/occupancy/{target_date}")
-async def get_daily_occupancy(
+def get_daily_occupancy(
     target_date: date,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -2343,7 +2352,7 @@ async def get_daily_occupancy(
 
 
 @app.get("/api/admin/bookings/stats")
-async def get_booking_stats(
+def get_booking_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -2357,8 +2366,9 @@ async def get_booking_stats(
     """
     from collections import defaultdict
 
-    # Get ALL bookings ordered by creation date
-    all_bookings = db.query(DbBooking).order_by(DbBooking.created_at.asc()).all()
+    # Per (effective UK date, status) rollup rows - a few per day, kept
+    # current on every booking/payment commit (see booking_stats).
+    stats_rows = booking_stats.load_booking_stats_rows(db)
 
     # Status colors mapping
     status_order = ['confirmed', 'completed', 'pending', 'cancelled']
@@ -2368,26 +2378,20 @@ async def get_booking_stats(
     weekly_by_status = defaultdict(lambda: defaultdict(int))
     daily_by_status = defaultdict(lambda: defaultdict(int))
 
-    for booking in all_bookings:
-        # Bucket on the payment-success day in UK time (falls back to
-        # created_at for unpaid/manual). Keeps a 23:59-initiated / 00:12-paid
-        # booking on the confirmed day, consistently with the financial report.
-        eff = booking_effective_datetime(booking)
-        if eff:
-            status = booking.status.value if booking.status else 'unknown'
+    for row in stats_rows:
+        # Rows are keyed on the payment-success day in UK time (created_at
+        # for unpaid/manual), consistently with the financial report.
+        day = row.stat_date
 
-            # Daily: YYYY-MM-DD
-            day_key = eff.strftime("%Y-%m-%d")
-            daily_by_status[day_key][status] += 1
+        # Daily: YYYY-MM-DD
+        daily_by_status[day.strftime("%Y-%m-%d")][row.status] += row.booking_count
 
-            # Weekly: YYYY-WW (ISO week)
-            iso_year, iso_week, _ = eff.isocalendar()
-            week_key = f"{iso_year}-W{iso_week:02d}"
-            weekly_by_status[week_key][status] += 1
+        # Weekly: YYYY-WW (ISO week)
+        iso_year, iso_week, _ = day.isocalendar()
+        weekly_by_status[f"{iso_year}-W{iso_week:02d}"][row.status] += row.booking_count
 
-            # Monthly: YYYY-MM
-            month_key = eff.strftime("%Y-%m")
-            monthly_by_status[month_key][status] += 1
+        # Monthly: YYYY-MM
+        monthly_by_status[day.strftime("%Y-%m")][row.status] += row.booking_count
 
     # Convert to sorted lists for charts (with status breakdown)
     def format_data(data_dict, key_name):
@@ -2413,9 +2417,8 @@ async def get_booking_stats(
 
     # Summary stats
     status_totals = defaultdict(int)
-    for booking in all_bookings:
-        status = booking.status.value if booking.status else 'unknown'
-        status_totals[status] += 1
+    for row in stats_rows:
+        status_totals[row.status] += row.booking_count
 
     total_successful = status_totals.get('confirmed', 0) + status_totals.get('completed', 0)
 
@@ -2428,70 +2431,55 @@ async def get_booking_stats(
     this_month_start = today.replace(day=1)
     last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
 
-    def _eff_date(b):
-        eff = booking_effective_datetime(b)
-        return eff.date() if eff else None
+    successful_rows = [r for r in stats_rows if r.status in booking_stats.SUCCESSFUL_STATUSES]
+
+    def _count_from(start, end=None):
+        return sum(
+            r.booking_count for r in successful_rows
+            if r.stat_date >= start and (end is None or r.stat_date < end)
+        )
 
-    successful_bookings = [b for b in all_bookings if b.status in [BookingStatus.CONFIRMED, BookingStatus.COMPLETED]]
-    this_week_count = sum(1 for b in successful_bookings if (d := _eff_date(b)) and d >= this_week_start)
-    last_week_count = sum(1 for b in successful_bookings if (d := _eff_date(b)) and last_week_start <= d < this_week_start)
-    this_month_count = sum(1 for b in successful_bookings if (d := _eff_date(b)) and d >= this_month_start)
-    last_month_count = sum(1 for b in successful_bookings if (d := _eff_date(b)) and last_month_start <= d < this_month_start)
+    this_week_count = _count_from(this_week_start)
+    last_week_count = _count_from(last_week_start, this_week_start)
+    this_month_count = _count_from(this_month_start)
+    last_month_count = _count_from(last_month_start, this_month_start)
 
     # Booking targets count successful bookings, not only still-confirmed
     # bookings. A booking can be created, paid, and completed in the same
     # day/week/month and should still count against the target.
-    confirmed_today = sum(1 for b in successful_bookings if _eff_date(b) == today)
-    confirmed_this_week = sum(1 for b in successful_bookings if (d := _eff_date(b)) and d >= this_week_start)
-    confirmed_this_month = sum(1 for b in successful_bookings if (d := _eff_date(b)) and d >= this_month_start)
-
-    # Revenue calculations - only count bookings with non-zero payments
-    from db_models import Payment
+    confirmed_today = sum(r.booking_count for r in successful_rows if r.stat_date == today)
+    confirmed_this_week = this_week_count
+    confirmed_this_month = this_month_count
 
-    total_revenue_pence = 0
-    paid_customer_count = 0
-
-    for booking in successful_bookings:
-        # Only count bookings with actual payments (excludes free promo bookings with £0 payment)
-        if booking.payment and booking.payment.amount_pence and booking.payment.amount_pence > 0:
-            total_revenue_pence += booking.payment.amount_pence
-            paid_customer_count += 1
+    # Revenue calculations - only bookings with non-zero payments (free promo
+    # bookings with a £0 payment are excluded when the rollup is built)
+    total_revenue_pence = sum(r.revenue_pence for r in successful_rows)
+    paid_customer_count = sum(r.paid_count for r in successful_rows)
 
     # Calculate average revenue per paying customer
     avg_revenue_per_customer = round(total_revenue_pence / paid_customer_count / 100, 2) if paid_customer_count > 0 else 0
     total_revenue_pounds = round(total_revenue_pence / 100, 2)
 
-    # Calculate average trip duration, drop-off time range, and pick-up time range
-    trip_durations = []
-    dropoff_times_minutes = []
-    pickup_times_minutes = []
-
-    for booking in successful_bookings:
-        # Trip duration (in days)
-        if booking.dropoff_date and booking.pickup_date:
-            duration = (booking.pickup_date - booking.dropoff_date).days
-            if duration >= 0:
-                trip_durations.append(duration)
-
-        # Drop-off time (convert to minutes from midnight for averaging)
-        if booking.dropoff_time:
-            minutes = booking.dropoff_time.hour * 60 + booking.dropoff_time.minute
-            dropoff_times_minutes.append(minutes)
-
-        # Pick-up time (convert to minutes from midnight for averaging)
-        if booking.pickup_time:
-            minutes = booking.pickup_time.hour * 60 + booking.pickup_time.minute
-            pickup_times_minutes.append(minutes)
+    # Trip duration, drop-off and pick-up hour distributions
+    duration_counts = defaultdict(int)
+    dropoff_hour_counts = [0] * 24
+    pickup_hour_counts = [0] * 24
+    for row in successful_rows:
+        for days, count in (row.trip_days_json or {}).items():
+            duration_counts[int(days)] += count
+        for hour, count in enumerate(row.dropoff_hours_json or []):
+            dropoff_hour_counts[hour] += count
+        for hour, count in enumerate(row.pickup_hours_json or []):
+            pickup_hour_counts[hour] += count
 
     # Calculate averages
-    avg_trip_duration = round(sum(trip_durations) / len(trip_durations), 1) if trip_durations else 0
+    total_trips = sum(duration_counts.values())
+    avg_trip_duration = (
+        round(sum(d * c for d, c in duration_counts.items()) / total_trips, 1) if total_trips else 0
+    )
 
     # Calculate top 10 most common trip durations with percentages
-    duration_counts = {}
-    for d in trip_durations:
-        duration_counts[d] = duration_counts.get(d, 0) + 1
-    total_trips = len(trip_durations)
-    top_durations = sorted(duration_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_durations = sorted(sorted(duration_counts.items()), key=lambda x: x[1], reverse=True)[:10]
     top_durations = [
         {"days": d, "count": c, "percent": round(c / total_trips * 100, 1) if total_trips > 0 else 0}
         for d, c in top_durations
@@ -2499,19 +2487,12 @@ async def get_booking_stats(
 
     # Helper function to find top N busiest hours using fixed hourly buckets
     # Each booking is counted in exactly one bucket (00:00-01:00, 01:00-02:00, etc.)
-    def find_top_busiest_hours(times_minutes, top_n=3):
-        if not times_minutes:
-            return []
-
-        # Count bookings in each fixed hourly bucket (0-23)
-        hour_buckets = {}
-        for time_min in times_minutes:
-            hour = time_min // 60  # Get the hour (0-23)
-            hour_buckets[hour] = hour_buckets.get(hour, 0) + 1
-
-        # Convert to list of dicts with formatted times
+    def find_top_busiest_hours(hour_counts_by_hour, hours, top_n=3):
         hour_counts = []
-        for hour, count in hour_buckets.items():
+        for hour in hours:
+            count = hour_counts_by_hour[hour]
+            if not count:
+                continue
             end_hour = (hour + 1) % 24
             hour_counts.append({
                 "start": f"{hour:02d}:00",
@@ -2523,62 +2504,38 @@ async def get_booking_stats(
         hour_counts.sort(key=lambda x: x["count"], reverse=True)
         return hour_counts[:top_n]
 
-    # Drop-off time range (AM: 00:00-11:59, PM: 12:00-23:59)
-    if dropoff_times_minutes:
-        am_dropoffs = [m for m in dropoff_times_minutes if m < 720]  # Before 12:00
-        pm_dropoffs = [m for m in dropoff_times_minutes if m >= 720]  # 12:00 and after
-        dropoff_range = {
-            "am": len(am_dropoffs),
-            "pm": len(pm_dropoffs),
-            "am_busiest": find_top_busiest_hours(am_dropoffs, 6),
-            "pm_busiest": find_top_busiest_hours(pm_dropoffs, 6),
-        }
-    else:
-        dropoff_range = {"am": 0, "pm": 0, "am_busiest": [], "pm_busiest": []}
-
-    # Pick-up time range (AM: 00:00-11:59, PM: 12:00-23:59)
-    if pickup_times_minutes:
-        am_pickups = [m for m in pickup_times_minutes if m < 720]  # Before 12:00
-        pm_pickups = [m for m in pickup_times_minutes if m >= 720]  # 12:00 and after
-        pickup_range = {
-            "am": len(am_pickups),
-            "pm": len(pm_pickups),
-            "am_busiest": find_top_busiest_hours(am_pickups, 6),
-            "pm_busiest": find_top_busiest_hours(pm_pickups, 6),
+    # Drop-off / pick-up time range (AM: 00:00-11:59, PM: 12:00-23:59)
+    def _time_range(hour_counts_by_hour):
+        return {
+            "am": sum(hour_counts_by_hour[:12]),
+            "pm": sum(hour_counts_by_hour[12:]),
+            "am_busiest": find_top_busiest_hours(hour_counts_by_hour, range(12), 6),
+            "pm_busiest": find_top_busiest_hours(hour_counts_by_hour, range(12, 24), 6),
         }
-    else:
-        pickup_range = {"am": 0, "pm": 0, "am_busiest": [], "pm_busiest": []}
 
-    # Day of week booking creation analysis (when customers make bookings)
-    # Convert to UK timezone for accurate day/hour analysis
+    dropoff_range = _time_range(dropoff_hour_counts)
+    pickup_range = _time_range(pickup_hour_counts)
+
+    # Day of week booking creation analysis (when customers make bookings),
+    # bucketed in UK time when the rollup is built
     import pytz
     uk_tz = pytz.timezone('Europe/London')
 
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    booking_days_of_week = {day: 0 for day in day_names}
-
-    # Hour of day booking analysis (UK timezone)
-    booking_hours_of_day = {hour: 0 for hour in range(24)}
+    day_names = booking_stats.DAY_NAMES
 
     # Hour of day by day of week (for day-specific views)
     booking_hours_by_day = {day: {hour: 0 for hour in range(24)} for day in day_names}
+    for row in successful_rows:
+        for day, hours in (row.created_hours_json or {}).items():
+            for hour, count in enumerate(hours):
+                booking_hours_by_day[day][hour] += count
 
-    for booking in successful_bookings:
-        if booking.created_at:
-            # Convert to UK timezone
-            created_at_uk = booking.created_at
-            if created_at_uk.tzinfo is None:
-                created_at_uk = pytz.utc.localize(created_at_uk)
-            created_at_uk = created_at_uk.astimezone(uk_tz)
+    booking_days_of_week = {day: sum(booking_hours_by_day[day].values()) for day in day_names}
 
-            day_name = day_names[created_at_uk.weekday()]
-            booking_days_of_week[day_name] += 1
-
-            # Track hour of day (overall)
-            booking_hours_of_day[created_at_uk.hour] += 1
-
-            # Track hour of day by day of week
-            booking_hours_by_day[day_name][created_at_uk.hour] += 1
+    # Hour of day booking analysis (UK timezone)
+    booking_hours_of_day = {
+        hour: sum(booking_hours_by_day[day][hour] for day in day_names) for hour in range(24)
+    }
 
     # Convert to list format with percentages
     total_bookings_with_dates = sum(booking_days_of_week.values())
@@ -2779,7 +2736,13 @@ async def get_booking_stats(
     bid_total_bookings = 0
 
     if earliest_search_date:
-        for booking in successful_bookings:
+        # created_at only: the rollup is keyed on paid date, and this needs
+        # the exact creation instant against the tracking start.
+        since_tracking = db.query(DbBooking.created_at).filter(
+            DbBooking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]),
+            DbBooking.created_at >= earliest_search_date,
+        ).all()
+        for booking in since_tracking:
             if booking.created_at:
                 booking_date = booking.created_at
                 if booking_date.tzinfo is None:
@@ -2941,18 +2904,14 @@ async def get_booking_stats(
         return "W4"
 
     _pattern_counts = {m: {b: 0 for b in _bucket_keys} for m in range(1, _current_month + 1)}
-    for booking in all_bookings:
-        if booking.status not in (BookingStatus.CONFIRMED, BookingStatus.COMPLETED):
-            continue
+    for row in successful_rows:
         # Bucket on the effective (paid, UK) date — same basis as every other
         # booking-count report, so a 23:59-initiated / 00:12-paid booking sits
         # in the week its payment settled.
-        eff = booking_effective_datetime(booking)
-        if eff is None:
-            continue
+        eff = row.stat_date
         if eff.year != _now_uk.year or eff.month > _current_month:
             continue
-        _pattern_counts[eff.month][_week_bucket(eff.day)] += 1
+        _pattern_counts[eff.month][_week_bucket(eff.day)] += row.booking_count
 
     months_pattern = []
     overall_buckets = {b: 0 for b in _bucket_keys}
@@ -2991,7 +2950,7 @@ async def get_booking_stats(
     }
 
     return {
-        "total_bookings": len(all_bookings),
+        "total_bookings": sum(status_totals.values()),
         "total_successful": total_successful,
         "status_totals": dict(status_totals),
         "this_week": this_week_count,
@@ -3032,7 +2991,7 @@ async def get_booking_stats(
 
 
 @app.post("/api/admin/bookings", response_model=BookingResponse)
-async def create_admin_booking(
+def create_admin_booking(
     request: AdminBookingRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -3099,7 +3058,7 @@ async def create_admin_booking(
 
 
 @app.post("/api/admin/manual-booking")
-async def create_manual_booking(
+def create_manual_booking(
     request: ManualBookingRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -3496,7 +3455,7 @@ async def create_manual_booking(
 
 
 @app.post("/api/admin/bookings/{booking_id}/mark-paid")
-async def mark_booking_paid(
+def mark_booking_paid(
     booking_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -3722,7 +3681,7 @@ async def mark_booking_paid(
 
 
 @app.post("/api/admin/bookings/{booking_id}/cancel")
-async def cancel_booking_admin(
+def cancel_booking_admin(
     booking_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -3750,14 +3709,7 @@ async def cancel_booking_admin(
         raise HTTPException(status_code=400, detail="Cannot cancel a refunded booking")
 
     # Release the flight slot using stored departure_id and dropoff_slot
-    slot_released = False
-    if booking.departure_id and booking.dropoff_slot:
-        # Normalize dropoff_slot to "early"/"late" for slot release
-        # Slot types: "150"/"165"/"early" -> early, "120"/"standard"/"90"/"late" -> late
-        # Note: "165" is legacy format, treat as "early"
-        slot_type = "early" if booking.dropoff_slot in ("150", "165", "early") else "late"
-        result = db_service.release_departure_slot(db, booking.departure_id, slot_type)
-        slot_released = result.get("success", False)
+    slot_released = db_service.release_booking_departure_slot(db, booking)
 
     # Cancel the Stripe PaymentIntent if payment exists and is not completed
     stripe_cancelled = False
@@ -3817,7 +3769,7 @@ async def cancel_booking_admin(
 
 
 @app.delete("/api/admin/bookings/{booking_id}")
-async def delete_booking(
+def delete_booking(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -3845,12 +3797,7 @@ async def delete_booking(
     reference = booking.reference
 
     # Release the flight slot if one was reserved
-    # Slot types: "150"/"165"/"early" -> early, "120"/"standard"/"90"/"late" -> late
-    slot_released = False
-    if booking.departure_id and booking.dropoff_slot:
-        slot_type = "early" if booking.dropoff_slot in ("150", "165", "early") else "late"
-        result = db_service.release_departure_slot(db, booking.departure_id, slot_type)
-        slot_released = result.get("success", False)
+    slot_released = db_service.release_booking_departure_slot(db, booking)
 
     # Delete associated payment record if exists (Payment references booking via booking_id)
     payment = db.query(Payment).filter(Payment.booking_id == booking_id).first()
@@ -3891,7 +3838,7 @@ async def delete_booking(
 
 
 @app.put("/api/admin/bookings/{booking_id}")
-async def update_booking(
+def update_booking(
     booking_id: int,
     request: UpdateBookingRequest,
     background_tasks: BackgroundTasks,
@@ -4109,7 +4056,7 @@ async def update_booking(
 
 
 @app.post("/api/admin/fix-overnight-arrivals")
-async def fix_overnight_arrivals_endpoint(
+def fix_overnight_arrivals_endpoint(
     dry_run: bool = Query(True, description="If true, only report issues without fixing"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4187,7 +4134,7 @@ async def fix_overnight_arrivals_endpoint(
 
 
 @app.post("/api/admin/fix-customer-names")
-async def fix_customer_names_endpoint(
+def fix_customer_names_endpoint(
     dry_run: bool = Query(True, description="If true, only report issues without fixing"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4293,7 +4240,7 @@ async def fix_customer_names_endpoint(
 
 
 @app.post("/api/admin/bookings/{booking_id}/resend-email")
-async def resend_booking_confirmation_email(
+def resend_booking_confirmation_email(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4434,7 +4381,7 @@ async def resend_booking_confirmation_email(
 
 
 @app.post("/api/admin/bookings/{booking_id}/send-parking-update")
-async def send_parking_update_endpoint(
+def send_parking_update_endpoint(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4511,7 +4458,7 @@ async def send_parking_update_endpoint(
 
 
 @app.post("/api/admin/bookings/{booking_id}/send-cancellation-email")
-async def send_cancellation_email_endpoint(
+def send_cancellation_email_endpoint(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4562,7 +4509,7 @@ async def send_cancellation_email_endpoint(
 
 
 @app.post("/api/admin/bookings/{booking_id}/send-refund-email")
-async def send_refund_email_endpoint(
+def send_refund_email_endpoint(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4618,7 +4565,7 @@ async def send_refund_email_endpoint(
 
 
 @app.post("/api/admin/bookings/{booking_id}/send-founder-email")
-async def send_founder_email_endpoint(
+def send_founder_email_endpoint(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -4680,7 +4627,7 @@ class SwapVehicleRequest(BaseModel):
 
 
 @app.put("/api/admin/bookings/{booking_id}/swap-vehicle")
-async def swap_booking_vehicle(
+def swap_booking_vehicle(
     booking_id: int,
     request: SwapVehicleRequest,
     db: Session = Depends(get_db),
@@ -4756,19 +4703,133 @@ async def swap_booking_vehicle(
 # Marketing Subscribers Admin Endpoints
 # =============================================================================
 
+# Marketing subscribers page through (subscribed_at, id), newest first,
+# with an opaque cursor. Omitting `limit` keeps the legacy "every
+# subscriber" response. The status segments are the admin list's filter
+# tabs; each is a SQL predicate, so the list, its counts and a campaign's
+# recipients all select the same rows. Boolean flags are compared with
+# IS [NOT] TRUE so a NULL flag counts as false.
+SUBSCRIBER_PAGE_MAX_LIMIT = 500
+SUBSCRIBER_STATUSES = ("pending", "sent", "used", "unsubscribed")
+
+
+class SubscriberSegment(BaseModel):
+    """A slice of marketing_subscribers; every field given must match."""
+    status: Optional[str] = None  # one of SUBSCRIBER_STATUSES
+    source: Optional[str] = None
+    unsubscribed: Optional[bool] = None
+
+
+def _subscriber_status_condition(status: str):
+    from sqlalchemy import and_
+
+    s = MarketingSubscriber
+    if status == "pending":
+        return and_(s.promo_10_sent.is_not(True), s.promo_free_sent.is_not(True), s.unsubscribed.is_not(True))
+    if status == "sent":
+        return and_(
+            or_(s.promo_10_sent.is_(True), s.promo_free_sent.is_(True)),
+            s.promo_10_used.is_not(True),
+            s.promo_free_used.is_not(True),
+            s.unsubscribed.is_not(True),
+        )
+    if status == "used":
+        return or_(s.promo_10_used.is_(True), s.promo_free_used.is_(True))
+    if status == "unsubscribed":
+        return s.unsubscribed.is_(True)
+    raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(SUBSCRIBER_STATUSES)}")
+
+
+def _subscriber_segment_filters(segment: SubscriberSegment) -> list:
+    """WHERE clauses selecting `segment`; raises 400 on an unknown status."""
+    conditions = []
+    if segment.status:
+        conditions.append(_subscriber_status_condition(segment.status))
+    if segment.source:
+        conditions.append(MarketingSubscriber.source == segment.source)
+    if segment.unsubscribed is not None:
+        conditions.append(
+            MarketingSubscriber.unsubscribed.is_(True) if segment.unsubscribed
+            else MarketingSubscriber.unsubscribed.is_not(True)
+        )
+    return conditions
+
+
+def _subscriber_segment_counts(db: Session) -> dict:
+    """Subscribers per status tab, overall and per source, in one grouped query."""
+    statuses = [
+        func.count(MarketingSubscriber.id).filter(_subscriber_status_condition(status)).label(status)
+        for status in SUBSCRIBER_STATUSES
+    ]
+    rows = (
+        db.query(MarketingSubscriber.source, func.count(MarketingSubscriber.id).label("all"), *statuses)
+        .group_by(MarketingSubscriber.source)
+        .all()
+    )
+    keys = ("all",) + SUBSCRIBER_STATUSES
+    totals = dict.fromkeys(keys, 0)
+    by_source = {}
+    for source, *counts in rows:
+        by_source[source or "unknown"] = dict(zip(keys, counts))
+        for key, count in zip(keys, counts):
+            totals[key] += count
+    return {**totals, "by_source": by_source}
+
+
+def _encode_subscriber_cursor(subscribed_at: Optional[datetime], subscriber_id: int) -> str:
+    """Opaque keyset cursor for the last subscriber of a page."""
+    import base64
+    raw = f"{subscribed_at.isoformat() if subscribed_at else ''}|{subscriber_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_subscriber_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    """Inverse of _encode_subscriber_cursor; raises 400 on anything malformed."""
+    import base64
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        subscribed_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return (datetime.fromisoformat(subscribed_part) if subscribed_part else None, int(id_part))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/api/admin/marketing-subscribers")
-async def get_marketing_subscribers(
+def get_marketing_subscribers(
+    status: Optional[str] = Query(None, description=f"One of: {', '.join(SUBSCRIBER_STATUSES)}"),
+    source: Optional[str] = Query(None, description="Signup source, e.g. landing_page"),
+    unsubscribed: Optional[bool] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=SUBSCRIBER_PAGE_MAX_LIMIT, description="Page size; omit for every subscriber"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Get all marketing subscribers for admin management.
+    Get marketing subscribers for admin management, newest first.
+
+    `status`, `source` and `unsubscribed` filter in SQL. Pass `limit` to
+    page through; the response then carries a `next_cursor` to send back
+    as `cursor`. The first page (no cursor) also carries `segment_counts`.
     """
-    subscribers = db.query(MarketingSubscriber).order_by(
-        MarketingSubscriber.subscribed_at.desc()
-    ).all()
+    segment = SubscriberSegment(status=status, source=source, unsubscribed=unsubscribed)
+    query = db.query(MarketingSubscriber).filter(*_subscriber_segment_filters(segment))
+    if cursor:
+        after_subscribed_at, after_id = _decode_subscriber_cursor(cursor)
+        query = query.filter(_newest_first_after(
+            MarketingSubscriber.subscribed_at, MarketingSubscriber.id, after_subscribed_at, after_id,
+        ))
+    query = query.order_by(MarketingSubscriber.subscribed_at.desc().nulls_last(), MarketingSubscriber.id.desc())
 
-    return {
+    next_cursor = None
+    if limit is None:
+        subscribers = query.all()
+    else:
+        subscribers = query.limit(limit + 1).all()
+        if len(subscribers) > limit:
+            subscribers = subscribers[:limit]
+            next_cursor = _encode_subscriber_cursor(subscribers[-1].subscribed_at, subscribers[-1].id)
+
+    result = {
         "count": len(subscribers),
         "subscribers": [
             {
@@ -4776,6 +4837,7 @@ async def get_marketing_subscribers(
                 "first_name": s.first_name,
                 "last_name": s.last_name,
                 "email": s.email,
+                "source": s.source,
                 "subscribed_at": s.subscribed_at.isoformat() if s.subscribed_at else None,
                 "welcome_email_sent": s.welcome_email_sent,
                 "welcome_email_sent_at": s.welcome_email_sent_at.isoformat() if s.welcome_email_sent_at else None,
@@ -4816,40 +4878,115 @@ async def get_marketing_subscribers(
             for s in subscribers
         ],
     }
+    if limit is not None:
+        result["next_cursor"] = next_cursor
+        result["has_more"] = next_cursor is not None
+    if not cursor:
+        result["segment_counts"] = _subscriber_segment_counts(db)
+    return result
+
+
+# Abandoned leads page through (created_at, id), newest first, with an
+# opaque cursor. Omitting `limit` keeps the legacy "every lead" response.
+LEAD_PAGE_MAX_LIMIT = 500
+
+
+def _newest_first_after(stamp_column, id_column, after_stamp: Optional[datetime], after_id: int):
+    """Keyset filter for the rows after (after_stamp, after_id) in
+    `stamp DESC NULLS LAST, id DESC` order.
+
+    A NULL stamp sorts after every dated row, so a dated cursor's next page
+    still reaches the undated tail, and an undated cursor pages that tail
+    by id alone (`stamp < NULL` would match nothing).
+    """
+    from sqlalchemy import and_
+
+    if after_stamp is None:
+        return and_(stamp_column.is_(None), id_column < after_id)
+    return or_(
+        stamp_column < after_stamp,
+        and_(stamp_column == after_stamp, id_column < after_id),
+        stamp_column.is_(None),
+    )
+
+
+def _encode_lead_cursor(created_at: Optional[datetime], customer_id: int) -> str:
+    """Opaque keyset cursor for the last lead of a page."""
+    import base64
+    raw = f"{created_at.isoformat() if created_at else ''}|{customer_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_lead_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    """Inverse of _encode_lead_cursor; raises 400 on anything malformed."""
+    import base64
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return (datetime.fromisoformat(created_part) if created_part else None, int(id_part))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @app.get("/api/admin/abandoned-leads")
-async def get_abandoned_leads(
+def get_abandoned_leads(
+    limit: Optional[int] = Query(None, ge=1, le=LEAD_PAGE_MAX_LIMIT, description="Page size; omit for every lead"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),  # Requires admin auth
 ):
     """
     Get customers who started the booking flow but didn't complete.
     These are customers with no confirmed bookings.
+
+    One query: an anti-join drops customers with a confirmed booking, and
+    window functions over each customer's bookings give the attempt count
+    and the latest booking. Pass `limit` to page through (newest first);
+    the response then carries a `next_cursor` to send back as `cursor`.
     """
+    from sqlalchemy import and_, exists
     from db_models import Customer, Booking, BookingStatus
 
-    # Subquery to find customers with at least one confirmed booking
-    confirmed_booking_exists = (
-        db.query(Booking.customer_id)
-        .filter(Booking.status == BookingStatus.CONFIRMED)
+    latest_booking = (
+        db.query(
+            Booking.customer_id.label("customer_id"),
+            Booking.status.label("status"),
+            Booking.created_at.label("created_at"),
+            func.count(Booking.id).over(partition_by=Booking.customer_id).label("attempts"),
+            func.row_number().over(
+                partition_by=Booking.customer_id,
+                order_by=(Booking.created_at.desc(), Booking.id.desc()),
+            ).label("booking_rank"),
+        )
         .subquery()
     )
-
-    # Get customers who have NO confirmed bookings
-    abandoned_leads = (
-        db.query(Customer)
-        .filter(~Customer.id.in_(db.query(confirmed_booking_exists.c.customer_id)))
-        .order_by(Customer.created_at.desc())
-        .all()
+    has_confirmed_booking = exists().where(
+        Booking.customer_id == Customer.id,
+        Booking.status == BookingStatus.CONFIRMED,
     )
+    query = (
+        db.query(Customer, latest_booking.c.attempts, latest_booking.c.status, latest_booking.c.created_at)
+        .outerjoin(latest_booking, and_(latest_booking.c.customer_id == Customer.id, latest_booking.c.booking_rank == 1))
+        .filter(~has_confirmed_booking)
+    )
+    if cursor:
+        after_created_at, after_id = _decode_lead_cursor(cursor)
+        query = query.filter(_newest_first_after(Customer.created_at, Customer.id, after_created_at, after_id))
+    query = query.order_by(Customer.created_at.desc().nulls_last(), Customer.id.desc())
+
+    next_cursor = None
+    if limit is None:
+        rows = query.all()
+    else:
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = _encode_lead_cursor(last.created_at, last.id)
 
-    # For each lead, get their booking attempts (if any)
     leads_data = []
-    for customer in abandoned_leads:
-        # Get any bookings they might have (pending, failed, etc.)
-        bookings = db.query(Booking).filter(Booking.customer_id == customer.id).all()
-
+    for customer, attempts, last_status, last_booking_at in rows:
+        activity = [stamp for stamp in (customer.created_at, customer.billing_updated_at, last_booking_at) if stamp]
         leads_data.append({
             "id": customer.id,
             "first_name": customer.first_name,
@@ -4860,42 +4997,166 @@ async def get_abandoned_leads(
             "billing_city": customer.billing_city,
             "billing_postcode": customer.billing_postcode,
             "created_at": customer.created_at.isoformat() if customer.created_at else None,
-            "booking_attempts": len(bookings),
-            "last_booking_status": bookings[0].status.value if bookings else None,
+            "booking_attempts": attempts or 0,
+            "last_booking_status": last_status.value if last_status else None,
+            "last_booking_at": last_booking_at.isoformat() if last_booking_at else None,
+            "last_activity_at": max(activity, key=to_uk_datetime).isoformat() if activity else None,
             "founder_followup_sent": customer.founder_followup_sent,
             "founder_followup_sent_at": customer.founder_followup_sent_at.isoformat() if customer.founder_followup_sent_at else None,
         })
 
-    return {
+    result = {
         "count": len(leads_data),
         "leads": leads_data,
     }
+    if limit is not None:
+        result["next_cursor"] = next_cursor
+        result["has_more"] = next_cursor is not None
+    return result
+
+
+# The customers directory pages through (sort value, id) with an opaque
+# cursor. Omitting `limit` keeps the legacy "every customer" response.
+CUSTOMER_PAGE_MAX_LIMIT = 500
+CUSTOMER_SORTS = ("newest", "oldest", "name", "email")
+
+
+def _customer_full_name_expr():
+    """first_name || ' ' || last_name, as indexed by ix_customers_full_name_trgm."""
+    from db_models import Customer
+    return func.coalesce(Customer.first_name, "").concat(" ").concat(func.coalesce(Customer.last_name, ""))
+
+
+def _vehicle_registration_search_expr():
+    """Registration upper-cased with spaces removed, as indexed by ix_vehicles_registration_trgm."""
+    from db_models import Vehicle
+    return func.replace(func.upper(Vehicle.registration), " ", "")
+
+
+def _customer_sort_column(sort: str):
+    from db_models import Customer
+    if sort == "name":
+        return func.lower(_customer_full_name_expr())
+    if sort == "email":
+        return func.lower(Customer.email)
+    return Customer.created_at
+
+
+def _encode_customer_cursor(sort: str, value, customer_id: int) -> str:
+    """Opaque keyset cursor for the last customer of a page."""
+    import base64
+    text_value = value.isoformat() if isinstance(value, datetime) else (value or "")
+    raw = json.dumps([sort, text_value, customer_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_customer_cursor(cursor: str, sort: str):
+    """Inverse of _encode_customer_cursor; raises 400 on anything malformed
+    or on a cursor from a different sort order."""
+    import base64
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, customer_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if cursor_sort != sort:
+            raise ValueError("cursor belongs to another sort")
+        if sort in ("newest", "oldest"):
+            value = datetime.fromisoformat(value)
+        return value, int(customer_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _customer_related_counts(db: Session, customer_ids: Optional[list] = None) -> dict:
+    """{customer_id: (vehicle_count, booking_count)} from one aggregate over
+    vehicles and bookings; restricted to `customer_ids` when given."""
+    from sqlalchemy import literal, union_all
+    from db_models import Booking, Vehicle
+
+    vehicles = db.query(Vehicle.customer_id.label("customer_id"), literal(1).label("vehicle"), literal(0).label("booking"))
+    bookings = db.query(Booking.customer_id.label("customer_id"), literal(0).label("vehicle"), literal(1).label("booking"))
+    if customer_ids is not None:
+        if not customer_ids:
+            return {}
+        vehicles = vehicles.filter(Vehicle.customer_id.in_(customer_ids))
+        bookings = bookings.filter(Booking.customer_id.in_(customer_ids))
+    related = union_all(vehicles.statement, bookings.statement).subquery()
+    rows = (
+        db.query(related.c.customer_id, func.sum(related.c.vehicle), func.sum(related.c.booking))
+        .group_by(related.c.customer_id)
+        .all()
+    )
+    return {customer_id: (int(vehicle_count), int(booking_count)) for customer_id, vehicle_count, booking_count in rows}
 
 
 @app.get("/api/admin/customers")
-async def get_customers(
+def get_customers(
+    q: Optional[str] = Query(None, description="Search name, email, phone or vehicle registration"),
+    sort: str = Query("newest", pattern="^(newest|oldest|name|email)$"),
+    limit: Optional[int] = Query(None, ge=1, le=CUSTOMER_PAGE_MAX_LIMIT, description="Page size; omit for every customer"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Get all customers ordered by created_at ascending.
-    Returns customer contact and billing information.
+    Get customers, newest first by default.
+    Returns customer contact and billing information, marketing source and
+    vehicle/booking counts.
+
+    `q` matches a substring of the full name, email, phone or any vehicle
+    registration (pg_trgm GIN indexes keep these fast on Postgres). Pass
+    `limit` to page through results; the response then carries a
+    `next_cursor` to send back as `cursor` (None on the last page).
     """
-    from db_models import Customer
+    from sqlalchemy import and_, exists
+    from db_models import Customer, MarketingSource, Vehicle
 
-    customers = (
-        db.query(Customer)
-        .order_by(Customer.created_at.desc())
-        .all()
+    query = (
+        db.query(Customer, MarketingSource.source)
+        .outerjoin(MarketingSource, MarketingSource.customer_id == Customer.id)
     )
 
-    customers_data = []
-    for customer in customers:
-        # Get marketing source if exists
-        marketing_source = None
-        if customer.marketing_source:
-            marketing_source = customer.marketing_source.source
+    search = (q or "").strip()
+    if search:
+        pattern = f"%{search}%"
+        registration = re.sub(r"\s+", "", search).upper()
+        query = query.filter(or_(
+            _customer_full_name_expr().ilike(pattern),
+            Customer.email.ilike(pattern),
+            Customer.phone.ilike(pattern),
+            exists().where(
+                Vehicle.customer_id == Customer.id,
+                _vehicle_registration_search_expr().like(f"%{registration}%"),
+            ),
+        ))
+
+    sort_col = _customer_sort_column(sort)
+    descending = sort == "newest"
+    if cursor:
+        after_value, after_id = _decode_customer_cursor(cursor, sort)
+        if descending:
+            query = query.filter(or_(sort_col < after_value, and_(sort_col == after_value, Customer.id < after_id)))
+        else:
+            query = query.filter(or_(sort_col > after_value, and_(sort_col == after_value, Customer.id > after_id)))
+    if descending:
+        query = query.order_by(sort_col.desc(), Customer.id.desc())
+    else:
+        query = query.order_by(sort_col.asc(), Customer.id.asc())
+
+    next_cursor = None
+    if limit is None:
+        rows = query.all()
+        counts = _customer_related_counts(db)
+    else:
+        rows = query.add_columns(sort_col).limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_customer_cursor(sort, last[2], last[0].id)
+        counts = _customer_related_counts(db, [row[0].id for row in rows])
 
+    customers_data = []
+    for customer, marketing_source, *_ in rows:
+        vehicle_count, booking_count = counts.get(customer.id, (0, 0))
         customers_data.append({
             "id": customer.id,
             "first_name": customer.first_name,
@@ -4905,12 +5166,18 @@ async def get_customers(
             "billing_postcode": customer.billing_postcode,
             "created_at": customer.created_at.isoformat() if customer.created_at else None,
             "marketing_source": marketing_source,
+            "vehicle_count": vehicle_count,
+            "booking_count": booking_count,
         })
 
-    return {
+    result = {
         "count": len(customers_data),
         "customers": customers_data,
     }
+    if limit is not None:
+        result["next_cursor"] = next_cursor
+        result["has_more"] = next_cursor is not None
+    return result
 
 
 class UpdateCustomerRequest(BaseModel):
@@ -4919,7 +5186,7 @@ class UpdateCustomerRequest(BaseModel):
 
 
 @app.patch("/api/admin/customers/{customer_id}")
-async def update_customer(
+def update_customer(
     customer_id: int,
     request: UpdateCustomerRequest,
     db: Session = Depends(get_db),
@@ -4985,7 +5252,7 @@ async def update_customer(
 
 
 @app.delete("/api/admin/customers/{customer_id}")
-async def delete_customer(
+def delete_customer(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5087,7 +5354,7 @@ def build_referrals_dashboard_data(
     referral codes show every booking created with a referral code, regardless
     of whether the booking has completed or qualified for reward progress.
     """
-    from sqlalchemy import and_, or_
+    from sqlalchemy import and_, distinct, or_
     from sqlalchemy.orm import aliased, joinedload
     from db_models import Booking, Customer as DbCustomer, PromoCode, PromoCodeUsage, Promotion, ReferralAttribution, ReferralProgram
     from referral_service import (
@@ -5110,76 +5377,69 @@ def build_referrals_dashboard_data(
     usage_filter = (usage_filter or "all").strip()
     usage_search = (usage_search or "").strip()
 
-    referral_code_count = (
-        db.query(PromoCode)
+    # Headline stats come from one aggregate per table, each count a
+    # FILTER clause, rather than a COUNT round trip per figure.
+    referral_code_count, usage_total = (
+        db.query(func.count(distinct(PromoCode.id)), func.count(PromoCodeUsage.id))
         .join(Promotion, PromoCode.promotion_id == Promotion.id)
+        .outerjoin(PromoCodeUsage, PromoCodeUsage.promo_code_id == PromoCode.id)
         .filter(Promotion.name == FRIEND_PROMOTION_NAME)
-        .count()
+        .one()
     )
-    usage_total = (
-        db.query(PromoCodeUsage)
-        .join(PromoCode, PromoCodeUsage.promo_code_id == PromoCode.id)
-        .join(Promotion, PromoCode.promotion_id == Promotion.id)
-        .filter(Promotion.name == FRIEND_PROMOTION_NAME)
-        .count()
+    program_stats = (
+        db.query(
+            func.count(ReferralProgram.id).filter(ReferralProgram.invite_sent_at.isnot(None)),
+            func.count(ReferralProgram.id).filter(ReferralProgram.status.in_([PROGRAM_STATUS_INVITED, PROGRAM_STATUS_REMINDED])),
+            func.count(ReferralProgram.id).filter(ReferralProgram.status == PROGRAM_STATUS_OPTED_IN),
+            func.count(ReferralProgram.id).filter(ReferralProgram.status == PROGRAM_STATUS_OPTED_OUT),
+            func.count(ReferralProgram.id).filter(or_(ReferralProgram.reward_code_id.isnot(None), ReferralProgram.reward_earned_at.isnot(None))),
+            func.count(ReferralProgram.id).filter(ReferralProgram.reward_email_sent_at.isnot(None)),
+        )
+        .one()
+    )
+    attribution_stats = (
+        db.query(
+            func.count(ReferralAttribution.id).filter(
+                ReferralAttribution.status == ATTRIBUTION_STATUS_QUALIFIED,
+                ReferralAttribution.is_self_use.is_(False),
+            ),
+            func.count(ReferralAttribution.id).filter(
+                or_(ReferralAttribution.is_self_use.is_(True), ReferralAttribution.status == ATTRIBUTION_STATUS_DISQUALIFIED)
+            ),
+        )
+        .one()
     )
 
     stats = {
-        "invites_sent": db.query(ReferralProgram).filter(ReferralProgram.invite_sent_at.isnot(None)).count(),
-        "awaiting_response": db.query(ReferralProgram).filter(ReferralProgram.status.in_([PROGRAM_STATUS_INVITED, PROGRAM_STATUS_REMINDED])).count(),
-        "opted_in": db.query(ReferralProgram).filter(ReferralProgram.status == PROGRAM_STATUS_OPTED_IN).count(),
-        "opted_out": db.query(ReferralProgram).filter(ReferralProgram.status == PROGRAM_STATUS_OPTED_OUT).count(),
+        "invites_sent": program_stats[0],
+        "awaiting_response": program_stats[1],
+        "opted_in": program_stats[2],
+        "opted_out": program_stats[3],
         "referral_codes_generated": referral_code_count,
         "referral_code_bookings_created": usage_total,
-        "completed_qualified_referrals": (
-            db.query(ReferralAttribution)
-            .filter(
-                ReferralAttribution.status == ATTRIBUTION_STATUS_QUALIFIED,
-                ReferralAttribution.is_self_use.is_(False),
-            )
-            .count()
-        ),
-        "self_use_disqualified_referrals": (
-            db.query(ReferralAttribution)
-            .filter(or_(ReferralAttribution.is_self_use.is_(True), ReferralAttribution.status == ATTRIBUTION_STATUS_DISQUALIFIED))
-            .count()
-        ),
-        "rewards_earned": (
-            db.query(ReferralProgram)
-            .filter(or_(ReferralProgram.reward_code_id.isnot(None), ReferralProgram.reward_earned_at.isnot(None)))
-            .count()
-        ),
-        "rewards_sent": db.query(ReferralProgram).filter(ReferralProgram.reward_email_sent_at.isnot(None)).count(),
+        "completed_qualified_referrals": attribution_stats[0],
+        "self_use_disqualified_referrals": attribution_stats[1],
+        "rewards_earned": program_stats[4],
+        "rewards_sent": program_stats[5],
     }
     responded = stats["opted_in"] + stats["opted_out"]
     stats["opt_in_rate"] = round((stats["opted_in"] / responded) * 100, 1) if responded else 0
 
+    # Uses and self-uses per referrer in one GROUP BY; the customer list
+    # filters on it and reads the page's counts from the same join.
     usage_counts_subq = (
         db.query(
             PromoCode.customer_id.label("customer_id"),
             func.count(PromoCodeUsage.id).label("uses"),
+            func.count(PromoCodeUsage.id).filter(Booking.customer_id == PromoCode.customer_id).label("self_uses"),
         )
         .join(PromoCodeUsage, PromoCodeUsage.promo_code_id == PromoCode.id)
         .join(Promotion, PromoCode.promotion_id == Promotion.id)
+        .outerjoin(Booking, PromoCodeUsage.booking_id == Booking.id)
         .filter(Promotion.name == FRIEND_PROMOTION_NAME)
         .group_by(PromoCode.customer_id)
         .subquery()
     )
-    self_use_counts_subq = (
-        db.query(
-            PromoCode.customer_id.label("customer_id"),
-            func.count(PromoCodeUsage.id).label("self_uses"),
-        )
-        .join(PromoCodeUsage, PromoCodeUsage.promo_code_id == PromoCode.id)
-        .join(Promotion, PromoCode.promotion_id == Promotion.id)
-        .join(Booking, PromoCodeUsage.booking_id == Booking.id)
-        .filter(
-            Promotion.name == FRIEND_PROMOTION_NAME,
-            Booking.customer_id == PromoCode.customer_id,
-        )
-        .group_by(PromoCode.customer_id)
-        .subquery()
-    )
     disqualified_program_ids_subq = (
         db.query(ReferralAttribution.referral_program_id)
         .filter(ReferralAttribution.status == ATTRIBUTION_STATUS_DISQUALIFIED)
@@ -5188,11 +5448,14 @@ def build_referrals_dashboard_data(
     )
     ProgramCode = aliased(PromoCode)
     programs_query = (
-        db.query(ReferralProgram)
+        db.query(
+            ReferralProgram,
+            func.coalesce(usage_counts_subq.c.uses, 0),
+            func.coalesce(usage_counts_subq.c.self_uses, 0),
+        )
         .outerjoin(DbCustomer, ReferralProgram.customer_id == DbCustomer.id)
         .outerjoin(ProgramCode, ReferralProgram.referral_code_id == ProgramCode.id)
         .outerjoin(usage_counts_subq, usage_counts_subq.c.customer_id == ReferralProgram.customer_id)
-        .outerjoin(self_use_counts_subq, self_use_counts_subq.c.customer_id == ReferralProgram.customer_id)
     )
     if customer_search:
         search = f"%{customer_search}%"
@@ -5219,14 +5482,14 @@ def build_referrals_dashboard_data(
     elif customer_filter == "self_use_only":
         programs_query = programs_query.filter(
             func.coalesce(usage_counts_subq.c.uses, 0) > 0,
-            func.coalesce(self_use_counts_subq.c.self_uses, 0) == func.coalesce(usage_counts_subq.c.uses, 0),
+            func.coalesce(usage_counts_subq.c.self_uses, 0) == func.coalesce(usage_counts_subq.c.uses, 0),
             func.coalesce(ReferralProgram.qualified_referral_count, 0) == 0,
         )
     elif customer_filter == "disqualified_usage":
         programs_query = programs_query.filter(ReferralProgram.id.in_(disqualified_program_ids_subq))
 
     program_total = programs_query.count()
-    programs = (
+    program_rows = (
         programs_query
         .options(
             joinedload(ReferralProgram.customer),
@@ -5246,6 +5509,9 @@ def build_referrals_dashboard_data(
         .limit(customer_limit)
         .all()
     )
+    programs = [program for program, _uses, _self_uses in program_rows]
+    usage_count_by_customer_id = {program.customer_id: uses for program, uses, _self_uses in program_rows}
+    self_use_count_by_customer_id = {program.customer_id: self_uses for program, _uses, self_uses in program_rows}
 
     UsageBooking = aliased(Booking)
     UsedByCustomer = aliased(DbCustomer)
@@ -5335,35 +5601,6 @@ def build_referrals_dashboard_data(
     program_by_customer_id = {program.customer_id: program for program in lookup_programs}
 
     current_page_program_by_id = {program.id: program for program in programs}
-    usage_count_by_customer_id = {
-        customer_id: count
-        for customer_id, count in (
-            db.query(PromoCode.customer_id, func.count(PromoCodeUsage.id))
-            .join(PromoCodeUsage, PromoCodeUsage.promo_code_id == PromoCode.id)
-            .join(Promotion, PromoCode.promotion_id == Promotion.id)
-            .filter(Promotion.name == FRIEND_PROMOTION_NAME, PromoCode.customer_id.in_(program_customer_ids))
-            .group_by(PromoCode.customer_id)
-            .all()
-            if program_customer_ids else []
-        )
-    }
-    self_use_count_by_customer_id = {
-        customer_id: count
-        for customer_id, count in (
-            db.query(PromoCode.customer_id, func.count(PromoCodeUsage.id))
-            .join(PromoCodeUsage, PromoCodeUsage.promo_code_id == PromoCode.id)
-            .join(Promotion, PromoCode.promotion_id == Promotion.id)
-            .join(Booking, PromoCodeUsage.booking_id == Booking.id)
-            .filter(
-                Promotion.name == FRIEND_PROMOTION_NAME,
-                PromoCode.customer_id.in_(program_customer_ids),
-                Booking.customer_id == PromoCode.customer_id,
-            )
-            .group_by(PromoCode.customer_id)
-            .all()
-            if program_customer_ids else []
-        )
-    }
     disqualified_program_ids = {
         program_id
         for program_id, in (
@@ -5481,7 +5718,7 @@ def build_referrals_dashboard_data(
 
 
 @app.get("/api/admin/marketing/referrals")
-async def get_admin_referrals_dashboard(
+def get_admin_referrals_dashboard(
     customer_limit: int = Query(10, ge=1, le=1000),
     customer_offset: int = Query(0, ge=0),
     customer_filter: str = Query("all"),
@@ -5523,7 +5760,7 @@ class ManualReferralInviteRequest(BaseModel):
 
 
 @app.post("/api/admin/marketing/referrals/manual-invite")
-async def send_admin_manual_referral_invite(
+def send_admin_manual_referral_invite(
     request: ManualReferralInviteRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5567,7 +5804,7 @@ async def send_admin_manual_referral_invite(
 
 
 @app.get("/api/admin/customers/{customer_id}")
-async def get_customer_detail(
+def get_customer_detail(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5627,7 +5864,7 @@ async def get_customer_detail(
 
 
 @app.post("/api/admin/customers/{customer_id}/referral/cancel-code")
-async def admin_cancel_customer_referral_code(
+def admin_cancel_customer_referral_code(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5654,7 +5891,7 @@ async def admin_cancel_customer_referral_code(
 
 
 @app.post("/api/admin/customers/{customer_id}/referral/generate-new-code")
-async def admin_generate_customer_referral_code(
+def admin_generate_customer_referral_code(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5681,7 +5918,7 @@ async def admin_generate_customer_referral_code(
 
 
 @app.post("/api/admin/customers/{customer_id}/referral/resend-code")
-async def admin_resend_customer_referral_code(
+def admin_resend_customer_referral_code(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -5719,7 +5956,7 @@ class AddVehicleRequest(BaseModel):
 
 
 @app.post("/api/admin/customers/{customer_id}/vehicles")
-async def add_customer_vehicle(
+def add_customer_vehicle(
     customer_id: int,
     request: AddVehicleRequest,
     db: Session = Depends(get_db),
@@ -5799,23 +6036,17 @@ async def get_booking_locations(
     map_type='bookings': Returns confirmed bookings with geocoded billing postcodes.
     map_type='origins': Returns all customers (leads) from booking flow Page 1 with geocoded billing postcodes.
     """
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-
-    # Check cache
-    global _booking_locations_cache
     cache_key = map_type if map_type in ["bookings", "origins"] else "bookings"
-    if not refresh:
-        cache_entry = _booking_locations_cache.get(cache_key, {})
-        if cache_entry.get("data") is not None and cache_entry.get("cached_at") is not None:
-            cache_age = (now - cache_entry["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = cache_entry["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
+    return await report_cache.get_or_compute(
+        "booking_locations", cache_key,
+        lambda: _booking_locations_report(db, map_type),
+        tags=("bookings", "customers"),
+        refresh=refresh,
+    )
 
+
+async def _booking_locations_report(db, map_type) -> dict:
+    """Uncached body of get_booking_locations."""
     from db_models import Booking, Customer
 
     if map_type == "origins":
@@ -5839,8 +6070,11 @@ async def get_booking_locations(
         )
 
         # Get customers who are leads for their current booking attempt
-        customers = (
+        # (bookings loaded up front: the has_booking check below would
+        # otherwise lazy-load them one customer at a time on the event loop)
+        customers = await run_blocking(
             db.query(Customer)
+            .options(selectinload(Customer.bookings))
             .outerjoin(latest_booking, Customer.id == latest_booking.c.customer_id)
             .filter(Customer.billing_postcode.isnot(None))
             .filter(Customer.billing_postcode != "")
@@ -5855,7 +6089,7 @@ async def get_booking_locations(
                 )
             )
             .order_by(Customer.billing_updated_at.desc())
-            .all()
+            .all
         )
 
         # Extract unique postcodes
@@ -5870,31 +6104,10 @@ async def get_booking_locations(
         if not postcode_to_customers:
             return {"count": 0, "locations": [], "map_type": map_type}
 
-        # Bulk geocode postcodes via postcodes.io
-        postcodes_list = list(postcode_to_customers.keys())
-        coordinates = {}
-
-        try:
-            async with httpx.AsyncClient() as client:
-                for i in range(0, len(postcodes_list), 100):
-                    batch = postcodes_list[i:i + 100]
-                    response = await client.post(
-                        "https://api.postcodes.io/postcodes",
-                        json={"postcodes": batch},
-                        timeout=10.0,
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        for item in data.get("result", []):
-                            if item.get("result"):
-                                pc = item["query"].upper()
-                                coordinates[pc] = {
-                                    "lat": item["result"]["latitude"],
-                                    "lng": item["result"]["longitude"],
-                                    "admin_district": item["result"].get("admin_district"),
-                                }
-        except Exception as e:
-            log_error(db=db, error_type="geocoding_error", message=str(e))
+        coordinates = await postcode_geocoder.geocode_postcodes(
+            db, postcode_to_customers.keys(),
+            on_error=lambda e: log_error(db=db, error_type="geocoding_error", message=str(e)),
+        )
 
         # Build response with customer details
         locations = []
@@ -5931,19 +6144,17 @@ async def get_booking_locations(
             "locations": locations,
             "map_type": map_type,
         }
-
-        # Store in cache
-        _booking_locations_cache[cache_key] = {"data": result.copy(), "cached_at": now}
-        result["cached"] = False
+        # Keep the postcodes geocode_postcodes cached along the way.
+        await run_blocking(db.commit)
         return result
 
     # Default: map_type="bookings" - Query all bookings
-    bookings = (
+    bookings = await run_blocking(
         db.query(Booking)
         .options(joinedload(Booking.customer))
         .filter(Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.COMPLETED, BookingStatus.CANCELLED]))
         .order_by(Booking.dropoff_date.desc())
-        .all()
+        .all
     )
 
     # Extract unique postcodes
@@ -5959,33 +6170,12 @@ async def get_booking_locations(
     if not postcode_to_bookings:
         return {"count": 0, "total_bookings": 0, "skipped_count": 0, "skipped": [], "locations": [], "map_type": map_type}
 
-    # Bulk geocode postcodes via postcodes.io
-    postcodes_list = list(postcode_to_bookings.keys())
-    coordinates = {}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            # postcodes.io supports bulk lookup (max 100 per request)
-            for i in range(0, len(postcodes_list), 100):
-                batch = postcodes_list[i:i + 100]
-                response = await client.post(
-                    "https://api.postcodes.io/postcodes",
-                    json={"postcodes": batch},
-                    timeout=10.0,
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    for item in data.get("result", []):
-                        if item.get("result"):
-                            pc = item["query"].upper()
-                            coordinates[pc] = {
-                                "lat": item["result"]["latitude"],
-                                "lng": item["result"]["longitude"],
-                                "admin_district": item["result"].get("admin_district"),
-                            }
-    except Exception as e:
-        # Log error but continue with whatever we have
-        log_error(db=db, error_type="geocoding_error", message=str(e))
+    # Cached in postcode_geocodes; only new or expired postcodes go to
+    # postcodes.io, and failures fall back to the outward-code centroid.
+    coordinates = await postcode_geocoder.geocode_postcodes(
+        db, postcode_to_bookings.keys(),
+        on_error=lambda e: log_error(db=db, error_type="geocoding_error", message=str(e)),
+    )
 
     # Build response with booking details
     locations = []
@@ -6022,15 +6212,62 @@ async def get_booking_locations(
         "locations": locations,
         "map_type": map_type,
     }
-
-    # Store in cache
-    _booking_locations_cache[cache_key] = {"data": result.copy(), "cached_at": now}
-    result["cached"] = False
+    # Keep the postcodes geocode_postcodes cached along the way.
+    await run_blocking(db.commit)
     return result
 
 
+@app.get("/api/admin/reports/booking-locations/clusters")
+async def get_booking_location_clusters(
+    zoom: int = Query(..., ge=map_clusters.MIN_ZOOM, le=map_clusters.MAX_ZOOM),
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    map_type: str = Query("bookings", description="Map type: 'bookings' or 'origins'"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Booking locations clustered server-side for the map viewport.
+
+    Returns one entry per grid cell (count and centroid) for the tiles the
+    bounding box touches at `zoom`; see map_clusters. Every tile at a zoom
+    is clustered in one pass over the cached booking-locations report and
+    cached per (map_type, zoom), so the payload stays small however many
+    bookings exist and panning only looks tiles up.
+    """
+    map_type = map_type if map_type in ["bookings", "origins"] else "bookings"
+    try:
+        tiles = map_clusters.tiles_for_bbox(zoom, west, south, east, north)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    locations = await report_cache.get_or_compute(
+        "booking_locations", map_type,
+        lambda: _booking_locations_report(db, map_type),
+        tags=("bookings", "customers"),
+    )
+    # A plain function, so the cache clusters off the event loop.
+    index = await report_cache.get_or_compute(
+        "booking_location_tiles", (map_type, zoom),
+        lambda: {"tiles": map_clusters.cluster_tiles(locations["locations"], zoom)},
+        tags=("bookings", "customers"),
+    )
+    tile_clusters = [index["tiles"].get(tile, []) for tile in tiles]
+
+    clusters = map_clusters.merge_tiles(tile_clusters, (west, south, east, north))
+    return {
+        "map_type": map_type,
+        "zoom": zoom,
+        "tile_count": len(tiles),
+        "count": sum(c["count"] for c in clusters),
+        "clusters": clusters,
+    }
+
+
 @app.get("/api/admin/capacity-settings")
-async def get_admin_capacity_settings(
+def get_admin_capacity_settings(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -6044,7 +6281,7 @@ async def get_admin_capacity_settings(
 
 
 @app.put("/api/admin/capacity-settings")
-async def upsert_admin_capacity_setting(
+def upsert_admin_capacity_setting(
     request: ParkingCapacitySettingRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -6061,8 +6298,7 @@ async def upsert_admin_capacity_setting(
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    global _occupancy_cache
-    _occupancy_cache = {}
+    report_cache.invalidate("occupancy")
     return {
         "success": True,
         "setting": db_service.serialize_capacity_setting(setting),
@@ -6073,7 +6309,7 @@ async def upsert_admin_capacity_setting(
 
 
 @app.get("/api/admin/reports/secondary-carpark")
-async def get_secondary_carpark_report(
+def get_secondary_carpark_report(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -6081,7 +6317,11 @@ async def get_secondary_carpark_report(
     car park under the 09:00-21:00 window rule. Powers the dedicated panel in
     Admin/Reports/Occupancy; grouping (daily/weekly/monthly) happens
     client-side off dropoff_date. Cars already parked are NOT included —
-    eligibility applies to arrivals from now on."""
+    eligibility applies to arrivals from now on.
+
+    `daily_usage` is the secondary car park's peak per day, from today to
+    the last event, read from occupancy_timeline (cars already parked
+    count there, since they still take a space)."""
     from sqlalchemy.orm import joinedload
 
     secondary_settings = db_service.get_secondary_carpark_settings()
@@ -6142,6 +6382,20 @@ async def get_secondary_carpark_report(
 
     events.sort(key=lambda e: (e["date"], e["time"] or "99:99"))
 
+    last_day = date.fromisoformat(events[-1]["date"]) if events else today_uk
+    timelines = occupancy_timeline.load_timelines(db, today_uk, last_day)
+    daily_usage = [
+        {
+            "date": t["date"],
+            "peak": t["peak_secondary"],
+            "peak_at": t["peak_secondary_at"],
+            "dropoffs": t["secondary_dropoffs"],
+            "pickups": t["secondary_pickups"],
+            "over_capacity": t["peak_secondary"] > secondary_settings["capacity"],
+        }
+        for t in timelines.values()
+    ]
+
     return {
         "capacity": secondary_settings["capacity"],
         "window_start": secondary_settings["window_start"].strftime("%H:%M"),
@@ -6149,6 +6403,30 @@ async def get_secondary_carpark_report(
         "from_date": today_uk.isoformat(),
         "count": eligible_count,
         "events": events,
+        "daily_usage": daily_usage,
+    }
+
+
+@app.get("/api/employee/occupancy-timeline/{target_date}")
+def get_occupancy_timeline(
+    target_date: date,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Intraday occupancy for one day at 15-minute resolution.
+
+    `total` and `secondary` hold one count per slot from 00:00 (UK wall
+    clock): cars on site at the slot's start, and how many of them qualify
+    for the secondary car park. Served from occupancy_timeline in one
+    indexed select; see occupancy_timeline.
+    """
+    capacity = db_service.get_parking_capacity_for_date(db, target_date)
+    secondary_settings = db_service.get_secondary_carpark_settings()
+    return {
+        **occupancy_timeline.load_timeline(db, target_date),
+        "online_capacity": capacity["online_spaces"],
+        "total_capacity": capacity["total_spaces"],
+        "secondary_capacity": secondary_settings["capacity"],
     }
 
 
@@ -6201,25 +6479,23 @@ async def get_occupancy_report(
     shift logic, not the status, is what stops a just-collected car inflating
     "today".
     """
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-
-    # Only cache default requests (no custom date range)
-    is_default_request = start_date is None and end_date is None
+    # Only cache default requests (no custom date range). Keyed by view — a
+    # single shared slot served the cached DAILY payload to weekly/monthly
+    # requests for up to an hour, making the view switcher appear dead
+    # (2026-06-13).
+    is_default_request = start_date is None and end_date is None and view in ("daily", "weekly", "monthly")
+    if not is_default_request:
+        return {**await run_blocking(_occupancy_report, db, view, start_date, end_date), "cached": False}
+    return await report_cache.get_or_compute(
+        "occupancy", view,
+        lambda: _occupancy_report(db, view, start_date, end_date),
+        tags=("bookings",),
+        refresh=refresh,
+    )
 
-    # Check cache
-    global _occupancy_cache
-    if is_default_request and not refresh:
-        cache_slot = _occupancy_cache.get(view) or {}
-        if cache_slot.get("data") is not None and cache_slot.get("cached_at") is not None:
-            cache_age = (now - cache_slot["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = cache_slot["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
 
+def _occupancy_report(db, view, start_date, end_date) -> dict:
+    """Uncached body of get_occupancy_report."""
     from db_models import Booking, BookingStatus
     from datetime import timedelta
     from collections import defaultdict
@@ -6327,9 +6603,6 @@ async def get_occupancy_report(
             "end_date": report_end.isoformat(),
             "data": data,
         }
-        if is_default_request:
-            _occupancy_cache[view] = {"data": result.copy(), "cached_at": now}
-        result["cached"] = False
         return result
 
     elif view == "weekly":
@@ -6414,9 +6687,6 @@ async def get_occupancy_report(
             "end_date": report_end.isoformat(),
             "data": data,
         }
-        if is_default_request:
-            _occupancy_cache[view] = {"data": result.copy(), "cached_at": now}
-        result["cached"] = False
         return result
 
     elif view == "monthly":
@@ -6501,9 +6771,6 @@ async def get_occupancy_report(
             "end_date": report_end.isoformat(),
             "data": data,
         }
-        if is_default_request:
-            _occupancy_cache[view] = {"data": result.copy(), "cached_at": now}
-        result["cached"] = False
         return result
 
     else:
@@ -6521,7 +6788,7 @@ async def get_popular_airlines_destinations(
 ):
     """
     Get most popular airlines and destinations based on confirmed and completed bookings.
-    Cached for 1 hour (default parameters only).
+    Cached for 1 hour per date range, shared with the fun facts (see _booking_highlights).
 
     Returns ranked lists of:
     - Top airlines by booking count (each booking counted once per unique airline)
@@ -6532,158 +6799,8 @@ async def get_popular_airlines_destinations(
       payment date in UK time, falling back to created_at when unpaid)
     - top: Number of results (5, 10, or 20)
     """
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-
-    # Only cache default requests
-    is_default_request = start_date is None and end_date is None and top == 10
-
-    # Check cache
-    global _popular_cache
-    if is_default_request and not refresh:
-        if _popular_cache.get("data") is not None and _popular_cache.get("cached_at") is not None:
-            cache_age = (now - _popular_cache["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = _popular_cache["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
-
-    from db_models import Booking, BookingStatus
-    from collections import Counter
-
-    # Validate top parameter
-    if top not in [5, 10, 20]:
-        top = 10
-
-    # Build base query - confirmed and completed bookings only.
-    query = db.query(Booking).filter(Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]))
-
-    bookings = query.all()
-
-    # Date range is applied on the effective (paid, UK) date so it matches the
-    # other booking-count reports — not the raw-UTC created_at it used before.
-    if start_date or end_date:
-        def _in_range(b):
-            eff = booking_effective_datetime(b)
-            if eff is None:
-                return False
-            d = eff.date()
-            if start_date and d < start_date:
-                return False
-            if end_date and d > end_date:
-                return False
-            return True
-        bookings = [b for b in bookings if _in_range(b)]
-
-    # Count airlines (merge departure and return - each booking counts once per unique airline NAME)
-    # Use only airline name as key to avoid duplicates like "Jet2 (UNK)" and "Jet2 (LS)"
-    airline_counter = Counter()
-    for booking in bookings:
-        # Collect unique airline names for this booking
-        airlines_in_booking = set()
-        if booking.dropoff_airline_name:
-            airlines_in_booking.add(booking.dropoff_airline_name)
-        if booking.pickup_airline_name:
-            airlines_in_booking.add(booking.pickup_airline_name)
-        # Count each unique airline once per booking
-        for airline_name in airlines_in_booking:
-            airline_counter[airline_name] += 1
-
-    # Count destinations (merge departure destination and return origin - each booking counts once per unique destination)
-    destination_counter = Counter()
-    for booking in bookings:
-        # Collect unique destinations for this booking
-        destinations_in_booking = set()
-        if booking.dropoff_destination:
-            destinations_in_booking.add(booking.dropoff_destination)
-        if booking.pickup_origin:
-            destinations_in_booking.add(booking.pickup_origin)
-        # Count each unique destination once per booking
-        for dest in destinations_in_booking:
-            destination_counter[dest] += 1
-
-    # Get top airlines
-    top_airlines = []
-    total_airline_bookings = sum(airline_counter.values())
-    for airline_name, count in airline_counter.most_common(top):
-        percent = round((count / total_airline_bookings) * 100, 1) if total_airline_bookings > 0 else 0
-        top_airlines.append({
-            "airlineName": airline_name,
-            "count": count,
-            "percent": percent,
-        })
-
-    # Get top destinations
-    top_destinations = []
-    total_destination_bookings = sum(destination_counter.values())
-    for destination, count in destination_counter.most_common(top):
-        percent = round((count / total_destination_bookings) * 100, 1) if total_destination_bookings > 0 else 0
-        top_destinations.append({
-            "destination": destination,
-            "count": count,
-            "percent": percent,
-        })
-
-    # Count route combinations (airline + destination)
-    # Note: We use airline_name + destination as the key (not airline_code)
-    # to avoid duplicates from varying codes (e.g., UNK vs actual code)
-    route_counter = Counter()
-    for booking in bookings:
-        # Collect unique routes for this booking (airline + destination pairs)
-        routes_in_booking = set()
-        # Outbound: dropoff airline to dropoff destination
-        if booking.dropoff_airline_name and booking.dropoff_destination:
-            route_key = (
-                booking.dropoff_airline_name,
-                booking.dropoff_destination
-            )
-            routes_in_booking.add(route_key)
-        # Return: pickup airline from pickup origin
-        if booking.pickup_airline_name and booking.pickup_origin:
-            route_key = (
-                booking.pickup_airline_name,
-                booking.pickup_origin
-            )
-            routes_in_booking.add(route_key)
-        # Count each unique route once per booking
-        for route_key in routes_in_booking:
-            route_counter[route_key] += 1
-
-    # Get top routes
-    top_routes = []
-    total_route_bookings = sum(route_counter.values())
-    for (airline, destination), count in route_counter.most_common(top):
-        percent = round((count / total_route_bookings) * 100, 1) if total_route_bookings > 0 else 0
-        top_routes.append({
-            "airlineName": airline,
-            "destination": destination,
-            "route": f"{airline} to {destination}",
-            "count": count,
-            "percent": percent,
-        })
-
-    result = {
-        "meta": {
-            "startDate": start_date.isoformat() if start_date else None,
-            "endDate": end_date.isoformat() if end_date else None,
-            "top": top,
-            "totalBookings": len(bookings),
-            "totalAirlineBookings": total_airline_bookings,
-            "totalDestinationBookings": total_destination_bookings,
-            "totalRouteBookings": total_route_bookings,
-        },
-        "popularAirlines": top_airlines,
-        "popularDestinations": top_destinations,
-        "popularRoutes": top_routes,
-    }
-
-    if is_default_request:
-        _popular_cache["data"] = result.copy()
-        _popular_cache["cached_at"] = now
-    result["cached"] = False
-    return result
+    highlights = await _booking_highlights(db, start_date, end_date, refresh)
+    return _with_cache_info(booking_highlights.popular_report(highlights, top), highlights)
 
 
 @app.get("/api/admin/reports/fun-facts")
@@ -6694,7 +6811,7 @@ async def get_fun_facts(
 ):
     """
     Get fun facts/records for the business.
-    Cached for 1 hour.
+    Cached for 1 hour, shared with the all-time popular report.
 
     Returns:
     - Busiest Day: Day with most confirmed bookings (by payment date)
@@ -6704,367 +6821,26 @@ async def get_fun_facts(
 
     Only considers confirmed and completed bookings.
     """
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-
-    # Check cache
-    global _fun_facts_cache
-    if not refresh:
-        if _fun_facts_cache.get("data") is not None and _fun_facts_cache.get("cached_at") is not None:
-            cache_age = (now - _fun_facts_cache["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = _fun_facts_cache["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
-
-    from db_models import Booking, BookingStatus
-    from collections import Counter
-    from datetime import timedelta
-
-    # Get all confirmed/completed bookings
-    bookings = db.query(Booking).filter(
-        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED])
-    ).all()
-
-    result = {
-        "busiestDay": None,
-        "busiestWeek": None,
-        "busiestMonth": None,
-        "busiestStreak": None,
-        "longestTrip": None,
-        "highestTransaction": None,
-        "latestTimeOfNight": None,
-        "earliestTimeOfDay": None,
-        "lastMinuteBooking": None,
-        "advanceBooking": None,
-        "milestones": [],
-    }
-
-    if not bookings:
-        result["cached"] = False
-        return result
-
-    # === Busiest Day ===
-    # Count bookings by payment date (when transaction was confirmed)
-    day_counter = Counter()
-    for booking in bookings:
-        # Use payment.paid_at for the confirmation/transaction date
-        if booking.payment and booking.payment.paid_at:
-            paid_date = to_uk_datetime(booking.payment.paid_at).date()
-            day_counter[paid_date] += 1
-
-    if day_counter:
-        # Find the maximum count
-        max_count = max(day_counter.values())
-        # Get all dates that have the maximum count
-        busiest_dates = [d for d, c in day_counter.items() if c == max_count]
-        # Sort dates chronologically
-        busiest_dates.sort()
-        result["busiestDay"] = {
-            "dates": [d.strftime("%a %d %b %Y") for d in busiest_dates],  # e.g., ["Mon 24 Feb 2026", "Tue 25 Feb 2026"]
-            "count": max_count,
-        }
-
-    # === Busiest Streak ===
-    # Find longest consecutive days with at least one booking
-    if day_counter:
-        sorted_dates = sorted(day_counter.keys())
-
-        longest_streak = 1
-        longest_streak_start = sorted_dates[0]
-        longest_streak_end = sorted_dates[0]
-
-        current_streak = 1
-        current_streak_start = sorted_dates[0]
-
-        for i in range(1, len(sorted_dates)):
-            if sorted_dates[i] == sorted_dates[i-1] + timedelta(days=1):
-                # Consecutive day
-                current_streak += 1
-            else:
-                # Streak broken, check if it was the longest
-                if current_streak > longest_streak:
-                    longest_streak = current_streak
-                    longest_streak_start = current_streak_start
-                    longest_streak_end = sorted_dates[i-1]
-                # Start new streak
-                current_streak = 1
-                current_streak_start = sorted_dates[i]
-
-        # Check final streak
-        if current_streak > longest_streak:
-            longest_streak = current_streak
-            longest_streak_start = current_streak_start
-            longest_streak_end = sorted_dates[-1]
-
-        # Count total bookings in the streak
-        streak_bookings = sum(
-            day_counter[d] for d in sorted_dates
-            if longest_streak_start <= d <= longest_streak_end
-        )
-
-        result["busiestStreak"] = {
-            "days": longest_streak,
-            "startDate": longest_streak_start.strftime("%d %b"),  # e.g., "24 Feb"
-            "endDate": longest_streak_end.strftime("%d %b %Y"),   # e.g., "28 Feb 2026"
-            "bookings": streak_bookings,
-        }
-
-    # === Busiest Week ===
-    # Group `day_counter` by ISO week (Mon-Sun). The week with the highest
-    # booking count wins; ties resolved by most recent week first.
-    if day_counter:
-        week_counter = Counter()
-        for day, count in day_counter.items():
-            iso_year, iso_week, _ = day.isocalendar()
-            week_counter[(iso_year, iso_week)] += count
-
-        max_week_count = max(week_counter.values())
-        busiest_weeks = [
-            (y, w) for (y, w), c in week_counter.items() if c == max_week_count
-        ]
-        busiest_weeks.sort(reverse=True)  # most recent first
-        winning_year, winning_week = busiest_weeks[0]
-
-        # Convert ISO year/week back to Mon and Sun dates for display.
-        from datetime import date as date_type
-        week_start = date_type.fromisocalendar(winning_year, winning_week, 1)
-        week_end = date_type.fromisocalendar(winning_year, winning_week, 7)
-        result["busiestWeek"] = {
-            "bookings": max_week_count,
-            "startDate": week_start.strftime("%d %b"),
-            "endDate": week_end.strftime("%d %b %Y"),
-            "weekNumber": winning_week,
-            "year": winning_year,
-        }
-
-    # === Busiest Month ===
-    # Group `day_counter` by (year, month) of payment date. The month with the
-    # highest booking count wins; ties resolved by most recent month first.
-    if day_counter:
-        month_counter = Counter()
-        for day, count in day_counter.items():
-            month_counter[(day.year, day.month)] += count
-
-        max_month_count = max(month_counter.values())
-        busiest_months = [
-            (y, m) for (y, m), c in month_counter.items() if c == max_month_count
-        ]
-        busiest_months.sort(reverse=True)  # most recent first
-        winning_month_year, winning_month = busiest_months[0]
-
-        from datetime import date as date_type
-        month_label_date = date_type(winning_month_year, winning_month, 1)
-        result["busiestMonth"] = {
-            "bookings": max_month_count,
-            "month": month_label_date.strftime("%b %Y"),  # e.g., "May 2026"
-            "monthNumber": winning_month,
-            "year": winning_month_year,
-        }
-
-    # === Longest Trip ===
-    longest_booking = None
-    longest_days = 0
-
-    for booking in bookings:
-        if booking.dropoff_date and booking.pickup_date:
-            trip_days = (booking.pickup_date - booking.dropoff_date).days
-            if trip_days > longest_days:
-                longest_days = trip_days
-                longest_booking = booking
-
-    if longest_booking:
-        # Get customer name
-        first_name = longest_booking.customer_first_name or (longest_booking.customer.first_name if longest_booking.customer else None)
-        last_name = longest_booking.customer_last_name or (longest_booking.customer.last_name if longest_booking.customer else None)
-        customer_name = f"{first_name} {last_name}" if first_name and last_name else None
-        result["longestTrip"] = {
-            "days": longest_days,
-            "reference": longest_booking.reference,
-            "destination": longest_booking.dropoff_destination or "Unknown",
-            "customerName": customer_name,
-            "dates": f"{longest_booking.dropoff_date.strftime('%d %b')} - {longest_booking.pickup_date.strftime('%d %b %Y')}" if longest_booking.dropoff_date and longest_booking.pickup_date else None,
-        }
+    highlights = await _booking_highlights(db, None, None, refresh)
+    return _with_cache_info(dict(highlights["funFacts"]), highlights)
 
-    # === Highest Transaction ===
-    highest_booking = None
-    highest_amount_pence = 0
-
-    for booking in bookings:
-        # Get price from payment relationship
-        if booking.payment and booking.payment.amount_pence and booking.payment.amount_pence > highest_amount_pence:
-            highest_amount_pence = booking.payment.amount_pence
-            highest_booking = booking
-
-    if highest_booking:
-        amount_pounds = highest_amount_pence / 100
-        # Get customer name
-        first_name = highest_booking.customer_first_name or (highest_booking.customer.first_name if highest_booking.customer else None)
-        last_name = highest_booking.customer_last_name or (highest_booking.customer.last_name if highest_booking.customer else None)
-        customer_name = f"{first_name} {last_name}" if first_name and last_name else None
-        result["highestTransaction"] = {
-            "amount": f"£{amount_pounds:.2f}",
-            "reference": highest_booking.reference,
-            "days": (highest_booking.pickup_date - highest_booking.dropoff_date).days if highest_booking.pickup_date and highest_booking.dropoff_date else None,
-            "customerName": customer_name,
-        }
-
-    # === Latest Time of Night & Earliest Time of Day ===
-    # Find bookings by time of day (not date) - who books latest at night, earliest in morning
-    # Convert to UK time for accurate comparison
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-
-    def to_uk_time(dt):
-        """Convert datetime to UK timezone"""
-        if dt is None:
-            return None
-        if dt.tzinfo is None:
-            # Assume UTC if no timezone
-            dt = pytz.utc.localize(dt)
-        return dt.astimezone(uk_tz)
-
-    # Effective (paid, UK) datetime — falls back to created_at when unpaid.
-    bookings_with_created = [b for b in bookings if booking_effective_datetime(b)]
-    if bookings_with_created:
-        # Latest time of night (e.g., 23:58:42) - compare effective UK times
-        latest_time = max(bookings_with_created, key=lambda b: booking_effective_datetime(b).time())
-        latest_uk = booking_effective_datetime(latest_time)
-        # Get customer name
-        lt_first = latest_time.customer_first_name or (latest_time.customer.first_name if latest_time.customer else None)
-        lt_last = latest_time.customer_last_name or (latest_time.customer.last_name if latest_time.customer else None)
-        result["latestTimeOfNight"] = {
-            "time": latest_uk.strftime("%H:%M:%S"),
-            "date": latest_uk.strftime("%d %b %Y"),
-            "reference": latest_time.reference,
-            "customerName": f"{lt_first} {lt_last}" if lt_first and lt_last else None,
-        }
 
-        # Earliest time of day (e.g., 03:02:15) - compare effective UK times
-        earliest_time = min(bookings_with_created, key=lambda b: booking_effective_datetime(b).time())
-        earliest_uk = booking_effective_datetime(earliest_time)
-        # Get customer name
-        et_first = earliest_time.customer_first_name or (earliest_time.customer.first_name if earliest_time.customer else None)
-        et_last = earliest_time.customer_last_name or (earliest_time.customer.last_name if earliest_time.customer else None)
-        result["earliestTimeOfDay"] = {
-            "time": earliest_uk.strftime("%H:%M:%S"),
-            "date": earliest_uk.strftime("%d %b %Y"),
-            "reference": earliest_time.reference,
-            "customerName": f"{et_first} {et_last}" if et_first and et_last else None,
-        }
+async def _booking_highlights(db, start_date, end_date, refresh) -> dict:
+    """The cached single-pass highlights document for a period."""
+    return await report_cache.get_or_compute(
+        "booking_highlights", (start_date, end_date),
+        lambda: booking_highlights.build_highlights(db, start_date, end_date),
+        tags=("bookings", "payments"),
+        refresh=refresh,
+    )
 
-    # === Milestones ===
-    # Order by effective (paid, UK) time — the Nth booking is the Nth to settle.
-    sorted_bookings = sorted(bookings_with_created, key=lambda b: booking_effective_datetime(b))
-    # Ladder of "Xth booking" milestones surfaced on Admin → Insights.
-    # 1–500 in fine-grained steps (early growth, every 25–50); 500–1000 in
-    # steps of 50; 1000+ in round 250s (later growth, less interesting to
-    # mark every 50).
-    # Each milestone is only rendered once total bookings >= the number
-    # (gate is the `if len(sorted_bookings) >= num:` check below) so
-    # future tiers stay invisible until earned.
-    milestone_numbers = [
-        1, 25, 50, 75, 100, 125, 150, 175, 200, 250, 300, 350, 400, 450, 500,
-        550, 600, 650, 700, 750, 800, 850, 900, 950, 1000,
-        1250, 1500, 1750, 2000,
-    ]
-    milestones = []
-
-    for num in milestone_numbers:
-        if len(sorted_bookings) >= num:
-            booking = sorted_bookings[num - 1]  # 0-indexed
-            label = "1st" if num == 1 else f"{num}th"
-            # Get customer name from snapshot or relationship
-            first_name = booking.customer_first_name or (booking.customer.first_name if booking.customer else None)
-            last_name = booking.customer_last_name or (booking.customer.last_name if booking.customer else None)
-            eff = booking_effective_datetime(booking)
-            milestones.append({
-                "number": num,
-                "label": label,
-                "date": eff.strftime("%d %b %Y"),
-                "time": eff.strftime("%H:%M"),
-                "reference": booking.reference,
-                "customerName": f"{first_name} {last_name}" if first_name and last_name else None,
-                "customerFirstName": first_name,
-            })
 
-    result["milestones"] = milestones
-
-    # === Last Minute & Advance Booking ===
-    # Gap between the effective (paid, UK) booking date and the dropoff date.
-    bookings_with_gap = []
-    for booking in bookings:
-        eff = booking_effective_datetime(booking)
-        if eff and booking.dropoff_date:
-            booked_date = eff.date()
-            gap_days = (booking.dropoff_date - booked_date).days
-            bookings_with_gap.append((booking, gap_days))
-
-    if bookings_with_gap:
-        # Shortest gap (last minute booking)
-        last_minute = min(bookings_with_gap, key=lambda x: x[1])
-        # Get customer name
-        lm_first = last_minute[0].customer_first_name or (last_minute[0].customer.first_name if last_minute[0].customer else None)
-        lm_last = last_minute[0].customer_last_name or (last_minute[0].customer.last_name if last_minute[0].customer else None)
-        last_minute_data = {
-            "gapDays": last_minute[1],
-            "reference": last_minute[0].reference,
-            "bookedOn": booking_effective_datetime(last_minute[0]).strftime("%d %b %Y"),
-            "dropoffDate": last_minute[0].dropoff_date.strftime("%d %b %Y"),
-            "customerName": f"{lm_first} {lm_last}" if lm_first and lm_last else None,
-        }
-        # For same-day bookings, calculate hours:minutes:seconds before drop-off.
-        # Compare the dropoff (naive UK local) to the effective time as naive UK.
-        if last_minute[1] == 0 and last_minute[0].dropoff_time:
-            dropoff_datetime = datetime.combine(last_minute[0].dropoff_date, last_minute[0].dropoff_time)
-            created_naive = booking_effective_datetime(last_minute[0]).replace(tzinfo=None)
-            time_diff = dropoff_datetime - created_naive
-            if time_diff.total_seconds() > 0:
-                hours, remainder = divmod(int(time_diff.total_seconds()), 3600)
-                minutes, seconds = divmod(remainder, 60)
-                last_minute_data["gapTime"] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        result["lastMinuteBooking"] = last_minute_data
-
-        # Longest gap (most advance booking)
-        advance = max(bookings_with_gap, key=lambda x: x[1])
-        # Get customer name
-        adv_first = advance[0].customer_first_name or (advance[0].customer.first_name if advance[0].customer else None)
-        adv_last = advance[0].customer_last_name or (advance[0].customer.last_name if advance[0].customer else None)
-        advance_data = {
-            "gapDays": advance[1],
-            "reference": advance[0].reference,
-            "bookedOn": booking_effective_datetime(advance[0]).strftime("%d %b %Y"),
-            "dropoffDate": advance[0].dropoff_date.strftime("%d %b %Y"),
-            "customerName": f"{adv_first} {adv_last}" if adv_first and adv_last else None,
-        }
-        # Calculate detailed breakdown: months/days/hours/minutes/seconds
-        if advance[0].dropoff_time:
-            dropoff_datetime = datetime.combine(advance[0].dropoff_date, advance[0].dropoff_time)
-            created_naive = booking_effective_datetime(advance[0]).replace(tzinfo=None)
-            time_diff = dropoff_datetime - created_naive
-            if time_diff.total_seconds() > 0:
-                total_seconds = int(time_diff.total_seconds())
-                days = time_diff.days
-                months = days // 30
-                remaining_days = days % 30
-                hours, remainder = divmod(total_seconds % 86400, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                advance_data["gapDetailed"] = {
-                    "months": months,
-                    "days": remaining_days,
-                    "hours": hours,
-                    "minutes": minutes,
-                    "seconds": seconds,
-                }
-        result["advanceBooking"] = advance_data
-
-    # Store in cache
-    _fun_facts_cache["data"] = result.copy()
-    _fun_facts_cache["cached_at"] = now
-    result["cached"] = False
-    return result
+def _with_cache_info(body: dict, cached_response: dict) -> dict:
+    """Copy the report cache's cached/age/stale flags onto a derived body."""
+    for key in ("cached", "cache_age_minutes", "stale"):
+        if key in cached_response:
+            body[key] = cached_response[key]
+    return body
 
 
 def _subscriber_attribution_for_booking(db: Session, booking_id: int):
@@ -7131,7 +6907,7 @@ def _unmark_promotions_attribution(db: Session, booking_id: int) -> list:
 
 
 @app.put("/api/admin/bookings/{booking_id}/financial-override")
-async def update_booking_financial_override(
+def update_booking_financial_override(
     booking_id: int,
     gross_pence: int = Query(..., description="Original price in pence"),
     discount_pence: int = Query(..., description="Discount amount in pence"),
@@ -7266,7 +7042,7 @@ async def update_booking_financial_override(
 
 
 @app.put("/api/admin/bookings/{booking_id}/refund-sync")
-async def sync_booking_refund(
+def sync_booking_refund(
     booking_id: int,
     stripe_id: Optional[str] = Query(
         None,
@@ -7339,11 +7115,14 @@ async def sync_booking_refund(
         payment.refund_amount_pence = refund_pence
         payment.refund_reason = refund_reason
         payment.refunded_at = datetime.utcnow()
+        was_refunded = payment.status == PaymentStatus.REFUNDED
         payment.status = (
             PaymentStatus.REFUNDED
             if payment.amount_pence and refund_pence >= payment.amount_pence
             else PaymentStatus.PARTIALLY_REFUNDED
         )
+        if payment.status == PaymentStatus.REFUNDED:
+            db_service.release_refunded_booking_slot(db, booking, was_refunded)
         recorded = {"source": "manual", "refund_amount_pence": refund_pence}
 
     else:
@@ -7394,12 +7173,15 @@ async def sync_booking_refund(
             payment.refunded_at = datetime.utcfromtimestamp(result["refunded_at_ts"])
         else:
             payment.refunded_at = datetime.utcnow()
+        was_refunded = payment.status == PaymentStatus.REFUNDED
         if result.get("fully_refunded"):
             payment.status = PaymentStatus.REFUNDED
         elif payment.amount_pence and result["refund_amount_pence"] >= payment.amount_pence:
             payment.status = PaymentStatus.REFUNDED
         else:
             payment.status = PaymentStatus.PARTIALLY_REFUNDED
+        if payment.status == PaymentStatus.REFUNDED:
+            db_service.release_refunded_booking_slot(db, booking, was_refunded)
 
         if (
             result.get("charge_amount_pence") is not None
@@ -7441,64 +7223,32 @@ async def sync_booking_refund(
     }
 
 
-@app.get("/api/admin/reports/financial")
-async def get_financial_report(
-    from_date: str = Query(None, description="Start date DD/MM/YYYY"),
-    to_date: str = Query(None, description="End date DD/MM/YYYY"),
-    status_filter: str = Query("all", description="Filter by status: all, confirmed, completed, refunded"),
-    promo_filter: str = Query("all", description="Filter by promo usage: all, yes, no"),
-    refresh: bool = Query(False, description="Force refresh cache"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin),
-):
-    """
-    Get financial report data for the admin dashboard.
-    Cached for 1 hour (default parameters only).
+def _financial_report_conditions(status_filter, from_date, to_date, promo_filter, include_multi_use=True):
+    """WHERE clauses shared by the financial report and its CSV export.
 
-    Returns:
-    - Revenue fun facts (most revenue day/week/month)
-    - Bookings with financial details grouped by month
+    Expects Booking joined to Payment. include_multi_use=False leaves
+    PromoCodeUsage out of the promo yes/no filter, as the export always has.
     """
-    import pytz
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-
-    # Only cache default requests
-    is_default_request = from_date is None and to_date is None and status_filter == "all" and promo_filter == "all"
+    from db_models import Booking, BookingStatus, Payment, PaymentStatus
 
-    # Check cache
-    global _financial_cache
-    if is_default_request and not refresh:
-        if _financial_cache.get("data") is not None and _financial_cache.get("cached_at") is not None:
-            cache_age = (now - _financial_cache["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = _financial_cache["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
-
-    from db_models import Booking, BookingStatus, Payment, PaymentStatus, PromoCode
-    from collections import defaultdict
-    import calendar
-
-    # Build query for bookings with successful payments
-    query = db.query(Booking).join(Payment).filter(
+    # Bookings with successful payments
+    conditions = [
         Payment.status.in_([PaymentStatus.SUCCEEDED, PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED])
-    )
+    ]
 
     # Status filter
     if status_filter == "confirmed":
-        query = query.filter(Booking.status == BookingStatus.CONFIRMED)
+        conditions.append(Booking.status == BookingStatus.CONFIRMED)
     elif status_filter == "completed":
-        query = query.filter(Booking.status == BookingStatus.COMPLETED)
+        conditions.append(Booking.status == BookingStatus.COMPLETED)
     elif status_filter == "refunded":
-        query = query.filter(Payment.status.in_([PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED]))
+        conditions.append(Payment.status.in_([PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED]))
     else:
         # All - include confirmed, completed, cancelled, and refunded.
         # Refunded bookings still have revenue impact (negative) so they belong
         # in the default view; without REFUNDED here a booking flipped to
         # status='refunded' silently disappears from the Financial section.
-        query = query.filter(Booking.status.in_([
+        conditions.append(Booking.status.in_([
             BookingStatus.CONFIRMED,
             BookingStatus.COMPLETED,
             BookingStatus.CANCELLED,
@@ -7508,132 +7258,229 @@ async def get_financial_report(
     # Date filters (based on payment date)
     if from_date:
         try:
-            from_dt = parse_uk_date_start(from_date)
-            query = query.filter(Payment.paid_at >= from_dt)
+            conditions.append(Payment.paid_at >= parse_uk_date_start(from_date))
         except ValueError:
             pass
 
     if to_date:
         try:
-            to_dt = parse_uk_date_end(to_date)
-            query = query.filter(Payment.paid_at <= to_dt)
+            conditions.append(Payment.paid_at <= parse_uk_date_end(to_date))
         except ValueError:
             pass
 
-    bookings = query.all()
+    # Promo filter: a booking "used a promo" if any promo source points at it.
+    if promo_filter == "yes":
+        conditions.append(Booking.id.in_(_promo_booking_ids(include_multi_use)))
+    elif promo_filter == "no":
+        conditions.append(Booking.id.notin_(_promo_booking_ids(include_multi_use)))
+    return conditions
 
-    # Get promo codes used by these bookings
-    booking_ids = [b.id for b in bookings]
+
+def _promo_booking_ids(include_multi_use=True):
+    """UNION of booking ids recorded against any promo source.
+
+    NULLs are excluded so NOT IN stays well-defined.
+    """
+    from sqlalchemy import select, union
+    from db_models import MarketingSubscriber, PromoCode, PromoCodeUsage
+
+    sources = [
+        select(PromoCode.booking_id).where(PromoCode.is_used == True, PromoCode.booking_id.isnot(None)),
+        select(MarketingSubscriber.promo_10_used_booking_id).where(
+            MarketingSubscriber.promo_10_used == True, MarketingSubscriber.promo_10_used_booking_id.isnot(None)),
+        select(MarketingSubscriber.promo_free_used_booking_id).where(
+            MarketingSubscriber.promo_free_used == True, MarketingSubscriber.promo_free_used_booking_id.isnot(None)),
+        select(MarketingSubscriber.founder_promo_used_booking_id).where(
+            MarketingSubscriber.founder_promo_used == True, MarketingSubscriber.founder_promo_used_booking_id.isnot(None)),
+        select(MarketingSubscriber.promo_code_used_booking_id).where(
+            MarketingSubscriber.promo_code_used == True, MarketingSubscriber.promo_code_used_booking_id.isnot(None)),
+    ]
+    if include_multi_use:
+        sources.append(select(PromoCodeUsage.booking_id))
+    return union(*sources)
+
+
+def _financial_promo_codes(db, conditions, include_multi_use=True) -> dict:
+    """{booking_id: {"code", "discount_percent"}} for bookings matching `conditions`.
+
+    Scoped by a booking-id subquery rather than an IN list of every booking
+    in the range. Earlier sources win when a booking appears in several.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import joinedload
+    from db_models import Booking, MarketingSubscriber, Payment, PromoCode, PromoCodeUsage
+
+    booking_ids = select(Booking.id).join(Payment, Payment.booking_id == Booking.id).where(*conditions)
     promo_codes = {}
-    if booking_ids:
-        from sqlalchemy.orm import joinedload
-        from db_models import MarketingSubscriber
+    # 1. Get promos from PromoCode table (Promotions system)
+    promos = db.query(PromoCode).options(
+        joinedload(PromoCode.promotion)
+    ).filter(
+        PromoCode.booking_id.in_(booking_ids),
+        PromoCode.is_used == True
+    ).all()
+    for promo in promos:
+        promo_codes[promo.booking_id] = {
+            "code": promo.code,
+            "discount_percent": promo.promotion.discount_percent if promo.promotion else 0
+        }
 
-        # 1. Get promos from PromoCode table (Promotions system)
-        promos = db.query(PromoCode).options(
-            joinedload(PromoCode.promotion)
-        ).filter(
-            PromoCode.booking_id.in_(booking_ids),
-            PromoCode.is_used == True
-        ).all()
-        for promo in promos:
-            promo_codes[promo.booking_id] = {
-                "code": promo.code,
-                "discount_percent": promo.promotion.discount_percent if promo.promotion else 0
+    # 2. Get promos from MarketingSubscriber table (10% off promos)
+    promo_10_subs = db.query(MarketingSubscriber).filter(
+        MarketingSubscriber.promo_10_used_booking_id.in_(booking_ids),
+        MarketingSubscriber.promo_10_used == True
+    ).all()
+    for sub in promo_10_subs:
+        if sub.promo_10_used_booking_id not in promo_codes:
+            promo_codes[sub.promo_10_used_booking_id] = {
+                "code": sub.promo_10_code,
+                "discount_percent": 10
             }
 
-        # 2. Get promos from MarketingSubscriber table (10% off promos)
-        promo_10_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_10_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_10_used == True
-        ).all()
-        for sub in promo_10_subs:
-            if sub.promo_10_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_10_used_booking_id] = {
-                    "code": sub.promo_10_code,
-                    "discount_percent": 10
-                }
+    # 3. Get promos from MarketingSubscriber table (FREE parking promos - 100% off)
+    promo_free_subs = db.query(MarketingSubscriber).filter(
+        MarketingSubscriber.promo_free_used_booking_id.in_(booking_ids),
+        MarketingSubscriber.promo_free_used == True
+    ).all()
+    for sub in promo_free_subs:
+        if sub.promo_free_used_booking_id not in promo_codes:
+            promo_codes[sub.promo_free_used_booking_id] = {
+                "code": sub.promo_free_code,
+                "discount_percent": 100
+            }
 
-        # 3. Get promos from MarketingSubscriber table (FREE parking promos - 100% off)
-        promo_free_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_free_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_free_used == True
-        ).all()
-        for sub in promo_free_subs:
-            if sub.promo_free_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_free_used_booking_id] = {
-                    "code": sub.promo_free_code,
-                    "discount_percent": 100
-                }
+    # 4. Get founder promos from MarketingSubscriber table (10% off)
+    founder_promo_subs = db.query(MarketingSubscriber).filter(
+        MarketingSubscriber.founder_promo_used_booking_id.in_(booking_ids),
+        MarketingSubscriber.founder_promo_used == True
+    ).all()
+    for sub in founder_promo_subs:
+        if sub.founder_promo_used_booking_id not in promo_codes:
+            promo_codes[sub.founder_promo_used_booking_id] = {
+                "code": sub.founder_promo_code,
+                "discount_percent": 10
+            }
 
-        # 4. Get founder promos from MarketingSubscriber table (10% off)
-        founder_promo_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.founder_promo_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.founder_promo_used == True
-        ).all()
-        for sub in founder_promo_subs:
-            if sub.founder_promo_used_booking_id not in promo_codes:
-                promo_codes[sub.founder_promo_used_booking_id] = {
-                    "code": sub.founder_promo_code,
-                    "discount_percent": 10
-                }
+    # 5. Get legacy promos from MarketingSubscriber table
+    legacy_promo_subs = db.query(MarketingSubscriber).filter(
+        MarketingSubscriber.promo_code_used_booking_id.in_(booking_ids),
+        MarketingSubscriber.promo_code_used == True
+    ).all()
+    for sub in legacy_promo_subs:
+        if sub.promo_code_used_booking_id not in promo_codes:
+            promo_codes[sub.promo_code_used_booking_id] = {
+                "code": sub.promo_code,
+                "discount_percent": sub.discount_percent or 10
+            }
 
-        # 5. Get legacy promos from MarketingSubscriber table
-        legacy_promo_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_code_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_code_used == True
-        ).all()
-        for sub in legacy_promo_subs:
-            if sub.promo_code_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_code_used_booking_id] = {
-                    "code": sub.promo_code,
-                    "discount_percent": sub.discount_percent or 10
-                }
+    if not include_multi_use:
+        return promo_codes
 
-        # 6. Get multi-use promo codes from PromoCodeUsage table
-        from db_models import PromoCodeUsage
-        promo_usages = db.query(PromoCodeUsage).options(
-            joinedload(PromoCodeUsage.promo_code)
-        ).filter(
-            PromoCodeUsage.booking_id.in_(booking_ids)
-        ).all()
-        for usage in promo_usages:
-            if usage.booking_id not in promo_codes:
-                promo_codes[usage.booking_id] = {
-                    "code": usage.promo_code.code if usage.promo_code else "UNKNOWN",
-                    "discount_percent": usage.discount_percent or 0
-                }
+    # 6. Get multi-use promo codes from PromoCodeUsage table
+    promo_usages = db.query(PromoCodeUsage).options(
+        joinedload(PromoCodeUsage.promo_code)
+    ).filter(
+        PromoCodeUsage.booking_id.in_(booking_ids)
+    ).all()
+    for usage in promo_usages:
+        if usage.booking_id not in promo_codes:
+            promo_codes[usage.booking_id] = {
+                "code": usage.promo_code.code if usage.promo_code else "UNKNOWN",
+                "discount_percent": usage.discount_percent or 0
+            }
+    return promo_codes
 
-    # Filter by promo usage if requested
-    if promo_filter == "yes":
-        bookings = [b for b in bookings if b.id in promo_codes]
-    elif promo_filter == "no":
-        bookings = [b for b in bookings if b.id not in promo_codes]
 
-    # Calculate revenue fun facts
-    revenue_by_day = defaultdict(int)
-    revenue_by_week = defaultdict(int)
-    revenue_by_month = defaultdict(int)
+def _uk_period_start(unit: str, column):
+    """date_trunc(unit) of a timestamptz column in UK local time.
 
-    for booking in bookings:
-        if booking.payment and booking.payment.paid_at and booking.payment.amount_pence:
-            paid_date = to_uk_datetime(booking.payment.paid_at).date()
-            amount = booking.payment.amount_pence
+    Typed as DateTime so drivers hand back a datetime either way; callers take
+    .date(). 'week' truncates to the ISO Monday.
+    """
+    from sqlalchemy import DateTime
 
-            # Subtract refunds for net revenue
-            if booking.payment.refund_amount_pence:
-                amount -= booking.payment.refund_amount_pence
+    return func.date_trunc(unit, func.timezone("Europe/London", column), type_=DateTime)
 
-            revenue_by_day[paid_date] += amount
 
-            # Week (ISO week)
-            year, week, _ = paid_date.isocalendar()
-            week_key = f"{year}-W{week:02d}"
-            revenue_by_week[week_key] += amount
+@app.get("/api/admin/reports/financial")
+async def get_financial_report(
+    from_date: str = Query(None, description="Start date DD/MM/YYYY"),
+    to_date: str = Query(None, description="End date DD/MM/YYYY"),
+    status_filter: str = Query("all", description="Filter by status: all, confirmed, completed, refunded"),
+    promo_filter: str = Query("all", description="Filter by promo usage: all, yes, no"),
+    refresh: bool = Query(False, description="Force refresh cache"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get financial report data for the admin dashboard.
+    Cached for 1 hour (default parameters only) unless
+    FINANCIAL_REPORT_CACHE_ENABLED is off.
 
-            # Month
-            month_key = paid_date.strftime("%Y-%m")
-            revenue_by_month[month_key] += amount
+    Returns:
+    - Revenue fun facts (most revenue day/week/month)
+    - Bookings with financial details grouped by month
+    """
+    # Only cache default requests
+    is_default_request = (
+        FINANCIAL_REPORT_CACHE_ENABLED
+        and from_date is None and to_date is None and status_filter == "all" and promo_filter == "all"
+    )
+    if not is_default_request:
+        return {**await run_blocking(_financial_report, db, from_date, to_date, status_filter, promo_filter), "cached": False}
+    return await report_cache.get_or_compute(
+        "financial", None,
+        lambda: _financial_report(db, from_date, to_date, status_filter, promo_filter),
+        tags=("bookings", "payments"),
+        refresh=refresh,
+    )
+
+
+def _financial_report(db, from_date, to_date, status_filter, promo_filter) -> dict:
+    """Uncached body of get_financial_report."""
+    from db_models import Booking, Payment
+    from collections import defaultdict
+    from sqlalchemy.orm import contains_eager, joinedload
+
+    conditions = _financial_report_conditions(status_filter, from_date, to_date, promo_filter)
+
+    # One query for the per-booking rows (payment and customer joined in)
+    bookings = (
+        db.query(Booking)
+        .join(Payment, Payment.booking_id == Booking.id)
+        .options(contains_eager(Booking.payment), joinedload(Booking.customer))
+        .filter(*conditions)
+        .order_by(Payment.paid_at, Booking.id)
+        .all()
+    )
+
+    # Get promo codes used by these bookings
+    promo_codes = _financial_promo_codes(db, conditions) if bookings else {}
+
+    # Revenue fun facts and charts: net (amount - refunds) per UK day, ISO
+    # week and month, grouped in SQL. Free (£0) payments are left out.
+    def _revenue_by(unit):
+        period = _uk_period_start(unit, Payment.paid_at)
+        rows = (
+            db.query(period, func.sum(Payment.amount_pence - func.coalesce(Payment.refund_amount_pence, 0)))
+            .join(Booking, Booking.id == Payment.booking_id)
+            .filter(*conditions, Payment.paid_at.isnot(None), Payment.amount_pence != 0)
+            .group_by(period)
+            .all()
+        )
+        return {
+            (start.date() if isinstance(start, datetime) else start): int(amount or 0)
+            for start, amount in rows
+        }
+
+    revenue_by_day = defaultdict(int, _revenue_by("day"))
+    revenue_by_week = defaultdict(int)
+    for week_start, amount in _revenue_by("week").items():
+        year, week, _ = week_start.isocalendar()
+        revenue_by_week[f"{year}-W{week:02d}"] += amount
+    revenue_by_month = defaultdict(int)
+    for month_start, amount in _revenue_by("month").items():
+        revenue_by_month[month_start.strftime("%Y-%m")] += amount
 
     # Find top revenue periods
     fun_facts = {
@@ -7962,151 +7809,42 @@ async def get_financial_report(
             "totalRevenue": f"£{total_revenue / 100:.2f}",
         }
     }
-
-    if is_default_request:
-        _financial_cache["data"] = result.copy()
-        _financial_cache["cached_at"] = now
-    result["cached"] = False
     return result
 
 
 @app.get("/api/admin/reports/financial/export")
-async def export_financial_report(
+def export_financial_report(
     from_date: str = Query(None, description="Start date DD/MM/YYYY"),
     to_date: str = Query(None, description="End date DD/MM/YYYY"),
     status_filter: str = Query("all", description="Filter by status: all, confirmed, completed, refunded"),
     promo_filter: str = Query("all", description="Filter by promo usage: all, yes, no"),
+    gzip: bool = Query(False, description="Download as a gzip-compressed .csv.gz"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Export financial report as CSV.
+    Export financial report as CSV, streamed in chunks.
     """
-    from db_models import Booking, BookingStatus, Payment, PaymentStatus, PromoCode
-    from fastapi.responses import StreamingResponse
-    import csv
-    import io
-    from datetime import datetime
+    from db_models import Booking, Payment
+    from sqlalchemy.orm import contains_eager, joinedload
+    from csv_export import CSV_EXPORT_YIELD_PER, csv_streaming_response
 
-    # Build query (same as financial report)
-    query = db.query(Booking).join(Payment).filter(
-        Payment.status.in_([PaymentStatus.SUCCEEDED, PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED])
+    # Same filters as the financial report; the export has never counted
+    # multi-use (PromoCodeUsage) promos.
+    conditions = _financial_report_conditions(
+        status_filter, from_date, to_date, promo_filter, include_multi_use=False,
     )
+    bookings = (
+        db.query(Booking)
+        .join(Payment, Payment.booking_id == Booking.id)
+        .options(contains_eager(Booking.payment), joinedload(Booking.customer))
+        .filter(*conditions)
+        .order_by(Payment.paid_at.desc())
+        .yield_per(CSV_EXPORT_YIELD_PER)
+    )
+    promo_codes = _financial_promo_codes(db, conditions, include_multi_use=False)
 
-    if status_filter == "confirmed":
-        query = query.filter(Booking.status == BookingStatus.CONFIRMED)
-    elif status_filter == "completed":
-        query = query.filter(Booking.status == BookingStatus.COMPLETED)
-    elif status_filter == "refunded":
-        query = query.filter(Payment.status.in_([PaymentStatus.REFUNDED, PaymentStatus.PARTIALLY_REFUNDED]))
-    else:
-        # All - include confirmed, completed, cancelled, and refunded.
-        # Refunded bookings still have revenue impact (negative) so they belong
-        # in the default view; without REFUNDED here a booking flipped to
-        # status='refunded' silently disappears from the Financial section.
-        query = query.filter(Booking.status.in_([
-            BookingStatus.CONFIRMED,
-            BookingStatus.COMPLETED,
-            BookingStatus.CANCELLED,
-            BookingStatus.REFUNDED,
-        ]))
-
-    if from_date:
-        try:
-            from_dt = parse_uk_date_start(from_date)
-            query = query.filter(Payment.paid_at >= from_dt)
-        except ValueError:
-            pass
-
-    if to_date:
-        try:
-            to_dt = parse_uk_date_end(to_date)
-            query = query.filter(Payment.paid_at <= to_dt)
-        except ValueError:
-            pass
-
-    bookings = query.order_by(Payment.paid_at.desc()).all()
-
-    # Get promo codes
-    booking_ids = [b.id for b in bookings]
-    promo_codes = {}
-    if booking_ids:
-        from sqlalchemy.orm import joinedload
-        from db_models import MarketingSubscriber
-
-        # 1. Get promos from PromoCode table (Promotions system)
-        promos = db.query(PromoCode).options(
-            joinedload(PromoCode.promotion)
-        ).filter(
-            PromoCode.booking_id.in_(booking_ids),
-            PromoCode.is_used == True
-        ).all()
-        for promo in promos:
-            promo_codes[promo.booking_id] = {
-                "code": promo.code,
-                "discount_percent": promo.promotion.discount_percent if promo.promotion else 0
-            }
-
-        # 2. Get promos from MarketingSubscriber table (10% off promos)
-        promo_10_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_10_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_10_used == True
-        ).all()
-        for sub in promo_10_subs:
-            if sub.promo_10_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_10_used_booking_id] = {
-                    "code": sub.promo_10_code,
-                    "discount_percent": 10
-                }
-
-        # 3. Get promos from MarketingSubscriber table (FREE parking promos - 100% off)
-        promo_free_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_free_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_free_used == True
-        ).all()
-        for sub in promo_free_subs:
-            if sub.promo_free_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_free_used_booking_id] = {
-                    "code": sub.promo_free_code,
-                    "discount_percent": 100
-                }
-
-        # 4. Get founder promos from MarketingSubscriber table (10% off)
-        founder_promo_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.founder_promo_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.founder_promo_used == True
-        ).all()
-        for sub in founder_promo_subs:
-            if sub.founder_promo_used_booking_id not in promo_codes:
-                promo_codes[sub.founder_promo_used_booking_id] = {
-                    "code": sub.founder_promo_code,
-                    "discount_percent": 10
-                }
-
-        # 5. Get legacy promos from MarketingSubscriber table
-        legacy_promo_subs = db.query(MarketingSubscriber).filter(
-            MarketingSubscriber.promo_code_used_booking_id.in_(booking_ids),
-            MarketingSubscriber.promo_code_used == True
-        ).all()
-        for sub in legacy_promo_subs:
-            if sub.promo_code_used_booking_id not in promo_codes:
-                promo_codes[sub.promo_code_used_booking_id] = {
-                    "code": sub.promo_code,
-                    "discount_percent": sub.discount_percent or 10
-                }
-
-    # Filter by promo
-    if promo_filter == "yes":
-        bookings = [b for b in bookings if b.id in promo_codes]
-    elif promo_filter == "no":
-        bookings = [b for b in bookings if b.id not in promo_codes]
-
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
+    header = [
         "Date",
         "Reference",
         "Customer",
@@ -8120,12 +7858,11 @@ async def export_financial_report(
         "Final Revenue",
         "Booking Status",
         "Payment Status"
-    ])
+    ]
 
-    # Data rows
-    for booking in bookings:
+    def format_row(booking):
         if not booking.payment or not booking.payment.paid_at:
-            continue
+            return None
 
         paid_date = to_uk_datetime(booking.payment.paid_at).strftime("%d/%m/%Y")
         # Net = what customer actually paid
@@ -8153,7 +7890,7 @@ async def export_financial_report(
 
         customer_name = f"{booking.customer.first_name} {booking.customer.last_name}" if booking.customer else "Unknown"
 
-        writer.writerow([
+        return [
             paid_date,
             booking.reference,
             customer_name,
@@ -8167,7 +7904,7 @@ async def export_financial_report(
             f"£{final_revenue_pence / 100:.2f}",
             booking.status.value if booking.status else "",
             booking.payment.status.value if booking.payment.status else ""
-        ])
+        ]
 
     # Build filename
     filename_parts = ["financial_report"]
@@ -8177,12 +7914,7 @@ async def export_financial_report(
         filename_parts.append(f"to_{to_date.replace('/', '-')}")
     filename = "_".join(filename_parts) + ".csv"
 
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return csv_streaming_response(header, bookings, filename, format_row, gzip=gzip)
 
 
 @app.get("/api/admin/reports/session-tracking")
@@ -8205,7 +7937,21 @@ async def get_session_tracking_report(
 
     Grouped by day, week, or month with conversion rates.
     """
-    from db_models import AuditLog, AuditLogEvent
+    # Only cache default requests (daily period)
+    is_default_request = period == "daily"
+    if not is_default_request:
+        return {**await run_blocking(_session_tracking_report, db, period), "cached": False}
+    return await report_cache.get_or_compute(
+        "session_tracking", None,
+        lambda: _session_tracking_report(db, period),
+        tags=("bookings",),
+        refresh=refresh,
+    )
+
+
+def _session_tracking_report(db, period) -> dict:
+    """Uncached body of get_session_tracking_report."""
+    from funnel_sessions import FUNNEL_STAGES, funnel_stage_day_counts
     from datetime import datetime, timedelta
     from collections import defaultdict
     import pytz
@@ -8213,28 +7959,7 @@ async def get_session_tracking_report(
     uk_tz = pytz.timezone('Europe/London')
     now = datetime.now(uk_tz)
 
-    # Only cache default requests (daily period)
-    is_default_request = period == "daily"
-
-    # Check cache
-    global _session_tracking_cache
-    if is_default_request and not refresh:
-        if _session_tracking_cache.get("data") is not None and _session_tracking_cache.get("cached_at") is not None:
-            cache_age = (now - _session_tracking_cache["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = _session_tracking_cache["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
-
-    # Define funnel stages in order
-    funnel_stages = [
-        ("dates_selected", "Dates Selected"),
-        ("flight_selected", "Flight Selected"),
-        ("customer_entered", "Details Entered"),
-        ("payment_initiated", "Payment Started"),
-        ("booking_confirmed", "Booking Confirmed"),
-    ]
+    funnel_stages = FUNNEL_STAGES
 
     # Feature deployment date - only show data from this date onwards
     # dates_selected tracking was deployed on 29 Mar 2026 at 17:00 UK time
@@ -8249,67 +7974,37 @@ async def get_session_tracking_report(
     elif period == "weekly":
         # Last 12 weeks (but not before deployment)
         start_date = max(now - timedelta(weeks=12), feature_deploy_date)
-        date_format = "%Y-W%W"
-        display_format = "W%W %Y"
-    else:  # monthly
-        # Last 12 months (but not before deployment)
-        start_date = max(now - timedelta(days=365), feature_deploy_date)
-        date_format = "%Y-%m"
-        display_format = "%b %Y"
-
-    # Query audit logs for funnel events
-    audit_logs = db.query(AuditLog).filter(
-        AuditLog.created_at >= start_date,
-        AuditLog.event.in_([
-            AuditLogEvent.DATES_SELECTED,
-            AuditLogEvent.FLIGHT_SELECTED,
-            AuditLogEvent.CUSTOMER_ENTERED,
-            AuditLogEvent.PAYMENT_INITIATED,
-            AuditLogEvent.BOOKING_CONFIRMED,
-        ])
-    ).all()
-
-    # Group by period and count unique sessions per event type
-    period_data = defaultdict(lambda: defaultdict(set))
-
-    for log in audit_logs:
-        # Drop ghost BOOKING_CONFIRMED rows (booking_reference=None). The
-        # Stripe webhook writes one for every manual-booking-payment-link
-        # event because the payment_intent isn't linked to a Payment row.
-        # Those bookings are already counted by the separate Manual column;
-        # leaving them in the funnel double-counts (e.g. 2026-05-22 showed
-        # 10 booking_confirmed = 8 online + 2 manual ghosts). 23 such rows
-        # exist in the DB at fix time. The new webhook guard prevents new
-        # ones; this filter cleans up historical data on read.
-        if log.event == AuditLogEvent.BOOKING_CONFIRMED and not log.booking_reference:
-            continue
-        if log.created_at:
-            log_time = log.created_at
-            if log_time.tzinfo is None:
-                log_time = uk_tz.localize(log_time)
-            else:
-                log_time = log_time.astimezone(uk_tz)
-
-            if period == "weekly":
-                period_key = log_time.strftime("%Y-W%W")
-            elif period == "monthly":
-                period_key = log_time.strftime("%Y-%m")
-            else:  # daily
-                period_key = log_time.strftime("%Y-%m-%d")
+        date_format = "%Y-W%W"
+        display_format = "W%W %Y"
+    else:  # monthly
+        # Last 12 months (but not before deployment)
+        start_date = max(now - timedelta(days=365), feature_deploy_date)
+        date_format = "%Y-%m"
+        display_format = "%b %Y"
 
-            event_key = log.event.value if hasattr(log.event, 'value') else str(log.event)
-            session_key = log.session_id or (f"ref_{log.booking_reference}" if log.booking_reference else f"anon_{log.id}")
-            period_data[period_key][event_key].add(session_key)
+    # Sessions first reaching each step, per UK day, from funnel_sessions
+    # (kept current from the funnel audit events; see funnel_sessions).
+    # Ghost BOOKING_CONFIRMED rows with no booking_reference never get a
+    # funnel row, and a Stripe webhook confirmation is folded into the
+    # browser session that started the payment.
+    day_counts = funnel_stage_day_counts(db, start_date, lambda column: _uk_period_start("day", column))
+
+    # Roll the days up into periods
+    period_data = defaultdict(lambda: defaultdict(int))
+    cumulative_counts = {stage_key: 0 for stage_key, _ in funnel_stages}
+    for stage_key, rows in day_counts.items():
+        for day, count in rows:
+            if day is None:
+                continue
+            if isinstance(day, str):
+                day = datetime.fromisoformat(day)
+            period_key = day.strftime(date_format)
+            period_data[period_key][stage_key] += count
+            cumulative_counts[stage_key] += count
 
     # Build response data
     periods_list = sorted(period_data.keys())
 
-    # Calculate cumulative totals
-    cumulative = {stage[0]: set() for stage in funnel_stages}
-    for period_key in periods_list:
-        for stage_key, _ in funnel_stages:
-            cumulative[stage_key].update(period_data[period_key].get(stage_key, set()))
-
     # Format period data for response
     formatted_periods = []
     for period_key in periods_list:
@@ -8332,7 +8027,7 @@ async def get_session_tracking_report(
 
         period_counts = {}
         for stage_key, _ in funnel_stages:
-            period_counts[stage_key] = len(period_data[period_key].get(stage_key, set()))
+            period_counts[stage_key] = period_data[period_key].get(stage_key, 0)
 
         formatted_periods.append({
             "period": period_key,
@@ -8341,8 +8036,6 @@ async def get_session_tracking_report(
         })
 
     # Calculate conversion rates for cumulative data
-    cumulative_counts = {stage[0]: len(cumulative[stage[0]]) for stage in funnel_stages}
-
     conversion_rates = {}
     prev_count = None
     for stage_key, stage_label in funnel_stages:
@@ -8429,11 +8122,6 @@ async def get_session_tracking_report(
             "free_bookings": free_cumulative
         }
     }
-
-    if is_default_request:
-        _session_tracking_cache["data"] = result.copy()
-        _session_tracking_cache["cached_at"] = now
-    result["cached"] = False
     return result
 
 
@@ -8454,29 +8142,30 @@ async def get_abandoned_carts_report(
     - Top trip lengths (days) that were abandoned
     - Recent abandoned cart details with flight info
     """
+    # Only cache default requests (daily period)
+    is_default_request = period == "daily"
+    if not is_default_request:
+        return {**await run_blocking(_abandoned_carts_report, db, period), "cached": False}
+    return await report_cache.get_or_compute(
+        "abandoned_carts", None,
+        lambda: _abandoned_carts_report(db, period),
+        tags=("bookings",),
+        refresh=refresh,
+    )
+
+
+def _abandoned_carts_report(db, period) -> dict:
+    """Uncached body of get_abandoned_carts_report."""
     from db_models import AuditLog, AuditLogEvent
     from datetime import datetime, timedelta
     from collections import defaultdict
+    from sqlalchemy import select
+    from sqlalchemy.orm import aliased
     import pytz
-    import json
 
     uk_tz = pytz.timezone('Europe/London')
     now = datetime.now(uk_tz)
 
-    # Only cache default requests (daily period)
-    is_default_request = period == "daily"
-
-    # Check cache
-    global _abandoned_carts_cache
-    if is_default_request and not refresh:
-        if _abandoned_carts_cache.get("data") is not None and _abandoned_carts_cache.get("cached_at") is not None:
-            cache_age = (now - _abandoned_carts_cache["cached_at"]).total_seconds()
-            if cache_age < REPORT_CACHE_DURATION_SECONDS:
-                cached_response = _abandoned_carts_cache["data"].copy()
-                cached_response["cached"] = True
-                cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-                return cached_response
-
     # Feature deployment date
     feature_deploy_date = uk_tz.localize(datetime(2026, 3, 29, 17, 0, 0))
 
@@ -8488,27 +8177,39 @@ async def get_abandoned_carts_report(
     else:  # monthly
         start_date = max(now - timedelta(days=365), feature_deploy_date)
 
-    # Get all sessions that selected dates or flights (ordered by newest first for recent_abandoned)
-    started_sessions = db.query(AuditLog).filter(
+    # Sessions that selected dates or flights and never completed a booking
+    # (newest first, for recent_abandoned). The completed-session exclusion
+    # and the event_data fields are evaluated by the database (JSONB ->>),
+    # so only the columns the report uses are fetched.
+    completed = aliased(AuditLog)
+    data = AuditLog.event_data
+    started_sessions = db.query(
+        AuditLog.session_id,
+        AuditLog.event,
+        AuditLog.created_at,
+        data["departure_destination"].as_string().label("destination"),
+        data["dropoff_date"].as_string().label("dropoff_date"),
+        data["pickup_date"].as_string().label("pickup_date"),
+        data["departure_time"].as_string().label("departure_time"),
+        data["arrival_time"].as_string().label("arrival_time"),
+        data["departure_airline"].as_string().label("airline"),
+    ).filter(
         AuditLog.created_at >= start_date,
         AuditLog.event.in_([
             AuditLogEvent.DATES_SELECTED,
             AuditLogEvent.FLIGHT_SELECTED,
         ]),
-        AuditLog.session_id.isnot(None)
+        AuditLog.session_id.isnot(None),
+        ~select(completed.id).where(
+            completed.session_id == AuditLog.session_id,
+            completed.created_at >= start_date,
+            completed.event.in_([
+                AuditLogEvent.PAYMENT_SUCCEEDED,
+                AuditLogEvent.BOOKING_CONFIRMED,
+            ]),
+        ).exists(),
     ).order_by(AuditLog.created_at.desc()).all()
 
-    # Get all sessions that completed booking
-    completed_sessions = db.query(AuditLog.session_id).filter(
-        AuditLog.created_at >= start_date,
-        AuditLog.event.in_([
-            AuditLogEvent.PAYMENT_SUCCEEDED,
-            AuditLogEvent.BOOKING_CONFIRMED,
-        ]),
-        AuditLog.session_id.isnot(None)
-    ).distinct().all()
-    completed_session_ids = {s[0] for s in completed_sessions}
-
     # Group abandoned sessions by period
     period_data = defaultdict(set)
     destination_sessions = defaultdict(set)  # Track unique sessions per destination
@@ -8517,9 +8218,6 @@ async def get_abandoned_carts_report(
     seen_sessions = set()  # Track sessions we've already added to recent_abandoned
 
     for log in started_sessions:
-        if log.session_id in completed_session_ids:
-            continue  # Skip completed sessions
-
         if log.created_at:
             log_time = log.created_at
             if log_time.tzinfo is None:
@@ -8536,47 +8234,36 @@ async def get_abandoned_carts_report(
 
             period_data[period_key].add(log.session_id)
 
-            # Extract event data for analytics
-            if log.event_data:
-                try:
-                    data = json.loads(log.event_data) if isinstance(log.event_data, str) else log.event_data
-
-                    # Count unique sessions per destination
-                    destination = data.get('departure_destination')
-                    if destination:
-                        destination_sessions[destination].add(log.session_id)
+            # Count unique sessions per destination
+            if log.destination:
+                destination_sessions[log.destination].add(log.session_id)
 
-                    # Count unique sessions per trip length
-                    dropoff = data.get('dropoff_date')
-                    pickup = data.get('pickup_date')
-                    if dropoff and pickup:
-                        try:
-                            d1 = datetime.strptime(dropoff, "%Y-%m-%d")
-                            d2 = datetime.strptime(pickup, "%Y-%m-%d")
-                            days = (d2 - d1).days
-                            if days > 0:
-                                days_sessions[days].add(log.session_id)
-                        except:
-                            pass
-
-                    # Collect recent abandoned with flight details (one per session)
-                    if log.event == AuditLogEvent.FLIGHT_SELECTED and log.session_id not in seen_sessions and len(recent_abandoned) < 100:
-                        seen_sessions.add(log.session_id)
-                        recent_abandoned.append({
-                            "created_at": log_time.isoformat(),
-                            "session_id": log.session_id,
-                            "dropoff_date": data.get('dropoff_date'),
-                            "pickup_date": data.get('pickup_date'),
-                            "departure_time": data.get('departure_time'),
-                            "arrival_time": data.get('arrival_time'),
-                            "destination": data.get('departure_destination'),
-                            "airline": data.get('departure_airline'),
-                            "days": (datetime.strptime(data.get('pickup_date'), "%Y-%m-%d") -
-                                    datetime.strptime(data.get('dropoff_date'), "%Y-%m-%d")).days
-                                    if data.get('pickup_date') and data.get('dropoff_date') else None
-                        })
-                except:
-                    pass
+            # Count unique sessions per trip length
+            days = None
+            if log.dropoff_date and log.pickup_date:
+                try:
+                    d1 = datetime.strptime(log.dropoff_date, "%Y-%m-%d")
+                    d2 = datetime.strptime(log.pickup_date, "%Y-%m-%d")
+                    days = (d2 - d1).days
+                    if days > 0:
+                        days_sessions[days].add(log.session_id)
+                except (TypeError, ValueError):
+                    days = None
+
+            # Collect recent abandoned with flight details (one per session)
+            if log.event == AuditLogEvent.FLIGHT_SELECTED and log.session_id not in seen_sessions and len(recent_abandoned) < 100:
+                seen_sessions.add(log.session_id)
+                recent_abandoned.append({
+                    "created_at": log_time.isoformat(),
+                    "session_id": log.session_id,
+                    "dropoff_date": log.dropoff_date,
+                    "pickup_date": log.pickup_date,
+                    "departure_time": log.departure_time,
+                    "arrival_time": log.arrival_time,
+                    "destination": log.destination,
+                    "airline": log.airline,
+                    "days": days,
+                })
 
     # Sort recent abandoned by created_at descending
     recent_abandoned.sort(key=lambda x: x['created_at'], reverse=True)
@@ -8635,16 +8322,11 @@ async def get_abandoned_carts_report(
         },
         "recent_abandoned": recent_abandoned[:50]  # Limit to 50 for response size
     }
-
-    if is_default_request:
-        _abandoned_carts_cache["data"] = result.copy()
-        _abandoned_carts_cache["cached_at"] = now
-    result["cached"] = False
     return result
 
 
 @app.get("/api/admin/reports/bookings-forecast")
-async def get_bookings_forecast(
+def get_bookings_forecast(
     refresh: bool = Query(False, description="Force refresh cache"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -8656,402 +8338,17 @@ async def get_bookings_forecast(
     - Historical bookings by destination, day of week, airline
     - Abandoned cart searches (demand signals)
     - Compares what's being searched vs what's being booked
+    - Drop-offs per day for the next 30 days from booking pace and
+      seasonality, with an 80% band ("projection")
 
-    Returns predictions for the next 30 days.
-    Results are cached for 1 hour to improve performance.
+    Computed nightly by booking_forecast and served from the latest
+    booking_forecasts row; refresh=true computes and stores a new one.
     """
-    from db_models import Booking, BookingStatus, AuditLog, AuditLogEvent
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-    import pytz
-    import json
-
-    uk_tz = pytz.timezone('Europe/London')
-    now = datetime.now(uk_tz)
-    today = now.date()
-
-    # Check cache (unless refresh is requested)
-    global _forecast_cache
-    if not refresh and _forecast_cache["data"] is not None and _forecast_cache["cached_at"] is not None:
-        cache_age = (now - _forecast_cache["cached_at"]).total_seconds()
-        if cache_age < FORECAST_CACHE_DURATION_SECONDS:
-            # Return cached data with cache info
-            cached_response = _forecast_cache["data"].copy()
-            cached_response["cached"] = True
-            cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
-            return cached_response
-
-    # Get historical bookings (last 6 months of completed/confirmed bookings)
-    six_months_ago = now - timedelta(days=180)
-
-    historical_bookings = db.query(Booking).filter(
-        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.COMPLETED]),
-        Booking.created_at >= six_months_ago
-    ).all()
-
-    # Analyze booking patterns
-    destination_bookings = defaultdict(int)
-    day_of_week_bookings = defaultdict(int)  # 0=Monday, 6=Sunday (dropoff/travel day)
-    pickup_day_of_week_bookings = defaultdict(int)  # 0=Monday, 6=Sunday (pickup/return day)
-    airline_bookings = defaultdict(int)
-    travel_month_bookings = defaultdict(int)  # Month of dropoff (when they travel)
-    booking_month_bookings = defaultdict(int)  # Month of booking creation (when they booked)
-    destination_by_dow = defaultdict(lambda: defaultdict(int))  # destination -> dow -> count
-    departure_time_bookings = defaultdict(int)  # Hour of departure (0-23)
-    arrival_time_bookings = defaultdict(int)  # Hour of arrival (0-23)
-
-    for booking in historical_bookings:
-        # Departure destination
-        if booking.dropoff_destination:
-            dest = booking.dropoff_destination.strip().title()
-            destination_bookings[dest] += 1
-
-            # Track day of week for this destination
-            if booking.dropoff_date:
-                dow = booking.dropoff_date.weekday()
-                destination_by_dow[dest][dow] += 1
-
-        # Day of week patterns (dropoff = travel day)
-        if booking.dropoff_date:
-            dow = booking.dropoff_date.weekday()
-            day_of_week_bookings[dow] += 1
-            travel_month_bookings[booking.dropoff_date.month] += 1
-
-        # Day of week patterns (pickup = return day)
-        if booking.pickup_date:
-            pickup_dow = booking.pickup_date.weekday()
-            pickup_day_of_week_bookings[pickup_dow] += 1
-
-        # Month the booking was placed (effective paid month, UK time)
-        eff = booking_effective_datetime(booking)
-        if eff:
-            booking_month_bookings[eff.month] += 1
-
-        # Airline patterns (merge Ryanair UK into Ryanair)
-        if booking.dropoff_airline_name:
-            airline_name = booking.dropoff_airline_name
-            if airline_name.lower() in ['ryanair uk', 'ryanair uk ltd']:
-                airline_name = 'Ryanair'
-            airline_bookings[airline_name] += 1
-
-        # Departure time patterns
-        if booking.flight_departure_time:
-            hour = booking.flight_departure_time.hour
-            departure_time_bookings[hour] += 1
-
-        # Arrival time patterns
-        if booking.flight_arrival_time:
-            hour = booking.flight_arrival_time.hour
-            arrival_time_bookings[hour] += 1
-
-    # Get abandoned cart data (last 30 days)
-    thirty_days_ago = now - timedelta(days=30)
-
-    abandoned_logs = db.query(AuditLog).filter(
-        AuditLog.created_at >= thirty_days_ago,
-        AuditLog.event == AuditLogEvent.FLIGHT_SELECTED,
-        AuditLog.session_id.isnot(None)
-    ).all()
-
-    # Get completed sessions to exclude
-    completed_sessions = db.query(AuditLog.session_id).filter(
-        AuditLog.created_at >= thirty_days_ago,
-        AuditLog.event.in_([AuditLogEvent.PAYMENT_SUCCEEDED, AuditLogEvent.BOOKING_CONFIRMED]),
-        AuditLog.session_id.isnot(None)
-    ).distinct().all()
-    completed_session_ids = {s[0] for s in completed_sessions}
-
-    # Analyze abandoned cart searches
-    searched_destinations = defaultdict(set)  # destination -> set of session_ids
-    searched_dates = defaultdict(set)  # date string -> set of session_ids
-    searched_airlines = defaultdict(set)
-    abandoned_month_sessions = defaultdict(set)  # month (1-12) -> set of session_ids
-
-    for log in abandoned_logs:
-        if log.session_id in completed_session_ids:
-            continue
-
-        if log.event_data:
-            try:
-                data = json.loads(log.event_data) if isinstance(log.event_data, str) else log.event_data
-
-                dest = data.get('departure_destination')
-                if dest:
-                    searched_destinations[dest.strip().title()].add(log.session_id)
-
-                dropoff_date = data.get('dropoff_date')
-                if dropoff_date:
-                    searched_dates[dropoff_date].add(log.session_id)
-                    # Track abandoned by month of intended travel
-                    try:
-                        month = int(dropoff_date.split('-')[1])
-                        abandoned_month_sessions[month].add(log.session_id)
-                    except:
-                        pass
-
-                airline = data.get('departure_airline')
-                if airline:
-                    # Merge Ryanair UK into Ryanair
-                    if airline.lower() in ['ryanair uk', 'ryanair uk ltd']:
-                        airline = 'Ryanair'
-                    searched_airlines[airline].add(log.session_id)
-            except:
-                pass
-
-    # Calculate totals for normalization
-    total_bookings = len(historical_bookings) or 1
-    total_searches = len(set(s for sessions in searched_destinations.values() for s in sessions)) or 1
-
-    # Build destination forecast with demand scores
-    destination_forecast = []
-    all_destinations = set(destination_bookings.keys()) | set(searched_destinations.keys())
-
-    for dest in all_destinations:
-        bookings_count = destination_bookings.get(dest, 0)
-        search_count = len(searched_destinations.get(dest, set()))
-
-        # Calculate base scores (normalized 0-100)
-        booking_score = min(100, (bookings_count / total_bookings) * 500)  # Historical booking strength
-        search_score = min(100, (search_count / total_searches) * 300)  # Recent search interest
-
-        # Model 1: Balanced (60% bookings, 40% searches)
-        score_balanced = round((booking_score * 0.6) + (search_score * 0.4), 1)
-
-        # Model 2: Momentum (30% bookings, 70% searches) - catches emerging trends
-        score_momentum = round((booking_score * 0.3) + (search_score * 0.7), 1)
-
-        # Model 3: Established (80% bookings, 20% searches) - conservative, proven patterns
-        score_established = round((booking_score * 0.8) + (search_score * 0.2), 1)
-
-        # Calculate model agreement/confidence
-        scores = [score_balanced, score_momentum, score_established]
-        score_range = max(scores) - min(scores)
-        if score_range <= 10:
-            confidence = "high"
-            confidence_icon = "✓✓✓"
-        elif score_range <= 25:
-            confidence = "medium"
-            confidence_icon = "✓✓"
-        else:
-            confidence = "low"
-            confidence_icon = "⚠️"
-
-        # Conversion indicator
-        if bookings_count > 0 and search_count > 0:
-            conversion_rate = round((bookings_count / (bookings_count + search_count)) * 100, 1)
-        elif bookings_count > 0:
-            conversion_rate = 100
-        else:
-            conversion_rate = 0
-
-        # Best day of week for this destination
-        dest_dow = destination_by_dow.get(dest, {})
-        best_dow = max(dest_dow.keys(), key=lambda x: dest_dow[x]) if dest_dow else None
-        dow_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-        # Determine trend: is momentum higher or lower than established?
-        if score_momentum > score_established + 10:
-            trend = "rising"  # Gaining popularity
-        elif score_established > score_momentum + 10:
-            trend = "stable"  # Reliable but not trending
-        else:
-            trend = "neutral"
-
-        destination_forecast.append({
-            "destination": dest,
-            "bookings_6m": bookings_count,
-            "searches_30d": search_count,
-            "score_balanced": score_balanced,
-            "score_momentum": score_momentum,
-            "score_established": score_established,
-            "confidence": confidence,
-            "confidence_icon": confidence_icon,
-            "trend": trend,
-            "conversion_rate": conversion_rate,
-            "best_day": dow_names[best_dow] if best_dow is not None else None,
-            "status": "high_demand" if score_balanced >= 50 else "moderate" if score_balanced >= 20 else "low"
-        })
-
-    # Sort by demand score
-    destination_forecast.sort(key=lambda x: x['score_balanced'], reverse=True)
-
-    # Day of week analysis
-    dow_names_full = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    dow_forecast = []
-    for dow in range(7):
-        count = day_of_week_bookings.get(dow, 0)
-        dow_forecast.append({
-            "day": dow_names_full[dow],
-            "day_short": dow_names_full[dow][:3],
-            "bookings": count,
-            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-
-    # Pickup day of week analysis (when do customers return?)
-    pickup_dow_forecast = []
-    for dow in range(7):
-        count = pickup_day_of_week_bookings.get(dow, 0)
-        pickup_dow_forecast.append({
-            "day": dow_names_full[dow],
-            "day_short": dow_names_full[dow][:3],
-            "bookings": count,
-            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-
-    # Airline analysis
-    airline_forecast = []
-    for airline, count in sorted(airline_bookings.items(), key=lambda x: x[1], reverse=True)[:10]:
-        search_count = len(searched_airlines.get(airline, set()))
-        airline_forecast.append({
-            "airline": airline,
-            "bookings_6m": count,
-            "searches_30d": search_count,
-            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-
-    # Month analysis (seasonality) - travel month, booking month, and abandoned month
-    month_names = ['', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    travel_month_forecast = []
-    booking_month_forecast = []
-    abandoned_month_forecast = []
-    for month in range(1, 13):
-        travel_count = travel_month_bookings.get(month, 0)
-        booking_count = booking_month_bookings.get(month, 0)
-        abandoned_count = len(abandoned_month_sessions.get(month, set()))
-        travel_month_forecast.append({
-            "month": month_names[month],
-            "month_num": month,
-            "bookings": travel_count,
-            "percentage": round((travel_count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-        booking_month_forecast.append({
-            "month": month_names[month],
-            "month_num": month,
-            "bookings": booking_count,
-            "percentage": round((booking_count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-        abandoned_month_forecast.append({
-            "month": month_names[month],
-            "month_num": month,
-            "count": abandoned_count,
-            "percentage": round((abandoned_count / total_searches) * 100, 1) if total_searches else 0
-        })
-
-    # Upcoming dates with search interest (next 30 days)
-    upcoming_demand = []
-    for i in range(30):
-        future_date = today + timedelta(days=i)
-        date_str = future_date.strftime("%Y-%m-%d")
-        search_count = len(searched_dates.get(date_str, set()))
-
-        if search_count > 0:
-            upcoming_demand.append({
-                "date": date_str,
-                "display_date": future_date.strftime("%a %d %b"),
-                "searches": search_count,
-                "day_of_week": dow_names_full[future_date.weekday()]
-            })
-
-    # Sort by search count
-    upcoming_demand.sort(key=lambda x: x['searches'], reverse=True)
-
-    # Predicted dates - next 30 days scored by day-of-week pattern + month pattern + searches
-    predicted_dates = []
-    for i in range(30):
-        future_date = today + timedelta(days=i)
-        date_str = future_date.strftime("%Y-%m-%d")
-        dow = future_date.weekday()
-        month = future_date.month
-
-        # Score based on historical patterns
-        dow_score = (day_of_week_bookings.get(dow, 0) / total_bookings * 100) if total_bookings else 0
-        month_score = (travel_month_bookings.get(month, 0) / total_bookings * 100) if total_bookings else 0
-        search_score = len(searched_dates.get(date_str, set())) * 10  # Boost for active searches
-
-        # Combined prediction score
-        prediction_score = round((dow_score * 0.4) + (month_score * 0.3) + (search_score * 0.3), 1)
-
-        predicted_dates.append({
-            "date": date_str,
-            "display_date": future_date.strftime("%a %d %b"),
-            "day_of_week": dow_names_full[dow],
-            "prediction_score": prediction_score,
-            "searches": len(searched_dates.get(date_str, set())),
-            "likelihood": "high" if prediction_score >= 15 else "medium" if prediction_score >= 8 else "low"
-        })
-
-    # Sort by prediction score
-    predicted_dates.sort(key=lambda x: x['prediction_score'], reverse=True)
-
-    # Departure time analysis
-    departure_time_forecast = []
-    for hour in range(0, 24):  # Full day coverage
-        count = departure_time_bookings.get(hour, 0)
-        time_label = f"{hour:02d}:00"
-        departure_time_forecast.append({
-            "hour": hour,
-            "time": time_label,
-            "bookings": count,
-            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-
-    # Arrival time analysis
-    arrival_time_forecast = []
-    for hour in range(0, 24):  # Full day coverage
-        count = arrival_time_bookings.get(hour, 0)
-        time_label = f"{hour:02d}:00"
-        arrival_time_forecast.append({
-            "hour": hour,
-            "time": time_label,
-            "bookings": count,
-            "percentage": round((count / total_bookings) * 100, 1) if total_bookings else 0
-        })
-
-    # Search vs booking gap (high searches, low conversions = opportunity)
-    opportunity_gaps = []
-    for dest in destination_forecast:
-        if dest['searches_30d'] >= 2 and dest['conversion_rate'] < 50:
-            opportunity_gaps.append({
-                "destination": dest['destination'],
-                "searches": dest['searches_30d'],
-                "bookings": dest['bookings_6m'],
-                "gap_score": dest['searches_30d'] * (100 - dest['conversion_rate']) / 100
-            })
-    opportunity_gaps.sort(key=lambda x: x['gap_score'], reverse=True)
-
-    result = {
-        "generated_at": now.isoformat(),
-        "data_range": {
-            "bookings_from": six_months_ago.strftime("%Y-%m-%d"),
-            "searches_from": thirty_days_ago.strftime("%Y-%m-%d"),
-            "total_bookings_analyzed": total_bookings,
-            "total_abandoned_sessions": total_searches
-        },
-        "destinations": destination_forecast[:20],
-        "day_of_week": dow_forecast,
-        "pickup_day_of_week": pickup_dow_forecast,
-        "airlines": airline_forecast,
-        "seasonality_travel": travel_month_forecast,
-        "seasonality_booking": booking_month_forecast,
-        "seasonality_abandoned": abandoned_month_forecast,
-        "departure_times": departure_time_forecast,
-        "arrival_times": arrival_time_forecast,
-        "predicted_dates": predicted_dates[:15],
-        "upcoming_demand": upcoming_demand[:15],
-        "opportunity_gaps": opportunity_gaps[:10]
-    }
-
-    # Store in cache
-    _forecast_cache["data"] = result
-    _forecast_cache["cached_at"] = now
-
-    # Return fresh data
-    result["cached"] = False
-    return result
+    return booking_forecast.latest_booking_forecast(db, refresh=refresh)
 
 
 @app.post("/api/admin/marketing-subscribers/{subscriber_id}/send-promo")
-async def send_promo_email_to_subscriber(
+def send_promo_email_to_subscriber(
     subscriber_id: int,
     discount_percent: int = Query(10, description="Discount percentage (10 or 100)"),
     db: Session = Depends(get_db),
@@ -9161,7 +8458,7 @@ async def send_promo_email_to_subscriber(
 
 
 @app.post("/api/admin/marketing-subscribers/{subscriber_id}/send-founder-email")
-async def send_founder_email_to_subscriber(
+def send_founder_email_to_subscriber(
     subscriber_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -9233,7 +8530,7 @@ async def send_founder_email_to_subscriber(
 
 
 @app.post("/api/admin/marketing-subscribers/{subscriber_id}/send-promo-10-reminder")
-async def send_promo_10_reminder_to_subscriber(
+def send_promo_10_reminder_to_subscriber(
     subscriber_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -9299,7 +8596,7 @@ async def send_promo_10_reminder_to_subscriber(
 
 
 @app.post("/api/admin/marketing-subscribers/{subscriber_id}/send-promo-free-reminder")
-async def send_promo_free_reminder_to_subscriber(
+def send_promo_free_reminder_to_subscriber(
     subscriber_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -9369,7 +8666,7 @@ async def send_promo_free_reminder_to_subscriber(
 # =============================================================================
 
 @app.get("/api/admin/marketing-sources/summary")
-async def get_marketing_sources_summary(
+def get_marketing_sources_summary(
     from_month: str = Query(None, description="Start month in MM/YYYY format (e.g., 04/2026)"),
     to_month: str = Query(None, description="End month in MM/YYYY format (e.g., 06/2026)"),
     db: Session = Depends(get_db),
@@ -9436,7 +8733,7 @@ async def get_marketing_sources_summary(
 
 
 @app.get("/api/admin/marketing-sources/other")
-async def get_marketing_sources_other(
+def get_marketing_sources_other(
     year_month: str = Query(None, description="Filter by month in YYYY-MM format"),
     from_date: str = Query(None, description="Start date in DD/MM/YYYY format"),
     to_date: str = Query(None, description="End date in DD/MM/YYYY format"),
@@ -9500,23 +8797,24 @@ async def get_marketing_sources_other(
 
 
 @app.get("/api/admin/marketing-sources/export")
-async def export_marketing_sources_csv(
+def export_marketing_sources_csv(
     from_date: Optional[str] = Query(None, description="Start date in DD/MM/YYYY format"),
     to_date: Optional[str] = Query(None, description="End date in DD/MM/YYYY format"),
+    gzip: bool = Query(False, description="Download as a gzip-compressed .csv.gz"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
     Export marketing source data as CSV, optionally filtered by date range.
+    Streamed in chunks.
 
     Args:
         from_date: Start date in DD/MM/YYYY format (inclusive)
         to_date: End date in DD/MM/YYYY format (inclusive)
+        gzip: Send a gzip-compressed .csv.gz instead
     """
     from db_models import MarketingSource, Customer
-    from fastapi.responses import StreamingResponse
-    import io
-    import csv
+    from csv_export import CSV_EXPORT_YIELD_PER, csv_streaming_response
 
     query = db.query(MarketingSource, Customer).join(
         Customer, MarketingSource.customer_id == Customer.id
@@ -9539,24 +8837,18 @@ async def export_marketing_sources_csv(
         except (IndexError, ValueError):
             pass  # Invalid format, skip filter
 
-    results = query.order_by(MarketingSource.created_at.desc()).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['customer_id', 'customer_email', 'customer_name', 'source', 'source_detail', 'created_at'])
+    results = query.order_by(MarketingSource.created_at.desc()).yield_per(CSV_EXPORT_YIELD_PER)
 
-    for ms, customer in results:
-        writer.writerow([
+    def format_row(result):
+        ms, customer = result
+        return [
             customer.id,
             customer.email,
             f"{customer.first_name} {customer.last_name}",
             ms.source,
             ms.source_detail or '',
             ms.created_at.strftime('%d/%m/%Y') if ms.created_at else '',
-        ])
-
-    output.seek(0)
+        ]
 
     # Generate filename with date range if filters applied
     filename = "marketing_sources"
@@ -9566,10 +8858,12 @@ async def export_marketing_sources_csv(
         filename += f"_to_{to_date}"
     filename += ".csv"
 
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    return csv_streaming_response(
+        ['customer_id', 'customer_email', 'customer_name', 'source', 'source_detail', 'created_at'],
+        results,
+        filename,
+        format_row,
+        gzip=gzip,
     )
 
 
@@ -9588,7 +8882,7 @@ def generate_promo_code(prefix: str = "TAG") -> str:
 
 
 @app.post("/api/admin/promotions")
-async def create_promotion(
+def create_promotion(
     request: dict,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -9755,7 +9049,7 @@ async def create_promotion(
 
 
 @app.get("/api/admin/promotions")
-async def list_promotions(
+def list_promotions(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -9818,7 +9112,7 @@ async def list_promotions(
 
 
 @app.get("/api/admin/promotions/{promotion_id}")
-async def get_promotion(
+def get_promotion(
     promotion_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -9940,7 +9234,7 @@ class PromotionUpdate(BaseModel):
 
 
 @app.patch("/api/admin/promotions/{promotion_id}")
-async def update_promotion(
+def update_promotion(
     promotion_id: int,
     update_data: PromotionUpdate,
     db: Session = Depends(get_db),
@@ -10002,7 +9296,7 @@ async def update_promotion(
 
 
 @app.delete("/api/admin/promotions/{promotion_id}")
-async def delete_promotion(
+def delete_promotion(
     promotion_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -10071,7 +9365,7 @@ async def delete_promotion(
 
 
 @app.post("/api/admin/promotions/{promotion_id}/generate-codes")
-async def generate_more_codes(
+def generate_more_codes(
     promotion_id: int,
     request: dict,
     db: Session = Depends(get_db),
@@ -10195,7 +9489,7 @@ async def generate_more_codes(
 
 
 @app.get("/api/admin/promotions/{promotion_id}/available-codes")
-async def get_available_codes(
+def get_available_codes(
     promotion_id: int,
     limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
@@ -10227,7 +9521,7 @@ async def get_available_codes(
 
 
 @app.patch("/api/admin/promo-codes/{code_id}/share-socials")
-async def mark_code_shared_on_socials(
+def mark_code_shared_on_socials(
     code_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -10280,7 +9574,7 @@ async def mark_code_shared_on_socials(
 
 
 @app.patch("/api/admin/promo-codes/{code_id}/share-privately")
-async def mark_code_shared_privately(
+def mark_code_shared_privately(
     code_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -10341,7 +9635,7 @@ class PromoCodeExpiryUpdate(BaseModel):
 
 
 @app.patch("/api/admin/promo-codes/{code_id}/expiry")
-async def update_promo_code_expiry(
+def update_promo_code_expiry(
     code_id: int,
     request: PromoCodeExpiryUpdate,
     db: Session = Depends(get_db),
@@ -10465,7 +9759,7 @@ class BulkPromoCodeExpiryUpdate(BaseModel):
 
 
 @app.patch("/api/admin/promo-codes/bulk-expiry")
-async def bulk_update_promo_code_expiry(
+def bulk_update_promo_code_expiry(
     request: BulkPromoCodeExpiryUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -10579,7 +9873,7 @@ async def bulk_update_promo_code_expiry(
 
 
 @app.post("/api/admin/promotions/send-emails")
-async def send_promo_emails(
+def send_promo_emails(
     request: dict,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -10768,7 +10062,7 @@ def send_generic_promo_email(to_email: str, subject: str, html_body: str) -> boo
 
 
 @app.get("/api/admin/promotions/recipients/search")
-async def search_recipients(
+def search_recipients(
     q: str = Query("", min_length=0),
     source: str = Query("all", description="Filter by source: all, customers, subscribers"),
     limit: int = Query(50, ge=1, le=200),
@@ -10867,8 +10161,32 @@ def send_free_parking_promo_email(first_name: str, email: str, promo_code: str)
 # Flight Schedule Endpoints (from database)
 # =============================================================================
 
+def _departure_slots_payload(rows) -> list:
+    """Slot rows in buildDropoffSlots' shape (tag-website/src/utils/dropoffSlots.js).
+
+    Two slots clamped to the same floor time collapse to the first, exactly
+    as the frontend builder does.
+    """
+    payload = []
+    seen_times = set()
+    for row in sorted(rows, key=lambda r: (r.drop_off_date, r.drop_off_time, -int(r.slot_id))):
+        hhmm = row.drop_off_time.strftime("%H:%M")
+        if hhmm in seen_times:
+            continue
+        seen_times.add(hhmm)
+        payload.append({
+            "id": row.slot_id,
+            "label": row.label,
+            "time": hhmm,
+            "drop_off_date": row.drop_off_date.isoformat(),
+            "available": row.remaining,
+            "isLastSlot": row.remaining == 1,
+        })
+    return payload
+
+
 @app.get("/api/flights/departures/{flight_date}")
-async def get_departures_for_date(flight_date: date, db: Session = Depends(get_db)):
+def get_departures_for_date(flight_date: date, db: Session = Depends(get_db)):
     """
     Get all departure flights for a specific date.
 
@@ -10887,6 +10205,7 @@ async def get_departures_for_date(flight_date: date, db: Session = Depends(get_d
     departures = db.query(FlightDeparture).filter(
         FlightDeparture.date == flight_date
     ).order_by(FlightDeparture.departure_time).all()
+    slots_by_departure = db_service.get_departure_slots_for_date(db, flight_date, departures)
 
     return [
         {
@@ -10911,6 +10230,8 @@ async def get_departures_for_date(flight_date: date, db: Session = Depends(get_d
             "is_last_slot": d.is_last_slot,
             "early_is_last_slot": d.early_is_last_slot,
             "late_is_last_slot": d.late_is_last_slot,
+            # Materialised drop-off slots (departure_slots)
+            "slots": _departure_slots_payload(slots_by_departure.get(d.id, [])),
             # Blocked date indicator
             "is_blocked": blocked is not None,
             "blocked_reason": blocked.reason if blocked else None,
@@ -10920,7 +10241,7 @@ async def get_departures_for_date(flight_date: date, db: Session = Depends(get_d
 
 
 @app.get("/api/flights/arrivals/{flight_date}")
-async def get_arrivals_for_date(flight_date: date, db: Session = Depends(get_db)):
+def get_arrivals_for_date(flight_date: date, db: Session = Depends(get_db)):
     """
     Get all arrival flights for a specific date.
 
@@ -10960,7 +10281,7 @@ async def get_arrivals_for_date(flight_date: date, db: Session = Depends(get_db)
 
 
 @app.get("/api/flights/schedule/{flight_date}")
-async def get_schedule_for_date(flight_date: date, db: Session = Depends(get_db)):
+def get_schedule_for_date(flight_date: date, db: Session = Depends(get_db)):
     """
     Get combined flight schedule (departures + arrivals) for a date.
 
@@ -11018,7 +10339,7 @@ async def get_schedule_for_date(flight_date: date, db: Session = Depends(get_db)
 
 
 @app.post("/api/flights/departures/{departure_id}/book-slot")
-async def book_departure_slot(
+def book_departure_slot(
     departure_id: int,
     slot_id: str = Query(..., description="Slot ID: '150' for early slot (2½h), '120' for standard slot (2h), '90' for late slot (1½h)"),
     db: Session = Depends(get_db)
@@ -11059,7 +10380,7 @@ async def book_departure_slot(
 
 
 @app.get("/api/flights/dates")
-async def get_available_dates(db: Session = Depends(get_db)):
+def get_available_dates(db: Session = Depends(get_db)):
     """
     Get all dates that have departure flights available.
 
@@ -11129,7 +10450,7 @@ def validate_flight_time(time_str: str, flight_type: str) -> tuple[bool, str, Op
 
 
 @app.post("/api/booking/validate-flight-time", response_model=ValidateFlightTimeResponse)
-async def validate_customer_flight_time(request: ValidateFlightTimeRequest):
+def validate_customer_flight_time(request: ValidateFlightTimeRequest):
     """
     Validate a customer-provided flight time.
 
@@ -11159,7 +10480,7 @@ async def validate_customer_flight_time(request: ValidateFlightTimeRequest):
 
 
 @app.get("/api/booking/airlines")
-async def get_available_airlines():
+def get_available_airlines():
     """
     Get list of airlines for manual flight entry.
 
@@ -11178,7 +10499,7 @@ async def get_available_airlines():
 
 
 @app.get("/api/booking/destinations")
-async def get_available_destinations(db: Session = Depends(get_db)):
+def get_available_destinations(db: Session = Depends(get_db)):
     """
     Get list of destinations for manual flight entry.
 
@@ -11237,7 +10558,7 @@ class CreateVehicleRequest(BaseModel):
 
 
 @app.post("/api/customers")
-async def create_or_update_customer(
+def create_or_update_customer(
     request: CreateCustomerRequest,
     http_request: Request,
     db: Session = Depends(get_db),
@@ -11321,7 +10642,7 @@ async def create_or_update_customer(
 
 
 @app.patch("/api/customers/{customer_id}")
-async def update_customer(
+def update_customer(
     customer_id: int,
     request: CreateCustomerRequest,
     http_request: Request,
@@ -11382,7 +10703,7 @@ VALID_MARKETING_SOURCES = ['newspaper', 'google', 'facebook', 'instagram', 'link
 
 
 @app.get("/api/customers/heard-about-us-status")
-async def get_heard_about_us_status(
+def get_heard_about_us_status(
     http_request: Request,
     email: str = Query(..., description="Customer email address"),
     db: Session = Depends(get_db),
@@ -11438,7 +10759,7 @@ class HeardAboutUsRequest(BaseModel):
 
 
 @app.post("/api/customers/heard-about-us")
-async def save_heard_about_us(
+def save_heard_about_us(
     request: HeardAboutUsRequest,
     http_request: Request,
     db: Session = Depends(get_db),
@@ -11547,7 +10868,7 @@ async def save_heard_about_us(
 
 
 @app.patch("/api/customers/{customer_id}/billing")
-async def update_customer_billing(
+def update_customer_billing(
     customer_id: int,
     request: UpdateCustomerBillingRequest,
     http_request: Request,
@@ -11638,7 +10959,7 @@ async def update_customer_billing(
 
 
 @app.post("/api/vehicles")
-async def create_or_update_vehicle(
+def create_or_update_vehicle(
     request: CreateVehicleRequest,
     http_request: Request,
     db: Session = Depends(get_db),
@@ -11708,7 +11029,7 @@ async def create_or_update_vehicle(
 
 
 @app.patch("/api/vehicles/{vehicle_id}")
-async def update_vehicle(
+def update_vehicle(
     vehicle_id: int,
     request: CreateVehicleRequest,
     http_request: Request,
@@ -11789,7 +11110,7 @@ class CheckoutAuditRequest(BaseModel):
 
 
 @app.post("/api/booking/audit-event")
-async def log_checkout_event(
+def log_checkout_event(
     request: CheckoutAuditRequest,
     http_request: Request,
     db: Session = Depends(get_db),
@@ -11866,6 +11187,29 @@ class VehicleLookupResponse(BaseModel):
     error: Optional[str] = None
 
 
+def _claim_dvla_lookup(db: Session, draft: BookingDraft) -> bool:
+    """Count one DVLA lookup against the draft; False once its quota is used up."""
+    # Single conditional UPDATE so two concurrent lookups can't both
+    # pass at quota - 1. Pre-2026-05-29-review this was a Python
+    # check + a separate UPDATE; two concurrent requests at count=9
+    # both observed 9 and both incremented, ending at 11.
+    result = db.execute(
+        text(
+            "UPDATE booking_drafts SET dvla_calls_count = "
+            "dvla_calls_count + 1 "
+            "WHERE token = :t AND dvla_calls_count < :max"
+        ),
+        {"t": draft.token, "max": MAX_DVLA_LOOKUPS_PER_DRAFT},
+    )
+    db.commit()
+    # rowcount == 0 means the WHERE clause didn't match → quota
+    # already exceeded (or token disappeared between get and update).
+    if result.rowcount == 0:
+        return False
+    db.refresh(draft)
+    return True
+
+
 @app.post("/api/vehicles/dvla-lookup", response_model=VehicleLookupResponse)
 async def lookup_vehicle(
     request: VehicleLookupRequest,
@@ -11886,29 +11230,13 @@ async def lookup_vehicle(
     quota only enforced when token is present.
     """
     if draft is not None:
-        # Single conditional UPDATE so two concurrent lookups can't both
-        # pass at quota - 1. Pre-2026-05-29-review this was a Python
-        # check + a separate UPDATE; two concurrent requests at count=9
-        # both observed 9 and both incremented, ending at 11.
-        # rowcount == 0 means the WHERE clause didn't match → quota
-        # already exceeded (or token disappeared between get and update).
-        result = db.execute(
-            text(
-                "UPDATE booking_drafts SET dvla_calls_count = "
-                "dvla_calls_count + 1 "
-                "WHERE token = :t AND dvla_calls_count < :max"
-            ),
-            {"t": draft.token, "max": MAX_DVLA_LOOKUPS_PER_DRAFT},
-        )
-        db.commit()
-        if result.rowcount == 0:
+        if not await run_blocking(_claim_dvla_lookup, db, draft):
             raise HTTPException(
                 status_code=429,
                 detail=f"DVLA lookup quota exceeded for this checkout "
                        f"(max {MAX_DVLA_LOOKUPS_PER_DRAFT}). Reload the "
                        f"booking page to start a new draft.",
             )
-        db.refresh(draft)
 
     # Clean the registration number - remove spaces and non-alphanumeric chars
     clean_reg = re.sub(r'[^A-Za-z0-9]', '', request.registration.upper())
@@ -11977,7 +11305,8 @@ async def lookup_vehicle(
                     error="Invalid registration format"
                 )
             elif response.status_code == 403:
-                log_error(
+                await run_blocking(
+                    log_error,
                     db=db,
                     error_type="dvla_api",
                     message="DVLA API access denied",
@@ -11991,7 +11320,8 @@ async def lookup_vehicle(
                     error="DVLA API access denied - check API key"
                 )
             else:
-                log_error(
+                await run_blocking(
+                    log_error,
                     db=db,
                     error_type="dvla_api",
                     message=f"DVLA API error: {response.status_code}",
@@ -12006,7 +11336,8 @@ async def lookup_vehicle(
                 )
 
     except httpx.TimeoutException:
-        log_error(
+        await run_blocking(
+            log_error,
             db=db,
             error_type="dvla_api",
             message="DVLA API timeout",
@@ -12020,7 +11351,8 @@ async def lookup_vehicle(
             error="DVLA service timeout"
         )
     except Exception as e:
-        log_error(
+        await run_blocking(
+            log_error,
             db=db,
             error_type="dvla_api",
             message=str(e),
@@ -12195,7 +11527,8 @@ async def lookup_address(
                 )
             elif response.status_code == 402:
                 # Payment required / key exhausted
-                log_error(
+                await run_blocking(
+                    log_error,
                     db=db,
                     error_type="ideal_postcodes_api",
                     message="Ideal Postcodes API key exhausted or payment required",
@@ -12209,7 +11542,8 @@ async def lookup_address(
                     error="Address service temporarily unavailable"
                 )
             elif response.status_code == 401:
-                log_error(
+                await run_blocking(
+                    log_error,
                     db=db,
                     error_type="ideal_postcodes_api",
                     message="Ideal Postcodes API authentication failed",
@@ -12223,7 +11557,8 @@ async def lookup_address(
                     error="Address service authentication failed"
                 )
             else:
-                log_error(
+                await run_blocking(
+                    log_error,
                     db=db,
                     error_type="ideal_postcodes_api",
                     message=f"Ideal Postcodes API error: {response.status_code}",
@@ -12238,7 +11573,8 @@ async def lookup_address(
                 )
 
     except httpx.TimeoutException:
-        log_error(
+        await run_blocking(
+            log_error,
             db=db,
             error_type="ideal_postcodes_api",
             message="Ideal Postcodes API timeout",
@@ -12252,7 +11588,8 @@ async def lookup_address(
             error="Address service timeout"
         )
     except Exception as e:
-        log_error(
+        await run_blocking(
+            log_error,
             db=db,
             error_type="ideal_postcodes_api",
             message=str(e),
@@ -12287,7 +11624,7 @@ class MarketingSubscribeResponse(BaseModel):
 
 
 @app.post("/api/marketing/subscribe", response_model=MarketingSubscribeResponse)
-async def subscribe_to_marketing(
+def subscribe_to_marketing(
     request: MarketingSubscribeRequest,
     db: Session = Depends(get_db),
 ):
@@ -12354,7 +11691,7 @@ async def subscribe_to_marketing(
 
 
 @app.get("/api/marketing/unsubscribe/{token}")
-async def unsubscribe_confirmation_page(
+def unsubscribe_confirmation_page(
     token: str,
     db: Session = Depends(get_db),
 ):
@@ -12459,7 +11796,7 @@ async def unsubscribe_confirmation_page(
 
 
 @app.post("/api/marketing/unsubscribe/{token}")
-async def unsubscribe_from_marketing(
+def unsubscribe_from_marketing(
     token: str,
     db: Session = Depends(get_db),
 ):
@@ -12792,7 +12129,7 @@ class CreatePaymentResponse(BaseModel):
 
 
 @app.get("/api/stripe/config")
-async def get_stripe_config():
+def get_stripe_config():
     """
     Get Stripe publishable key for frontend initialization.
 
@@ -12813,7 +12150,7 @@ async def get_stripe_config():
 
 
 @app.post("/api/payments/create-intent", response_model=CreatePaymentResponse)
-async def create_payment(
+def create_payment(
     request: CreatePaymentRequest,
     http_request: Request,
     background_tasks: BackgroundTasks,
@@ -13450,13 +12787,19 @@ async def create_payment(
             if departure_time:
                 dropoff_time = _entry_time_before_departure(departure_time, request.drop_off_slot)
         elif request.departure_id and request.drop_off_slot:
-            # Calculate from flight departure time minus slot minutes —
-            # same shared helper, same floor.
-            departure = db.query(FlightDeparture).filter(FlightDeparture.id == request.departure_id).first()
-            if departure:
-                dropoff_time = _entry_time_before_departure(
-                    departure.departure_time, request.drop_off_slot
-                )
+            # Read the materialised slot; fall back to flight departure time
+            # minus slot minutes (same shared helper, same floor) for a slot
+            # id outside the catalogue (legacy "150") or a departure not yet
+            # materialised.
+            slot = db_service.get_departure_slot(db, request.departure_id, request.drop_off_slot)
+            if slot is not None:
+                dropoff_time = slot.drop_off_time
+            else:
+                departure = db.query(FlightDeparture).filter(FlightDeparture.id == request.departure_id).first()
+                if departure:
+                    dropoff_time = _entry_time_before_departure(
+                        departure.departure_time, request.drop_off_slot
+                    )
 
         # Parse pickup/landing time and calculate pickup time (30 min after landing).
         # pickup_time is a pure calculation off arrival — there's no separate
@@ -14069,7 +13412,7 @@ async def create_payment(
 
 
 @app.get("/api/payments/{payment_intent_id}/status")
-async def check_payment_status(payment_intent_id: str):
+def check_payment_status(payment_intent_id: str):
     """
     Check the status of a payment.
 
@@ -14095,35 +13438,14 @@ async def check_payment_status(payment_intent_id: str):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/api/webhooks/stripe")
-async def stripe_webhook(
+def _handle_stripe_event(
+    payload: bytes,
+    stripe_signature: str,
     request: Request,
     background_tasks: BackgroundTasks,
-    stripe_signature: str = Header(None, alias="Stripe-Signature"),
-    db: Session = Depends(get_db),
-):
-    """
-    Handle Stripe webhook events.
-
-    This endpoint receives events from Stripe when:
-    - Payment succeeds (payment_intent.succeeded)
-    - Payment fails (payment_intent.payment_failed)
-    - Refund is processed (charge.refunded)
-
-    The webhook secret verifies the request is from Stripe.
-    """
-    if not is_stripe_configured():
-        raise HTTPException(
-            status_code=503,
-            detail="Payment system is not configured"
-        )
-
-    if not stripe_signature:
-        raise HTTPException(status_code=400, detail="Missing Stripe signature")
-
-    # Get the raw body
-    payload = await request.body()
-
+    db: Session,
+) -> dict:
+    """Verify a Stripe webhook payload and apply its event; see stripe_webhook."""
     try:
         event = verify_webhook_signature(payload, stripe_signature)
     except Exception as e:
@@ -14574,8 +13896,10 @@ async def stripe_webhook(
 
                     # Also send SMS confirmation if enabled
                     if sms_service.is_sms_enabled():
+                        import asyncio
                         try:
-                            await sms_service.send_booking_confirmation_sms(booking, db)
+                            # No loop runs on this thread (as in email_scheduler).
+                            asyncio.run(sms_service.send_booking_confirmation_sms(booking, db))
                             print(f"[SMS] Confirmation SMS sent for booking {booking_reference}")
                         except Exception as sms_error:
                             print(f"[SMS] Failed to send confirmation SMS: {str(sms_error)}")
@@ -14693,10 +14017,13 @@ async def stripe_webhook(
                 payment.refund_id = latest_refund_id
 
             # Set status based on refund amount
+            was_refunded = payment.status == PaymentStatus.REFUNDED
             if refund_amount >= original_amount:
                 payment.status = PaymentStatus.REFUNDED
             else:
                 payment.status = PaymentStatus.PARTIALLY_REFUNDED
+            if payment.status == PaymentStatus.REFUNDED:
+                db_service.release_refunded_booking_slot(db, payment.booking, was_refunded)
 
             db.commit()
 
@@ -14739,10 +14066,13 @@ async def stripe_webhook(
                 payment.refund_id = refund_id
 
                 # Set status based on refund amount vs original
+                was_refunded = payment.status == PaymentStatus.REFUNDED
                 if payment.amount_pence and refund_amount >= payment.amount_pence:
                     payment.status = PaymentStatus.REFUNDED
                 else:
                     payment.status = PaymentStatus.PARTIALLY_REFUNDED
+                if payment.status == PaymentStatus.REFUNDED:
+                    db_service.release_refunded_booking_slot(db, payment.booking, was_refunded)
 
                 db.commit()
 
@@ -14766,11 +14096,46 @@ async def stripe_webhook(
     return {"status": "received", "type": event_type}
 
 
+@app.post("/api/webhooks/stripe")
+async def stripe_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    stripe_signature: str = Header(None, alias="Stripe-Signature"),
+    db: Session = Depends(get_db),
+):
+    """
+    Handle Stripe webhook events.
+
+    This endpoint receives events from Stripe when:
+    - Payment succeeds (payment_intent.succeeded)
+    - Payment fails (payment_intent.payment_failed)
+    - Refund is processed (charge.refunded)
+
+    The webhook secret verifies the request is from Stripe.
+    """
+    if not is_stripe_configured():
+        raise HTTPException(
+            status_code=503,
+            detail="Payment system is not configured"
+        )
+
+    if not stripe_signature:
+        raise HTTPException(status_code=400, detail="Missing Stripe signature")
+
+    # Get the raw body
+    payload = await request.body()
+
+    # Everything after reading the body blocks (the Stripe SDK, the capacity
+    # locks, the payment/promo updates, the confirmation email), so it runs
+    # off the loop.
+    return await run_blocking(_handle_stripe_event, payload, stripe_signature, request, background_tasks, db)
+
+
 STRIPE_REFUND_REASONS = {"requested_by_customer", "duplicate", "fraudulent"}
 
 
 @app.post("/api/admin/refund/{payment_intent_id}")
-async def admin_refund_payment(
+def admin_refund_payment(
     payment_intent_id: str,
     reason: str = Query("requested_by_customer", description="Refund reason"),
     booking_id: Optional[int] = Query(
@@ -14843,6 +14208,7 @@ async def admin_refund_payment(
         payment.refund_amount_pence = refunded_amount
         payment.refund_reason = reason
         payment.refunded_at = datetime.utcnow()
+        was_refunded = payment.status == PaymentStatus.REFUNDED
         if payment.amount_pence and refunded_amount >= payment.amount_pence:
             payment.status = PaymentStatus.REFUNDED
         else:
@@ -14852,6 +14218,8 @@ async def admin_refund_payment(
             DbBookingModel.id == payment.booking_id
         ).first()
         booking_reference = booking.reference if booking else None
+        if payment.status == PaymentStatus.REFUNDED:
+            db_service.release_refunded_booking_slot(db, booking, was_refunded)
 
         log_audit_event(
             db=db,
@@ -14909,7 +14277,7 @@ def load_flight_schedule_json():
 
 
 @app.post("/api/admin/seed-flights")
-async def seed_flights(
+def seed_flights(
     secret: str = Query(..., description="Admin secret key"),
     clear_existing: bool = Query(True, description="Clear existing flight data"),
     db: Session = Depends(get_db),
@@ -14937,6 +14305,7 @@ async def seed_flights(
 
         departures_count = 0
         arrivals_count = 0
+        seeded_departures = []
 
         for flight in flights:
             flight_date = datetime.strptime(flight["date"], "%Y-%m-%d").date()
@@ -14955,6 +14324,7 @@ async def seed_flights(
                     slots_booked_late=0,
                 )
                 db.add(departure)
+                seeded_departures.append(departure)
                 departures_count += 1
 
             elif flight["type"] == "arrival":
@@ -14975,6 +14345,8 @@ async def seed_flights(
                 db.add(arrival)
                 arrivals_count += 1
 
+        db.flush()
+        db_service.materialize_departure_slots(db, seeded_departures)
         db.commit()
 
         return {
@@ -14993,10 +14365,11 @@ class ImportDeparturesRequest(BaseModel):
     """Request body for importing departures with capacity tiers."""
     tsv_data: str  # Tab-separated data
     clear_existing: bool = True
+    dry_run: bool = False  # Validate and diff against flight_departures without writing
 
 
 @app.post("/api/admin/import-departures")
-async def import_departures_with_capacity(
+def import_departures_with_capacity(
     request: ImportDeparturesRequest,
     secret: str = Query(..., description="Admin secret key"),
     db: Session = Depends(get_db),
@@ -15009,6 +14382,8 @@ async def import_departures_with_capacity(
     Date, Day, Op Al, Dest, Flight, Dep Time, Forming Service Arr Time, 0 Spaces, 2 Spaces, 4 Spaces, 6 Spaces, 8 Spaces
 
     Each row should have exactly one TRUE in the capacity columns.
+    Rows are validated individually; errors come back by sheet and row.
+    With dry_run the response carries a diff summary and nothing is written.
     """
     admin_secret = os.getenv("ADMIN_SECRET", "tag-admin-2024")
 
@@ -15017,7 +14392,7 @@ async def import_departures_with_capacity(
 
     try:
         from import_departures_capacity import import_from_tsv_string
-        result = import_from_tsv_string(request.tsv_data, request.clear_existing)
+        result = import_from_tsv_string(request.tsv_data, request.clear_existing, dry_run=request.dry_run)
 
         if result.get("error"):
             raise HTTPException(status_code=400, detail=result["error"])
@@ -15061,7 +14436,7 @@ class UpdateUserRequest(BaseModel):
 
 
 @app.post("/api/admin/users")
-async def create_user(
+def create_user(
     request: CreateUserRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -15113,7 +14488,7 @@ async def create_user(
 
 
 @app.get("/api/admin/users")
-async def list_users(
+def list_users(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -15139,7 +14514,7 @@ async def list_users(
 
 
 @app.put("/api/admin/users/{user_id}")
-async def update_user(
+def update_user(
     user_id: int,
     request: UpdateUserRequest,
     db: Session = Depends(get_db),
@@ -15198,7 +14573,7 @@ async def update_user(
 
 
 @app.delete("/api/admin/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -15261,53 +14636,196 @@ class UpdateInspectionRequest(BaseModel):
     mileage: Optional[int] = None
 
 
-@app.get("/api/employee/flight-board")
-async def get_employee_flight_board(
+FLIGHT_BOARD_STALE_MINUTES = 45
+FLIGHT_BOARD_LONG_POLL_MAX_SECONDS = 25
+FLIGHT_BOARD_STREAM_CHECK_SECONDS = 1.0
+FLIGHT_BOARD_STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _flight_board_payload(board: dict) -> dict:
+    """Shape a live-board state (or an empty board) for the driver view."""
+    if board.get("version") is None:
+        return {
+            "available": False,
+            "version": None,
+            "arrivals": [],
+            "departures": [],
+            "scraped_at": None,
+            "age_minutes": None,
+            "stale": True,
+        }
+    scraped_at = board["scraped_at"]
+    age_minutes = None
+    if scraped_at is not None:
+        age_minutes = max(
+            0,
+            int((datetime.now(timezone.utc) - scraped_at).total_seconds() // 60),
+        )
+    return {
+        "available": True,
+        "version": board["version"],
+        "arrivals": board["arrivals"],
+        "departures": board["departures"],
+        "scraped_at": scraped_at.isoformat() if scraped_at else None,
+        # Stale once we've missed at least one 30-min scrape cycle.
+        "age_minutes": age_minutes,
+        "stale": age_minutes is None or age_minutes > FLIGHT_BOARD_STALE_MINUTES,
+    }
+
+
+def _flight_board_freshness(board: dict) -> dict:
+    """The age fields of a payload, for update messages that carry no rows."""
+    payload = _flight_board_payload(board)
+    return {key: payload[key] for key in ("version", "scraped_at", "age_minutes", "stale")}
+
+
+def _load_live_flight_board(db: Session) -> dict:
+    """Current live board, priming it from the latest ok snapshot if cold.
+
+    Only a cold process (fresh deploy, before its first scrape) reads the
+    database; after that every poll is served from memory.
+    """
+    from db_models import FlightBoardSnapshot
+    from flight_board_service import live_flight_board
+
+    if live_flight_board.loaded:
+        return live_flight_board.state()
+
+    snapshot = (
+        db.query(FlightBoardSnapshot)
+        .filter(FlightBoardSnapshot.status == "ok")
+        .order_by(FlightBoardSnapshot.created_at.desc())
+        .first()
+    )
+    if not snapshot:
+        return {"version": None}
+    live_flight_board.prime(snapshot)
+    return live_flight_board.state()
+
+
+@app.get("/api/employee/flight-board")
+def get_employee_flight_board(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Latest scraped BOH arrivals/departures board for the driver view.
+
+    Serves the most recent successful board — a failed scrape never blanks
+    the board, it just ages (the frontend shows staleness from age_minutes).
+    Age runs from the last scrape that saw this board (last_seen_at), since an
+    unchanged re-scrape refreshes that instead of writing a new snapshot.
+    Read from the in-memory live board; `version` is the `since` for
+    /flight-board/updates and /flight-board/stream.
+    """
+    return _flight_board_payload(_load_live_flight_board(db))
+
+
+def _flight_board_update(since: Optional[int]) -> Optional[dict]:
+    """Changes since a version, a full resync, or None if nothing moved."""
+    from flight_board_service import live_flight_board
+
+    board = live_flight_board.state()
+    if board["version"] is None or board["version"] == since:
+        return None
+    changes = live_flight_board.changes_since(since)
+    if changes is None:
+        return {"resync": True, **_flight_board_payload(board)}
+    return {"resync": False, "changes": changes, **_flight_board_freshness(board)}
+
+
+@app.get("/api/employee/flight-board/updates")
+async def get_employee_flight_board_updates(
+    since: Optional[int] = Query(None, description="Board version the client holds"),
+    wait: int = Query(FLIGHT_BOARD_LONG_POLL_MAX_SECONDS, ge=0, le=FLIGHT_BOARD_LONG_POLL_MAX_SECONDS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Long-poll fallback for clients that can't hold an EventSource open.
+
+    Returns as soon as the board moves past `since`: only the changed flights
+    when the chain from `since` is still held, otherwise the full board with
+    resync=true. After `wait` seconds with no change it returns changes=[]
+    with refreshed age fields so the client can re-poll immediately.
+    """
+    import asyncio
+    import time as _time
+
+    await run_blocking(_load_live_flight_board, db)
+    # Release the pooled connection — the rest of the wait is memory-only.
+    db.close()
+
+    deadline = _time.monotonic() + wait
+    while True:
+        update = _flight_board_update(since)
+        if update is not None:
+            return update
+        if _time.monotonic() >= deadline:
+            from flight_board_service import live_flight_board
+
+            board = live_flight_board.state()
+            if board["version"] is None:
+                return {"resync": True, **_flight_board_payload(board)}
+            return {"resync": False, "changes": [], **_flight_board_freshness(board)}
+        await asyncio.sleep(min(FLIGHT_BOARD_STREAM_CHECK_SECONDS, max(0.0, deadline - _time.monotonic())))
+
+
+@app.get("/api/employee/flight-board/stream")
+async def stream_employee_flight_board(
+    request: Request,
+    since: Optional[int] = Query(None, description="Board version the client holds"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Latest scraped BOH arrivals/departures board for the driver view.
+    """Server-sent events: pushes only the flights that changed.
 
-    Serves the most recent successful snapshot — a failed scrape never blanks
-    the board, it just ages (the frontend shows staleness from age_minutes).
+    The first event is the full board (`board`) unless `since` is current or
+    its changes are still held; each new scrape that changes the board emits
+    a `changes` event; an unchanged re-scrape emits `fresh` with the new age.
+    Comment lines keep idle proxies from closing the connection.
     """
-    from db_models import FlightBoardSnapshot
+    import asyncio
+    from fastapi.responses import StreamingResponse
+    from flight_board_service import live_flight_board
+
+    await run_blocking(_load_live_flight_board, db)
+    db.close()
+
+    def _event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def _events():
+        version = since
+        seen_at = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            update = _flight_board_update(version)
+            if update is not None:
+                version = update["version"]
+                seen_at = live_flight_board.state()["scraped_at"]
+                yield _event("board" if update.pop("resync") else "changes", update)
+                idle = 0.0
+            else:
+                board = live_flight_board.state()
+                if board["version"] is not None and board["scraped_at"] != seen_at:
+                    if seen_at is not None:
+                        yield _event("fresh", _flight_board_freshness(board))
+                    seen_at = board["scraped_at"]
+                    idle = 0.0
+                elif idle >= FLIGHT_BOARD_STREAM_KEEPALIVE_SECONDS:
+                    yield ": keepalive\n\n"
+                    idle = 0.0
+            await asyncio.sleep(FLIGHT_BOARD_STREAM_CHECK_SECONDS)
+            idle += FLIGHT_BOARD_STREAM_CHECK_SECONDS
 
-    snapshot = (
-        db.query(FlightBoardSnapshot)
-        .filter(FlightBoardSnapshot.status == "ok")
-        .order_by(FlightBoardSnapshot.created_at.desc())
-        .first()
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    if not snapshot:
-        return {
-            "available": False,
-            "arrivals": [],
-            "departures": [],
-            "scraped_at": None,
-            "age_minutes": None,
-            "stale": True,
-        }
-
-    age_minutes = None
-    if snapshot.created_at is not None:
-        age_minutes = max(
-            0,
-            int((datetime.now(timezone.utc) - snapshot.created_at).total_seconds() // 60),
-        )
-    return {
-        "available": True,
-        "arrivals": snapshot.arrivals_json or [],
-        "departures": snapshot.departures_json or [],
-        "scraped_at": snapshot.created_at.isoformat() if snapshot.created_at else None,
-        # Stale once we've missed at least one 30-min scrape cycle.
-        "age_minutes": age_minutes,
-        "stale": age_minutes is None or age_minutes > 45,
-    }
 
 
 @app.get("/api/employee/bookings")
-async def get_employee_bookings(
+def get_employee_bookings(
     include_cancelled: bool = Query(False, description="Include cancelled bookings"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15369,7 +14887,7 @@ async def get_employee_bookings(
 
 
 @app.post("/api/employee/inspections")
-async def create_inspection(
+def create_inspection(
     request: CreateInspectionRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15458,7 +14976,7 @@ async def create_inspection(
 
 
 @app.get("/api/employee/inspections/{booking_id}")
-async def get_inspections(
+def get_inspections(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15518,7 +15036,7 @@ async def get_inspections_status_batch(
     booking_ids = booking_ids[:100]
 
     # Single query for all inspections - only select needed columns
-    inspections = db.query(
+    inspections = await run_blocking(db.query(
         VehicleInspection.id,
         VehicleInspection.booking_id,
         VehicleInspection.inspection_type,
@@ -15526,7 +15044,7 @@ async def get_inspections_status_batch(
         VehicleInspection.mileage,
     ).filter(
         VehicleInspection.booking_id.in_(booking_ids)
-    ).all()
+    ).all)
 
     # Group by booking_id - return lightweight status only
     result = {str(bid): [] for bid in booking_ids}
@@ -15544,7 +15062,7 @@ async def get_inspections_status_batch(
 
 
 @app.put("/api/employee/inspections/{inspection_id}")
-async def update_inspection(
+def update_inspection(
     inspection_id: int,
     request: UpdateInspectionRequest,
     db: Session = Depends(get_db),
@@ -15607,7 +15125,7 @@ async def update_inspection(
 
 
 @app.post("/api/employee/bookings/{booking_id}/complete")
-async def mark_booking_completed(
+def mark_booking_completed(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15649,7 +15167,7 @@ async def mark_booking_completed(
 
 
 @app.post("/api/employee/bookings/{booking_id}/decline-inspection")
-async def decline_return_inspection(
+def decline_return_inspection(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15689,7 +15207,7 @@ async def decline_return_inspection(
 
 
 @app.post("/api/employee/bookings/{booking_id}/undecline-inspection")
-async def undecline_return_inspection(
+def undecline_return_inspection(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -15746,7 +15264,7 @@ class PricingSettingsUpdate(BaseModel):
 
 
 @app.get("/api/pricing")
-async def get_pricing():
+def get_pricing():
     """
     Public endpoint: Get current pricing settings.
     Used by HomePage to display dynamic prices.
@@ -15758,7 +15276,7 @@ async def get_pricing():
 
 
 @app.get("/api/admin/pricing")
-async def get_admin_pricing(
+def get_admin_pricing(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -15797,7 +15315,7 @@ async def get_admin_pricing(
 
 
 @app.put("/api/admin/pricing")
-async def update_pricing(
+def update_pricing(
     update: PricingSettingsUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -15922,7 +15440,7 @@ class AuthMeResponse(BaseModel):
 
 
 @app.post("/api/auth/request-code", response_model=AuthRequestCodeResponse)
-async def auth_request_code(
+def auth_request_code(
     payload: AuthRequestCodeRequest,
     request: Request,
     db: Session = Depends(get_db),
@@ -16037,7 +15555,7 @@ async def auth_request_code(
 
 
 @app.post("/api/auth/verify-code", response_model=AuthVerifyCodeResponse)
-async def auth_verify_code(
+def auth_verify_code(
     payload: AuthVerifyCodeRequest,
     request: Request,
     db: Session = Depends(get_db),
@@ -16175,7 +15693,7 @@ async def auth_verify_code(
 
 
 @app.post("/api/auth/logout")
-async def auth_logout(
+def auth_logout(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
@@ -16196,7 +15714,7 @@ async def auth_logout(
 
 
 @app.get("/api/auth/me", response_model=AuthMeResponse)
-async def auth_me(
+def auth_me(
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -16220,7 +15738,7 @@ class DraftTokenResponse(BaseModel):
 
 
 @app.post("/api/booking-drafts", response_model=DraftTokenResponse)
-async def create_booking_draft(
+def create_booking_draft(
     request: Request,
     db: Session = Depends(get_db),
 ):
@@ -16308,8 +15826,104 @@ class CreateArrivalRequest(BaseModel):
     departure_time: Optional[str] = None  # HH:MM format (when it left origin)
 
 
+# Admin flights tables page through (date, time, id) with an opaque cursor.
+# Omitting `limit` keeps the legacy "every row" response the cached default
+# view and the JSON export rely on.
+FLIGHT_PAGE_MAX_LIMIT = 500
+FLIGHT_CAPACITY_STATES = ("call_us", "available", "last_slot", "full")
+_MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _encode_flight_cursor(flight_date: date, flight_time: Optional[time], flight_id: int) -> str:
+    """Opaque keyset cursor for the last row of a flights page."""
+    import base64
+    time_part = flight_time.strftime("%H:%M:%S") if flight_time else ""
+    raw = f"{flight_date.isoformat()}|{time_part}|{flight_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_flight_cursor(cursor: str) -> tuple[date, Optional[time], int]:
+    """Inverse of _encode_flight_cursor; raises 400 on anything malformed."""
+    import base64
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_part, time_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return (
+            date.fromisoformat(date_part),
+            time.fromisoformat(time_part) if time_part else None,
+            int(id_part),
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _apply_flight_keyset(query, date_col, time_col, id_col, cursor: Optional[str], descending: bool):
+    """Order a flights query by (date, time, id) and seek past `cursor`.
+
+    The predicate is expanded into OR/AND form rather than a row-value
+    comparison so the same query runs on Postgres and the SQLite test DB.
+    """
+    from sqlalchemy import and_
+
+    if cursor:
+        after_date, after_time, after_id = _decode_flight_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                date_col < after_date,
+                and_(date_col == after_date, time_col < after_time),
+                and_(date_col == after_date, time_col == after_time, id_col < after_id),
+            ))
+        else:
+            query = query.filter(or_(
+                date_col > after_date,
+                and_(date_col == after_date, time_col > after_time),
+                and_(date_col == after_date, time_col == after_time, id_col > after_id),
+            ))
+
+    if descending:
+        return query.order_by(date_col.desc(), time_col.desc(), id_col.desc())
+    return query.order_by(date_col.asc(), time_col.asc(), id_col.asc())
+
+
+def _departure_capacity_state_expr():
+    """SQL CASE mirroring FlightDeparture's slot-availability properties.
+
+    call_us   - capacity_tier is 0 (no online slots at all)
+    full      - every early and late slot is booked
+    last_slot - exactly one slot left across early + late
+    available - anything else with at least one slot free
+    """
+    per_time = FlightDeparture.capacity_tier // 2
+    early_left = case((per_time - FlightDeparture.slots_booked_early > 0,
+                       per_time - FlightDeparture.slots_booked_early), else_=0)
+    late_left = case((per_time - FlightDeparture.slots_booked_late > 0,
+                      per_time - FlightDeparture.slots_booked_late), else_=0)
+    return case(
+        (FlightDeparture.capacity_tier == 0, "call_us"),
+        (early_left + late_left == 0, "full"),
+        (early_left + late_left == 1, "last_slot"),
+        else_="available",
+    )
+
+
+def _paginate_flights(query, limit: Optional[int], time_attr: str):
+    """Run a keyset-ordered query, returning (rows, next_cursor).
+
+    Fetches one extra row to learn whether another page exists without a
+    separate COUNT over the filtered set.
+    """
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, _encode_flight_cursor(last.date, getattr(last, time_attr), last.id)
+
+
 @app.get("/api/admin/flights/departures")
-async def get_admin_departures(
+def get_admin_departures(
     sort_order: str = Query("asc", pattern="^(asc|desc)$"),
     destination: Optional[str] = None,
     airline: Optional[str] = None,
@@ -16317,15 +15931,21 @@ async def get_admin_departures(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = None,
     start_date: Optional[date] = Query(None, description="Filter flights from this date onwards (default: 2026-01-01)"),
+    capacity_state: Optional[str] = Query(None, pattern="^(call_us|available|last_slot|full)$"),
+    limit: Optional[int] = Query(None, ge=1, le=FLIGHT_PAGE_MAX_LIMIT, description="Page size; omit for every row"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     refresh: bool = Query(False, description="Force refresh cache"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Get all departure flights with optional filters.
-    Sorted by date (ASC by default, DESC optional).
+    Get departure flights with optional filters.
+    Sorted by (date, departure_time, id) - ASC by default, DESC optional.
     Default start_date is 2026-01-01 if not specified.
-    Cached for 3 months (reference data only).
+
+    Pass `limit` to page through results; the response then carries a
+    `next_cursor` to send back as `cursor` (None on the last page).
+    The unfiltered, unpaged view is cached for 3 months (reference data only).
     """
     import pytz
     uk_tz = pytz.timezone('Europe/London')
@@ -16339,7 +15959,10 @@ async def get_admin_departures(
         flight_number is None and
         month is None and
         year is None and
-        start_date is None
+        start_date is None and
+        capacity_state is None and
+        limit is None and
+        cursor is None
     )
 
     # Check cache for default requests
@@ -16383,13 +16006,20 @@ async def get_admin_departures(
         from sqlalchemy import extract
         query = query.filter(extract('year', FlightDeparture.date) == year)
 
-    # Apply sorting
-    if sort_order == "desc":
-        query = query.order_by(FlightDeparture.date.desc(), FlightDeparture.departure_time.desc())
-    else:
-        query = query.order_by(FlightDeparture.date.asc(), FlightDeparture.departure_time.asc())
+    if capacity_state:
+        query = query.filter(_departure_capacity_state_expr() == capacity_state)
+
+    # Apply sorting (id breaks ties so the keyset cursor is stable)
+    query = _apply_flight_keyset(
+        query,
+        FlightDeparture.date,
+        FlightDeparture.departure_time,
+        FlightDeparture.id,
+        cursor,
+        descending=sort_order == "desc",
+    )
 
-    departures = query.all()
+    departures, next_cursor = _paginate_flights(query, limit, time_attr="departure_time")
 
     result = {
         "departures": [
@@ -16415,6 +16045,9 @@ async def get_admin_departures(
         ],
         "total": len(departures),
     }
+    if limit is not None:
+        result["next_cursor"] = next_cursor
+        result["has_more"] = next_cursor is not None
 
     # Store in cache for default requests
     if is_default_request:
@@ -16426,7 +16059,7 @@ async def get_admin_departures(
 
 
 @app.get("/api/admin/flights/arrivals")
-async def get_admin_arrivals(
+def get_admin_arrivals(
     sort_order: str = Query("asc", pattern="^(asc|desc)$"),
     origin: Optional[str] = None,
     airline: Optional[str] = None,
@@ -16434,15 +16067,20 @@ async def get_admin_arrivals(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = None,
     start_date: Optional[date] = Query(None, description="Filter flights from this date onwards (default: 2026-01-01)"),
+    limit: Optional[int] = Query(None, ge=1, le=FLIGHT_PAGE_MAX_LIMIT, description="Page size; omit for every row"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     refresh: bool = Query(False, description="Force refresh cache"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Get all arrival flights with optional filters.
-    Sorted by date (ASC by default, DESC optional).
+    Get arrival flights with optional filters.
+    Sorted by (date, arrival_time, id) - ASC by default, DESC optional.
     Default start_date is 2026-01-01 if not specified.
-    Cached for 3 months (reference data only).
+
+    Pass `limit` to page through results; the response then carries a
+    `next_cursor` to send back as `cursor` (None on the last page).
+    The unfiltered, unpaged view is cached for 3 months (reference data only).
     """
     import pytz
     uk_tz = pytz.timezone('Europe/London')
@@ -16456,7 +16094,9 @@ async def get_admin_arrivals(
         flight_number is None and
         month is None and
         year is None and
-        start_date is None
+        start_date is None and
+        limit is None and
+        cursor is None
     )
 
     # Check cache for default requests
@@ -16500,13 +16140,17 @@ async def get_admin_arrivals(
         from sqlalchemy import extract
         query = query.filter(extract('year', FlightArrival.date) == year)
 
-    # Apply sorting
-    if sort_order == "desc":
-        query = query.order_by(FlightArrival.date.desc(), FlightArrival.arrival_time.desc())
-    else:
-        query = query.order_by(FlightArrival.date.asc(), FlightArrival.arrival_time.asc())
+    # Apply sorting (id breaks ties so the keyset cursor is stable)
+    query = _apply_flight_keyset(
+        query,
+        FlightArrival.date,
+        FlightArrival.arrival_time,
+        FlightArrival.id,
+        cursor,
+        descending=sort_order == "desc",
+    )
 
-    arrivals = query.all()
+    arrivals, next_cursor = _paginate_flights(query, limit, time_attr="arrival_time")
 
     result = {
         "arrivals": [
@@ -16527,6 +16171,9 @@ async def get_admin_arrivals(
         ],
         "total": len(arrivals),
     }
+    if limit is not None:
+        result["next_cursor"] = next_cursor
+        result["has_more"] = next_cursor is not None
 
     # Store in cache for default requests
     if is_default_request:
@@ -16538,14 +16185,15 @@ async def get_admin_arrivals(
 
 
 @app.get("/api/admin/flights/filters")
-async def get_admin_flight_filters(
+def get_admin_flight_filters(
     refresh: bool = Query(False, description="Force refresh cache"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
-    Get unique filter options for flights (airlines, destinations, origins, months).
-    Cached for 3 months (reference data only).
+    Get filter facets for flights (airlines, destinations, origins, months,
+    departure capacity states), each option carrying its row count.
+    Built from a single grouped query; cached for 3 months (reference data only).
     """
     import pytz
     uk_tz = pytz.timezone('Europe/London')
@@ -16562,58 +16210,83 @@ async def get_admin_flight_filters(
                 cached_response["cache_age_minutes"] = round(cache_age / 60, 1)
                 return cached_response
 
-    from sqlalchemy import distinct, extract
-
-    # Get unique airlines from both departures and arrivals
-    departure_airlines = db.query(
-        distinct(FlightDeparture.airline_code),
-        FlightDeparture.airline_name
-    ).all()
-    arrival_airlines = db.query(
-        distinct(FlightArrival.airline_code),
-        FlightArrival.airline_name
-    ).all()
+    from sqlalchemy import extract, literal, null, select, union_all
+
+    # One grouped statement over both tables - each output row is a
+    # (kind, airline, place, year, month, capacity_state) cell with its row
+    # count, and every facet below is folded from those cells in Python.
+    dep_year = extract('year', FlightDeparture.date)
+    dep_month = extract('month', FlightDeparture.date)
+    dep_state = _departure_capacity_state_expr()
+    arr_year = extract('year', FlightArrival.date)
+    arr_month = extract('month', FlightArrival.date)
+    departure_cells = select(
+        literal("departure").label("kind"),
+        FlightDeparture.airline_code.label("airline_code"),
+        FlightDeparture.airline_name.label("airline_name"),
+        FlightDeparture.destination_code.label("place_code"),
+        FlightDeparture.destination_name.label("place_name"),
+        dep_year.label("year"),
+        dep_month.label("month"),
+        dep_state.label("capacity_state"),
+        func.count().label("n"),
+    ).group_by(
+        FlightDeparture.airline_code,
+        FlightDeparture.airline_name,
+        FlightDeparture.destination_code,
+        FlightDeparture.destination_name,
+        dep_year,
+        dep_month,
+        dep_state,
+    )
+    arrival_cells = select(
+        literal("arrival").label("kind"),
+        FlightArrival.airline_code.label("airline_code"),
+        FlightArrival.airline_name.label("airline_name"),
+        FlightArrival.origin_code.label("place_code"),
+        FlightArrival.origin_name.label("place_name"),
+        arr_year.label("year"),
+        arr_month.label("month"),
+        null().label("capacity_state"),
+        func.count().label("n"),
+    ).group_by(
+        FlightArrival.airline_code,
+        FlightArrival.airline_name,
+        FlightArrival.origin_code,
+        FlightArrival.origin_name,
+        arr_year,
+        arr_month,
+    )
+    cells = db.execute(union_all(departure_cells, arrival_cells)).all()
 
-    # Combine and deduplicate airlines
     airlines_dict = {}
-    for code, name in departure_airlines + arrival_airlines:
-        if code not in airlines_dict:
-            airlines_dict[code] = name
-    airlines = [{"code": code, "name": name} for code, name in sorted(airlines_dict.items())]
-
-    # Get unique destinations (departures only)
-    destinations = db.query(
-        distinct(FlightDeparture.destination_code),
-        FlightDeparture.destination_name
-    ).all()
-    destinations = [{"code": code, "name": name} for code, name in sorted(destinations)]
-
-    # Get unique origins (arrivals only)
-    origins = db.query(
-        distinct(FlightArrival.origin_code),
-        FlightArrival.origin_name
-    ).all()
-    origins = [{"code": code, "name": name} for code, name in sorted(origins)]
-
-    # Get months with data
-    departure_months = db.query(
-        distinct(extract('month', FlightDeparture.date)),
-        extract('year', FlightDeparture.date)
-    ).all()
-    arrival_months = db.query(
-        distinct(extract('month', FlightArrival.date)),
-        extract('year', FlightArrival.date)
-    ).all()
-
-    # Combine and format months
-    months_set = set()
-    for month, year in departure_months + arrival_months:
+    destinations_dict = {}
+    origins_dict = {}
+    months_counts = {}
+    capacity_counts = {state: 0 for state in FLIGHT_CAPACITY_STATES}
+    for kind, airline_code, airline_name, place_code, place_name, year, month, state, n in cells:
+        # First name seen wins, matching the old DISTINCT-based dedupe.
+        airline = airlines_dict.setdefault(airline_code, {"code": airline_code, "name": airline_name, "count": 0})
+        airline["count"] += n
+        places = destinations_dict if kind == "departure" else origins_dict
+        place = places.setdefault(place_code, {"code": place_code, "name": place_name, "count": 0})
+        place["count"] += n
         if month and year:
-            months_set.add((int(year), int(month)))
-
+            key = (int(year), int(month))
+            months_counts[key] = months_counts.get(key, 0) + n
+        if state:
+            capacity_counts[state] += n
+
+    airlines = [airlines_dict[code] for code in sorted(airlines_dict)]
+    destinations = [destinations_dict[code] for code in sorted(destinations_dict)]
+    origins = [origins_dict[code] for code in sorted(origins_dict)]
     months = [
-        {"year": year, "month": month, "label": f"{['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'][month-1]} {year}"}
-        for year, month in sorted(months_set)
+        {"year": year, "month": month, "label": f"{_MONTH_LABELS[month - 1]} {year}", "count": count}
+        for (year, month), count in sorted(months_counts.items())
+    ]
+    capacity_states = [
+        {"state": state, "count": capacity_counts[state]}
+        for state in FLIGHT_CAPACITY_STATES
     ]
 
     result = {
@@ -16621,6 +16294,7 @@ async def get_admin_flight_filters(
         "destinations": destinations,
         "origins": origins,
         "months": months,
+        "capacity_states": capacity_states,
     }
 
     # Store in cache
@@ -16632,7 +16306,7 @@ async def get_admin_flight_filters(
 
 
 @app.get("/api/admin/flights/export")
-async def export_admin_flights(
+def export_admin_flights(
     flight_type: str = Query("all", pattern="^(all|departures|arrivals)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -16690,7 +16364,7 @@ async def export_admin_flights(
 
 
 @app.put("/api/admin/flights/departures/{departure_id}")
-async def update_admin_departure(
+def update_admin_departure(
     departure_id: int,
     update: UpdateDepartureRequest,
     db: Session = Depends(get_db),
@@ -16769,6 +16443,9 @@ async def update_admin_departure(
         if bookings_updated > 0:
             warnings.append(f"Updated drop-off times for {bookings_updated} booking(s)")
 
+    # Rebuilds the slot rows only if date/time moved; otherwise just
+    # refreshes remaining capacity from the (possibly edited) counters.
+    db_service.materialize_departure_slots(db, [departure])
     db.commit()
     db.refresh(departure)
     print(f"[FLIGHT UPDATE] Successfully updated departure {departure_id}")
@@ -16798,7 +16475,7 @@ async def update_admin_departure(
 
 
 @app.put("/api/admin/flights/arrivals/{arrival_id}")
-async def update_admin_arrival(
+def update_admin_arrival(
     arrival_id: int,
     update: UpdateArrivalRequest,
     db: Session = Depends(get_db),
@@ -16875,7 +16552,7 @@ async def update_admin_arrival(
 
 
 @app.post("/api/admin/flights/departures", status_code=201)
-async def create_admin_departure(
+def create_admin_departure(
     request: CreateDepartureRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -16915,6 +16592,8 @@ async def create_admin_departure(
     )
 
     db.add(departure)
+    db.flush()
+    db_service.materialize_departure_slots(db, [departure])
     db.commit()
     db.refresh(departure)
 
@@ -16940,7 +16619,7 @@ async def create_admin_departure(
 
 
 @app.post("/api/admin/flights/arrivals", status_code=201)
-async def create_admin_arrival(
+def create_admin_arrival(
     request: CreateArrivalRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -16994,7 +16673,7 @@ async def create_admin_arrival(
 
 
 @app.delete("/api/admin/flights/departures/{departure_id}", status_code=200)
-async def delete_admin_departure(
+def delete_admin_departure(
     departure_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -17044,7 +16723,7 @@ async def delete_admin_departure(
 
 
 @app.delete("/api/admin/flights/arrivals/{arrival_id}", status_code=200)
-async def delete_admin_arrival(
+def delete_admin_arrival(
     arrival_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -17096,7 +16775,7 @@ async def delete_admin_arrival(
 # =============================================================================
 
 @app.get("/api/admin/db-health")
-async def get_database_health(
+def get_database_health(
     current_user: User = Depends(require_admin),
 ):
     """
@@ -17126,23 +16805,22 @@ async def get_database_health(
 
 
 @app.get("/api/admin/db-health/history")
-async def get_database_health_history(
-    hours: int = Query(24, ge=1, le=168, description="Number of hours of history to fetch"),
+def get_database_health_history(
+    hours: int = Query(24, ge=1, le=db_pool_history.MAX_HISTORY_HOURS, description="Number of hours of history to fetch"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
     """
     Get historical database connection pool metrics.
-    Returns snapshots from the last N hours for trend analysis.
-    """
-    from db_models import DbPoolSnapshot
-    from datetime import datetime, timedelta
-
-    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    Returns snapshots from the last N hours for trend analysis, newest first.
 
-    snapshots = db.query(DbPoolSnapshot).filter(
-        DbPoolSnapshot.created_at >= cutoff
-    ).order_by(DbPoolSnapshot.created_at.desc()).limit(1000).all()
+    Windows up to 48 hours read the raw snapshots while they fit in 1000
+    points; otherwise the finest rollup that covers the whole window in
+    1000 points (1-minute, 1-hour or several hours merged), where each
+    entry carries the bucket's worst values plus its min/avg spread.
+    resolution_seconds is null for raw snapshots. See db_pool_history.
+    """
+    history = db_pool_history.load_pool_history(db, hours)
 
     # Also include circuit breaker stats
     cb_stats = get_circuit_breaker_stats()
@@ -17150,27 +16828,91 @@ async def get_database_health_history(
     return {
         "circuit_breaker": cb_stats,
         "hours_requested": hours,
-        "snapshot_count": len(snapshots),
-        "snapshots": [
-            {
-                "id": s.id,
-                "timestamp": s.created_at.isoformat() if s.created_at else None,
-                "pool_size": s.pool_size,
-                "max_overflow": s.max_overflow,
-                "checked_out": s.checked_out,
-                "overflow": s.overflow,
-                "checked_in": s.checked_in,
-                "usage_percent": float(s.usage_percent),
-                "health_status": s.health_status.value,
-                "trigger": s.trigger,
-            }
-            for s in snapshots
-        ],
+        "resolution_seconds": history["resolution_seconds"],
+        "snapshot_count": len(history["snapshots"]),
+        "snapshots": history["snapshots"],
     }
 
 
+@app.get("/api/admin/report-cache")
+def get_report_cache_stats(
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get hit/miss counts, compute times and current entries of the admin
+    report cache, per report.
+    """
+    return report_cache.stats()
+
+
+# Standard views kept warm in the background (report_warmup). Keys and
+# tags match the report endpoints above, so the endpoints serve the warmed
+# entries as cache hits.
+for _view in ("daily", "weekly", "monthly"):
+    report_warmer.register(
+        "occupancy", _view,
+        lambda db, view=_view: _occupancy_report(db, view, None, None),
+        tags=("bookings",),
+    )
+if FINANCIAL_REPORT_CACHE_ENABLED:
+    report_warmer.register(
+        "financial", None,
+        lambda db: _financial_report(db, None, None, "all", "all"),
+        tags=("bookings", "payments"),
+    )
+report_warmer.register(
+    "booking_highlights", (None, None),
+    lambda db: booking_highlights.build_highlights(db, None, None),
+    tags=("bookings", "payments"),
+    budget_seconds=50 * 60,
+)
+for _map_type in ("bookings", "origins"):
+    report_warmer.register(
+        "booking_locations", _map_type,
+        lambda db, map_type=_map_type: _booking_locations_report(db, map_type),
+        tags=("bookings", "customers"),
+        budget_seconds=50 * 60,
+    )
+report_warmer.register(
+    "session_tracking", None,
+    lambda db: _session_tracking_report(db, "daily"),
+    tags=("bookings",),
+    budget_seconds=50 * 60,
+)
+report_warmer.register(
+    "abandoned_carts", None,
+    lambda db: _abandoned_carts_report(db, "daily"),
+    tags=("bookings",),
+    budget_seconds=50 * 60,
+)
+
+
+@app.get("/api/admin/report-warmup")
+def get_report_warmup_status(
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get the background warm-up status of the standard admin report views:
+    cached age against each view's staleness budget, and the time the last
+    warm-up took.
+    """
+    return report_warmer.status()
+
+
+@app.get("/api/admin/event-loop")
+def get_event_loop_status(
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get event loop stalls seen by the lag monitor (count, worst lag, stalls
+    per route, the last one) and the handler thread pool sizes. See
+    event_loop_guard.
+    """
+    return loop_lag_monitor.status()
+
+
 @app.get("/api/admin/test-results")
-async def get_test_results(
+def get_test_results(
     limit: int = Query(10, ge=1, le=100),
     environment: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -17216,7 +16958,7 @@ async def get_test_results(
 
 
 @app.get("/api/admin/test-results/latest")
-async def get_latest_test_result(
+def get_latest_test_result(
     environment: str = "staging",
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -17275,7 +17017,7 @@ class CreateTestRunRequest(BaseModel):
 
 
 @app.post("/api/test-results")
-async def create_test_result(
+def create_test_result(
     request: CreateTestRunRequest,
     db: Session = Depends(get_db),
 ):
@@ -17340,11 +17082,13 @@ async def create_test_result(
 # =============================================================================
 
 @app.get("/api/admin/audit-logs")
-async def get_audit_logs(
+def get_audit_logs(
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
     search: Optional[str] = None,
     booking_reference: Optional[str] = None,
+    session_id: Optional[str] = None,
+    email: Optional[str] = None,
     event: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
@@ -17357,6 +17101,8 @@ async def get_audit_logs(
     Filters:
     - search: Search in email, customer name, session_id, booking_reference
     - booking_reference: Exact match on booking reference
+    - session_id: Exact match on the frontend session ID
+    - email: Exact (case-insensitive) match on event_data's "email"
     - event: Filter by event type
     - date_from/date_to: Date range filter (ISO format)
     """
@@ -17368,6 +17114,15 @@ async def get_audit_logs(
         where_clauses.append("booking_reference ILIKE :booking_ref")
         params["booking_ref"] = f"%{booking_reference}%"
 
+    if session_id:
+        where_clauses.append("session_id = :session_id")
+        params["session_id"] = session_id
+
+    if email:
+        # Served by ix_audit_logs_event_data_email.
+        where_clauses.append("lower(event_data->>'email') = lower(:email)")
+        params["email"] = email.strip()
+
     if event:
         where_clauses.append("event::text = :event")
         params["event"] = event
@@ -17438,7 +17193,7 @@ async def get_audit_logs(
 
 
 @app.get("/api/admin/audit-logs/events")
-async def get_audit_log_events(
+def get_audit_log_events(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -17453,7 +17208,7 @@ async def get_audit_log_events(
 
 
 @app.get("/api/admin/error-logs")
-async def get_error_logs(
+def get_error_logs(
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
     search: Optional[str] = None,
@@ -17566,7 +17321,7 @@ async def get_error_logs(
 
 
 @app.get("/api/admin/error-logs/severities")
-async def get_error_log_severities(
+def get_error_log_severities(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -17581,7 +17336,7 @@ async def get_error_log_severities(
 
 
 @app.get("/api/admin/error-logs/types")
-async def get_error_log_types(
+def get_error_log_types(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -17801,7 +17556,7 @@ class SQLQueryRequest(BaseModel):
 
 
 @app.post("/api/admin/sql/verify-pin")
-async def verify_sql_pin(
+def verify_sql_pin(
     request: SQLPinVerifyRequest,
     current_user: User = Depends(require_admin),
 ):
@@ -17837,7 +17592,7 @@ async def verify_sql_pin(
 
 
 @app.get("/api/admin/sql/session-status")
-async def get_sql_session_status(
+def get_sql_session_status(
     current_user: User = Depends(require_admin),
 ):
     """
@@ -17860,7 +17615,7 @@ async def get_sql_session_status(
 
 
 @app.post("/api/admin/sql/execute")
-async def execute_sql_query(
+def execute_sql_query(
     request: SQLQueryRequest,
     db: Session = Depends(get_sql_console_db),
     current_user: User = Depends(require_admin),
@@ -18125,7 +17880,7 @@ async def execute_sql_query(
 
 
 @app.post("/api/admin/sql/logout")
-async def logout_sql_session(
+def logout_sql_session(
     current_user: User = Depends(require_admin),
 ):
     """
@@ -18302,7 +18057,7 @@ def build_testimonial_buzz_words(testimonials, min_count: int = 2):
 
 
 @app.get("/api/admin/testimonials")
-async def get_all_testimonials(
+def get_all_testimonials(
     star_rating: Optional[int] = None,
     status: Optional[str] = None,
     sort: str = "date_added",
@@ -18340,7 +18095,7 @@ async def get_all_testimonials(
 
 
 @app.post("/api/admin/testimonials")
-async def create_testimonial(
+def create_testimonial(
     request: TestimonialCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18374,7 +18129,7 @@ async def create_testimonial(
 
 
 @app.put("/api/admin/testimonials/{testimonial_id}")
-async def update_testimonial(
+def update_testimonial(
     testimonial_id: int,
     request: TestimonialUpdate,
     db: Session = Depends(get_db),
@@ -18419,7 +18174,7 @@ async def update_testimonial(
 
 
 @app.delete("/api/admin/testimonials/{testimonial_id}")
-async def delete_testimonial(
+def delete_testimonial(
     testimonial_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18438,7 +18193,7 @@ async def delete_testimonial(
 
 
 @app.patch("/api/admin/testimonials/{testimonial_id}/status")
-async def toggle_testimonial_status(
+def toggle_testimonial_status(
     testimonial_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18466,7 +18221,7 @@ async def toggle_testimonial_status(
 
 
 @app.get("/api/testimonials")
-async def get_active_testimonials(
+def get_active_testimonials(
     db: Session = Depends(get_db),
 ):
     """
@@ -18751,7 +18506,7 @@ def format_promo_modal(modal):
 
 
 @app.get("/api/admin/promo-modals")
-async def get_all_promo_modals(
+def get_all_promo_modals(
     status: Optional[str] = None,
     type: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -18785,7 +18540,7 @@ async def get_all_promo_modals(
 
 
 @app.post("/api/admin/promo-modals")
-async def create_promo_modal(
+def create_promo_modal(
     request: PromoModalCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18847,7 +18602,7 @@ async def create_promo_modal(
 
 
 @app.put("/api/admin/promo-modals/{modal_id}")
-async def update_promo_modal(
+def update_promo_modal(
     modal_id: int,
     request: PromoModalUpdate,
     db: Session = Depends(get_db),
@@ -18941,7 +18696,7 @@ async def update_promo_modal(
 
 
 @app.delete("/api/admin/promo-modals/{modal_id}")
-async def delete_promo_modal(
+def delete_promo_modal(
     modal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18963,7 +18718,7 @@ async def delete_promo_modal(
 
 
 @app.patch("/api/admin/promo-modals/{modal_id}/status")
-async def toggle_promo_modal_status(
+def toggle_promo_modal_status(
     modal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -18996,7 +18751,7 @@ async def toggle_promo_modal_status(
 
 
 @app.get("/api/promo-modal")
-async def get_active_promo_modal(
+def get_active_promo_modal(
     db: Session = Depends(get_db),
 ):
     """
@@ -19039,7 +18794,7 @@ async def get_active_promo_modal(
 
 
 @app.get("/api/promo-section")
-async def get_active_promo_section(
+def get_active_promo_section(
     db: Session = Depends(get_db),
 ):
     """
@@ -19082,7 +18837,7 @@ async def get_active_promo_section(
 
 
 @app.post("/api/promo-modal/{modal_id}/view")
-async def track_promo_modal_view(
+def track_promo_modal_view(
     modal_id: int,
     db: Session = Depends(get_db),
 ):
@@ -19098,7 +18853,7 @@ async def track_promo_modal_view(
 
 
 @app.post("/api/promo-modal/{modal_id}/click")
-async def track_promo_modal_click(
+def track_promo_modal_click(
     modal_id: int,
     db: Session = Depends(get_db),
 ):
@@ -19177,7 +18932,7 @@ def format_blocked_date(blocked: "BlockedDate", include_time_slots: bool = True)
 
 
 @app.get("/api/admin/blocked-dates")
-async def get_blocked_dates(
+def get_blocked_dates(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -19210,7 +18965,7 @@ async def get_blocked_dates(
 
 
 @app.post("/api/admin/blocked-dates")
-async def create_blocked_date(
+def create_blocked_date(
     request: BlockedDateCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -19249,7 +19004,7 @@ async def create_blocked_date(
 
 
 @app.put("/api/admin/blocked-dates/{blocked_date_id}")
-async def update_blocked_date(
+def update_blocked_date(
     blocked_date_id: int,
     request: BlockedDateUpdate,
     db: Session = Depends(get_db),
@@ -19290,7 +19045,7 @@ async def update_blocked_date(
 
 
 @app.delete("/api/admin/blocked-dates/{blocked_date_id}")
-async def delete_blocked_date(
+def delete_blocked_date(
     blocked_date_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -19313,7 +19068,7 @@ async def delete_blocked_date(
 # =====================================================
 
 @app.get("/api/admin/blocked-dates/{blocked_date_id}/time-slots")
-async def get_blocked_time_slots(
+def get_blocked_time_slots(
     blocked_date_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -19347,7 +19102,7 @@ async def get_blocked_time_slots(
 
 
 @app.post("/api/admin/blocked-dates/{blocked_date_id}/time-slots")
-async def create_blocked_time_slot(
+def create_blocked_time_slot(
     blocked_date_id: int,
     start_time: str = Body(...),
     end_time: str = Body(...),
@@ -19420,7 +19175,7 @@ async def create_blocked_time_slot(
 
 
 @app.put("/api/admin/blocked-time-slots/{time_slot_id}")
-async def update_blocked_time_slot(
+def update_blocked_time_slot(
     time_slot_id: int,
     start_time: Optional[str] = Body(None),
     end_time: Optional[str] = Body(None),
@@ -19505,7 +19260,7 @@ async def update_blocked_time_slot(
 
 
 @app.delete("/api/admin/blocked-time-slots/{time_slot_id}")
-async def delete_blocked_time_slot(
+def delete_blocked_time_slot(
     time_slot_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -19524,7 +19279,7 @@ async def delete_blocked_time_slot(
 
 
 @app.get("/api/blocked-dates/check")
-async def check_blocked_date(
+def check_blocked_date(
     dropoff_date: Optional[str] = None,
     pickup_date: Optional[str] = None,
     dropoff_time: Optional[str] = None,
@@ -19666,7 +19421,7 @@ import sms_service
 
 
 @app.get("/api/admin/sms/templates")
-async def get_sms_templates(
+def get_sms_templates(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -19689,7 +19444,7 @@ async def get_sms_templates(
 
 
 @app.post("/api/admin/sms/templates")
-async def create_sms_template(
+def create_sms_template(
     data: dict,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -19719,7 +19474,7 @@ async def create_sms_template(
 
 
 @app.put("/api/admin/sms/templates/{template_id}")
-async def update_sms_template(
+def update_sms_template(
     template_id: int,
     data: dict,
     current_user: User = Depends(require_admin),
@@ -19758,7 +19513,7 @@ async def update_sms_template(
 
 
 @app.delete("/api/admin/sms/templates/{template_id}")
-async def delete_sms_template(
+def delete_sms_template(
     template_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -19775,7 +19530,7 @@ async def delete_sms_template(
 
 
 @app.get("/api/admin/sms/templates/variables")
-async def get_sms_template_variables(
+def get_sms_template_variables(
     current_user: User = Depends(require_admin),
 ):
     """Get available template variables."""
@@ -19783,7 +19538,7 @@ async def get_sms_template_variables(
 
 
 @app.get("/api/admin/sms/messages")
-async def get_sms_messages(
+def get_sms_messages(
     phone: str = None,
     booking_id: int = None,
     direction: str = None,
@@ -19832,7 +19587,7 @@ async def get_sms_messages(
 
 
 @app.get("/api/admin/sms/threads")
-async def get_sms_threads(
+def get_sms_threads(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -19898,7 +19653,7 @@ async def get_sms_threads(
 
 
 @app.put("/api/admin/sms/threads/{phone}/read")
-async def mark_thread_as_read(
+def mark_thread_as_read(
     phone: str,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -19919,7 +19674,7 @@ async def mark_thread_as_read(
 
 
 @app.delete("/api/admin/sms/threads/{phone}")
-async def delete_sms_thread(
+def delete_sms_thread(
     phone: str,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -19942,7 +19697,7 @@ class BulkDeleteThreadsRequest(BaseModel):
 
 
 @app.post("/api/admin/sms/threads/bulk-delete")
-async def bulk_delete_sms_threads(
+def bulk_delete_sms_threads(
     request: BulkDeleteThreadsRequest,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -19963,7 +19718,7 @@ async def bulk_delete_sms_threads(
 
 
 @app.get("/api/admin/sms/messages/conversation/{phone}")
-async def get_sms_conversation(
+def get_sms_conversation(
     phone: str,
     mark_read: bool = True,
     current_user: User = Depends(require_admin),
@@ -20020,12 +19775,14 @@ async def get_sms_conversation(
 
 
 @app.post("/api/admin/sms/messages/{message_id}/resend")
-async def resend_sms_message(
+def resend_sms_message(
     message_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Resend an existing SMS message."""
+    import asyncio
+
     message = db.query(SMSMessage).filter(SMSMessage.id == message_id).first()
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
@@ -20035,7 +19792,7 @@ async def resend_sms_message(
         raise HTTPException(status_code=400, detail="Cannot resend inbound messages")
 
     # Send the same content to the same phone
-    result = await sms_service.send_sms(
+    result = asyncio.run(sms_service.send_sms(
         phone=message.phone_number,
         content=message.content,
         booking_id=message.booking_id,
@@ -20043,7 +19800,7 @@ async def resend_sms_message(
         template_id=message.template_id,
         sent_by=current_user.id,
         db_session=db,
-    )
+    ))
 
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error"))
@@ -20056,7 +19813,7 @@ async def resend_sms_message(
 
 
 @app.delete("/api/admin/sms/messages/{message_id}")
-async def delete_sms_message(
+def delete_sms_message(
     message_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -20074,7 +19831,7 @@ async def delete_sms_message(
 
 # SMS Drafts endpoints
 @app.get("/api/admin/sms/drafts")
-async def get_sms_drafts(
+def get_sms_drafts(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -20104,7 +19861,7 @@ async def get_sms_drafts(
 
 
 @app.post("/api/admin/sms/drafts")
-async def save_sms_draft(
+def save_sms_draft(
     data: dict,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -20142,7 +19899,7 @@ async def save_sms_draft(
 
 
 @app.put("/api/admin/sms/drafts/{draft_id}")
-async def update_sms_draft(
+def update_sms_draft(
     draft_id: int,
     data: dict,
     current_user: User = Depends(require_admin),
@@ -20183,7 +19940,7 @@ async def update_sms_draft(
 
 
 @app.delete("/api/admin/sms/drafts/{draft_id}")
-async def delete_sms_draft(
+def delete_sms_draft(
     draft_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -20204,12 +19961,14 @@ async def delete_sms_draft(
 
 
 @app.post("/api/admin/sms/drafts/{draft_id}/send")
-async def send_sms_draft(
+def send_sms_draft(
     draft_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Send an SMS draft."""
+    import asyncio
+
     draft = db.query(SMSMessage).filter(
         SMSMessage.id == draft_id,
         SMSMessage.status == SMSStatus.DRAFT
@@ -20222,14 +19981,14 @@ async def send_sms_draft(
         raise HTTPException(status_code=400, detail="Phone and content are required to send")
 
     # Send the SMS
-    result = await sms_service.send_sms(
+    result = asyncio.run(sms_service.send_sms(
         phone=draft.phone_number,
         content=draft.content,
         booking_id=draft.booking_id,
         customer_id=draft.customer_id,
         sent_by=current_user.id,
         db_session=db,
-    )
+    ))
 
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error"))
@@ -20242,12 +20001,14 @@ async def send_sms_draft(
 
 
 @app.post("/api/admin/sms/send")
-async def send_sms_message(
+def send_sms_message(
     data: dict,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Send a single SMS message."""
+    import asyncio
+
     phone = data.get("phone")
     content = data.get("content")
     booking_id = data.get("booking_id")
@@ -20265,7 +20026,7 @@ async def send_sms_message(
             variables = sms_service.get_booking_variables(booking)
             content = sms_service.render_template(template.content, variables)
 
-    result = await sms_service.send_sms(
+    result = asyncio.run(sms_service.send_sms(
         phone=phone,
         content=content,
         booking_id=booking_id,
@@ -20273,7 +20034,7 @@ async def send_sms_message(
         template_id=template_id,
         sent_by=current_user.id,
         db_session=db,
-    )
+    ))
 
     if not result.get("success"):
         raise HTTPException(status_code=500, detail=result.get("error"))
@@ -20282,12 +20043,14 @@ async def send_sms_message(
 
 
 @app.post("/api/admin/sms/send-bulk")
-async def send_bulk_sms(
+def send_bulk_sms(
     data: dict,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Send SMS to multiple recipients."""
+    import asyncio
+
     booking_ids = data.get("booking_ids", [])
     template_id = data.get("template_id")
     custom_content = data.get("content")
@@ -20330,17 +20093,17 @@ async def send_bulk_sms(
     if not messages:
         raise HTTPException(status_code=400, detail="No valid recipients found")
 
-    result = await sms_service.send_bulk_sms(
+    result = asyncio.run(sms_service.send_bulk_sms(
         messages=messages,
         db_session=db,
         sent_by=current_user.id,
-    )
+    ))
 
     return result
 
 
 @app.get("/api/admin/sms/messages/{message_id}/status")
-async def get_sms_status(
+def get_sms_status(
     message_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -20359,12 +20122,14 @@ async def get_sms_status(
 
 
 @app.post("/api/admin/sms/refresh-statuses")
-async def refresh_sms_statuses(
+def refresh_sms_statuses(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Refresh delivery statuses of all sent messages from SMS Works API."""
-    result = await sms_service.refresh_message_statuses(db)
+    import asyncio
+
+    result = asyncio.run(sms_service.refresh_message_statuses(db))
     return result
 
 
@@ -20419,6 +20184,59 @@ def _is_sendgrid_test_email(email: str) -> bool:
     )
 
 
+def _alert_on_sendgrid_events(events: list, db: Session) -> int:
+    """Send a bounce alert for each hard-failure event; returns how many were sent."""
+    import json as _json
+
+    HARD_FAILURES = {"bounce", "dropped", "blocked", "spamreport"}
+    from email_service import send_bounce_alert_email
+
+    alerted = 0
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        event_type = (event.get("event") or "").lower()
+        if event_type not in HARD_FAILURES:
+            continue
+
+        customer_email = event.get("email") or "(unknown)"
+        if _is_sendgrid_test_email(customer_email):
+            print(f"[SENDGRID WEBHOOK] Suppressed test email alert for {customer_email}")
+            continue
+
+        reason = event.get("reason") or event.get("response") or ""
+
+        # Look up most-recent booking for this email so the alert has context.
+        booking_ref = None
+        try:
+            from db_models import Customer as _Customer
+            from sqlalchemy import func as _func
+            booking = (
+                db.query(DbBooking)
+                .join(DbBooking.customer)
+                .filter(_func.lower(_Customer.email) == customer_email.lower())
+                .order_by(DbBooking.created_at.desc())
+                .first()
+            )
+            if booking:
+                booking_ref = booking.reference
+        except Exception as exc:
+            print(f"[SENDGRID WEBHOOK] Booking lookup failed for {customer_email}: {exc}")
+
+        try:
+            send_bounce_alert_email(
+                customer_email=customer_email,
+                event_type=event_type,
+                reason=reason,
+                booking_reference=booking_ref,
+                raw_event=_json.dumps(event, default=str)[:2000],
+            )
+            alerted += 1
+        except Exception as exc:
+            print(f"[SENDGRID WEBHOOK] Alert send failed for {customer_email}: {exc}")
+    return alerted
+
+
 @app.post("/api/webhooks/sendgrid")
 async def webhook_sendgrid(
     request: Request,
@@ -20478,52 +20296,8 @@ async def webhook_sendgrid(
         print(f"[SENDGRID WEBHOOK] Unexpected payload shape (not a list): {type(events).__name__}")
         return {"received": 0, "alerted": 0}
 
-    HARD_FAILURES = {"bounce", "dropped", "blocked", "spamreport"}
-    from email_service import send_bounce_alert_email
-
-    alerted = 0
-    for event in events:
-        if not isinstance(event, dict):
-            continue
-        event_type = (event.get("event") or "").lower()
-        if event_type not in HARD_FAILURES:
-            continue
-
-        customer_email = event.get("email") or "(unknown)"
-        if _is_sendgrid_test_email(customer_email):
-            print(f"[SENDGRID WEBHOOK] Suppressed test email alert for {customer_email}")
-            continue
-
-        reason = event.get("reason") or event.get("response") or ""
-
-        # Look up most-recent booking for this email so the alert has context.
-        booking_ref = None
-        try:
-            from db_models import Customer as _Customer
-            from sqlalchemy import func as _func
-            booking = (
-                db.query(DbBooking)
-                .join(DbBooking.customer)
-                .filter(_func.lower(_Customer.email) == customer_email.lower())
-                .order_by(DbBooking.created_at.desc())
-                .first()
-            )
-            if booking:
-                booking_ref = booking.reference
-        except Exception as exc:
-            print(f"[SENDGRID WEBHOOK] Booking lookup failed for {customer_email}: {exc}")
-
-        try:
-            send_bounce_alert_email(
-                customer_email=customer_email,
-                event_type=event_type,
-                reason=reason,
-                booking_reference=booking_ref,
-                raw_event=_json.dumps(event, default=str)[:2000],
-            )
-            alerted += 1
-        except Exception as exc:
-            print(f"[SENDGRID WEBHOOK] Alert send failed for {customer_email}: {exc}")
+    # The booking lookups and SendGrid sends block; run them off the loop.
+    alerted = await run_blocking(_alert_on_sendgrid_events, events, db)
 
     print(f"[SENDGRID WEBHOOK] Received {len(events)} events, alerted on {alerted}")
     return {"received": len(events), "alerted": alerted}
@@ -20570,13 +20344,13 @@ async def webhook_sms_delivery(
     _verify_sms_webhook_secret(secret)
     payload = await request.json()
     print(f"[SMS WEBHOOK] Received delivery report: {payload}")
-    success = sms_service.handle_delivery_report(payload, db)
+    success = await run_blocking(sms_service.handle_delivery_report, payload, db)
     print(f"[SMS WEBHOOK] Processing result: {success}")
     return {"success": success}
 
 
 @app.get("/api/admin/sms/stats")
-async def get_sms_stats(
+def get_sms_stats(
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -20635,7 +20409,36 @@ class CampaignCreate(BaseModel):
     subject: str
     message: str
     promo_code_id: Optional[int] = None
-    subscriber_ids: List[int]  # List of subscriber IDs to send to
+    # Recipients: a segment of marketing_subscribers, or hand-picked IDs.
+    segment: Optional[SubscriberSegment] = None
+    subscriber_ids: Optional[List[int]] = None
+
+
+def _campaign_recipient_filters(data: CampaignCreate) -> list:
+    """WHERE clauses for a campaign's recipients; unsubscribed are always left out."""
+    if data.segment is not None:
+        conditions = _subscriber_segment_filters(data.segment)
+    elif data.subscriber_ids:
+        conditions = [MarketingSubscriber.id.in_(data.subscriber_ids)]
+    else:
+        raise HTTPException(status_code=400, detail="Select a subscriber segment or at least one subscriber")
+    return [*conditions, MarketingSubscriber.unsubscribed.is_not(True)]
+
+
+def _set_campaign_recipients(db: Session, campaign_id: int, conditions: list) -> int:
+    """Insert the campaign's recipients straight from the subscriber query.
+
+    The segment (or the ID list) becomes one INSERT ... SELECT, so a large
+    segment never round-trips through the browser or the ORM. Returns the
+    number of recipients added.
+    """
+    from sqlalchemy import insert, literal, select
+
+    recipients = select(literal(campaign_id), MarketingSubscriber.id).where(*conditions)
+    result = db.execute(
+        insert(MarketingEmailRecipient).from_select(["campaign_id", "subscriber_id"], recipients)
+    )
+    return result.rowcount
 
 
 class CampaignPreview(BaseModel):
@@ -20645,7 +20448,7 @@ class CampaignPreview(BaseModel):
 
 
 @app.get("/api/admin/marketing/campaigns")
-async def get_marketing_campaigns(
+def get_marketing_campaigns(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -20677,7 +20480,7 @@ async def get_marketing_campaigns(
 
 
 @app.get("/api/admin/marketing/campaigns/{campaign_id}")
-async def get_marketing_campaign(
+def get_marketing_campaign(
     campaign_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -20725,7 +20528,7 @@ async def get_marketing_campaign(
 
 
 @app.post("/api/admin/marketing/campaigns")
-async def create_marketing_campaign(
+def create_marketing_campaign(
     data: CampaignCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -20737,14 +20540,7 @@ async def create_marketing_campaign(
         if not promo:
             raise HTTPException(status_code=400, detail="Promo code not found")
 
-    # Validate subscribers exist
-    subscribers = db.query(MarketingSubscriber).filter(
-        MarketingSubscriber.id.in_(data.subscriber_ids),
-        MarketingSubscriber.unsubscribed == False
-    ).all()
-
-    if not subscribers:
-        raise HTTPException(status_code=400, detail="No valid subscribers selected")
+    recipient_filters = _campaign_recipient_filters(data)
 
     # Create campaign
     campaign = MarketingEmailCampaign(
@@ -20752,27 +20548,24 @@ async def create_marketing_campaign(
         message=data.message,
         promo_code_id=data.promo_code_id,
         status=MarketingEmailStatus.DRAFT,
-        total_recipients=len(subscribers),
         created_by=current_user.email,
     )
     db.add(campaign)
     db.flush()  # Get campaign ID
 
-    # Add recipients
-    for subscriber in subscribers:
-        recipient = MarketingEmailRecipient(
-            campaign_id=campaign.id,
-            subscriber_id=subscriber.id,
-        )
-        db.add(recipient)
+    total_recipients = _set_campaign_recipients(db, campaign.id, recipient_filters)
+    if not total_recipients:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="No valid subscribers selected")
+    campaign.total_recipients = total_recipients
 
     db.commit()
 
-    return {"id": campaign.id, "message": f"Campaign created with {len(subscribers)} recipients"}
+    return {"id": campaign.id, "message": f"Campaign created with {total_recipients} recipients"}
 
 
 @app.put("/api/admin/marketing/campaigns/{campaign_id}")
-async def update_marketing_campaign(
+def update_marketing_campaign(
     campaign_id: int,
     data: CampaignCreate,
     db: Session = Depends(get_db),
@@ -20794,37 +20587,28 @@ async def update_marketing_campaign(
         if not promo:
             raise HTTPException(status_code=400, detail="Promo code not found")
 
-    subscribers = db.query(MarketingSubscriber).filter(
-        MarketingSubscriber.id.in_(data.subscriber_ids),
-        MarketingSubscriber.unsubscribed == False
-    ).all()
+    recipient_filters = _campaign_recipient_filters(data)
+    db.query(MarketingEmailRecipient).filter(
+        MarketingEmailRecipient.campaign_id == campaign_id
+    ).delete()
 
-    if not subscribers:
+    total_recipients = _set_campaign_recipients(db, campaign.id, recipient_filters)
+    if not total_recipients:
+        db.rollback()
         raise HTTPException(status_code=400, detail="No valid subscribers selected")
 
     campaign.subject = data.subject
     campaign.message = data.message
     campaign.promo_code_id = data.promo_code_id
-    campaign.total_recipients = len(subscribers)
-
-    db.query(MarketingEmailRecipient).filter(
-        MarketingEmailRecipient.campaign_id == campaign_id
-    ).delete()
-
-    for subscriber in subscribers:
-        recipient = MarketingEmailRecipient(
-            campaign_id=campaign.id,
-            subscriber_id=subscriber.id,
-        )
-        db.add(recipient)
+    campaign.total_recipients = total_recipients
 
     db.commit()
 
-    return {"id": campaign.id, "message": f"Campaign updated with {len(subscribers)} recipients"}
+    return {"id": campaign.id, "message": f"Campaign updated with {total_recipients} recipients"}
 
 
 @app.delete("/api/admin/marketing/campaigns/{campaign_id}")
-async def delete_marketing_campaign(
+def delete_marketing_campaign(
     campaign_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -20850,7 +20634,7 @@ async def delete_marketing_campaign(
 
 
 @app.post("/api/admin/marketing/campaigns/{campaign_id}/send")
-async def send_marketing_campaign(
+def send_marketing_campaign(
     campaign_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -20879,7 +20663,7 @@ async def send_marketing_campaign(
 
 
 @app.post("/api/admin/marketing/campaigns/preview")
-async def preview_marketing_campaign(
+def preview_marketing_campaign(
     data: CampaignPreview,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
@@ -20904,7 +20688,7 @@ async def preview_marketing_campaign(
 
 
 @app.get("/api/admin/marketing/promo-codes")
-async def get_available_promo_codes(
+def get_available_promo_codes(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
@@ -0,0 +1,130 @@
+"""Server-side clustering for the admin booking-locations map.
+
+/api/admin/reports/booking-locations ships every geocoded booking (or lead)
+to the browser, which then clusters thousands of markers itself. The
+clusters endpoint instead buckets the points on a grid aligned to the
+standard web-mercator ("slippy map") tiles:
+
+- At zoom z the world is 2**z x 2**z tiles of TILE_SIZE_PX pixels.
+- Each tile is split into CELLS_PER_TILE x CELLS_PER_TILE cells, so a
+  cluster never spans more than CELL_SIZE_PX on screen at that zoom.
+- A cell reports its point count and the centroid of its points; a cell
+  holding one point also carries that point's id so the map can open it.
+
+cluster_tiles() is pure: one pass over the points clusters every tile at
+a zoom, and the main module caches that tile index per (map_type, zoom).
+A request for a bounding box is the union of the tiles it touches,
+trimmed to the box, so panning reuses the index already built for that
+zoom and an empty tile costs a dict lookup.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional
+
+TILE_SIZE_PX = 256
+CELL_SIZE_PX = 64
+CELLS_PER_TILE = TILE_SIZE_PX // CELL_SIZE_PX
+MIN_ZOOM = 0
+MAX_ZOOM = 18
+# A bounding box touching more tiles than this is rejected; the admin map
+# viewport covers a few dozen at most.
+MAX_TILES_PER_REQUEST = 256
+# Tile indexes (one per map type and zoom) the main module keeps cached
+# per process, least recently used evicted first. A deep zoom's index
+# holds about one cluster per point, so don't keep every zoom.
+TILE_INDEX_CACHE_MAX_ENTRIES = 12
+# Web mercator is undefined at the poles; clamp to the usual tile limits.
+MAX_LATITUDE = 85.05112878
+
+
+def _world_position(lat: float, lng: float, zoom: int) -> tuple[float, float]:
+    """Fractional tile coordinates of (lat, lng) at `zoom`."""
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    lat_rad = math.radians(lat)
+    x = (lng + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    # The antimeridian and south pole land exactly on n; keep them in range.
+    return min(max(x, 0.0), n - 1e-9), min(max(y, 0.0), n - 1e-9)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(west, south, east, north) of tile (x, y) at `zoom`, in degrees."""
+    n = 2 ** zoom
+
+    def lat(ty: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tiles_for_bbox(zoom: int, west: float, south: float, east: float, north: float) -> list[tuple[int, int]]:
+    """Every (x, y) tile at `zoom` that intersects the bounding box.
+
+    Raises ValueError for an inverted box or one spanning more than
+    MAX_TILES_PER_REQUEST tiles. A box crossing the antimeridian should be
+    requested as two boxes.
+    """
+    if west > east or south > north:
+        raise ValueError("Bounding box must have west <= east and south <= north")
+    min_x, min_y = _world_position(north, west, zoom)
+    max_x, max_y = _world_position(south, east, zoom)
+    xs = range(int(min_x), int(max_x) + 1)
+    ys = range(int(min_y), int(max_y) + 1)
+    if len(xs) * len(ys) > MAX_TILES_PER_REQUEST:
+        raise ValueError(
+            f"Bounding box covers {len(xs) * len(ys)} tiles at zoom {zoom}; "
+            f"zoom in or request at most {MAX_TILES_PER_REQUEST}"
+        )
+    return [(x, y) for x in xs for y in ys]
+
+
+def cluster_tiles(points: Iterable[dict], zoom: int) -> dict:
+    """Bucket every point into its tile's grid cells at `zoom`, in one pass.
+
+    `points` are dicts with "lat", "lng" and "id" (the shape of the
+    booking-locations payload). Returns {(x, y): clusters} for the tiles
+    holding points; a tile missing from it is empty. Each cluster has
+    "lat"/"lng" (centroid), "count" and, for a single point, "id"; a tile's
+    clusters are ordered by count, largest first.
+    """
+    cells: dict = {}
+    for point in points:
+        px, py = _world_position(point["lat"], point["lng"], zoom)
+        x, y = int(px), int(py)
+        cell = (x, y, int((px - x) * CELLS_PER_TILE), int((py - y) * CELLS_PER_TILE))
+        bucket = cells.get(cell)
+        if bucket is None:
+            cells[cell] = [point["lat"], point["lng"], 1, point.get("id")]
+        else:
+            bucket[0] += point["lat"]
+            bucket[1] += point["lng"]
+            bucket[2] += 1
+
+    tiles: dict = {}
+    for (x, y, _, _), (lat_sum, lng_sum, count, first_id) in cells.items():
+        cluster = {"lat": round(lat_sum / count, 6), "lng": round(lng_sum / count, 6), "count": count}
+        if count == 1:
+            cluster["id"] = first_id
+        tiles.setdefault((x, y), []).append(cluster)
+    for clusters in tiles.values():
+        clusters.sort(key=lambda c: -c["count"])
+    return tiles
+
+
+def in_bbox(cluster: dict, west: float, south: float, east: float, north: float) -> bool:
+    return west <= cluster["lng"] <= east and south <= cluster["lat"] <= north
+
+
+def merge_tiles(
+    tiles: Iterable[list[dict]],
+    bbox: Optional[tuple[float, float, float, float]] = None,
+) -> list[dict]:
+    """Concatenate per-tile clusters, keeping those whose centroid is in `bbox`."""
+    merged = []
+    for clusters in tiles:
+        merged.extend(c for c in clusters if bbox is None or in_bbox(c, *bbox))
+    merged.sort(key=lambda c: -c["count"])
+    return merged
@@ -1015,6 +1015,11 @@ class PlannerCommitRequest(BaseModel):
     overrides: Dict[int, ProposalOverride] = Field(default_factory=dict)
 
 
+class FlightDelayImpactConsumeRequest(BaseModel):
+    """Body of POST /api/admin/roster/flight-impacts/consume."""
+    impact_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class PlannerCommitResponse(BaseModel):
     """Response from POST /api/admin/qa/roster-planner/commit."""
     run_id: str
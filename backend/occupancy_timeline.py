@@ -0,0 +1,333 @@
+"""Intraday occupancy timeline (occupancy_timeline).
+
+The secondary car park report and the intraday occupancy views used to
+rebuild overflow usage from every overlapping booking on each call. This
+module keeps one occupancy_timeline row per day instead: for each
+SLOT_MINUTES slot, the cars on site at the slot's start and how many of
+them qualify for the secondary car park, plus the day's peaks and the
+secondary hand-over counts. A day's payload is then one indexed select.
+
+Counting follows the time-aware capacity gate (db_service): CONFIRMED,
+COMPLETED and REFUNDED bookings occupy a space from drop-off until pickup,
+a pickup at T frees the space for a drop-off at T, and a missing time is
+worst-cased (drop-off 00:00, pickup 23:59). Secondary qualification is
+db_service.booking_qualifies_for_secondary_carpark.
+
+Rows are kept for a rolling window, TIMELINE_PAST_DAYS back to
+TIMELINE_FUTURE_DAYS ahead (UK dates). install_occupancy_timeline_tracking()
+hooks a sessionmaker so a flush touching a booking's status, dates or times
+records every day of its stay before and after the change. Once the booking
+has committed, those days (inside the window) are recomputed in a short
+transaction under per-day advisory locks and upserted on timeline_date, as
+booking_stats does for its rollup; a failure is retried once, then logged.
+Reads never write: a day with no row is computed on the fly. The
+refresh_occupancy_timeline() job runs shortly after startup and nightly; it
+rebuilds the window, picks up secondary-window setting changes and writes
+that bypassed the ORM, and prunes rows that have aged out.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+TIMELINE_PAST_DAYS = 7
+TIMELINE_FUTURE_DAYS = 180
+# Nightly rebuild, Europe/London: after the booking stats reconcile.
+OCCUPANCY_TIMELINE_REFRESH_HOUR = 3
+OCCUPANCY_TIMELINE_REFRESH_MINUTE = 40
+
+_PENDING_DAYS_KEY = "occupancy_timeline_days"
+_BOOKING_FIELDS = ("status", "dropoff_date", "pickup_date", "dropoff_time", "pickup_time")
+
+
+def _today() -> date:
+    from booking_stats import UK_TIMEZONE
+
+    return datetime.now(UK_TIMEZONE).date()
+
+
+def timeline_window(today: Optional[date] = None) -> tuple[date, date]:
+    """(first, last) day kept in occupancy_timeline, inclusive."""
+    today = today or _today()
+    return today - timedelta(days=TIMELINE_PAST_DAYS), today + timedelta(days=TIMELINE_FUTURE_DAYS)
+
+
+def _slot_index(day: date, moment: datetime) -> int:
+    """Index of the first slot of `day` starting at or after `moment` (may be <0 or >SLOTS_PER_DAY)."""
+    minutes = (moment - datetime.combine(day, time.min)).total_seconds() / 60
+    return -int(-minutes // SLOT_MINUTES)  # ceil
+
+
+def _stay(booking) -> tuple[datetime, datetime]:
+    return (
+        datetime.combine(booking.dropoff_date, booking.dropoff_time or time(0, 0)),
+        datetime.combine(booking.pickup_date, booking.pickup_time or time(23, 59)),
+    )
+
+
+def compute_day(bookings: Iterable, day: date, settings: dict) -> dict:
+    """Timeline values for `day` from occupying bookings already fetched.
+
+    Returns the occupancy_timeline column values (without computed_at).
+    """
+    import db_service
+
+    total = [0] * (SLOTS_PER_DAY + 1)
+    secondary = [0] * (SLOTS_PER_DAY + 1)
+    dropoffs = pickups = 0
+    for booking in bookings:
+        if not booking.dropoff_date or not booking.pickup_date:
+            continue
+        enter, leave = _stay(booking)
+        first = max(_slot_index(day, enter), 0)
+        last = min(_slot_index(day, leave), SLOTS_PER_DAY)  # first slot it is gone for
+        qualifies = db_service.booking_qualifies_for_secondary_carpark(booking, settings)
+        if first < last:
+            total[first] += 1
+            total[last] -= 1
+            if qualifies:
+                secondary[first] += 1
+                secondary[last] -= 1
+        if qualifies:
+            dropoffs += booking.dropoff_date == day
+            pickups += booking.pickup_date == day
+
+    def running(deltas: list) -> list:
+        counts, current = [], 0
+        for delta in deltas[:SLOTS_PER_DAY]:
+            current += delta
+            counts.append(current)
+        return counts
+
+    total_counts, secondary_counts = running(total), running(secondary)
+    return {
+        "timeline_date": day,
+        "slot_minutes": SLOT_MINUTES,
+        "total_json": total_counts,
+        "secondary_json": secondary_counts,
+        "peak_total": max(total_counts),
+        "peak_secondary": max(secondary_counts),
+        "secondary_dropoffs": dropoffs,
+        "secondary_pickups": pickups,
+    }
+
+
+def _fetch_occupying(db, start: date, end: date) -> list:
+    import db_service
+
+    return db_service.fetch_bookings_overlapping_window(
+        db, start, end, db_service.TIME_AWARE_OCCUPYING_STATUSES,
+    )
+
+
+def compute_days(db, days: Iterable[date]) -> dict:
+    """{day: column values} for the given days, from one bookings fetch."""
+    import db_service
+
+    days = sorted(set(days))
+    if not days:
+        return {}
+    settings = db_service.get_secondary_carpark_settings()
+    bookings = _fetch_occupying(db, days[0], days[-1])
+    values = {}
+    for day in days:
+        touching = [b for b in bookings if b.dropoff_date <= day <= b.pickup_date]
+        values[day] = compute_day(touching, day, settings)
+    return values
+
+
+def _store(db, values: dict) -> None:
+    """INSERT ... ON CONFLICT (timeline_date) DO UPDATE for each day's values."""
+    from db_models import OccupancyTimeline
+
+    if not values:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    computed_at = datetime.now(timezone.utc)
+    rows = [{**row, "computed_at": computed_at} for row in values.values()]
+    stmt = insert(OccupancyTimeline.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["timeline_date"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "timeline_date"},
+    )
+    db.execute(stmt)
+    db.flush()
+
+
+def recompute_timeline_days(db, days: Iterable[date], today: Optional[date] = None) -> int:
+    """Recompute and store the given days that fall inside the window. Does not commit.
+
+    Returns the number of rows written.
+    """
+    first, last = timeline_window(today)
+    days = {day for day in days if first <= day <= last}
+    if not days:
+        return 0
+    values = compute_days(db, days)
+    _store(db, values)
+    return len(values)
+
+
+def rebuild_timeline_window(db, today: Optional[date] = None) -> dict:
+    """Rebuild every day of the window and prune rows outside it. Does not commit."""
+    from sqlalchemy import or_
+
+    from db_models import OccupancyTimeline
+
+    first, last = timeline_window(today)
+    pruned = db.query(OccupancyTimeline).filter(
+        or_(OccupancyTimeline.timeline_date < first, OccupancyTimeline.timeline_date > last)
+    ).delete(synchronize_session=False)
+    days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    written = recompute_timeline_days(db, days, today)
+    return {"rows": written, "pruned": pruned}
+
+
+def refresh_occupancy_timeline(session_factory) -> dict:
+    """Nightly job: rebuild the rolling window of occupancy_timeline."""
+    db = session_factory()
+    try:
+        result = rebuild_timeline_window(db)
+        db.commit()
+        logger.info("occupancy timeline refresh complete rows=%s pruned=%s", result["rows"], result["pruned"])
+        return result
+    except Exception as e:
+        logger.exception("occupancy timeline refresh failed error=%s", e)
+        db.rollback()
+        return {"rows": 0, "pruned": 0, "failed": True, "error": str(e)}
+    finally:
+        db.close()
+
+
+def _payload(values: dict, computed_at: Optional[datetime]) -> dict:
+    def peak_at(counts: list, peak: int) -> Optional[str]:
+        if not peak:
+            return None
+        minutes = counts.index(peak) * values["slot_minutes"]
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    total, secondary = values["total_json"], values["secondary_json"]
+    return {
+        "date": values["timeline_date"].isoformat(),
+        "slot_minutes": values["slot_minutes"],
+        "total": total,
+        "secondary": secondary,
+        "peak_total": values["peak_total"],
+        "peak_total_at": peak_at(total, values["peak_total"]),
+        "peak_secondary": values["peak_secondary"],
+        "peak_secondary_at": peak_at(secondary, values["peak_secondary"]),
+        "secondary_dropoffs": values["secondary_dropoffs"],
+        "secondary_pickups": values["secondary_pickups"],
+        "computed_at": computed_at.isoformat() if computed_at else None,
+    }
+
+
+def load_timelines(db, start: date, end: date) -> dict:
+    """{day: payload} for every day in [start, end], one indexed select.
+
+    Days missing from the table are computed (one more bookings fetch) and
+    returned with computed_at None; nothing is written.
+    """
+    from db_models import OccupancyTimeline
+
+    rows = (
+        db.query(OccupancyTimeline)
+        .filter(OccupancyTimeline.timeline_date >= start, OccupancyTimeline.timeline_date <= end)
+        .all()
+    )
+    payloads = {
+        row.timeline_date: _payload({
+            "timeline_date": row.timeline_date,
+            "slot_minutes": row.slot_minutes,
+            "total_json": row.total_json,
+            "secondary_json": row.secondary_json,
+            "peak_total": row.peak_total,
+            "peak_secondary": row.peak_secondary,
+            "secondary_dropoffs": row.secondary_dropoffs,
+            "secondary_pickups": row.secondary_pickups,
+        }, row.computed_at)
+        for row in rows
+    }
+    missing = [
+        day for day in (start + timedelta(days=n) for n in range((end - start).days + 1))
+        if day not in payloads
+    ]
+    if not missing:
+        return payloads
+
+    for day, v in compute_days(db, missing).items():
+        payloads[day] = _payload(v, None)
+    return dict(sorted(payloads.items()))
+
+
+def load_timeline(db, day: date) -> dict:
+    """Payload for one day; see load_timelines."""
+    return load_timelines(db, day, day)[day]
+
+
+# ---------------------------------------------------------------------------
+# Commit tracking
+# ---------------------------------------------------------------------------
+
+def _stay_days(dropoff_dates: Iterable, pickup_dates: Iterable) -> set:
+    dropoffs = [d for d in dropoff_dates if isinstance(d, date)]
+    pickups = [d for d in pickup_dates if isinstance(d, date)]
+    if not dropoffs or not pickups:
+        return set()
+    start, end = min(dropoffs), max(pickups)
+    return {start + timedelta(days=n) for n in range((end - start).days + 1)}
+
+
+def _collect_timeline_days(session, flush_context, instances) -> None:
+    from db_models import Booking
+    from session_hooks import attr_values, changed
+
+    pending = session.info.setdefault(_PENDING_DAYS_KEY, set())
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        if not isinstance(obj, Booking):
+            continue
+        if not (obj in session.new or obj in session.deleted or changed(obj, _BOOKING_FIELDS)):
+            continue
+        pending |= _stay_days(attr_values(obj, "dropoff_date"), attr_values(obj, "pickup_date"))
+
+
+def _apply_timeline_days(session) -> None:
+    from session_hooks import run_locked
+
+    first, last = timeline_window()
+    days = sorted(day for day in session.info.pop(_PENDING_DAYS_KEY, ()) if first <= day <= last)
+    if not days:
+        return
+    # The nightly refresh repairs whatever this missed.
+    run_locked(
+        session.get_bind(),
+        [f"occupancy_timeline:{day.isoformat()}" for day in days],
+        lambda db: recompute_timeline_days(db, days),
+        label=f"occupancy timeline update days={len(days)}",
+    )
+
+
+def _discard_timeline_days(session) -> None:
+    session.info.pop(_PENDING_DAYS_KEY, None)
+
+
+def install_occupancy_timeline_tracking(target) -> None:
+    """Keep occupancy_timeline current for sessions from `target`."""
+    from session_hooks import install_session_hooks
+
+    install_session_hooks(
+        target,
+        _collect_timeline_days,
+        _apply_timeline_days,
+        _discard_timeline_days,
+    )
@@ -0,0 +1,328 @@
+"""Persistent postcode geocoding (postcode_geocodes).
+
+/api/admin/reports/booking-locations used to post every customer postcode
+to postcodes.io whenever its report cache expired: slow, rate-limited and
+useless offline. geocode_postcodes() now reads postcode_geocodes first and
+only asks postcodes.io (in bulk batches of 100) for full postcodes that are
+missing or expired, storing the answers, misses included, for next time.
+Once the map's postcodes are cached a refresh makes no network calls.
+
+Full postcodes expire after POSTCODE_TTL_DAYS (NOT_FOUND_TTL_DAYS for
+postcodes postcodes.io did not know), so terminated or newly issued
+postcodes are picked up eventually. An expired row is still served if the
+refresh fails. Postcodes that cannot be resolved (network down, not found,
+malformed unit) fall back to the centroid of their outward code ("BH7" for
+"BH7 6AW"). Outward centroids never expire and come from an offline CSV:
+
+    python postcode_geocoder.py --import-centroids outcodes.csv
+
+The CSV needs an outward-code column (outcode, outward_code or postcode) and
+latitude/longitude columns (lat/lng/lon accepted); an admin_district column
+is optional. Any outward-code centroid list works, e.g. the free UK outcode
+lists built from the ONS Postcode Directory.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+
+import httpx
+
+from event_loop_guard import run_blocking
+
+logger = logging.getLogger(__name__)
+
+POSTCODES_IO_BULK_URL = "https://api.postcodes.io/postcodes"
+BULK_LOOKUP_SIZE = 100  # postcodes.io bulk lookup limit
+LOOKUP_TIMEOUT_SECONDS = 10.0
+POSTCODE_TTL_DAYS = 365
+NOT_FOUND_TTL_DAYS = 30
+IMPORT_CHUNK_SIZE = 1000
+
+KIND_POSTCODE = "postcode"
+KIND_OUTWARD = "outward"
+SOURCE_POSTCODES_IO = "postcodes.io"
+SOURCE_CENTROID_CSV = "centroid_csv"
+
+_POSTCODE_RE = re.compile(r"^[A-Z]{1,2}[0-9][A-Z0-9]?[0-9][A-Z]{2}$")
+_OUTWARD_RE = re.compile(r"^[A-Z]{1,2}[0-9][A-Z0-9]?$")
+
+_OUTWARD_COLUMNS = ("outcode", "outward_code", "outward", "postcode")
+_LATITUDE_COLUMNS = ("latitude", "lat")
+_LONGITUDE_COLUMNS = ("longitude", "lng", "lon", "long")
+
+
+def normalise_postcode(raw: Optional[str]) -> Optional[str]:
+    """Canonical "BH7 6AW" / "BH7" form, or None if it is neither shape."""
+    compact = re.sub(r"\s+", "", raw or "").upper()
+    if _POSTCODE_RE.match(compact):
+        return f"{compact[:-3]} {compact[-3:]}"
+    if _OUTWARD_RE.match(compact):
+        return compact
+    return None
+
+
+def outward_code(postcode: str) -> str:
+    return postcode.split(" ", 1)[0]
+
+
+def _as_utc(stamp: Optional[datetime]) -> Optional[datetime]:
+    if stamp is not None and stamp.tzinfo is None:
+        return stamp.replace(tzinfo=timezone.utc)
+    return stamp
+
+
+def load_cached_geocodes(db, keys: Iterable[str]) -> dict:
+    """Cached rows for `keys` as {postcode: {...}}, in one query."""
+    from db_models import PostcodeGeocode
+
+    keys = sorted(set(keys))
+    if not keys:
+        return {}
+    rows = (
+        db.query(
+            PostcodeGeocode.postcode,
+            PostcodeGeocode.latitude,
+            PostcodeGeocode.longitude,
+            PostcodeGeocode.admin_district,
+            PostcodeGeocode.expires_at,
+        )
+        .filter(PostcodeGeocode.postcode.in_(keys))
+        .all()
+    )
+    return {
+        postcode: {
+            "latitude": latitude,
+            "longitude": longitude,
+            "admin_district": admin_district,
+            "expires_at": _as_utc(expires_at),
+        }
+        for postcode, latitude, longitude, admin_district, expires_at in rows
+    }
+
+
+def _upsert(db, rows: list[dict]) -> None:
+    """Insert or update postcode_geocodes rows keyed by postcode."""
+    from db_models import PostcodeGeocode
+
+    existing = {
+        row.postcode: row
+        for row in db.query(PostcodeGeocode)
+        .filter(PostcodeGeocode.postcode.in_([row["postcode"] for row in rows]))
+        .all()
+    }
+    for values in rows:
+        row = existing.get(values["postcode"])
+        if row is None:
+            db.add(PostcodeGeocode(**values))
+            continue
+        for field, value in values.items():
+            setattr(row, field, value)
+
+
+def store_geocodes(db, found: dict, now: datetime) -> dict:
+    """Store postcodes.io answers ({postcode: result or None}).
+
+    Returns the stored rows in load_cached_geocodes() shape. The rows are
+    written in a savepoint and left for the caller to commit; a failed write
+    is logged and rolls back only the savepoint, and the answers are still
+    returned for this call.
+    """
+    rows = []
+    for postcode, result in found.items():
+        ttl = POSTCODE_TTL_DAYS if result else NOT_FOUND_TTL_DAYS
+        rows.append({
+            "postcode": postcode,
+            "kind": KIND_POSTCODE,
+            "latitude": result["latitude"] if result else None,
+            "longitude": result["longitude"] if result else None,
+            "admin_district": (result.get("admin_district") or None) if result else None,
+            "source": SOURCE_POSTCODES_IO,
+            "fetched_at": now,
+            "expires_at": now + timedelta(days=ttl),
+        })
+    try:
+        with db.begin_nested():
+            _upsert(db, rows)
+    except Exception:
+        logger.warning("Could not store %d postcode geocodes", len(rows), exc_info=True)
+    return {
+        row["postcode"]: {
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "admin_district": row["admin_district"],
+            "expires_at": row["expires_at"],
+        }
+        for row in rows
+    }
+
+
+async def fetch_postcodes(
+    postcodes: list[str],
+    on_error: Optional[Callable[[Exception], None]] = None,
+) -> dict:
+    """Bulk-look up full postcodes on postcodes.io.
+
+    Returns {postcode: result or None} for every postcode in a batch that
+    was answered; None means postcodes.io does not know it. The first
+    failed request stops the lookup and is reported through on_error,
+    which runs on the blocking pool (callers log to the database).
+    """
+    found = {}
+    try:
+        async with httpx.AsyncClient() as client:
+            for i in range(0, len(postcodes), BULK_LOOKUP_SIZE):
+                batch = postcodes[i:i + BULK_LOOKUP_SIZE]
+                response = await client.post(
+                    POSTCODES_IO_BULK_URL,
+                    json={"postcodes": batch},
+                    timeout=LOOKUP_TIMEOUT_SECONDS,
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"postcodes.io bulk lookup returned {response.status_code}")
+                answered = {postcode: None for postcode in batch}
+                for item in response.json().get("result") or []:
+                    postcode = normalise_postcode(item.get("query"))
+                    if postcode in answered and item.get("result"):
+                        answered[postcode] = item["result"]
+                found.update(answered)
+    except Exception as e:
+        logger.warning("Postcode lookup failed after %d postcodes: %s", len(found), e)
+        if on_error:
+            await run_blocking(on_error, e)
+    return found
+
+
+def _is_fresh(row: Optional[dict], now: datetime) -> bool:
+    return row is not None and (row["expires_at"] is None or row["expires_at"] > now)
+
+
+def _coordinates(row: Optional[dict], precision: str) -> Optional[dict]:
+    if row is None or row["latitude"] is None or row["longitude"] is None:
+        return None
+    return {
+        "lat": row["latitude"],
+        "lng": row["longitude"],
+        "admin_district": row["admin_district"],
+        "precision": precision,
+    }
+
+
+async def geocode_postcodes(
+    db,
+    postcodes: Iterable[str],
+    on_error: Optional[Callable[[Exception], None]] = None,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Coordinates for each postcode as given, {raw: {lat, lng, ...}}.
+
+    "precision" is "postcode" for a full-postcode hit and "outward" for the
+    outward-code centroid fallback. Postcodes with neither are left out.
+    New postcodes.io answers are added to `db`; the caller commits them.
+    """
+    now = now or datetime.now(timezone.utc)
+    wanted = {raw: normalise_postcode(raw) for raw in postcodes}
+    full = {postcode for postcode in wanted.values() if postcode and " " in postcode}
+    outward = {outward_code(postcode) for postcode in wanted.values() if postcode}
+
+    cached = await run_blocking(load_cached_geocodes, db, full | outward)
+    stale = sorted(postcode for postcode in full if not _is_fresh(cached.get(postcode), now))
+    if stale:
+        found = await fetch_postcodes(stale, on_error)
+        if found:
+            cached.update(await run_blocking(store_geocodes, db, found, now))
+
+    coordinates = {}
+    for raw, postcode in wanted.items():
+        if not postcode:
+            continue
+        coords = _coordinates(cached.get(postcode), KIND_POSTCODE if " " in postcode else KIND_OUTWARD)
+        if coords is None:
+            coords = _coordinates(cached.get(outward_code(postcode)), KIND_OUTWARD)
+        if coords is not None:
+            coordinates[raw] = coords
+    return coordinates
+
+
+def _column(fieldnames: list[str], candidates: tuple[str, ...]) -> str:
+    lookup = {name.strip().lower(): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    raise ValueError(f"CSV has none of the columns {', '.join(candidates)}")
+
+
+def import_outward_centroids(db, path: str, now: Optional[datetime] = None) -> dict:
+    """Load outward-code centroids from a CSV into postcode_geocodes.
+
+    Re-importing updates existing outward rows. Rows with a malformed
+    outward code or unparsable coordinates are skipped and counted.
+    """
+    now = now or datetime.now(timezone.utc)
+    imported = skipped = 0
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle)
+        fieldnames = reader.fieldnames or []
+        code_col = _column(fieldnames, _OUTWARD_COLUMNS)
+        lat_col = _column(fieldnames, _LATITUDE_COLUMNS)
+        lng_col = _column(fieldnames, _LONGITUDE_COLUMNS)
+        district_col = next((name for name in fieldnames if name.strip().lower() == "admin_district"), None)
+
+        rows = {}
+        for record in reader:
+            code = normalise_postcode(record.get(code_col))
+            try:
+                latitude = float(record.get(lat_col) or "")
+                longitude = float(record.get(lng_col) or "")
+            except ValueError:
+                latitude = longitude = None
+            if not code or " " in code or latitude is None:
+                skipped += 1
+                continue
+            rows[code] = {
+                "postcode": code,
+                "kind": KIND_OUTWARD,
+                "latitude": latitude,
+                "longitude": longitude,
+                "admin_district": (record.get(district_col) or None) if district_col else None,
+                "source": SOURCE_CENTROID_CSV,
+                "fetched_at": now,
+                "expires_at": None,
+            }
+
+    batch = list(rows.values())
+    for i in range(0, len(batch), IMPORT_CHUNK_SIZE):
+        _upsert(db, batch[i:i + IMPORT_CHUNK_SIZE])
+        db.commit()
+        imported += len(batch[i:i + IMPORT_CHUNK_SIZE])
+    return {"imported": imported, "skipped": skipped}
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the postcode geocode cache")
+    parser.add_argument("--import-centroids", metavar="CSV", required=True,
+                        help="Load outward-code centroids from a CSV file")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = import_outward_centroids(db, args.import_centroids)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"Imported {result['imported']} outward-code centroids ({result['skipped']} rows skipped)")
+
+
+if __name__ == "__main__":
+    main()
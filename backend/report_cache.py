@@ -0,0 +1,407 @@
+"""Shared in-memory cache for the admin reports.
+
+The admin reports (occupancy, financial, forecast, popular, fun facts,
+session tracking, abandoned carts, booking locations) used to keep one
+hand-rolled module-level dict each, with a fixed one-hour TTL and no lock:
+when an entry expired every concurrent admin request recomputed the same
+heavy report. They now share one ReportCache:
+
+- Entries are keyed by (report, key), e.g. ("occupancy", "weekly").
+- Single-flight: one caller per key computes; callers without usable data
+  wait for it and reuse its result instead of computing again.
+- Stale-while-revalidate: once an entry has expired (or been invalidated)
+  the next caller recomputes it while concurrent callers are served the
+  previous payload, flagged "stale", for up to REPORT_CACHE_STALE_SECONDS.
+- Tags: each entry carries tags ("bookings", "payments", ...).
+  install_report_cache_invalidation() hooks a sessionmaker so a commit that
+  wrote a Booking, Payment or Customer invalidates every entry tagged with
+  the matching name.
+- Bounded reports: set_max_entries() caps a report with many keys (the
+  booking-location map's per-zoom tile indexes) to its most recently used entries, and
+  invalidation drops their entries instead of keeping them to serve stale.
+- Per-report hit/miss/stale counts and compute times, served by
+  /api/admin/report-cache.
+- report_warmup recomputes the standard views in the background before
+  they age out; see /api/admin/report-warmup.
+
+The cache is per process; each worker keeps (and invalidates) its own copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from event_loop_guard import run_blocking
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TTL_SECONDS = 3600  # 1 hour
+# How long past expiry an entry may still be served while it is recomputed.
+REPORT_CACHE_STALE_SECONDS = 3600
+# How often a waiting request re-checks an in-flight computation.
+REPORT_CACHE_POLL_SECONDS = 0.05
+
+_ALL = object()
+_PENDING_TAGS_KEY = "report_cache_tags"
+# Model name -> tag invalidated when a committed flush wrote one.
+WRITE_TAGS = {
+    "Booking": "bookings",
+    "Payment": "payments",
+    "Customer": "customers",
+}
+
+
+@dataclass
+class _Entry:
+    data: dict
+    stored_at: float
+    cached_at: datetime
+    tags: frozenset
+    ttl: float
+    invalidated: bool = False
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+    def is_fresh(self, now: float) -> bool:
+        return not self.invalidated and self.age(now) < self.ttl
+
+    def is_servable_stale(self, now: float, stale_seconds: float) -> bool:
+        return self.age(now) < self.ttl + stale_seconds
+
+
+@dataclass
+class _ReportStats:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    computes: int = 0
+    errors: int = 0
+    compute_seconds_total: float = 0.0
+    compute_seconds_max: float = 0.0
+    compute_seconds_last: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses + self.stale_hits + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.stale_hits + self.coalesced) / lookups, 3) if lookups else None,
+            "computes": self.computes,
+            "errors": self.errors,
+            "compute_seconds_avg": round(self.compute_seconds_total / self.computes, 3) if self.computes else None,
+            "compute_seconds_max": round(self.compute_seconds_max, 3),
+            "compute_seconds_last": round(self.compute_seconds_last, 3) if self.compute_seconds_last is not None else None,
+        }
+
+
+class ReportCache:
+    """Report payloads keyed by (report, key); see the module docstring."""
+
+    def __init__(
+        self,
+        ttl: float = REPORT_CACHE_TTL_SECONDS,
+        stale_seconds: float = REPORT_CACHE_STALE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.clock = clock
+        self._entries: dict = {}
+        self._locks: dict = {}
+        self._stats: dict = {}
+        # tag -> slots carrying it, so a write only visits its own entries.
+        self._tagged: dict = {}
+        # report -> max entries, and its keys least recently used first.
+        self._max_entries: dict = {}
+        self._recent: dict = {}
+        self._mutex = threading.Lock()
+
+    def set_max_entries(self, report: str, max_entries: int) -> None:
+        """Keep at most `max_entries` of `report`, evicting the least recently used.
+
+        Invalidating a bounded report drops its entries rather than marking
+        them, so they are never served stale.
+        """
+        self._max_entries[report] = max_entries
+        self._recent.setdefault(report, OrderedDict())
+        self._evict(report)
+
+    async def get_or_compute(
+        self,
+        report: str,
+        key: Hashable,
+        compute: Callable[[], Any],
+        *,
+        tags: Iterable[str] = (),
+        refresh: bool = False,
+        ttl: Optional[float] = None,
+    ) -> dict:
+        """The cached payload for (report, key), computing it at most once.
+
+        `compute` returns the payload dict, or an awaitable of it; a plain
+        function is called on the blocking executor (event_loop_guard). The
+        response is a copy with "cached" (and, when cached,
+        "cache_age_minutes"; when stale, "stale") added. `refresh` skips the
+        fresh-entry check but still joins an in-flight computation.
+        """
+        slot = (report, key)
+        stats = self._stats_for(report)
+        requested_at = self.clock()
+        entry = self._entries.get(slot)
+        seen = entry
+        if not refresh and entry is not None and entry.is_fresh(requested_at):
+            stats.hits += 1
+            self._touch(slot)
+            return self._response(entry, requested_at)
+
+        lock = self._lock_for(slot)
+        if not lock.acquire(blocking=False):
+            if not refresh and entry is not None and entry.is_servable_stale(requested_at, self.stale_seconds):
+                stats.stale_hits += 1
+                return self._response(entry, requested_at, stale=True)
+            while not lock.acquire(blocking=False):
+                await asyncio.sleep(REPORT_CACHE_POLL_SECONDS)
+        try:
+            entry = self._entries.get(slot)
+            if entry is not None and entry is not seen and not entry.invalidated:
+                # Computed by the caller we waited for.
+                stats.coalesced += 1
+                return self._response(entry, self.clock())
+
+            stats.misses += 1
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(compute):
+                    data = compute()
+                else:
+                    # Synchronous computes query the DB; keep them off the loop.
+                    data = await run_blocking(compute)
+                if inspect.isawaitable(data):
+                    data = await data
+            except BaseException:
+                stats.errors += 1
+                raise
+            elapsed = time.perf_counter() - started
+            stats.computes += 1
+            stats.compute_seconds_total += elapsed
+            stats.compute_seconds_max = max(stats.compute_seconds_max, elapsed)
+            stats.compute_seconds_last = elapsed
+            self.store(report, key, data, tags=tags, ttl=ttl)
+            response = dict(data)
+            response["cached"] = False
+            return response
+        finally:
+            lock.release()
+            if slot not in self._entries:
+                self._discard_lock(slot)
+
+    def store(self, report: str, key: Hashable, data: dict, *, tags: Iterable[str] = (), ttl: Optional[float] = None) -> None:
+        """Cache `data` as the fresh payload for (report, key)."""
+        slot = (report, key)
+        self._untag(slot)
+        entry = _Entry(
+            data=dict(data),
+            stored_at=self.clock(),
+            cached_at=datetime.now(timezone.utc),
+            tags=frozenset(tags),
+            ttl=self.ttl if ttl is None else ttl,
+        )
+        with self._mutex:
+            self._entries[slot] = entry
+            for tag in entry.tags:
+                self._tagged.setdefault(tag, set()).add(slot)
+        if report in self._max_entries:
+            self._touch(slot)
+            self._evict(report)
+
+    def peek(self, report: str, key: Hashable = None) -> Optional[dict]:
+        """The cached payload for (report, key), fresh or not, without counting a lookup."""
+        entry = self._entries.get((report, key))
+        return dict(entry.data) if entry is not None else None
+
+    def entry_age(self, report: str, key: Hashable = None) -> Optional[float]:
+        """Seconds since (report, key) was stored; None if absent or invalidated."""
+        entry = self._entries.get((report, key))
+        if entry is None or entry.invalidated:
+            return None
+        return entry.age(self.clock())
+
+    def invalidate(self, report: str, key: Hashable = _ALL) -> int:
+        """Mark one key (or every key) of `report` as needing a recompute."""
+        with self._mutex:
+            slots = [
+                slot for slot in self._entries
+                if slot[0] == report and (key is _ALL or slot[1] == key)
+            ]
+        return self._invalidate(slots)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Mark every entry tagged `tag` as needing a recompute."""
+        with self._mutex:
+            slots = list(self._tagged.get(tag, ()))
+        return self._invalidate(slots)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the metrics."""
+        with self._mutex:
+            self._entries.clear()
+            self._stats.clear()
+            self._tagged.clear()
+            for recent in self._recent.values():
+                recent.clear()
+
+    def stats(self) -> dict:
+        now = self.clock()
+        # Copy under the mutex: computes on other threads add and drop
+        # entries and bump counters while the response is being built.
+        with self._mutex:
+            entries = list(self._entries.items())
+            counters = {report: stats.as_dict() for report, stats in self._stats.items()}
+        reports = {}
+        for report in sorted({slot[0] for slot, _ in entries} | set(counters)):
+            reports[report] = {
+                **counters.get(report, _ReportStats().as_dict()),
+                "entries": [
+                    {
+                        "key": slot[1],
+                        "cached_at": entry.cached_at.isoformat(),
+                        "age_seconds": round(entry.age(now), 1),
+                        "fresh": entry.is_fresh(now),
+                        "tags": sorted(entry.tags),
+                    }
+                    for slot, entry in entries
+                    if slot[0] == report
+                ],
+            }
+        return {
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_seconds,
+            "reports": reports,
+        }
+
+    def _invalidate(self, slots: Iterable) -> int:
+        count = 0
+        for slot in slots:
+            entry = self._entries.get(slot)
+            if entry is None or entry.invalidated:
+                continue
+            if slot[0] in self._max_entries:
+                self._drop(slot)
+            else:
+                entry.invalidated = True
+            self._stats_for(slot[0]).invalidations += 1
+            count += 1
+        return count
+
+    def _touch(self, slot) -> None:
+        recent = self._recent.get(slot[0])
+        if recent is not None:
+            with self._mutex:
+                recent[slot[1]] = None
+                recent.move_to_end(slot[1])
+
+    def _evict(self, report: str) -> None:
+        recent = self._recent[report]
+        while len(recent) > self._max_entries[report]:
+            with self._mutex:
+                key = next(iter(recent))
+            self._drop((report, key))
+            self._stats_for(report).evictions += 1
+
+    def _drop(self, slot) -> None:
+        """Forget a slot entirely: entry, tag index, LRU position and idle lock."""
+        self._untag(slot)
+        with self._mutex:
+            self._entries.pop(slot, None)
+            recent = self._recent.get(slot[0])
+            if recent is not None:
+                recent.pop(slot[1], None)
+        self._discard_lock(slot)
+
+    def _untag(self, slot) -> None:
+        entry = self._entries.get(slot)
+        if entry is None:
+            return
+        with self._mutex:
+            for tag in entry.tags:
+                slots = self._tagged.get(tag)
+                if slots is not None:
+                    slots.discard(slot)
+                    if not slots:
+                        del self._tagged[tag]
+
+    def _discard_lock(self, slot) -> None:
+        # Only bounded reports have an unbounded key space; the rest keep
+        # their handful of locks.
+        if slot[0] not in self._max_entries:
+            return
+        with self._mutex:
+            lock = self._locks.get(slot)
+            if lock is not None and not lock.locked():
+                del self._locks[slot]
+
+    def _response(self, entry: _Entry, now: float, stale: bool = False) -> dict:
+        response = dict(entry.data)
+        response["cached"] = True
+        response["cache_age_minutes"] = round(entry.age(now) / 60, 1)
+        if stale:
+            response["stale"] = True
+        return response
+
+    def _lock_for(self, slot) -> threading.Lock:
+        with self._mutex:
+            return self._locks.setdefault(slot, threading.Lock())
+
+    def _stats_for(self, report: str) -> _ReportStats:
+        with self._mutex:
+            return self._stats.setdefault(report, _ReportStats())
+
+
+report_cache = ReportCache()
+
+
+def _collect_report_cache_tags(session, flush_context, instances) -> None:
+    tags = session.info.setdefault(_PENDING_TAGS_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tag = WRITE_TAGS.get(type(obj).__name__)
+        if tag is not None:
+            tags.add(tag)
+
+
+def _apply_report_cache_tags(session) -> None:
+    for tag in session.info.pop(_PENDING_TAGS_KEY, ()):
+        count = report_cache.invalidate_tag(tag)
+        if count:
+            logger.debug("Report cache: %s write invalidated %d entries", tag, count)
+
+
+def _discard_report_cache_tags(session) -> None:
+    session.info.pop(_PENDING_TAGS_KEY, None)
+
+
+def install_report_cache_invalidation(target) -> None:
+    """Invalidate tagged report_cache entries after commits from `target`."""
+    from session_hooks import install_session_hooks
+
+    install_session_hooks(
+        target,
+        _collect_report_cache_tags,
+        _apply_report_cache_tags,
+        _discard_report_cache_tags,
+    )
@@ -0,0 +1,188 @@
+"""Background warm-up of the admin reports (report_cache).
+
+After a deploy the report cache is empty, so the first admin to open the
+dashboard waited for every report to compute, and entries then expired
+hourly in the middle of use. The standard views (the ones the endpoints
+cache) are now registered here with a staleness budget, and the scheduler
+runs one job per view every WARMUP_CHECK_MINUTES, their start times spread
+evenly across the interval so two heavy reports never start together.
+A job recomputes its view when the cached entry is missing, invalidated
+by a booking/payment/customer write, or older than its budget; otherwise
+it does nothing. Budgets stay below the cache TTL, so a warmed view is
+recomputed before it can expire under an admin.
+
+Warming goes through report_cache.get_or_compute(refresh=True), so it
+joins a computation an admin request already started instead of running a
+second one. Each job runs in the scheduler's thread with its own session.
+The per-view age, last compute time and failures are served by
+/api/admin/report-warmup.
+
+Like the cache, this is per process: every worker warms its own copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from report_cache import ReportCache, report_cache
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CHECK_MINUTES = 5
+# First run after startup; leaves the deploy's migrations and the first
+# requests alone.
+WARMUP_START_DELAY_SECONDS = 120
+# Default staleness budget: recompute once the entry is this old.
+WARMUP_BUDGET_SECONDS = 45 * 60
+
+
+@dataclass
+class WarmReport:
+    """One standard view to keep warm."""
+    report: str
+    key: Hashable
+    compute: Callable[[Any], Any]  # (db) -> payload, or an awaitable of it
+    tags: tuple = ()
+    budget_seconds: float = WARMUP_BUDGET_SECONDS
+    # Filled in as the view is warmed.
+    warm_runs: int = 0
+    failures: int = 0
+    last_warmed_at: Optional[datetime] = None
+    last_compute_seconds: Optional[float] = None
+    compute_seconds_total: float = 0.0
+    last_error: Optional[str] = None
+    last_checked_at: Optional[datetime] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def job_id(self) -> str:
+        return f"report_warmup:{self.report}:{self.key}"
+
+
+class ReportWarmer:
+    """Registry of warmed views; see the module docstring."""
+
+    def __init__(self, cache: ReportCache = report_cache):
+        self.cache = cache
+        self._reports: dict = {}
+
+    def register(
+        self,
+        report: str,
+        key: Hashable,
+        compute: Callable[[Any], Any],
+        *,
+        tags: Iterable[str] = (),
+        budget_seconds: float = WARMUP_BUDGET_SECONDS,
+    ) -> WarmReport:
+        """Keep (report, key) warm; `tags` must match the endpoint's."""
+        if budget_seconds >= self.cache.ttl:
+            raise ValueError(f"budget for {report!r} must be below the cache TTL ({self.cache.ttl}s)")
+        spec = WarmReport(report, key, compute, tuple(tags), budget_seconds)
+        self._reports[(report, key)] = spec
+        return spec
+
+    def reports(self) -> list:
+        return list(self._reports.values())
+
+    def is_due(self, spec: WarmReport) -> bool:
+        age = self.cache.entry_age(spec.report, spec.key)
+        return age is None or age >= spec.budget_seconds
+
+    def warm(self, spec: WarmReport, session_factory, force: bool = False) -> bool:
+        """Recompute `spec` if it is due (or `force`); True if it ran."""
+        if not spec._lock.acquire(blocking=False):
+            return False  # the previous run is still going
+        try:
+            spec.last_checked_at = datetime.now(timezone.utc)
+            if not force and not self.is_due(spec):
+                return False
+            db = session_factory()
+            started = time.perf_counter()
+            try:
+                asyncio.run(self._compute(spec, db))
+            except Exception as e:
+                spec.failures += 1
+                spec.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Report warm-up %s/%s failed: %s", spec.report, spec.key, e)
+                db.rollback()
+                return False
+            finally:
+                db.close()
+            elapsed = time.perf_counter() - started
+            spec.warm_runs += 1
+            spec.last_warmed_at = datetime.now(timezone.utc)
+            spec.last_compute_seconds = elapsed
+            spec.compute_seconds_total += elapsed
+            spec.last_error = None
+            logger.info("Report warm-up %s/%s took %.2fs", spec.report, spec.key, elapsed)
+            return True
+        finally:
+            spec._lock.release()
+
+    async def _compute(self, spec: WarmReport, db) -> None:
+        async def _payload():
+            data = spec.compute(db)
+            if inspect.isawaitable(data):
+                data = await data
+            return data
+
+        await self.cache.get_or_compute(spec.report, spec.key, _payload, tags=spec.tags, refresh=True)
+
+    def status(self) -> dict:
+        reports = []
+        for spec in self._reports.values():
+            age = self.cache.entry_age(spec.report, spec.key)
+            reports.append({
+                "report": spec.report,
+                "key": spec.key,
+                "budget_seconds": spec.budget_seconds,
+                "age_seconds": round(age, 1) if age is not None else None,
+                "within_budget": age is not None and age < spec.budget_seconds,
+                "last_warmed_at": spec.last_warmed_at.isoformat() if spec.last_warmed_at else None,
+                "last_checked_at": spec.last_checked_at.isoformat() if spec.last_checked_at else None,
+                "compute_seconds_last": round(spec.last_compute_seconds, 3) if spec.last_compute_seconds is not None else None,
+                "compute_seconds_avg": round(spec.compute_seconds_total / spec.warm_runs, 3) if spec.warm_runs else None,
+                "warm_runs": spec.warm_runs,
+                "failures": spec.failures,
+                "last_error": spec.last_error,
+            })
+        return {
+            "check_minutes": WARMUP_CHECK_MINUTES,
+            "cache_ttl_seconds": self.cache.ttl,
+            "reports": reports,
+        }
+
+
+report_warmer = ReportWarmer()
+
+
+def schedule_report_warmup(scheduler, session_factory, warmer: ReportWarmer = report_warmer) -> int:
+    """Add one staggered interval job per registered view; returns the count."""
+    from datetime import timedelta
+
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    reports = warmer.reports()
+    start = datetime.now() + timedelta(seconds=WARMUP_START_DELAY_SECONDS)
+    stagger = WARMUP_CHECK_MINUTES * 60 / max(len(reports), 1)
+    for index, spec in enumerate(reports):
+        scheduler.add_job(
+            warmer.warm,
+            args=(spec, session_factory),
+            trigger=IntervalTrigger(minutes=WARMUP_CHECK_MINUTES),
+            id=spec.job_id,
+            name=f"Warm {spec.report} report ({spec.key})",
+            replace_existing=True,
+            misfire_grace_time=WARMUP_CHECK_MINUTES * 60,
+            coalesce=True,
+            next_run_time=start + timedelta(seconds=index * stagger),
+        )
+    return len(reports)
@@ -28,6 +28,7 @@ from models import (
     PlannerRunListItem, PlannerRunDetail,
     PlannerRunFeedbackCreate, PlannerRunFeedbackResponse, PlannerRunFeedbackOverride,
     PlannerCommitRequest, PlannerCommitResponse, PlannerUndoResponse,
+    FlightDelayImpactConsumeRequest,
     CommittedShiftSnapshot,
     TeamShiftResponse,
 )
@@ -598,7 +599,7 @@ def shift_to_response(shift: RosterShift, db: Session) -> RosterShiftResponse:
 # Dependency: Authentication
 # ============================================================================
 
-async def get_current_user(
+def get_current_user(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ) -> User:
@@ -679,7 +680,7 @@ def calculate_shift_hours(start_time, end_time, is_overnight: bool = False) -> f
 # ============================================================================
 
 @router.get("/staff", response_model=List[EmployeeResponse])
-async def list_all_staff(
+def list_all_staff(
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     auto_assign_excluded: Optional[bool] = Query(
         None,
@@ -708,7 +709,7 @@ async def list_all_staff(
 # ============================================================================
 
 @router.get("/employees", response_model=List[EmployeeResponse])
-async def list_employees(
+def list_employees(
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -727,7 +728,7 @@ async def list_employees(
 
 
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
-async def get_employee(
+def get_employee(
     employee_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -745,7 +746,7 @@ async def get_employee(
 
 
 @router.post("/employees", response_model=EmployeeResponse, status_code=201)
-async def create_employee(
+def create_employee(
     employee: EmployeeCreate,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -784,7 +785,7 @@ async def create_employee(
 
 
 @router.put("/employees/{employee_id}", response_model=EmployeeResponse)
-async def update_employee(
+def update_employee(
     employee_id: int,
     updates: EmployeeUpdate,
     current_user: User = Depends(require_admin),
@@ -825,7 +826,7 @@ async def update_employee(
 
 
 @router.delete("/employees/{employee_id}")
-async def deactivate_employee(
+def deactivate_employee(
     employee_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -849,7 +850,7 @@ async def deactivate_employee(
 
 
 @router.post("/employees/{employee_id}/reactivate")
-async def reactivate_employee(
+def reactivate_employee(
     employee_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -874,7 +875,7 @@ async def reactivate_employee(
 # ============================================================================
 
 @router.get("/roster", response_model=List[RosterShiftResponse])
-async def list_shifts(
+def list_shifts(
     date: Optional[date_type] = Query(None, description="Filter by specific date (YYYY-MM-DD)"),
     date_from: Optional[date_type] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[date_type] = Query(None, description="Filter to date (YYYY-MM-DD)"),
@@ -1057,7 +1058,7 @@ def _build_shift_exceptions(
 
 
 @router.get("/roster/shift-exceptions", response_model=List[ShiftExceptionResponse])
-async def list_shift_exceptions(
+def list_shift_exceptions(
     date_from: date_type = Query(..., description="Start date (YYYY-MM-DD)"),
     date_to: date_type = Query(..., description="End date (YYYY-MM-DD)"),
     current_user: User = Depends(require_admin),
@@ -1117,7 +1118,7 @@ async def list_shift_exceptions(
 # ============================================================================
 
 @router.get("/roster/bookings-for-date")
-async def get_bookings_for_date(
+def get_bookings_for_date(
     date: date_type = Query(..., description="Date to fetch bookings for (YYYY-MM-DD)"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -1202,7 +1203,7 @@ async def get_bookings_for_date(
 # ============================================================================
 
 @router.get("/roster/weekly-hours")
-async def get_weekly_hours(
+def get_weekly_hours(
     week_start: date_type = Query(..., description="Monday of the week (YYYY-MM-DD)"),
     staff_id: Optional[int] = Query(None, description="Filter by specific staff member (admin only)"),
     source: Optional[str] = Query(
@@ -1307,7 +1308,7 @@ async def get_weekly_hours(
 # ============================================================================
 
 @router.get("/roster/monthly-hours")
-async def get_monthly_hours(
+def get_monthly_hours(
     year: int = Query(..., description="Year (YYYY)"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     staff_id: Optional[int] = Query(None, description="Filter by specific staff member"),
@@ -1490,7 +1491,7 @@ async def get_monthly_hours(
 
 
 @router.get("/employee/monthly-hours")
-async def get_employee_monthly_hours(
+def get_employee_monthly_hours(
     year: int = Query(..., description="Year (YYYY)"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     current_user: User = Depends(get_current_user),
@@ -1592,50 +1593,44 @@ async def get_employee_monthly_hours(
 # ============================================================================
 
 @router.get("/roster/export")
-async def export_roster_csv(
+def export_roster_csv(
     week_start: date_type = Query(..., description="Start date for export"),
+    gzip: bool = Query(False, description="Download as a gzip-compressed .csv.gz"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
-    Export roster shifts as CSV.
+    Export roster shifts as CSV, streamed in chunks.
     Dates formatted as DD/MM/YYYY, times as HH:MM.
     """
-    from fastapi.responses import StreamingResponse
-    import csv
-    import io
+    from sqlalchemy.orm import joinedload, lazyload
+    from csv_export import CSV_EXPORT_YIELD_PER, csv_streaming_response
 
     week_end = week_start + timedelta(days=6)
 
-    shifts = db.query(RosterShift).filter(
+    # Staff and the (deprecated single) booking are joined in; the
+    # many-to-many bookings list (selectin by default) is not needed for the file.
+    shifts = db.query(RosterShift).options(
+        joinedload(RosterShift.staff),
+        joinedload(RosterShift.booking),
+        lazyload(RosterShift.bookings),
+    ).filter(
         RosterShift.date >= week_start,
         RosterShift.date <= week_end
-    ).order_by(RosterShift.date, RosterShift.start_time).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header
-    writer.writerow([
-        "Date", "Employee Name", "Shift Type", "Start Time", "End Time",
-        "Booking Ref", "Status", "Notes"
-    ])
+    ).order_by(RosterShift.date, RosterShift.start_time).yield_per(CSV_EXPORT_YIELD_PER)
 
-    for shift in shifts:
+    def format_row(shift):
         # Get booking reference
         booking_ref = ""
-        if shift.booking_id:
-            booking = db.query(Booking).filter(Booking.id == shift.booking_id).first()
-            if booking:
-                booking_ref = booking.reference
+        if shift.booking_id and shift.booking:
+            booking_ref = shift.booking.reference
 
         # Format employee name
         employee_name = "Unassigned"
         if shift.staff:
             employee_name = f"{shift.staff.first_name} {shift.staff.last_name}"
 
-        writer.writerow([
+        return [
             shift.date.strftime("%d/%m/%Y"),
             employee_name,
             shift.shift_type.value.capitalize(),
@@ -1644,21 +1639,22 @@ async def export_roster_csv(
             booking_ref,
             shift.status.value.capitalize(),
             shift.notes or ""
-        ])
-
-    output.seek(0)
+        ]
 
     filename = f"roster_export_{week_start.strftime('%d%m%Y')}.csv"
 
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    return csv_streaming_response(
+        ["Date", "Employee Name", "Shift Type", "Start Time", "End Time",
+         "Booking Ref", "Status", "Notes"],
+        shifts,
+        filename,
+        format_row,
+        gzip=gzip,
     )
 
 
 @router.get("/roster/{shift_id}", response_model=RosterShiftResponse)
-async def get_shift(
+def get_shift(
     shift_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -1673,7 +1669,7 @@ async def get_shift(
 
 
 @router.post("/roster", response_model=RosterShiftResponse, status_code=201)
-async def create_shift(
+def create_shift(
     shift_data: RosterShiftCreate,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -1795,7 +1791,7 @@ def _shift_audit_snapshot(db: Session, shift: RosterShift) -> dict:
 
 
 @router.put("/roster/{shift_id}", response_model=RosterShiftResponse)
-async def update_shift(
+def update_shift(
     shift_id: int,
     updates: RosterShiftUpdate,
     request: Request,
@@ -1994,7 +1990,7 @@ async def update_shift(
 
 
 @router.patch("/roster/{shift_id}/independent-from-parent", response_model=RosterShiftResponse)
-async def patch_shift_independent_from_parent(
+def patch_shift_independent_from_parent(
     shift_id: int,
     body: RosterShiftIndependentUpdate,
     current_user: User = Depends(require_admin),
@@ -2034,7 +2030,7 @@ async def patch_shift_independent_from_parent(
 
 
 @router.patch("/roster/{shift_id}/locked", response_model=RosterShiftResponse)
-async def patch_shift_locked(
+def patch_shift_locked(
     shift_id: int,
     body: RosterShiftLockedUpdate,
     current_user: User = Depends(require_admin),
@@ -2058,7 +2054,7 @@ async def patch_shift_locked(
 
 
 @router.delete("/roster/{shift_id}")
-async def delete_shift(
+def delete_shift(
     shift_id: int,
     request: Request,
     current_user: User = Depends(require_admin),
@@ -2268,7 +2264,7 @@ def _delete_shift_preview(db: Session, shift: RosterShift) -> dict:
 
 
 @router.get("/roster/{shift_id}/delete-preview")
-async def preview_delete_shift(
+def preview_delete_shift(
     shift_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -2281,7 +2277,7 @@ async def preview_delete_shift(
 
 
 @router.post("/roster/{shift_id}/duplicate", response_model=List[RosterShiftResponse])
-async def duplicate_shift(
+def duplicate_shift(
     shift_id: int,
     body: RosterShiftDuplicateRequest,
     current_user: User = Depends(require_admin),
@@ -2453,7 +2449,7 @@ async def duplicate_shift(
 
 
 @router.post("/roster/{shift_id}/merge", response_model=RosterShiftResponse)
-async def merge_shift(
+def merge_shift(
     shift_id: int,
     body: RosterShiftMergeRequest,
     current_user: User = Depends(require_admin),
@@ -2584,7 +2580,7 @@ async def merge_shift(
 
 
 @router.post("/roster/{shift_id}/split", response_model=List[RosterShiftResponse])
-async def split_shift(
+def split_shift(
     shift_id: int,
     body: RosterShiftSplitRequest,
     current_user: User = Depends(require_admin),
@@ -2693,7 +2689,7 @@ async def split_shift(
 
 
 @router.patch("/roster/{shift_id}/unassign", response_model=RosterShiftResponse)
-async def unassign_shift(
+def unassign_shift(
     shift_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -2725,7 +2721,7 @@ async def unassign_shift(
 # ============================================================================
 
 @router.post("/roster/auto-assign", response_model=AutoAssignResponse)
-async def auto_assign_shifts(
+def auto_assign_shifts(
     request: AutoAssignRequest,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -2891,7 +2887,7 @@ async def auto_assign_shifts(
 # ============================================================================
 
 @router.get("/employee/shifts", response_model=List[RosterShiftResponse])
-async def get_employee_shifts(
+def get_employee_shifts(
     date_from: Optional[date_type] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[date_type] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     week_start: Optional[date_type] = Query(None, description="Filter by week starting date"),
@@ -2936,7 +2932,7 @@ async def get_employee_shifts(
 
 
 @router.get("/employee/team-shifts", response_model=List[TeamShiftResponse])
-async def get_team_shifts(
+def get_team_shifts(
     date_from: Optional[date_type] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[date_type] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     week_start: Optional[date_type] = Query(None, description="Filter by week starting date"),
@@ -3003,7 +2999,7 @@ async def get_team_shifts(
 
 
 @router.get("/employee/weekly-hours")
-async def get_employee_weekly_hours(
+def get_employee_weekly_hours(
     week_start: date_type = Query(..., description="Monday of the week (YYYY-MM-DD)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -3054,7 +3050,7 @@ async def get_employee_weekly_hours(
 # ============================================================================
 
 @router.get("/employee/available-shifts", response_model=List[RosterShiftResponse])
-async def get_available_shifts(
+def get_available_shifts(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -3098,7 +3094,7 @@ async def get_available_shifts(
 
 
 @router.post("/employee/claim-shift/{shift_id}")
-async def claim_shift(
+def claim_shift(
     shift_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -3242,7 +3238,7 @@ HOLIDAY_TYPE_CONFIG = {
 
 
 @router.post("/employee/release-shift/{shift_id}")
-async def release_shift(
+def release_shift(
     shift_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -3305,7 +3301,7 @@ async def release_shift(
 
 
 @router.get("/employee/holidays")
-async def get_employee_holidays(
+def get_employee_holidays(
     date_from: Optional[date_type] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[date_type] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     current_user: User = Depends(get_current_user),
@@ -3411,7 +3407,7 @@ def check_shift_conflict_for_unavailability(
 
 
 @router.post("/employee/unavailability")
-async def add_employee_unavailability(
+def add_employee_unavailability(
     start_date: str = Query(..., description="Start date (DD/MM/YYYY)"),
     end_date: str = Query(..., description="End date (DD/MM/YYYY)"),
     start_time: Optional[str] = Query(None, description="Start time (HH:MM) for partial day, or omit for full day"),
@@ -3535,7 +3531,7 @@ async def add_employee_unavailability(
 
 
 @router.get("/employee/unavailability")
-async def get_employee_unavailability(
+def get_employee_unavailability(
     date_from: Optional[str] = Query(None, description="Filter from date (DD/MM/YYYY)"),
     date_to: Optional[str] = Query(None, description="Filter to date (DD/MM/YYYY)"),
     current_user: User = Depends(get_current_user),
@@ -3585,7 +3581,7 @@ async def get_employee_unavailability(
 
 
 @router.delete("/employee/unavailability/{unavailability_id}")
-async def delete_employee_unavailability(
+def delete_employee_unavailability(
     unavailability_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -3617,7 +3613,7 @@ async def delete_employee_unavailability(
 # ============================================================================
 
 @router.get("/payroll/monthly")
-async def get_monthly_payroll(
+def get_monthly_payroll(
     year: int = Query(..., description="Year (e.g., 2026)"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     current_user: User = Depends(require_admin),
@@ -3730,7 +3726,7 @@ async def get_monthly_payroll(
 
 
 @router.get("/employee/payroll/monthly")
-async def get_employee_monthly_payroll(
+def get_employee_monthly_payroll(
     year: int = Query(..., description="Year (e.g., 2026)"),
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     current_user: User = Depends(get_current_user),
@@ -3823,7 +3819,7 @@ def holiday_to_response(holiday: EmployeeHoliday) -> dict:
 
 
 @router.get("/holidays")
-async def list_holidays(
+def list_holidays(
     date_from: Optional[date_type] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[date_type] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     staff_id: Optional[int] = Query(None, description="Filter by staff member"),
@@ -3858,7 +3854,7 @@ async def list_holidays(
 
 
 @router.get("/holidays/for-date")
-async def get_holidays_for_date(
+def get_holidays_for_date(
     date: date_type = Query(..., description="Date to check (YYYY-MM-DD)"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -3876,7 +3872,7 @@ async def get_holidays_for_date(
 
 
 @router.get("/holidays/{holiday_id}")
-async def get_holiday(
+def get_holiday(
     holiday_id: int,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -3891,7 +3887,7 @@ async def get_holiday(
 
 
 @router.post("/holidays", status_code=201)
-async def create_holiday(
+def create_holiday(
     staff_id: int,
     start_date: date_type,
     end_date: date_type,
@@ -4006,7 +4002,7 @@ async def create_holiday(
 
 
 @router.put("/holidays/{holiday_id}")
-async def update_holiday(
+def update_holiday(
     holiday_id: int,
     background_tasks: BackgroundTasks,
     start_date: Optional[date_type] = None,
@@ -4118,7 +4114,7 @@ async def update_holiday(
 
 
 @router.delete("/holidays/{holiday_id}")
-async def delete_holiday(
+def delete_holiday(
     holiday_id: int,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(require_admin),
@@ -4198,7 +4194,7 @@ def _settings_response(parsed: dict) -> RosterPlannerSettingsResponse:
     "/admin/qa/roster-planner/settings",
     response_model=RosterPlannerSettingsResponse,
 )
-async def get_roster_planner_settings(
+def get_roster_planner_settings(
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
 ):
@@ -4209,7 +4205,7 @@ async def get_roster_planner_settings(
     "/admin/qa/roster-planner/settings",
     response_model=RosterPlannerSettingsResponse,
 )
-async def patch_roster_planner_settings(
+def patch_roster_planner_settings(
     payload: RosterPlannerSettingsUpdate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(require_qa_admin),
@@ -4251,7 +4247,7 @@ async def patch_roster_planner_settings(
     "/admin/qa/roster-planner/propose",
     response_model=RosterProposalResponse,
 )
-async def propose_roster_endpoint(
+def propose_roster_endpoint(
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
 ):
@@ -4415,7 +4411,7 @@ def _audit_planner(
     "/admin/qa/roster-planner/commit",
     response_model=PlannerCommitResponse,
 )
-async def commit_planner_run(
+def commit_planner_run(
     request: PlannerCommitRequest,
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
@@ -4514,7 +4510,10 @@ async def commit_planner_run(
     }
     for audit_row in prior_audits:
         try:
-            payload = json.loads(audit_row.event_data or "{}")
+            # event_data is JSONB (a dict); rows still in the session may hold the JSON text.
+            payload = audit_row.event_data or {}
+            if isinstance(payload, str):
+                payload = json.loads(payload)
         except (TypeError, ValueError):
             continue
         for k, v in (payload.get("proposal_to_shift_ids") or {}).items():
@@ -4722,7 +4721,7 @@ async def commit_planner_run(
     "/admin/qa/roster-planner/runs/{run_id}",
     response_model=PlannerUndoResponse,
 )
-async def undo_planner_run(
+def undo_planner_run(
     run_id: str,
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
@@ -4788,7 +4787,7 @@ async def undo_planner_run(
     "/admin/qa/roster-planner/runs",
     response_model=List[PlannerRunListItem],
 )
-async def list_planner_runs(
+def list_planner_runs(
     limit: int = Query(50, ge=1, le=200),
     trigger_event: Optional[str] = Query(None, description="Filter by trigger_event (e.g. booking_confirmed)"),
     current_user: User = Depends(require_qa_admin),
@@ -4836,7 +4835,7 @@ async def list_planner_runs(
     "/admin/qa/roster-planner/runs/{run_id}",
     response_model=PlannerRunDetail,
 )
-async def get_planner_run(
+def get_planner_run(
     run_id: str,
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
@@ -4899,7 +4898,9 @@ async def get_planner_run(
         )
         for audit_row in commit_audits:
             try:
-                payload = json.loads(audit_row.event_data or "{}")
+                payload = audit_row.event_data or {}
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
             except (TypeError, ValueError):
                 continue
             mapping = payload.get("proposal_to_shift_ids") or {}
@@ -5009,7 +5010,7 @@ async def get_planner_run(
     response_model=PlannerRunFeedbackResponse,
     status_code=201,
 )
-async def submit_planner_run_feedback(
+def submit_planner_run_feedback(
     run_id: str,
     payload: PlannerRunFeedbackCreate,
     current_user: User = Depends(require_qa_admin),
@@ -5080,7 +5081,7 @@ def _feedback_row_to_response(row) -> PlannerRunFeedbackResponse:
     "/admin/qa/roster-planner/feedback",
     response_model=List[PlannerRunFeedbackResponse],
 )
-async def list_planner_run_feedback(
+def list_planner_run_feedback(
     shift_date: Optional[date_type] = Query(None),
     shift_staff_id: Optional[int] = Query(None),
     shift_start_time: Optional[str] = Query(
@@ -5444,7 +5445,7 @@ def _resolve_dates(req: RegenerateAutoRequest, settings: PlannerSettings) -> set
 
 
 @router.post("/admin/qa/roster-planner/regenerate-auto")
-async def regenerate_auto_roster(
+def regenerate_auto_roster(
     req: RegenerateAutoRequest,
     current_user: User = Depends(require_qa_admin),
     db: Session = Depends(get_db),
@@ -5500,7 +5501,7 @@ async def regenerate_auto_roster(
 
 
 @router.get("/admin/roster/review-generate-gate")
-async def get_roster_review_generate_gate(
+def get_roster_review_generate_gate(
     date: date_type = Query(..., description="Operational date to review (YYYY-MM-DD)."),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -5509,7 +5510,7 @@ async def get_roster_review_generate_gate(
 
 
 @router.get("/admin/roster/review-generate-gates")
-async def get_roster_review_generate_gates(
+def get_roster_review_generate_gates(
     date_from: date_type = Query(..., description="First operational date to review (YYYY-MM-DD)."),
     date_to: date_type = Query(..., description="Last operational date to review (YYYY-MM-DD)."),
     current_user: User = Depends(require_admin),
@@ -5533,8 +5534,60 @@ async def get_roster_review_generate_gates(
     }
 
 
+def _flight_impact_response(impact) -> dict:
+    def _iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "id": impact.id,
+        "snapshot_id": impact.snapshot_id,
+        "impact_type": impact.impact_type,
+        "booking_id": impact.booking_id,
+        "shift_id": impact.shift_id,
+        "flight_number": impact.flight_number,
+        "flight_date": _iso(impact.flight_date),
+        "board_status": impact.board_status,
+        "booked_arrival_at": _iso(impact.booked_arrival_at),
+        "revised_arrival_at": _iso(impact.revised_arrival_at),
+        "delay_minutes": impact.delay_minutes,
+        "still_covered": impact.still_covered,
+        "overrun_minutes": impact.overrun_minutes,
+        "detail": impact.detail_json,
+        "created_at": _iso(impact.created_at),
+    }
+
+
+@router.get("/admin/roster/flight-impacts")
+def list_pending_flight_impacts(
+    limit: int = Query(200, ge=1, le=500),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    """Unconsumed booking/shift impacts from flight board delays, oldest first."""
+    from flight_delay_propagation import pending_flight_impacts
+
+    impacts = pending_flight_impacts(db, limit=limit)
+    return {"impacts": [_flight_impact_response(i) for i in impacts]}
+
+
+@router.post("/admin/roster/flight-impacts/consume")
+def consume_flight_impacts(
+    payload: FlightDelayImpactConsumeRequest,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    """Mark impacts as handled so they drop out of the pending list."""
+    from flight_delay_propagation import mark_flight_impacts_consumed
+
+    consumed = mark_flight_impacts_consumed(
+        db, payload.impact_ids, now=datetime.now(timezone.utc),
+    )
+    db.commit()
+    return {"consumed": consumed}
+
+
 @router.get("/admin/qa/roster-planner/auto-sweep/dry-run")
-async def dry_run_auto_roster_sweep_endpoint(
+def dry_run_auto_roster_sweep_endpoint(
     date_from: Optional[date_type] = Query(
         None,
         description="First operational date to scan (YYYY-MM-DD). Defaults to tomorrow UK.",
@@ -5570,7 +5623,7 @@ async def dry_run_auto_roster_sweep_endpoint(
 
 
 @router.post("/admin/roster/generate-date")
-async def generate_roster_for_date(
+def generate_roster_for_date(
     req: GenerateRosterForDateRequest,
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -5613,7 +5666,7 @@ async def generate_roster_for_date(
 
 
 @router.delete("/admin/qa/roster-planner/auto-shifts")
-async def delete_all_auto_shifts_endpoint(
+def delete_all_auto_shifts_endpoint(
     date_from: Optional[date_type] = Query(
         None, description="Inclusive lower bound (YYYY-MM-DD). Omit for open-ended."
     ),
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark audit-log reads with event_data as text vs JSONB.
+
+Builds two temporary copies of an audit_logs-shaped table (one with a text
+event_data, one with JSONB and the indexes from alembic revision 3v3ntjsb),
+fills both with the same synthetic funnel traffic, then times:
+
+- the abandoned-carts read: before, every started row plus the completed
+  session IDs are fetched and event_data is parsed in Python; after, the
+  exclusion and the JSON fields are evaluated by Postgres;
+- an email lookup: before, ILIKE over the event_data text; after, the
+  lower(event_data->>'email') expression index.
+
+Temporary tables only; nothing in the real audit_logs table is touched.
+Needs a Postgres DATABASE_URL.
+
+Usage:
+    python scripts/benchmark_audit_event_data.py [--rows 1000000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+EVENT_MIX = (
+    ("dates_selected", 30),
+    ("flight_selected", 25),
+    ("customer_entered", 15),
+    ("payment_initiated", 10),
+    ("payment_succeeded", 5),
+    ("booking_confirmed", 5),
+    ("booking_started", 10),
+)
+
+CREATE_TABLE = """
+    CREATE TEMP TABLE {name} (
+        id serial PRIMARY KEY,
+        session_id varchar(100),
+        event text NOT NULL,
+        event_data {data_type},
+        created_at timestamptz NOT NULL
+    ) ON COMMIT PRESERVE ROWS
+"""
+
+# Session n produces consecutive rows; events follow EVENT_MIX by weight.
+FILL_TABLE = """
+    INSERT INTO {name} (session_id, event, event_data, created_at)
+    SELECT
+        'sess-' || (i / 5),
+        (ARRAY[{events}])[1 + (i * 7919) % {weight_total}],
+        json_build_object(
+            'departure_destination', (ARRAY['Palma', 'Alicante', 'Faro', 'Tenerife', 'Malaga'])[1 + i % 5],
+            'departure_airline', (ARRAY['Ryanair', 'Jet2', 'TUI', 'easyJet'])[1 + i % 4],
+            'dropoff_date', to_char(date '2026-01-01' + (i % 300), 'YYYY-MM-DD'),
+            'pickup_date', to_char(date '2026-01-01' + (i % 300) + 1 + (i % 14), 'YYYY-MM-DD'),
+            'departure_time', '06:30',
+            'arrival_time', '22:15',
+            'email', 'user' || (i % 50000) || '@example.test'
+        )::{cast},
+        now() - ((i % 365) || ' days')::interval - ((i % 1440) || ' minutes')::interval
+    FROM generate_series(1, :rows) AS i
+"""
+
+JSONB_INDEXES = (
+    "CREATE INDEX ON {name} USING gin (event_data jsonb_path_ops)",
+    "CREATE INDEX ON {name} (lower(event_data->>'email'))",
+    "CREATE INDEX ON {name} (event, session_id, created_at) WHERE session_id IS NOT NULL",
+)
+SHARED_INDEXES = (
+    "CREATE INDEX ON {name} (session_id)",
+    "CREATE INDEX ON {name} (event)",
+    "CREATE INDEX ON {name} (created_at)",
+)
+
+STARTED = "('dates_selected', 'flight_selected')"
+COMPLETED = "('payment_succeeded', 'booking_confirmed')"
+
+
+def _abandoned_before(conn):
+    started = conn.execute(text(f"""
+        SELECT session_id, event, event_data, created_at FROM audit_text
+        WHERE created_at >= now() - interval '30 days'
+          AND event IN {STARTED} AND session_id IS NOT NULL
+        ORDER BY created_at DESC
+    """)).fetchall()
+    completed = {
+        row[0] for row in conn.execute(text(f"""
+            SELECT DISTINCT session_id FROM audit_text
+            WHERE created_at >= now() - interval '30 days'
+              AND event IN {COMPLETED} AND session_id IS NOT NULL
+        """))
+    }
+    destinations = {}
+    for session_id, _event, event_data, _created_at in started:
+        if session_id in completed or not event_data:
+            continue
+        data = json.loads(event_data)
+        destinations.setdefault(data.get("departure_destination"), set()).add(session_id)
+    return len(destinations)
+
+
+def _abandoned_after(conn):
+    rows = conn.execute(text(f"""
+        SELECT a.session_id, a.event, a.created_at,
+               a.event_data->>'departure_destination', a.event_data->>'dropoff_date',
+               a.event_data->>'pickup_date', a.event_data->>'departure_time',
+               a.event_data->>'arrival_time', a.event_data->>'departure_airline'
+        FROM audit_jsonb a
+        WHERE a.created_at >= now() - interval '30 days'
+          AND a.event IN {STARTED} AND a.session_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM audit_jsonb c
+              WHERE c.session_id = a.session_id
+                AND c.created_at >= now() - interval '30 days'
+                AND c.event IN {COMPLETED}
+          )
+        ORDER BY a.created_at DESC
+    """)).fetchall()
+    destinations = {}
+    for row in rows:
+        destinations.setdefault(row[3], set()).add(row[0])
+    return len(destinations)
+
+
+def _email_before(conn):
+    return conn.execute(
+        text("SELECT count(*) FROM audit_text WHERE event_data ILIKE :pattern"),
+        {"pattern": "%user4242@example.test%"},
+    ).scalar()
+
+
+def _email_after(conn):
+    return conn.execute(
+        text("SELECT count(*) FROM audit_jsonb WHERE lower(event_data->>'email') = lower(:email)"),
+        {"email": "user4242@example.test"},
+    ).scalar()
+
+
+def _time(fn, conn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(conn)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def _build(conn, rows):
+    events = ", ".join(f"'{event}'" for event, weight in EVENT_MIX for _ in range(weight))
+    weight_total = sum(weight for _, weight in EVENT_MIX)
+    for name, data_type, cast in (("audit_text", "text", "text"), ("audit_jsonb", "jsonb", "jsonb")):
+        started = time.perf_counter()
+        conn.execute(text(CREATE_TABLE.format(name=name, data_type=data_type)))
+        conn.execute(
+            text(FILL_TABLE.format(name=name, events=events, weight_total=weight_total, cast=cast)),
+            {"rows": rows},
+        )
+        for statement in SHARED_INDEXES + (JSONB_INDEXES if data_type == "jsonb" else ()):
+            conn.execute(text(statement.format(name=name)))
+        conn.execute(text(f"ANALYZE {name}"))
+        print(f"Built {name}: {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query; the median is reported")
+    args = parser.parse_args()
+
+    if engine is None or engine.dialect.name != "postgresql":
+        print("This benchmark needs a Postgres DATABASE_URL.")
+        sys.exit(1)
+
+    with engine.connect() as conn:
+        _build(conn, args.rows)
+        print(f"\n{'query':<18}{'text (s)':>10}{'jsonb (s)':>11}{'speed-up':>10}")
+        for label, before, after in (
+            ("abandoned carts", _abandoned_before, _abandoned_after),
+            ("email lookup", _email_before, _email_after),
+        ):
+            before_s, before_result = _time(before, conn, args.repeat)
+            after_s, after_result = _time(after, conn, args.repeat)
+            if before_result != after_result:
+                print(f"  warning: {label} results differ ({before_result} vs {after_result})")
+            print(f"{label:<18}{before_s:>10.3f}{after_s:>11.3f}{before_s / after_s:>9.1f}x")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Session hooks shared by the derived-table trackers.
+
+booking_stats, occupancy_timeline, funnel_sessions and report_cache each
+keep something derived from ORM writes up to date the same way: a
+before_flush listener collects what changed into session.info, a commit
+listener applies it, and after_rollback throws the collection away.
+install_session_hooks() registers that trio; attr_values()/changed() read
+an instance's attribute history inside before_flush.
+
+Trackers that rewrite rows other transactions may rewrite at the same
+moment apply after commit through run_locked(): a short transaction of its
+own that takes Postgres advisory locks on the affected keys before reading,
+so concurrent refreshes of the same key queue instead of racing.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Attempts at a post-commit refresh before leaving it to the nightly job.
+REFRESH_ATTEMPTS = 2
+
+
+def attr_values(obj, field: str) -> list:
+    """Current and (if modified in this flush) previous values of a field."""
+    from sqlalchemy import inspect
+
+    history = inspect(obj).attrs[field].history
+    return [*history.added, *history.unchanged, *history.deleted]
+
+
+def changed(obj, fields) -> bool:
+    """Whether any of `fields` is modified on `obj` in this flush."""
+    from sqlalchemy import inspect
+
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def install_session_hooks(
+    target,
+    collect: Callable,
+    apply: Callable,
+    discard: Callable,
+    *,
+    apply_on: str = "after_commit",
+) -> None:
+    """Register collect (before_flush), apply (`apply_on`) and discard
+    (after_rollback) on `target`.
+
+    `target` is a sessionmaker (or a single Session). Safe to call twice.
+    """
+    from sqlalchemy import event
+
+    for name, fn in (
+        ("before_flush", collect),
+        (apply_on, apply),
+        ("after_rollback", discard),
+    ):
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
+
+
+def run_locked(bind, lock_keys: Iterable[str], work: Callable, *, label: str) -> bool:
+    """Run work(db) in a new session on `bind` and commit it.
+
+    pg_advisory_xact_lock(hashtext(key)) is taken for every key first, in
+    sorted order so overlapping refreshes never deadlock, and held until
+    commit. Retried up to REFRESH_ATTEMPTS times; returns False if every
+    attempt failed. `label` names the work in the log.
+    """
+    from sqlalchemy import text as _sql_text
+    from sqlalchemy.orm import Session
+
+    lock_keys = sorted(set(lock_keys))
+    for attempt in range(1, REFRESH_ATTEMPTS + 1):
+        db = Session(bind=bind)
+        try:
+            for key in lock_keys:
+                db.execute(_sql_text("SELECT pg_advisory_xact_lock(hashtext(:k))"), {"k": key})
+            work(db)
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.warning(
+                "%s failed attempt=%s/%s error=%s", label, attempt, REFRESH_ATTEMPTS, e,
+            )
+        finally:
+            db.close()
+    return False
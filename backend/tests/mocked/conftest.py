@@ -58,6 +58,36 @@ def _create_sqlite_users_table(engine):
         ))
 
 
+def _sqlite_timezone(zone, value):
+    """Postgres timezone(zone, timestamptz): local wall time in `zone`.
+
+    SQLite stores DateTime columns as naive UTC text.
+    """
+    if value is None:
+        return None
+    from datetime import datetime, timezone
+    from zoneinfo import ZoneInfo
+
+    stamp = datetime.fromisoformat(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(ZoneInfo(zone)).replace(tzinfo=None).isoformat(" ")
+
+
+def _sqlite_date_trunc(unit, value):
+    """Postgres date_trunc for 'day', 'week' (ISO Monday) and 'month'."""
+    if value is None:
+        return None
+    from datetime import datetime, timedelta
+
+    stamp = datetime.fromisoformat(value).replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        stamp -= timedelta(days=stamp.weekday())
+    elif unit == "month":
+        stamp = stamp.replace(day=1)
+    return stamp.isoformat(" ")
+
+
 def _build_sqlite_sessionmaker():
     import db_models  # noqa: F401 - registers ORM tables on Base.metadata
     from database import Base
@@ -80,6 +110,8 @@ def _build_sqlite_sessionmaker():
             1,
             lambda _value: None,
         )
+        dbapi_connection.create_function("timezone", 2, _sqlite_timezone)
+        dbapi_connection.create_function("date_trunc", 2, _sqlite_date_trunc)
 
     sqlite_tables = _sqlite_tables(Base)
     _create_sqlite_users_table(engine)
@@ -147,6 +179,22 @@ def db_session():
         Base.metadata.drop_all(bind=engine, tables=sqlite_tables)
 
 
+@pytest.fixture
+def booking_stats_from_bookings(monkeypatch):
+    """Serve the booking stats rollup from an in-memory booking list.
+
+    For fake-DB tests of /api/admin/bookings/stats, which reads
+    booking_stats_daily rather than bookings.
+    """
+    import booking_stats
+
+    def _install(bookings):
+        rows = booking_stats.stats_rows_for_bookings(bookings)
+        monkeypatch.setattr(booking_stats, "load_booking_stats_rows", lambda db: rows)
+
+    return _install
+
+
 @pytest.fixture(autouse=True)
 def isolate_environment(monkeypatch, request):
     """Keep the shell's ENVIRONMENT out of mocked tests.
@@ -229,7 +277,8 @@ def reset_app_state():
     Automatically reset FastAPI app state after each test.
 
     This prevents test pollution when multiple test files use
-    app.dependency_overrides.
+    app.dependency_overrides, and drops the process-local live flight
+    board so one test's board never serves another's.
     """
     yield
 
@@ -239,6 +288,8 @@ def reset_app_state():
         app.dependency_overrides.clear()
     except ImportError:
         pass  # main not imported in this test
+    from flight_board_service import live_flight_board
+    live_flight_board.reset()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -0,0 +1,202 @@
+"""
+Tests for keyset pagination and grouped facets on the admin flights tables.
+
+Covers:
+- GET /api/admin/flights/departures?limit=&cursor=&capacity_state=
+- GET /api/admin/flights/arrivals?limit=&cursor=
+- GET /api/admin/flights/filters (single grouped query with counts)
+
+Uses the in-memory SQLite db_session so ordering, cursors and the grouped
+facet query run as real SQL.
+"""
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app, require_admin
+from db_models import FlightDeparture, FlightArrival
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[require_admin] = lambda: SimpleNamespace(
+        id=1, email="admin@tag.test", is_admin=True,
+    )
+    main._flight_filters_cache["data"] = None
+    yield TestClient(app)
+    main._flight_filters_cache["data"] = None
+
+
+def _departure(db, flight_date, hhmm, flight_number, **kw):
+    h, m = map(int, hhmm.split(":"))
+    row = FlightDeparture(
+        date=flight_date,
+        departure_time=time(h, m),
+        flight_number=flight_number,
+        airline_code=kw.pop("airline_code", "TOM"),
+        airline_name=kw.pop("airline_name", "TUI Airways"),
+        destination_code=kw.pop("destination_code", "TFS"),
+        destination_name=kw.pop("destination_name", "Tenerife"),
+        capacity_tier=kw.pop("capacity_tier", 4),
+        slots_booked_early=kw.pop("slots_booked_early", 0),
+        slots_booked_late=kw.pop("slots_booked_late", 0),
+    )
+    db.add(row)
+    return row
+
+
+def _arrival(db, flight_date, hhmm, flight_number, **kw):
+    h, m = map(int, hhmm.split(":"))
+    row = FlightArrival(
+        date=flight_date,
+        arrival_time=time(h, m),
+        flight_number=flight_number,
+        airline_code=kw.pop("airline_code", "TOM"),
+        airline_name=kw.pop("airline_name", "TUI Airways"),
+        origin_code=kw.pop("origin_code", "TFS"),
+        origin_name=kw.pop("origin_name", "Tenerife"),
+    )
+    db.add(row)
+    return row
+
+
+def _walk(client, path, key, **params):
+    """Follow next_cursor until exhausted, returning every page's rows."""
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        resp = client.get(path, params=query)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        assert body["has_more"] is (cursor is not None)
+        if cursor is None:
+            return pages
+
+
+class TestDepartureKeyset:
+    def test_H_pages_cover_every_row_once_in_order(self, client, db_session):
+        # Two flights share (date, time) so the id tiebreak is exercised.
+        _departure(db_session, date(2026, 6, 1), "10:00", "TOM1")
+        _departure(db_session, date(2026, 6, 1), "10:00", "TOM2")
+        _departure(db_session, date(2026, 6, 1), "08:00", "TOM3")
+        _departure(db_session, date(2026, 6, 2), "06:00", "TOM4")
+        _departure(db_session, date(2026, 7, 1), "12:00", "TOM5")
+        db_session.commit()
+
+        pages = _walk(client, "/api/admin/flights/departures", "departures", limit=2)
+
+        assert [len(p) for p in pages] == [2, 2, 1]
+        numbers = [row["flight_number"] for page in pages for row in page]
+        assert numbers == ["TOM3", "TOM1", "TOM2", "TOM4", "TOM5"]
+
+    def test_H_descending_pages_mirror_ascending(self, client, db_session):
+        for i, hhmm in enumerate(["06:00", "07:00", "08:00", "09:00"]):
+            _departure(db_session, date(2026, 6, 1), hhmm, f"TOM{i}")
+        db_session.commit()
+
+        pages = _walk(
+            client, "/api/admin/flights/departures", "departures",
+            limit=3, sort_order="desc",
+        )
+
+        numbers = [row["flight_number"] for page in pages for row in page]
+        assert numbers == ["TOM3", "TOM2", "TOM1", "TOM0"]
+
+    def test_U_capacity_state_filter(self, client, db_session):
+        _departure(db_session, date(2026, 6, 1), "06:00", "CALL", capacity_tier=0)
+        _departure(db_session, date(2026, 6, 1), "07:00", "FULL",
+                   capacity_tier=2, slots_booked_early=1, slots_booked_late=1)
+        _departure(db_session, date(2026, 6, 1), "08:00", "LAST",
+                   capacity_tier=2, slots_booked_early=1)
+        _departure(db_session, date(2026, 6, 1), "09:00", "OPEN", capacity_tier=4)
+        db_session.commit()
+
+        for state, expected in [
+            ("call_us", "CALL"), ("full", "FULL"), ("last_slot", "LAST"), ("available", "OPEN"),
+        ]:
+            resp = client.get("/api/admin/flights/departures",
+                              params={"capacity_state": state, "limit": 10})
+            assert resp.status_code == 200
+            assert [d["flight_number"] for d in resp.json()["departures"]] == [expected]
+
+    def test_B_unpaged_request_keeps_legacy_shape(self, client, db_session):
+        _departure(db_session, date(2026, 6, 1), "06:00", "TOM1")
+        db_session.commit()
+
+        body = client.get("/api/admin/flights/departures",
+                          params={"airline": "TOM", "refresh": True}).json()
+
+        assert body["total"] == 1
+        assert "next_cursor" not in body
+
+    def test_U_malformed_cursor_is_400(self, client, db_session):
+        resp = client.get("/api/admin/flights/departures",
+                          params={"limit": 5, "cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+
+
+class TestArrivalKeyset:
+    def test_H_pages_cover_every_row_once_in_order(self, client, db_session):
+        _arrival(db_session, date(2026, 6, 8), "15:00", "TOM9")
+        _arrival(db_session, date(2026, 6, 8), "11:00", "TOM8")
+        _arrival(db_session, date(2026, 6, 9), "09:00", "TOM7")
+        db_session.commit()
+
+        pages = _walk(client, "/api/admin/flights/arrivals", "arrivals", limit=2)
+
+        numbers = [row["flight_number"] for page in pages for row in page]
+        assert numbers == ["TOM8", "TOM9", "TOM7"]
+
+
+class TestGroupedFacets:
+    def test_H_facets_carry_counts_from_both_tables(self, client, db_session):
+        _departure(db_session, date(2026, 6, 1), "06:00", "TOM1", capacity_tier=0)
+        _departure(db_session, date(2026, 6, 2), "06:00", "TOM2")
+        _departure(db_session, date(2026, 7, 1), "06:00", "EZY1",
+                   airline_code="EZY", airline_name="easyJet",
+                   destination_code="AGP", destination_name="Malaga")
+        _arrival(db_session, date(2026, 6, 8), "15:00", "TOM3", origin_code="PMI", origin_name="Palma")
+        db_session.commit()
+
+        body = client.get("/api/admin/flights/filters", params={"refresh": True}).json()
+
+        assert body["airlines"] == [
+            {"code": "EZY", "name": "easyJet", "count": 1},
+            {"code": "TOM", "name": "TUI Airways", "count": 3},
+        ]
+        assert body["destinations"] == [
+            {"code": "AGP", "name": "Malaga", "count": 1},
+            {"code": "TFS", "name": "Tenerife", "count": 2},
+        ]
+        assert body["origins"] == [{"code": "PMI", "name": "Palma", "count": 1}]
+        assert [(m["label"], m["count"]) for m in body["months"]] == [("Jun 2026", 3), ("Jul 2026", 1)]
+        states = {s["state"]: s["count"] for s in body["capacity_states"]}
+        assert states == {"call_us": 1, "available": 2, "last_slot": 0, "full": 0}
+
+    def test_H_filters_issue_a_single_query(self, client, db_session):
+        from sqlalchemy import event
+
+        _departure(db_session, date(2026, 6, 1), "06:00", "TOM1")
+        db_session.commit()
+        statements = []
+        engine = db_session.get_bind()
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            resp = client.get("/api/admin/flights/filters", params={"refresh": True})
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert resp.status_code == 200
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
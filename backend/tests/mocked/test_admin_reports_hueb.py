@@ -28,7 +28,7 @@ from fastapi.testclient import TestClient
 import main
 from main import app, require_admin
 from database import get_db
-from db_models import BookingStatus, PaymentStatus
+from db_models import BookingForecast, BookingStatus, PaymentStatus
 
 UK = pytz.timezone("Europe/London")
 
@@ -77,18 +77,7 @@ def _booking(**kw):
 
 def _reset_caches():
     """Clear in-memory caches between tests so previous tests don't poison the next one."""
-    try:
-        main._financial_cache = {"data": None, "cached_at": None}
-    except Exception:
-        pass
-    try:
-        main._abandoned_carts_cache = {"data": None, "cached_at": None}
-    except Exception:
-        pass
-    try:
-        main._forecast_cache = {"data": None, "cached_at": None}
-    except Exception:
-        pass
+    main.report_cache.clear()
 
 
 # ============================================================================
@@ -120,7 +109,8 @@ class TestBookingStats:
         db.query.side_effect = _query
         return db
 
-    def test_H_empty_bookings(self):
+    def test_H_empty_bookings(self, booking_stats_from_bookings):
+        booking_stats_from_bookings([])
         _override(self._wire([]))
         resp = TestClient(app).get("/api/admin/bookings/stats")
         assert resp.status_code == 200
@@ -128,7 +118,7 @@ class TestBookingStats:
         assert body["daily"] == []
         assert body["monthly"] == []
 
-    def test_H_with_bookings(self):
+    def test_H_with_bookings(self, booking_stats_from_bookings):
         # Stats bucket on the effective (paid, UK) day, so vary paid_at — two
         # distinct payment days should yield two daily entries.
         b1 = _booking(id=1, status=BookingStatus.CONFIRMED,
@@ -139,6 +129,7 @@ class TestBookingStats:
                       created_at=datetime(2026, 5, 2, 10, 0),
                       payment=SimpleNamespace(amount_pence=9900, status=PaymentStatus.SUCCEEDED,
                                               paid_at=datetime(2026, 5, 2, 11, 0)))
+        booking_stats_from_bookings([b1, b2])
         _override(self._wire([b1, b2]))
         resp = TestClient(app).get("/api/admin/bookings/stats")
         assert resp.status_code == 200
@@ -147,14 +138,16 @@ class TestBookingStats:
         assert len(body["daily"]) == 2
         assert body["status_totals"]["confirmed"] >= 1
 
-    def test_E_booking_without_payment(self):
+    def test_E_booking_without_payment(self, booking_stats_from_bookings):
         b = _booking(id=5, payment=None)
+        booking_stats_from_bookings([b])
         _override(self._wire([b]))
         resp = TestClient(app).get("/api/admin/bookings/stats")
         assert resp.status_code == 200
 
-    def test_E_booking_with_status_none(self):
+    def test_E_booking_with_status_none(self, booking_stats_from_bookings):
         b = _booking(id=6, status=None)
+        booking_stats_from_bookings([b])
         _override(self._wire([b]))
         resp = TestClient(app).get("/api/admin/bookings/stats")
         assert resp.status_code == 200
@@ -231,19 +224,13 @@ class TestFinancialReport:
         _override(self._wire([]))
         TestClient(app).get("/api/admin/reports/financial")
         # Force a cache write by manually injecting
-        main._financial_cache = {
-            "data": {"bookings": [], "stats": {}},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("financial", None, {"bookings": [], "stats": {}})
         resp = TestClient(app).get("/api/admin/reports/financial")
         assert resp.status_code == 200
         assert resp.json().get("cached") is True
 
     def test_E_refresh_bypasses_cache(self):
-        main._financial_cache = {
-            "data": {"bookings": [], "stats": {}},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("financial", None, {"bookings": [], "stats": {}})
         _override(self._wire([]))
         resp = TestClient(app).get("/api/admin/reports/financial?refresh=true")
         assert resp.status_code == 200
@@ -338,20 +325,14 @@ class TestAbandonedCarts:
         assert resp.status_code == 200
 
     def test_E_cache_hit(self):
-        main._abandoned_carts_cache = {
-            "data": {"total_abandoned": 5, "by_period": []},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("abandoned_carts", None, {"total_abandoned": 5, "by_period": []})
         _override(self._wire())
         resp = TestClient(app).get("/api/admin/reports/abandoned-carts")
         assert resp.status_code == 200
         assert resp.json().get("cached") is True
 
     def test_E_refresh_bypasses_cache(self):
-        main._abandoned_carts_cache = {
-            "data": {"total_abandoned": 99},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("abandoned_carts", None, {"total_abandoned": 99})
         _override(self._wire())
         resp = TestClient(app).get("/api/admin/reports/abandoned-carts?refresh=true")
         assert resp.status_code == 200
@@ -370,27 +351,39 @@ class TestBookingsForecast:
     def teardown_method(self):
         _clear()
 
-    def _wire(self, historical=None, abandoned=None):
+    def _wire(self, historical=None, abandoned=None, stored=None):
         db = MagicMock()
         call_n = {"i": 0}
         def _query(*args):
-            call_n["i"] += 1
             chain = MagicMock()
             chain.filter.return_value = chain
             chain.order_by.return_value = chain
+            chain.outerjoin.return_value = chain
             chain.distinct.return_value = chain
+            if args[0] is BookingForecast:
+                chain.first.return_value = stored
+                return chain
+            call_n["i"] += 1
             if call_n["i"] == 1:
                 chain.all.return_value = historical or []
-            else:
+            elif call_n["i"] == 2:
                 chain.all.return_value = abandoned or []
+            else:
+                chain.yield_per.return_value = [
+                    (b.dropoff_date, b.created_at, None) for b in historical or []
+                ]
             return chain
         db.query.side_effect = _query
         return db
 
     def test_H_empty(self):
-        _override(self._wire())
+        db = self._wire()
+        _override(db)
         resp = TestClient(app).get("/api/admin/reports/bookings-forecast")
         assert resp.status_code == 200
+        assert resp.json()["cached"] is False
+        assert len(resp.json()["projection"]["days"]) == 30
+        db.add.assert_called_once()
 
     def test_H_with_historical_data(self):
         b1 = _booking(id=1, dropoff_destination="Tenerife",
@@ -400,23 +393,27 @@ class TestBookingsForecast:
         _override(self._wire(historical=[b1, b2]))
         resp = TestClient(app).get("/api/admin/reports/bookings-forecast")
         assert resp.status_code == 200
+        assert resp.json()["projection"]["training_bookings"] >= 0
 
-    def test_E_cache_hit(self):
-        main._forecast_cache = {
-            "data": {"predictions": [], "destinations": []},
-            "cached_at": datetime.now(UK),
-        }
-        _override(self._wire())
+    def test_E_stored_forecast_is_served(self):
+        stored = SimpleNamespace(
+            payload={"predictions": [], "destinations": []},
+            generated_at=datetime.utcnow() - timedelta(hours=2),
+        )
+        db = self._wire(stored=stored)
+        _override(db)
         resp = TestClient(app).get("/api/admin/reports/bookings-forecast")
         assert resp.status_code == 200
         assert resp.json().get("cached") is True
+        assert resp.json()["cache_age_minutes"] >= 120
+        db.add.assert_not_called()
 
-    def test_E_refresh_bypasses_cache(self):
-        main._forecast_cache = {
-            "data": {"predictions": []},
-            "cached_at": datetime.now(UK),
-        }
-        _override(self._wire())
+    def test_E_refresh_recomputes_and_stores(self):
+        stored = SimpleNamespace(payload={"predictions": []}, generated_at=datetime.utcnow())
+        db = self._wire(stored=stored)
+        _override(db)
         resp = TestClient(app).get("/api/admin/reports/bookings-forecast?refresh=true")
         assert resp.status_code == 200
         assert resp.json().get("cached") is not True
+        db.add.assert_called_once()
+        db.commit.assert_called_once()
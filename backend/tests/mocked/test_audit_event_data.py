@@ -0,0 +1,95 @@
+"""
+Tests for AuditLog.event_data as a JSON document (JSONB on Postgres).
+
+Covers the AuditEventData column type (dicts, legacy JSON text, invalid
+text, NULL), the abandoned-carts report reading event_data fields and
+excluding completed sessions in SQL, and the audit-log email/session
+filters.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import main
+from db_models import AuditLog, AuditLogEvent
+
+
+class TestAuditEventDataColumn:
+    def test_H_dicts_and_legacy_json_text_are_stored_as_documents(self, db_session):
+        db_session.add_all([
+            AuditLog(id=1, event=AuditLogEvent.DATES_SELECTED, event_data={"email": "a@example.test"}),
+            AuditLog(id=2, event=AuditLogEvent.DATES_SELECTED, event_data='{"email": "b@example.test"}'),
+        ])
+        db_session.commit()
+
+        stored = dict(db_session.execute(text("SELECT id, event_data FROM audit_logs ORDER BY id")).all())
+        db_session.expire_all()
+
+        assert stored == {1: '{"email": "a@example.test"}', 2: '{"email": "b@example.test"}'}
+        assert db_session.get(AuditLog, 2).event_data == {"email": "b@example.test"}
+
+    def test_E_invalid_text_and_none(self, db_session):
+        db_session.add_all([
+            AuditLog(id=1, event=AuditLogEvent.DATES_SELECTED, event_data="not json"),
+            AuditLog(id=2, event=AuditLogEvent.DATES_SELECTED, event_data=None),
+        ])
+        db_session.commit()
+        db_session.expire_all()
+
+        assert db_session.get(AuditLog, 1).event_data == "not json"
+        assert db_session.get(AuditLog, 2).event_data is None
+        assert db_session.execute(text("SELECT count(*) FROM audit_logs WHERE event_data IS NULL")).scalar() == 1
+
+
+class TestAbandonedCartsSql:
+    def test_H_fields_come_from_event_data_and_completed_sessions_are_excluded(self, db_session):
+        now = datetime.utcnow()
+        flight = {
+            "departure_destination": "Palma", "departure_airline": "TUI",
+            "dropoff_date": "2026-07-01", "pickup_date": "2026-07-08",
+            "departure_time": "13:45", "arrival_time": "12:15",
+        }
+        db_session.add_all([
+            AuditLog(session_id="open", event=AuditLogEvent.DATES_SELECTED,
+                     event_data={"departure_destination": "Palma"}, created_at=now - timedelta(hours=3)),
+            AuditLog(session_id="open", event=AuditLogEvent.FLIGHT_SELECTED,
+                     event_data=flight, created_at=now - timedelta(hours=2)),
+            AuditLog(session_id="paid", event=AuditLogEvent.FLIGHT_SELECTED,
+                     event_data={**flight, "departure_destination": "Faro"}, created_at=now - timedelta(hours=2)),
+            AuditLog(session_id="paid", event=AuditLogEvent.BOOKING_CONFIRMED,
+                     booking_reference="TAG-AB001", created_at=now - timedelta(hours=1)),
+            AuditLog(session_id="bare", event=AuditLogEvent.DATES_SELECTED, created_at=now - timedelta(hours=1)),
+        ])
+        db_session.commit()
+
+        report = main._abandoned_carts_report(db_session, "daily")
+
+        assert report["cumulative"]["total_abandoned"] == 2
+        assert report["cumulative"]["top_destinations"] == [{"destination": "Palma", "count": 1}]
+        assert report["cumulative"]["top_days"] == [{"days": 7, "count": 1}]
+        [recent] = report["recent_abandoned"]
+        assert (recent["session_id"], recent["airline"], recent["days"]) == ("open", "TUI", 7)
+
+
+class TestAuditLogFilters:
+    def test_H_email_and_session_filters_reach_the_sql(self):
+        db = MagicMock()
+        db.execute.return_value.scalar.return_value = 0
+        db.execute.return_value.fetchall.return_value = []
+        main.app.dependency_overrides[main.get_db] = lambda: db
+        main.app.dependency_overrides[main.require_admin] = lambda: SimpleNamespace(id=1, is_admin=True)
+        try:
+            resp = TestClient(main.app).get(
+                "/api/admin/audit-logs", params={"email": " Ada@Example.test ", "session_id": "sess-1"}
+            )
+        finally:
+            main.app.dependency_overrides.clear()
+
+        assert resp.status_code == 200
+        count_sql, params = str(db.execute.call_args_list[0].args[0]), db.execute.call_args_list[0].args[1]
+        assert "lower(event_data->>'email') = lower(:email)" in count_sql
+        assert "session_id = :session_id" in count_sql
+        assert (params["email"], params["session_id"]) == ("Ada@Example.test", "sess-1")
@@ -195,13 +195,14 @@ def _stats_booking(ref, created_at, paid_at, status=BookingStatus.CONFIRMED):
 
 
 @pytest.fixture
-def stats_client():
+def stats_client(booking_stats_from_bookings):
     bookings = [
         # Initiated 23:59 BST on 14 Jun, paid 00:12 BST on 15 Jun -> 15 Jun.
         _stats_booking("TAG-CROSS01", _utc(2026, 6, 14, 22, 59), _utc(2026, 6, 14, 23, 12)),
         # Plainly on 15 Jun.
         _stats_booking("TAG-SAME015", _utc(2026, 6, 15, 9, 0), _utc(2026, 6, 15, 9, 5)),
     ]
+    booking_stats_from_bookings(bookings)
 
     db = SimpleNamespace()
 
@@ -256,12 +257,13 @@ class TestMonthlyPatternPaidBasis:
     def teardown_method(self):
         app.dependency_overrides.clear()
 
-    def test_buckets_by_paid_week_not_created_week(self):
+    def test_buckets_by_paid_week_not_created_week(self, booking_stats_from_bookings):
         from main import get_uk_now
         now = get_uk_now()
         y, m = now.year, now.month
         # Created on day 7 (W1, Days 1-7); paid on day 8 (W2, Days 8-14).
         b = _stats_booking("TAG-WK0001", _utc(y, m, 7, 10, 0), _utc(y, m, 8, 10, 0))
+        booking_stats_from_bookings([b])
         resp = _build_stats_client([b]).get("/api/admin/bookings/stats")
         assert resp.status_code == 200
 
@@ -0,0 +1,140 @@
+"""
+Tests for the nightly bookings forecast (booking_forecast).
+
+Covers the NumPy projection (pace curve, blend with the seasonal baseline,
+bookings made after the as-of date ignored, band), storing and serving
+booking_forecasts rows on the in-memory SQLite db_session, and the
+backtest replaying past forecasts.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import booking_forecast as bf
+from db_models import Booking, BookingForecast, BookingStatus, Customer, Vehicle
+
+
+AS_OF = date(2026, 6, 1)
+
+
+def _history(days=range(-400, 40), leads=(3, 10)):
+    """Two bookings per drop-off day, made `leads` days ahead."""
+    dropoff, booked = [], []
+    for offset in days:
+        day = (AS_OF + timedelta(days=offset)).toordinal()
+        for lead in leads:
+            dropoff.append(day)
+            booked.append(day - lead)
+    return np.array(dropoff), np.array(booked)
+
+
+class TestProjection:
+    def test_H_pace_curve_scales_what_is_on_the_books(self):
+        result = bf.project(*_history(), AS_OF)
+
+        # Days 0-2 have both bookings in, 3-9 only the 10-day one, 10+ none.
+        assert result["on_books"][:11].tolist() == [2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 0]
+        assert result["pace"][[0, 3, 10]].tolist() == [1.0, 0.5, 0.0]
+        assert np.isnan(result["pace_projection"][10])
+        assert result["forecast"].tolist() == [2.0] * 30
+        assert result["trend"] == 1.0
+        assert result["training_bookings"] == 2 * bf.TRAINING_DAYS
+
+    def test_U_bookings_made_on_or_after_as_of_are_ignored(self):
+        dropoff, booked = _history()
+        late = np.array([AS_OF.toordinal() + 5] * 4)
+        result = bf.project(
+            np.concatenate([dropoff, late]), np.concatenate([booked, late - 5]), AS_OF
+        )
+
+        assert result["on_books"][5] == 1
+
+    def test_B_band_widens_with_noise_and_never_drops_below_on_books(self):
+        dropoff, booked = _history(leads=(3,))
+        rng = np.random.default_rng(7)
+        extra = AS_OF.toordinal() - rng.integers(1, bf.TRAINING_DAYS, 300)
+        result = bf.project(
+            np.concatenate([dropoff, extra]), np.concatenate([booked, extra - 3]), AS_OF
+        )
+
+        assert result["residual_sd"] > 0
+        assert (result["lower"] >= result["on_books"]).all()
+        assert (result["upper"] >= result["forecast"]).all()
+        # Days already fully booked at this lead have no band left.
+        width = result["upper"] - result["lower"]
+        assert width[0] == 0
+        assert width[20] > 0
+
+    def test_E_no_history(self):
+        empty = np.array([], dtype=np.int64)
+        payload = bf.projection_payload(bf.project(empty, empty, AS_OF))
+
+        assert payload["totals"] == {"on_books": 0, "forecast": 0.0, "lower": 0.0, "upper": 0.0}
+        assert payload["days"][0]["pace_projection"] is None
+
+
+@pytest.fixture
+def seeded(db_session):
+    customer = Customer(first_name="Ada", last_name="Forecast", email="forecast@example.test", phone="07700900003")
+    db_session.add(customer)
+    db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, registration="FC4 ST", make="Ford", model="Focus", colour="Blue")
+    db_session.add(vehicle)
+    db_session.flush()
+    for n, offset in enumerate(range(-120, 20)):
+        dropoff = AS_OF + timedelta(days=offset)
+        db_session.add(Booking(
+            reference=f"TAG-FC{n:04d}",
+            customer_id=customer.id,
+            vehicle_id=vehicle.id,
+            status=BookingStatus.COMPLETED if offset < 0 else BookingStatus.CONFIRMED,
+            created_at=datetime.combine(dropoff - timedelta(days=7), time(12), tzinfo=timezone.utc),
+            dropoff_date=dropoff,
+            dropoff_time=time(6, 30),
+            pickup_date=dropoff + timedelta(days=7),
+            pickup_time=time(20, 15),
+        ))
+    db_session.commit()
+    return db_session
+
+
+class TestStoredForecast:
+    def test_H_refresh_stores_a_row_that_the_endpoint_serves(self, seeded, monkeypatch):
+        monkeypatch.setattr(bf, "datetime", SimpleNamespace(
+            now=lambda tz=None: datetime(2026, 6, 1, 3, 45, tzinfo=tz),
+        ))
+        seeded.add(BookingForecast(
+            as_of=AS_OF - timedelta(days=bf.KEEP_FORECAST_DAYS + 1),
+            generated_at=datetime(2026, 2, 1, tzinfo=timezone.utc),
+            horizon_days=30, model_version="old", payload={},
+        ))
+        seeded.commit()
+
+        result = bf.refresh_booking_forecast(lambda: seeded)
+        response = bf.latest_booking_forecast(seeded)
+
+        [row] = seeded.query(BookingForecast).all()
+        assert row.as_of == AS_OF
+        assert result["on_books"] == 7
+        assert response["cached"] is True
+        assert response["projection"]["days"][0]["on_books"] == 1
+        assert response["projection"]["days"][0]["forecast"] == pytest.approx(1.0)
+        assert response["data_range"]["total_bookings_analyzed"] == row.payload["data_range"]["total_bookings_analyzed"]
+
+
+class TestBacktest:
+    def test_H_backtest_scores_replayed_forecasts(self, seeded):
+        result = bf.backtest_booking_forecast(
+            seeded, AS_OF - timedelta(days=60), AS_OF - timedelta(days=30), horizon=14, today=AS_OF
+        )
+
+        assert result["runs"] == 5
+        assert [b["days_ahead"] for b in result["by_days_ahead"]] == ["0-6", "7-13"]
+        # One drop-off a day, always booked 7 days ahead: days 0-6 are
+        # fully on the books, so the pace projection is exact.
+        near = result["by_days_ahead"][0]
+        assert near["days"] == 35
+        assert (near["mae"], near["bias"], near["coverage"]) == (0.0, 0.0, 1.0)
+        assert result["overall"]["days"] == 70
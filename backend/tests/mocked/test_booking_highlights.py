@@ -0,0 +1,119 @@
+"""
+Tests for the single-pass booking highlights (booking_highlights).
+
+Uses the in-memory SQLite db_session: the popular report and the fun facts
+come from one streamed query per period, shared through the report cache.
+"""
+from datetime import date, datetime, time, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import booking_highlights
+import main
+from db_models import Booking, BookingStatus, Customer, Payment, PaymentStatus, Vehicle
+
+
+@pytest.fixture
+def seeded(db_session):
+    customer = Customer(first_name="Ada", last_name="Highlights", email="hl@example.test", phone="07700900004")
+    db_session.add(customer)
+    db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, registration="HL1 GHT", make="Ford", model="Focus", colour="Blue")
+    db_session.add(vehicle)
+    db_session.flush()
+
+    def _booking(ref, created_at, paid_at, amount_pence, dropoff, pickup, airline, destination, **extra):
+        booking = Booking(
+            reference=ref, customer_id=customer.id, vehicle_id=vehicle.id,
+            status=extra.pop("status", BookingStatus.CONFIRMED), created_at=created_at,
+            dropoff_date=dropoff, dropoff_time=time(6, 0), pickup_date=pickup, pickup_time=time(20, 0),
+            dropoff_airline_name=airline, dropoff_destination=destination,
+            pickup_airline_name=airline, pickup_origin=destination, **extra,
+        )
+        db_session.add(booking)
+        db_session.flush()
+        if paid_at is not None:
+            db_session.add(Payment(booking_id=booking.id, amount_pence=amount_pence,
+                                   status=PaymentStatus.SUCCEEDED, paid_at=paid_at))
+
+    utc = timezone.utc
+    # Inserted out of effective-time order; TAG-HL2 is the 1st to settle.
+    _booking("TAG-HL1", datetime(2026, 3, 1, 9, tzinfo=utc), datetime(2026, 3, 2, 23, 30, tzinfo=utc), 9900,
+             date(2026, 3, 10), date(2026, 3, 24), "Jet2", "Faro", customer_first_name="Bo", customer_last_name="Snap")
+    _booking("TAG-HL2", datetime(2026, 2, 1, 9, tzinfo=utc), datetime(2026, 2, 1, 9, 5, tzinfo=utc), 4500,
+             date(2026, 6, 1), date(2026, 6, 4), "Ryanair", "Faro")
+    _booking("TAG-HL3", datetime(2026, 3, 3, 5, tzinfo=utc), None, None,
+             date(2026, 3, 3), date(2026, 3, 10), "Jet2", "Palma")
+    _booking("TAG-HL4", datetime(2026, 3, 3, 5, tzinfo=utc), None, None,
+             date(2026, 3, 5), date(2026, 3, 12), "TUI", "Palma", status=BookingStatus.CANCELLED)
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture
+def client(seeded):
+    main.report_cache.clear()
+    main.app.dependency_overrides[main.require_admin] = lambda: SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+    main.report_cache.clear()
+
+
+class TestBuildHighlights:
+    def test_H_one_pass_feeds_both_reports(self, seeded):
+        highlights = booking_highlights.build_highlights(seeded)
+        facts = highlights["funFacts"]
+
+        assert highlights["totalBookings"] == 3
+        assert highlights["airlines"] == [("Jet2", 2), ("Ryanair", 1)]
+        assert sorted(highlights["routes"]) == [["Jet2", "Faro", 1], ["Jet2", "Palma", 1], ["Ryanair", "Faro", 1]]
+        assert [m["reference"] for m in facts["milestones"]] == ["TAG-HL2"]
+        assert facts["longestTrip"]["reference"] == "TAG-HL1"
+        assert facts["longestTrip"]["customerName"] == "Bo Snap"
+        assert facts["highestTransaction"] == {"amount": "£99.00", "reference": "TAG-HL1", "days": 14, "customerName": "Bo Snap"}
+        # Paid 23:30 UTC on 2 Mar is still 2 Mar in UK winter time.
+        assert facts["latestTimeOfNight"]["reference"] == "TAG-HL1"
+        assert facts["busiestDay"]["dates"] == ["Sun 01 Feb 2026", "Mon 02 Mar 2026"]
+        assert facts["lastMinuteBooking"]["reference"] == "TAG-HL3"
+        assert facts["lastMinuteBooking"]["gapTime"] == "01:00:00"
+        assert facts["advanceBooking"]["reference"] == "TAG-HL2"
+
+    def test_U_period_uses_the_effective_uk_date(self, seeded):
+        highlights = booking_highlights.build_highlights(seeded, date(2026, 3, 1), date(2026, 3, 2))
+        popular = booking_highlights.popular_report(highlights, top=5)
+
+        assert popular["meta"]["totalBookings"] == 1
+        assert popular["popularDestinations"] == [{"destination": "Faro", "count": 1, "percent": 100.0}]
+        assert popular["meta"]["startDate"] == "2026-03-01"
+
+    def test_E_invalid_top_falls_back_to_ten(self, seeded):
+        popular = booking_highlights.popular_report(booking_highlights.build_highlights(seeded), top=7)
+
+        assert popular["meta"]["top"] == 10
+
+
+class TestEndpoints:
+    def test_H_popular_and_fun_facts_share_one_query(self, client, seeded):
+        engine = seeded.get_bind()
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            facts = client.get("/api/admin/reports/fun-facts").json()
+            popular = client.get("/api/admin/reports/popular").json()
+            top_five = client.get("/api/admin/reports/popular", params={"top": 5}).json()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(selects) == 1
+        assert facts["cached"] is False and popular["cached"] is True and top_five["cached"] is True
+        assert facts["longestTrip"]["reference"] == "TAG-HL1"
+        assert popular["meta"]["totalBookings"] == 3
+        assert "funFacts" not in popular
@@ -136,10 +136,10 @@ async def client():
     admin_user = create_mock_admin_user()
     app.dependency_overrides[require_admin] = lambda: admin_user
 
-    # Reset the module-level _booking_locations_cache so prior tests in the
+    # Clear the shared report_cache so prior tests in the
     # suite don't leak cached results into this one.
     import main as main_module
-    main_module._booking_locations_cache = {}
+    main_module.report_cache.clear()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -147,7 +147,16 @@ async def client():
 
     # Clean up overrides
     app.dependency_overrides.clear()
-    main_module._booking_locations_cache = {}
+    main_module.report_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_geocode_cache(monkeypatch):
+    """The mocked sessions cannot hold postcode_geocodes rows: start every
+    lookup from an empty cache and drop the writes."""
+    import postcode_geocoder
+    monkeypatch.setattr(postcode_geocoder, "load_cached_geocodes", lambda db, keys: {})
+    monkeypatch.setattr(postcode_geocoder, "_upsert", lambda db, rows: None)
 
 
 def create_mock_postcodes_response(postcodes_data):
@@ -194,6 +203,7 @@ def create_mock_db_for_customers(mock_customers):
     )
 
     customer_query = MagicMock()
+    customer_query.options.return_value = customer_query
     customer_query.outerjoin.return_value = customer_query
     customer_query.filter.return_value = customer_query
     customer_query.order_by.return_value = customer_query
@@ -169,7 +169,7 @@ class TestBookingStatsEndpoint:
 class TestBookingTargetsHUEB:
     """HUEB coverage for Booking Targets counters on the real endpoint."""
 
-    def test_completed_booking_paid_this_week_counts_toward_targets(self):
+    def test_completed_booking_paid_this_week_counts_toward_targets(self, booking_stats_from_bookings):
         """Booking Targets should count successful bookings, not confirmed-only.
 
         This covers the real admin report path where a booking can be made and
@@ -213,6 +213,7 @@ class TestBookingTargetsHUEB:
             ),
         ]
 
+        booking_stats_from_bookings(bookings)
         mock_db = MagicMock()
 
         def query_side_effect(model):
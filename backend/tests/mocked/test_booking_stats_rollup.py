@@ -0,0 +1,207 @@
+"""
+Tests for the booking_stats_daily rollup (booking_stats).
+
+Uses the in-memory SQLite db_session with session tracking installed on it,
+so inserts, status changes and payment updates recompute the affected days
+on commit exactly as request sessions do.
+"""
+from datetime import date, datetime, time, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import booking_stats
+from db_models import (
+    Booking,
+    BookingStatsDaily,
+    BookingStatus,
+    Customer,
+    Payment,
+    PaymentStatus,
+    Vehicle,
+)
+
+
+@pytest.fixture
+def tracked(db_session):
+    booking_stats.install_booking_stats_tracking(db_session)
+    customer = Customer(first_name="Ada", last_name="Stats", email="stats@example.test", phone="07700900002")
+    db_session.add(customer)
+    db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, registration="ST4 TS", make="Ford", model="Focus", colour="Blue")
+    db_session.add(vehicle)
+    db_session.commit()
+    return SimpleNamespace(db=db_session, customer_id=customer.id, vehicle_id=vehicle.id)
+
+
+_refs = iter(range(1000, 9999))
+
+
+def _booking(ctx, *, created_at, status=BookingStatus.CONFIRMED, paid_at=None, amount_pence=9900):
+    booking = Booking(
+        reference=f"TAG-STS{next(_refs)}",
+        customer_id=ctx.customer_id,
+        vehicle_id=ctx.vehicle_id,
+        status=status,
+        created_at=created_at,
+        dropoff_date=date(2026, 7, 1),
+        dropoff_time=time(6, 30),
+        pickup_date=date(2026, 7, 8),
+        pickup_time=time(20, 15),
+    )
+    ctx.db.add(booking)
+    ctx.db.flush()
+    if amount_pence is not None:
+        ctx.db.add(Payment(
+            booking_id=booking.id,
+            amount_pence=amount_pence,
+            status=PaymentStatus.SUCCEEDED,
+            paid_at=paid_at,
+        ))
+    ctx.db.commit()
+    return booking
+
+
+def _rollup(db):
+    return {
+        (row.stat_date, row.status): (row.booking_count, row.paid_count, row.revenue_pence)
+        for row in db.query(BookingStatsDaily).all()
+    }
+
+
+class TestIncrementalMaintenance:
+    def test_H_new_booking_lands_on_its_paid_uk_date(self, tracked):
+        # Initiated 23:50 UK on 1 June, paid 00:10 UK on 2 June (BST).
+        booking = _booking(
+            tracked,
+            created_at=datetime(2026, 6, 1, 22, 50, tzinfo=timezone.utc),
+            paid_at=datetime(2026, 6, 1, 23, 10, tzinfo=timezone.utc),
+        )
+
+        assert _rollup(tracked.db) == {(date(2026, 6, 2), "confirmed"): (1, 1, 9900)}
+        (row,) = tracked.db.query(BookingStatsDaily).all()
+        assert row.trip_days_json == {"7": 1}
+        assert row.dropoff_hours_json[6] == 1
+        assert row.pickup_hours_json[20] == 1
+        assert row.created_hours_json["Monday"][23] == 1
+        assert booking.id is not None
+
+    def test_H_status_change_moves_the_count(self, tracked):
+        booking = _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        _booking(tracked, created_at=datetime(2026, 6, 3, 11, 0), paid_at=datetime(2026, 6, 3, 11, 5))
+
+        booking.status = BookingStatus.CANCELLED
+        tracked.db.commit()
+
+        assert _rollup(tracked.db) == {
+            (date(2026, 6, 3), "confirmed"): (1, 1, 9900),
+            (date(2026, 6, 3), "cancelled"): (1, 1, 9900),
+        }
+
+    def test_H_paid_at_change_recomputes_both_days(self, tracked):
+        booking = _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+
+        booking.payment.paid_at = datetime(2026, 6, 5, 12, 0)
+        tracked.db.commit()
+
+        assert _rollup(tracked.db) == {(date(2026, 6, 5), "confirmed"): (1, 1, 9900)}
+
+    def test_B_free_booking_counts_without_revenue(self, tracked):
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5), amount_pence=0)
+        _booking(tracked, created_at=datetime(2026, 6, 3, 10, 0), status=BookingStatus.PENDING, amount_pence=None)
+
+        assert _rollup(tracked.db) == {
+            (date(2026, 6, 3), "confirmed"): (1, 0, 0),
+            (date(2026, 6, 3), "pending"): (1, 0, 0),
+        }
+
+    def test_U_rollback_discards_pending_days(self, tracked):
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        booking = tracked.db.query(Booking).one()
+        booking.status = BookingStatus.CANCELLED
+        tracked.db.flush()
+        tracked.db.rollback()
+        tracked.db.commit()
+
+        assert _rollup(tracked.db) == {(date(2026, 6, 3), "confirmed"): (1, 1, 9900)}
+
+    def test_H_recompute_upserts_over_rows_another_commit_wrote(self, tracked):
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        # A row left by a concurrent refresh for a status the day no longer has.
+        tracked.db.add(BookingStatsDaily(stat_date=date(2026, 6, 3), status="refunded", booking_count=4))
+        tracked.db.commit()
+
+        assert booking_stats.refresh_booking_stats_days(tracked.db.get_bind(), [date(2026, 6, 3)]) is True
+        assert booking_stats.refresh_booking_stats_days(tracked.db.get_bind(), [date(2026, 6, 3)]) is True
+
+        assert _rollup(tracked.db) == {(date(2026, 6, 3), "confirmed"): (1, 1, 9900)}
+
+    def test_U_failed_refresh_is_retried_after_the_booking_commits(self, tracked, monkeypatch):
+        real = booking_stats.recompute_booking_stats_days
+        calls = []
+
+        def flaky(db, dates):
+            calls.append(sorted(dates))
+            if len(calls) == 1:
+                raise RuntimeError("deadlock detected")
+            return real(db, dates)
+
+        monkeypatch.setattr(booking_stats, "recompute_booking_stats_days", flaky)
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+
+        assert calls == [[date(2026, 6, 3)], [date(2026, 6, 3)]]
+        assert tracked.db.query(Booking).count() == 1
+        assert _rollup(tracked.db) == {(date(2026, 6, 3), "confirmed"): (1, 1, 9900)}
+
+
+class TestRebuild:
+    def test_H_rebuild_reports_drift_from_raw_sql(self, tracked):
+        booking = _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        tracked.db.execute(
+            text("UPDATE bookings SET status = 'COMPLETED' WHERE id = :id"), {"id": booking.id}
+        )
+        tracked.db.commit()
+
+        result = booking_stats.rebuild_booking_stats(tracked.db)
+        tracked.db.commit()
+
+        assert result["drift"] == [
+            {"stat_date": "2026-06-03", "status": "completed", "stored": 0, "actual": 1},
+            {"stat_date": "2026-06-03", "status": "confirmed", "stored": 1, "actual": 0},
+        ]
+        assert _rollup(tracked.db) == {(date(2026, 6, 3), "completed"): (1, 1, 9900)}
+
+    def test_H_clean_rollup_has_no_drift(self, tracked):
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        assert booking_stats.rebuild_booking_stats(tracked.db)["drift"] == []
+
+    def test_B_empty_rollup_is_rebuilt_on_first_read(self, tracked):
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        tracked.db.query(BookingStatsDaily).delete()
+        tracked.db.commit()
+
+        rows = booking_stats.load_booking_stats_rows(tracked.db)
+
+        assert [(r.stat_date, r.status, r.booking_count) for r in rows] == [(date(2026, 6, 3), "confirmed", 1)]
+
+
+class TestStatsEndpoint:
+    def test_H_endpoint_totals_come_from_the_rollup(self, tracked):
+        from main import app, require_admin
+
+        _booking(tracked, created_at=datetime(2026, 6, 3, 9, 0), paid_at=datetime(2026, 6, 3, 9, 5))
+        _booking(tracked, created_at=datetime(2026, 6, 4, 9, 0), paid_at=datetime(2026, 6, 4, 9, 5),
+                 amount_pence=12000)
+        _booking(tracked, created_at=datetime(2026, 6, 4, 10, 0), status=BookingStatus.CANCELLED, amount_pence=None)
+        app.dependency_overrides[require_admin] = lambda: SimpleNamespace(id=1, is_admin=True)
+
+        body = TestClient(app).get("/api/admin/bookings/stats").json()
+
+        assert body["total_bookings"] == 3
+        assert body["total_successful"] == 2
+        assert body["total_revenue"] == 219.0
+        assert body["status_totals"] == {"confirmed": 2, "cancelled": 1}
+        assert [(d["date"], d["total"]) for d in body["daily"]] == [("2026-06-03", 1), ("2026-06-04", 2)]
+        assert body["top_durations"] == [{"days": 7, "count": 2, "percent": 100.0}]
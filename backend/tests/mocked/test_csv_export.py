@@ -0,0 +1,177 @@
+"""
+Tests for the streaming CSV exports (csv_export).
+
+The expected files below were produced by the previous build-the-whole-file
+implementation of each endpoint; the streamed output must match them byte
+for byte. Uses the in-memory SQLite db_session.
+"""
+import csv
+import gzip
+import io
+from datetime import date, datetime, time, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import csv_export
+import routers.roster as roster
+from main import app, require_admin
+from db_models import (
+    Booking, BookingStatus, Customer, MarketingSource, MarketingSubscriber, Payment,
+    PaymentStatus, PromoCode, Promotion, RosterShift, ShiftStatus, ShiftType, Vehicle,
+)
+
+
+FINANCIAL_HEADER = (
+    "Date,Reference,Customer,Trip Days,Gross Price,Promo Code,Discount %,Discount Amount,"
+    "Net Price,Refund Amount,Final Revenue,Booking Status,Payment Status\r\n"
+)
+FINANCIAL_ROWS = [
+    "14/06/2026,TAG-EXP003,Ada Lovelace,10,£0.00,TAG-FREE-0001,100%,,£0.00,,£0.00,confirmed,succeeded\r\n",
+    '12/06/2026,TAG-EXP002,"Cleo Moss ""CM""",9,£120.00,,,,£120.00,,£120.00,completed,succeeded\r\n',
+    '09/06/2026,TAG-EXP001,"Brian Kernighan, Jr",8,£90.00,,,,£90.00,£30.00,£60.00,refunded,partially_refunded\r\n',
+    "01/06/2026,TAG-EXP000,Ada Lovelace,7,£90.00,TAG-SPRG-0001,20%,£18.00,£72.00,,£72.00,confirmed,succeeded\r\n",
+]
+MARKETING_CSV = (
+    "customer_id,customer_email,customer_name,source,source_detail,created_at\r\n"
+    '3,exp2@example.test,"Cleo Moss ""CM""",other,Saw a van,12/06/2026\r\n'
+    '2,exp1@example.test,"Brian Kernighan, Jr",facebook,,11/06/2026\r\n'
+    "1,exp0@example.test,Ada Lovelace,google,,10/06/2026\r\n"
+)
+ROSTER_CSV = (
+    "Date,Employee Name,Shift Type,Start Time,End Time,Booking Ref,Status,Notes\r\n"
+    '15/06/2026,Dee Driver,Morning,05:30,13:00,TAG-EXP002,Scheduled,"Keys, then Gate 2"\r\n'
+    "16/06/2026,Unassigned,Evening,14:00,22:00,,Scheduled,\r\n"
+)
+
+
+def _seed(db):
+    """Bookings/payments with promos, marketing sources and a roster week."""
+    customers = []
+    for i, (first, last) in enumerate([("Ada", "Lovelace"), ("Brian", "Kernighan, Jr"), ("Cleo", 'Moss "CM"')]):
+        customer = Customer(first_name=first, last_name=last, email=f"exp{i}@example.test", phone=f"0770090020{i}")
+        db.add(customer)
+        db.flush()
+        db.add(Vehicle(customer_id=customer.id, registration=f"EX{i} AAA", make="Ford", model="Focus", colour="Red"))
+        db.add(MarketingSource(customer_id=customer.id, source=["google", "facebook", "other"][i],
+                               source_detail="Saw a van" if i == 2 else None,
+                               created_at=datetime(2026, 6, 10 + i, 9, 0, tzinfo=timezone.utc)))
+        db.flush()
+        customers.append(customer)
+    vehicle_ids = {v.customer_id: v.id for v in db.query(Vehicle).all()}
+
+    bookings = []
+    for n, (customer, status, paid_at, amount, refund, payment_status) in enumerate([
+        (customers[0], BookingStatus.CONFIRMED, datetime(2026, 5, 31, 23, 12, tzinfo=timezone.utc), 7200, None, PaymentStatus.SUCCEEDED),
+        (customers[1], BookingStatus.REFUNDED, datetime(2026, 6, 9, 14, 0, tzinfo=timezone.utc), 9000, 3000, PaymentStatus.PARTIALLY_REFUNDED),
+        (customers[2], BookingStatus.COMPLETED, datetime(2026, 6, 12, 8, 0, tzinfo=timezone.utc), 12000, None, PaymentStatus.SUCCEEDED),
+        (customers[0], BookingStatus.CONFIRMED, datetime(2026, 6, 14, 8, 0, tzinfo=timezone.utc), 0, None, PaymentStatus.SUCCEEDED),
+    ]):
+        booking = Booking(
+            reference=f"TAG-EXP{n:03d}", customer_id=customer.id, vehicle_id=vehicle_ids[customer.id],
+            status=status, dropoff_date=date(2026, 7, 1), dropoff_time=time(6, 0),
+            pickup_date=date(2026, 7, 8 + n), pickup_time=time(18, 0), created_at=paid_at,
+        )
+        db.add(booking)
+        db.flush()
+        db.add(Payment(booking_id=booking.id, amount_pence=amount, status=payment_status,
+                       paid_at=paid_at, refund_amount_pence=refund))
+        bookings.append(booking)
+
+    promotion = Promotion(name="Spring", discount_percent=20, code_prefix="TAG")
+    db.add(promotion)
+    db.flush()
+    db.add(PromoCode(promotion_id=promotion.id, code="TAG-SPRG-0001", is_used=True, booking_id=bookings[0].id))
+    db.add(MarketingSubscriber(first_name="Fred", last_name="Free", email="fred@example.test",
+                               promo_free_code="TAG-FREE-0001", promo_free_used=True,
+                               promo_free_used_booking_id=bookings[3].id))
+
+    db.execute(text(
+        "INSERT INTO users (id, email, first_name, last_name, is_admin, is_active, "
+        "preferred_shift_types, excluded_shift_types, preferred_days_off) "
+        "VALUES (7, 'driver@example.test', 'Dee', 'Driver', 0, 1, '{}', '{}', '{}')"
+    ))
+    db.add(RosterShift(date=date(2026, 6, 15), start_time=time(5, 30), end_time=time(13, 0),
+                       shift_type=ShiftType.MORNING, status=ShiftStatus.SCHEDULED,
+                       staff_id=7, booking_id=bookings[2].id, notes="Keys, then Gate 2"))
+    db.add(RosterShift(date=date(2026, 6, 16), start_time=time(14, 0), end_time=time(22, 0),
+                       shift_type=ShiftType.EVENING, status=ShiftStatus.SCHEDULED))
+    db.add(RosterShift(date=date(2026, 6, 23), start_time=time(14, 0), end_time=time(22, 0),
+                       shift_type=ShiftType.EVENING, status=ShiftStatus.SCHEDULED))
+    db.commit()
+
+
+@pytest.fixture
+def client(db_session):
+    _seed(db_session)
+    admin = SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+    app.dependency_overrides[require_admin] = lambda: admin
+    app.dependency_overrides[roster.require_admin] = lambda: admin
+    yield TestClient(app)
+    app.dependency_overrides.pop(roster.require_admin, None)
+
+
+class TestIterCsv:
+    def test_H_chunks_join_to_single_writer_output(self):
+        rows = [[i, f"name {i}", "a, \"quoted\" cell"] for i in range(200)]
+        expected = io.StringIO()
+        writer = csv.writer(expected)
+        writer.writerow(["id", "name", "notes"])
+        writer.writerows(rows)
+
+        chunks = list(csv_export.iter_csv(["id", "name", "notes"], rows, chunk_bytes=256))
+
+        assert len(chunks) > 1
+        assert all(len(c) < 256 + 64 for c in chunks)
+        assert "".join(chunks) == expected.getvalue()
+
+    def test_B_format_row_none_skips_the_row(self):
+        chunks = csv_export.iter_csv(["n"], range(5), lambda n: [n] if n % 2 else None)
+        assert "".join(chunks) == "n\r\n1\r\n3\r\n"
+
+    def test_B_empty_rows_still_yield_header(self):
+        assert list(csv_export.iter_csv(["a", "b"], [])) == ["a,b\r\n"]
+
+
+class TestExports:
+    def test_H_financial_export_matches_previous_output(self, client):
+        resp = client.get("/api/admin/reports/financial/export")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert resp.headers["content-disposition"] == "attachment; filename=financial_report.csv"
+        assert resp.text == FINANCIAL_HEADER + "".join(FINANCIAL_ROWS)
+
+    def test_H_financial_export_filters(self, client):
+        resp = client.get("/api/admin/reports/financial/export",
+                          params={"promo_filter": "yes", "from_date": "01/06/2026"})
+
+        assert resp.headers["content-disposition"] == "attachment; filename=financial_report_from_01-06-2026.csv"
+        assert resp.text == FINANCIAL_HEADER + FINANCIAL_ROWS[0]
+
+    def test_H_marketing_sources_export_matches_previous_output(self, client):
+        resp = client.get("/api/admin/marketing-sources/export")
+
+        assert resp.headers["content-disposition"] == "attachment; filename=marketing_sources.csv"
+        assert resp.text == MARKETING_CSV
+
+    def test_H_roster_export_matches_previous_output(self, client):
+        resp = client.get("/api/roster/export", params={"week_start": "2026-06-15"})
+
+        assert resp.headers["content-disposition"] == "attachment; filename=roster_export_15062026.csv"
+        assert resp.text == ROSTER_CSV
+
+    @pytest.mark.parametrize("url, params, filename, expected", [
+        ("/api/admin/reports/financial/export", {}, "financial_report.csv.gz",
+         FINANCIAL_HEADER + "".join(FINANCIAL_ROWS)),
+        ("/api/admin/marketing-sources/export", {}, "marketing_sources.csv.gz", MARKETING_CSV),
+        ("/api/roster/export", {"week_start": "2026-06-15"}, "roster_export_15062026.csv.gz", ROSTER_CSV),
+    ])
+    def test_H_gzip_round_trips(self, client, url, params, filename, expected):
+        resp = client.get(url, params={**params, "gzip": True})
+
+        assert resp.headers["content-type"] == "application/gzip"
+        assert resp.headers["content-disposition"] == f"attachment; filename={filename}"
+        assert gzip.decompress(resp.content).decode("utf-8") == expected
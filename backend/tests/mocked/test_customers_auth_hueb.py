@@ -60,28 +60,6 @@ def _clear():
     app.dependency_overrides.clear()
 
 
-def _subscriber(**kw):
-    base = dict(
-        id=11, first_name="Jo", last_name="K", email="jo@x.test",
-        subscribed_at=datetime(2026, 5, 1, 9, 0),
-        welcome_email_sent=True, welcome_email_sent_at=datetime(2026, 5, 1, 9, 5),
-        promo_code=None, promo_code_sent=False, promo_code_sent_at=None,
-        discount_percent=None, promo_code_used=False, promo_code_used_at=None,
-        promo_code_used_booking_id=None,
-        promo_10_code=None, promo_10_sent=False, promo_10_sent_at=None,
-        promo_10_used=False, promo_10_used_at=None,
-        promo_10_reminder_sent=False, promo_10_reminder_sent_at=None,
-        promo_free_code=None, promo_free_sent=False, promo_free_sent_at=None,
-        promo_free_used=False, promo_free_used_at=None,
-        promo_free_reminder_sent=False, promo_free_reminder_sent_at=None,
-        founder_promo_code=None, founder_email_sent=False, founder_email_sent_at=None,
-        founder_promo_used=False, founder_promo_used_at=None,
-        unsubscribed=False, unsubscribed_at=None,
-    )
-    base.update(kw)
-    return SimpleNamespace(**base)
-
-
 def _customer(**kw):
     base = dict(
         id=42, first_name="Jo", last_name="K", email="jo@x.test",
@@ -105,26 +83,93 @@ class TestMarketingSubscribers:
     def teardown_method(self):
         _clear()
 
-    def test_H_returns_subscribers(self):
-        db = MagicMock()
-        chain = MagicMock()
-        chain.order_by.return_value = chain
-        chain.all.return_value = [_subscriber()]
-        db.query.return_value = chain
-        _override_admin(db)
+    def _seed(self, db):
+        from db_models import MarketingSubscriber
+
+        flags = [
+            ("pending", "landing_page", {}),
+            ("sent", "landing_page", {"promo_10_sent": True}),
+            ("used", "homepage", {"promo_free_sent": True, "promo_free_used": True}),
+            ("gone", "homepage", {"unsubscribed": True}),
+            ("nullflags", "homepage", {"promo_10_sent": None, "unsubscribed": None}),
+        ]
+        for n, (name, source, extra) in enumerate(flags):
+            db.add(MarketingSubscriber(first_name=name, last_name="K", email=f"{name}@x.test", source=source,
+                                       subscribed_at=datetime(2026, 5, 1) + timedelta(days=n), **extra))
+        db.commit()
+
+    def test_H_returns_subscribers_newest_first_with_segment_counts(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
         resp = TestClient(app).get("/api/admin/marketing-subscribers")
         assert resp.status_code == 200
-        assert resp.json()["count"] == 1
-
-    def test_E_empty(self):
-        db = MagicMock()
-        chain = MagicMock()
-        chain.order_by.return_value = chain
-        chain.all.return_value = []
-        db.query.return_value = chain
-        _override_admin(db)
+        body = resp.json()
+        assert [s["first_name"] for s in body["subscribers"]] == ["nullflags", "gone", "used", "sent", "pending"]
+        assert body["count"] == 5 and "next_cursor" not in body
+        counts = body["segment_counts"]
+        assert {k: counts[k] for k in ("all", "pending", "sent", "used", "unsubscribed")} == {
+            "all": 5, "pending": 2, "sent": 1, "used": 1, "unsubscribed": 1,
+        }
+        assert counts["by_source"]["homepage"]["pending"] == 1
+
+    def test_H_filters_run_in_sql(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
+        client = TestClient(app)
+
+        def names(**params):
+            return [s["first_name"] for s in client.get("/api/admin/marketing-subscribers", params=params).json()["subscribers"]]
+
+        assert names(status="pending") == ["nullflags", "pending"]
+        assert names(status="sent") == ["sent"]
+        assert names(source="homepage", unsubscribed=False) == ["nullflags", "used"]
+        assert names(unsubscribed=True) == ["gone"]
+
+    def test_B_keyset_pages_cover_every_subscriber_once(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
+        client = TestClient(app)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/api/admin/marketing-subscribers", params=params).json()
+            seen += [s["first_name"] for s in body["subscribers"]]
+            assert ("segment_counts" in body) is (cursor is None)
+            cursor = body["next_cursor"]
+            if not body["has_more"]:
+                break
+        assert seen == ["nullflags", "gone", "used", "sent", "pending"]
+
+    def test_B_keyset_pages_reach_subscribers_without_subscribed_at(self, db_session):
+        from db_models import MarketingSubscriber
+
+        self._seed(db_session)
+        for subscriber in db_session.query(MarketingSubscriber).filter(MarketingSubscriber.first_name.in_(["sent", "gone"])):
+            subscriber.subscribed_at = None
+        db_session.commit()
+        _override_admin(db_session)
+        client = TestClient(app)
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/api/admin/marketing-subscribers", params=params).json()
+            pages.append([s["first_name"] for s in body["subscribers"]])
+            cursor = body["next_cursor"]
+            if not body["has_more"]:
+                break
+        assert pages == [["nullflags", "used"], ["pending", "gone"], ["sent"]]
+
+    def test_E_invalid_status_and_cursor(self, db_session):
+        _override_admin(db_session)
+        client = TestClient(app)
+        assert client.get("/api/admin/marketing-subscribers", params={"status": "bogus"}).status_code == 400
+        assert client.get("/api/admin/marketing-subscribers", params={"limit": 2, "cursor": "%%%"}).status_code == 400
+
+    def test_E_empty(self, db_session):
+        _override_admin(db_session)
         resp = TestClient(app).get("/api/admin/marketing-subscribers")
         assert resp.json()["count"] == 0
+        assert resp.json()["segment_counts"]["all"] == 0
 
 
 # ============================================================================
@@ -135,47 +180,104 @@ class TestAbandonedLeads:
     def teardown_method(self):
         _clear()
 
-    def _wire(self, customers, bookings=None):
-        db = MagicMock()
-        confirmed_subq = MagicMock()
-        confirmed_subq.subquery.return_value = MagicMock(
-            c=MagicMock(customer_id="confirmed_customer_id")
-        )
-        cust_chain = MagicMock()
-        cust_chain.filter.return_value = cust_chain
-        cust_chain.order_by.return_value = cust_chain
-        cust_chain.all.return_value = customers
-        booking_chain = MagicMock()
-        booking_chain.filter.return_value = booking_chain
-        booking_chain.subquery.return_value = MagicMock(
-            c=MagicMock(customer_id="x")
-        )
-        booking_chain.all.return_value = bookings or []
-        calls = {"n": 0}
-        def _query(*args):
-            calls["n"] += 1
-            model = args[0]
-            name = model.__name__ if hasattr(model, "__name__") else str(model)
-            if name == "Customer":
-                return cust_chain
-            return booking_chain
-        db.query.side_effect = _query
-        return db
-
-    def test_H_returns_leads(self):
-        from db_models import BookingStatus
-        c = _customer()
-        b = SimpleNamespace(status=BookingStatus.PENDING)
-        _override_admin(self._wire([c], bookings=[b]))
+    def _seed(self, db, leads=3):
+        from db_models import Booking, BookingStatus, Customer, Vehicle
+
+        customers = []
+        for n in range(leads + 1):
+            customer = Customer(first_name="Lead", last_name=str(n), email=f"lead{n}@x.test",
+                                phone=f"0770090{n:04d}", created_at=datetime(2026, 5, 1) + timedelta(hours=n))
+            db.add(customer)
+            db.flush()
+            vehicle = Vehicle(customer_id=customer.id, registration=f"LD{n:04d}", make="Ford", model="Ka", colour="Red")
+            db.add(vehicle)
+            db.flush()
+            # The last customer confirmed; every other one made two attempts.
+            statuses = [BookingStatus.CONFIRMED] if n == leads else [BookingStatus.PENDING, BookingStatus.CANCELLED]
+            for i, status in enumerate(statuses):
+                db.add(Booking(
+                    reference=f"TAG-LD{n:03d}{i}", customer_id=customer.id, vehicle_id=vehicle.id, status=status,
+                    created_at=datetime(2026, 5, 2) + timedelta(hours=n, minutes=i),
+                    dropoff_date=date_type(2026, 6, 1), dropoff_time=datetime(2026, 6, 1, 8).time(),
+                    pickup_date=date_type(2026, 6, 8), pickup_time=datetime(2026, 6, 8, 18).time(),
+                ))
+            customers.append(customer)
+        db.commit()
+        return customers
+
+    def test_H_returns_leads_with_latest_booking(self, db_session):
+        self._seed(db_session, leads=2)
+        _override_admin(db_session)
         resp = TestClient(app).get("/api/admin/abandoned-leads")
         assert resp.status_code == 200
-        assert resp.json()["count"] == 1
+        body = resp.json()
+        assert body["count"] == 2
+        assert [lead["last_name"] for lead in body["leads"]] == ["1", "0"]
+        assert body["leads"][0]["booking_attempts"] == 2
+        assert body["leads"][0]["last_booking_status"] == "cancelled"
+        assert body["leads"][0]["last_activity_at"].startswith("2026-05-02T01:01")
+        assert "next_cursor" not in body
+
+    def test_B_keyset_pages_cover_every_lead_once(self, db_session):
+        self._seed(db_session, leads=5)
+        _override_admin(db_session)
+        client = TestClient(app)
+        pages, cursor = [], None
+        while True:
+            body = client.get("/api/admin/abandoned-leads", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            pages.append([lead["last_name"] for lead in body["leads"]])
+            cursor = body["next_cursor"]
+            if not body["has_more"]:
+                break
+        assert pages == [["4", "3"], ["2", "1"], ["0"]]
+
+    def test_B_keyset_pages_reach_leads_without_created_at(self, db_session):
+        customers = self._seed(db_session, leads=5)
+        customers[1].created_at = customers[3].created_at = None
+        db_session.commit()
+        _override_admin(db_session)
+        client = TestClient(app)
+        pages, cursor = [], None
+        while True:
+            body = client.get("/api/admin/abandoned-leads", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+            pages.append([lead["last_name"] for lead in body["leads"]])
+            cursor = body["next_cursor"]
+            if not body["has_more"]:
+                break
+        assert pages == [["4", "2"], ["0", "3"], ["1"]]
+
+    def test_E_invalid_cursor(self, db_session):
+        _override_admin(db_session)
+        resp = TestClient(app).get("/api/admin/abandoned-leads", params={"limit": 2, "cursor": "not-a-cursor"})
+        assert resp.status_code == 400
 
-    def test_E_no_leads(self):
-        _override_admin(self._wire([], bookings=[]))
+    def test_E_no_leads(self, db_session):
+        _override_admin(db_session)
         resp = TestClient(app).get("/api/admin/abandoned-leads")
         assert resp.json()["count"] == 0
 
+    def test_U_query_count_does_not_grow_with_leads(self, db_session):
+        from sqlalchemy import event
+
+        self._seed(db_session, leads=25)
+        _override_admin(db_session)
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            everyone = TestClient(app).get("/api/admin/abandoned-leads").json()
+            page = TestClient(app).get("/api/admin/abandoned-leads", params={"limit": 5}).json()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert everyone["count"] == 25 and page["count"] == 5
+        assert len(selects) == 2
+
 
 # ============================================================================
 # GET /api/admin/customers
@@ -185,39 +287,108 @@ class TestListCustomers:
     def teardown_method(self):
         _clear()
 
-    def test_H_with_marketing_source(self):
-        c = _customer()
-        c.marketing_source = SimpleNamespace(source="google")
-        db = MagicMock()
-        chain = MagicMock()
-        chain.order_by.return_value = chain
-        chain.all.return_value = [c]
-        db.query.return_value = chain
-        _override_admin(db)
+    def _seed(self, db):
+        from db_models import Booking, BookingStatus, Customer, MarketingSource, Vehicle
+
+        people = [("Ada", "Lovelace", "ada@x.test", "07700900101", "AB12 CDE"),
+                  ("Brian", "Kernighan", "bk@x.test", "07700900102", None),
+                  ("Cleo", "Adams", "cleo@x.test", "01202 555123", "xy99 zzz"),
+                  ("Dan", "Lovell", "dan@x.test", "07700900104", None)]
+        customers = []
+        for n, (first, last, email, phone, registration) in enumerate(people):
+            customer = Customer(first_name=first, last_name=last, email=email, phone=phone,
+                                created_at=datetime(2026, 5, 1) + timedelta(days=n))
+            db.add(customer)
+            db.flush()
+            if registration:
+                # Stored as entered: older rows kept the customer's spacing and case.
+                vehicle = Vehicle(customer_id=customer.id, registration=registration,
+                                  make="Ford", model="Ka", colour="Red")
+                db.add(vehicle)
+                db.flush()
+                for i in range(n + 1):
+                    db.add(Booking(
+                        reference=f"TAG-CU{n}{i}", customer_id=customer.id, vehicle_id=vehicle.id,
+                        status=BookingStatus.CONFIRMED, dropoff_date=date_type(2026, 6, 1),
+                        dropoff_time=datetime(2026, 6, 1, 8).time(), pickup_date=date_type(2026, 6, 8),
+                        pickup_time=datetime(2026, 6, 8, 18).time(),
+                    ))
+            customers.append(customer)
+        db.add(MarketingSource(customer_id=customers[0].id, source="google"))
+        db.commit()
+        return customers
+
+    def test_H_lists_newest_first_with_source_and_counts(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
         resp = TestClient(app).get("/api/admin/customers")
         assert resp.status_code == 200
-        assert resp.json()["customers"][0]["marketing_source"] == "google"
+        body = resp.json()
+        assert [c["first_name"] for c in body["customers"]] == ["Dan", "Cleo", "Brian", "Ada"]
+        ada, cleo = body["customers"][3], body["customers"][1]
+        assert ada["marketing_source"] == "google" and body["customers"][0]["marketing_source"] is None
+        assert (ada["vehicle_count"], ada["booking_count"]) == (1, 1)
+        assert (cleo["vehicle_count"], cleo["booking_count"]) == (1, 3)
+        assert "next_cursor" not in body
+
+    def test_H_search_covers_name_email_phone_and_registration(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
+        client = TestClient(app)
+
+        def names(q):
+            return [c["first_name"] for c in client.get("/api/admin/customers", params={"q": q}).json()["customers"]]
+
+        assert names("lov") == ["Dan", "Ada"]
+        assert names("ada love") == ["Ada"]
+        assert names("BK@X") == ["Brian"]
+        assert names("555123") == ["Cleo"]
+        assert names("xy99 z") == ["Cleo"]
+        assert names("99z") == ["Cleo"]
+        assert names("ab12c") == ["Ada"]
+
+    def test_B_keyset_pages_by_name(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
+        client = TestClient(app)
+        pages, cursor = [], None
+        while True:
+            params = {"sort": "name", "limit": 3, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/api/admin/customers", params=params).json()
+            pages.append([c["first_name"] for c in body["customers"]])
+            cursor = body["next_cursor"]
+            if not body["has_more"]:
+                break
+        assert pages == [["Ada", "Brian", "Cleo"], ["Dan"]]
+
+    def test_E_cursor_from_another_sort_is_rejected(self, db_session):
+        self._seed(db_session)
+        _override_admin(db_session)
+        client = TestClient(app)
+        cursor = client.get("/api/admin/customers", params={"limit": 1}).json()["next_cursor"]
+        resp = client.get("/api/admin/customers", params={"sort": "email", "limit": 1, "cursor": cursor})
+        assert resp.status_code == 400
 
-    def test_E_no_marketing_source(self):
-        c = _customer(marketing_source=None)
-        db = MagicMock()
-        chain = MagicMock()
-        chain.order_by.return_value = chain
-        chain.all.return_value = [c]
-        db.query.return_value = chain
-        _override_admin(db)
-        resp = TestClient(app).get("/api/admin/customers")
-        assert resp.json()["customers"][0]["marketing_source"] is None
+    def test_U_page_costs_two_queries(self, db_session):
+        from sqlalchemy import event
 
-    def test_E_empty(self):
-        db = MagicMock()
-        chain = MagicMock()
-        chain.order_by.return_value = chain
-        chain.all.return_value = []
-        db.query.return_value = chain
-        _override_admin(db)
-        resp = TestClient(app).get("/api/admin/customers")
-        assert resp.json()["count"] == 0
+        self._seed(db_session)
+        _override_admin(db_session)
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            body = TestClient(app).get("/api/admin/customers", params={"limit": 10}).json()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert body["count"] == 4
+        assert len(selects) == 2
 
 
 # ============================================================================
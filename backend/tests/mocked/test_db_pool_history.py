@@ -0,0 +1,171 @@
+"""
+Tests for downsampled pool health history (db_pool_history).
+
+Covers:
+- raw snapshots rolled into 1-minute buckets, then 1-hour buckets
+  (min/max/avg, worst health status, sample-weighted averages)
+- re-running the rollup recomputes the newest bucket without duplicating
+- retention: raw rows past 48 hours dropped only after being rolled up
+- GET /api/admin/db-health/history picks the resolution from the window
+  and never cuts the window short at HISTORY_MAX_POINTS
+
+Uses the in-memory SQLite db_session.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db_pool_history
+import main
+from db_models import DbPoolSnapshot, DbPoolSnapshotRollup, PoolHealthStatus
+from main import app, require_admin
+
+NOW = datetime(2026, 7, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _raw(db, at, usage, checked_out, health=PoolHealthStatus.HEALTHY, overflow=0):
+    db.add(DbPoolSnapshot(
+        pool_size=25, max_overflow=50, checked_out=checked_out, overflow=overflow,
+        checked_in=25 - min(checked_out, 25), usage_percent=usage,
+        health_status=health, trigger="threshold", created_at=at.replace(tzinfo=None),
+    ))
+
+
+def _buckets(db, resolution):
+    return (
+        db.query(DbPoolSnapshotRollup)
+        .filter(DbPoolSnapshotRollup.resolution_seconds == resolution)
+        .order_by(DbPoolSnapshotRollup.bucket_start)
+        .all()
+    )
+
+
+class TestRollup:
+    def test_H_raw_rows_roll_into_minute_then_hour_buckets(self, db_session):
+        _raw(db_session, NOW + timedelta(seconds=5), 20.0, 15)
+        _raw(db_session, NOW + timedelta(seconds=40), 80.0, 60, PoolHealthStatus.WARNING, overflow=35)
+        _raw(db_session, NOW + timedelta(minutes=3), 50.0, 38)
+        db_session.commit()
+
+        result = db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+
+        assert result == {"minute_buckets": 2, "hour_buckets": 1}
+        first, second = _buckets(db_session, db_pool_history.MINUTE)
+        assert first.sample_count == 2
+        assert (float(first.usage_min), float(first.usage_max), float(first.usage_avg)) == (20.0, 80.0, 50.0)
+        assert first.checked_out_max == 60 and first.overflow_max == 35
+        assert first.health_status == PoolHealthStatus.WARNING
+        assert second.health_status == PoolHealthStatus.HEALTHY
+
+        (hour,) = _buckets(db_session, db_pool_history.HOUR)
+        assert hour.sample_count == 3
+        assert float(hour.usage_avg) == 50.0  # (20 + 80 + 50) / 3, weighted by samples
+        assert float(hour.usage_max) == 80.0
+        assert hour.health_status == PoolHealthStatus.WARNING
+
+    def test_B_rerun_recomputes_the_newest_bucket_only(self, db_session):
+        _raw(db_session, NOW + timedelta(seconds=5), 20.0, 15)
+        db_session.commit()
+        db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+
+        _raw(db_session, NOW + timedelta(seconds=30), 40.0, 30)
+        db_session.commit()
+        db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+
+        (minute,) = _buckets(db_session, db_pool_history.MINUTE)
+        assert minute.sample_count == 2 and float(minute.usage_max) == 40.0
+        (hour,) = _buckets(db_session, db_pool_history.HOUR)
+        assert hour.sample_count == 2
+
+
+class TestRetention:
+    def test_H_old_raw_rows_are_dropped_after_rollup(self, db_session):
+        old = NOW - timedelta(hours=49)
+        _raw(db_session, old, 30.0, 22)
+        _raw(db_session, NOW - timedelta(hours=1), 30.0, 22)
+        db_session.commit()
+
+        result = db_pool_history.apply_pool_snapshot_retention(db_session, now=NOW)
+        db_session.commit()
+
+        assert result["raw_deleted"] == 1
+        assert db_session.query(DbPoolSnapshot).count() == 1
+        assert len(_buckets(db_session, db_pool_history.MINUTE)) == 2
+
+    def test_B_minute_buckets_expire_before_hour_buckets(self, db_session):
+        _raw(db_session, NOW - timedelta(days=20), 30.0, 22)
+        db_session.commit()
+
+        db_pool_history.apply_pool_snapshot_retention(db_session, now=NOW)
+        db_session.commit()
+
+        assert _buckets(db_session, db_pool_history.MINUTE) == []
+        assert len(_buckets(db_session, db_pool_history.HOUR)) == 1
+
+
+class TestResolution:
+    @pytest.mark.parametrize("hours,expected", [
+        (1, None), (48, None), (49, 3600), (999, 3600), (1000, 7200), (90 * 24, 3 * 3600),
+    ])
+    def test_B_window_picks_resolution(self, hours, expected):
+        assert db_pool_history.resolution_for_hours(hours) == expected
+
+    @pytest.mark.parametrize("hours,expected", [(1, 60), (16, 60), (17, 3600), (48, 3600)])
+    def test_B_rollup_resolution_fits_the_point_cap(self, hours, expected):
+        assert db_pool_history.rollup_resolution(hours) == expected
+
+
+class TestLoadPoolHistory:
+    def test_U_dense_raw_window_falls_back_to_rollups(self, db_session, monkeypatch):
+        # With room for 3 points an hour needs buckets of at least 30 minutes.
+        monkeypatch.setattr(db_pool_history, "HISTORY_MAX_POINTS", 3)
+        for seconds in (0, 10, 20, 70):
+            _raw(db_session, NOW - timedelta(minutes=30) + timedelta(seconds=seconds), 40.0, 30)
+        db_session.commit()
+        db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+
+        history = db_pool_history.load_pool_history(db_session, 1, now=NOW)
+
+        assert history["resolution_seconds"] == 3600
+        assert [s["sample_count"] for s in history["snapshots"]] == [4]
+
+    def test_H_long_window_merges_hour_buckets(self, db_session):
+        for hours in (1, 2, 3):
+            _raw(db_session, NOW - timedelta(hours=hours, minutes=-5), 10.0 * hours, 5 * hours)
+        db_session.commit()
+        db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+
+        history = db_pool_history.load_pool_history(db_session, 90 * 24, now=NOW)
+
+        assert history["resolution_seconds"] == 3 * 3600
+        # 09:05 falls in the 09:00-12:00 bucket, 10:05 and 11:05 with it.
+        (bucket,) = history["snapshots"]
+        assert bucket["id"] is None and bucket["sample_count"] == 3
+        assert (bucket["usage_min"], bucket["usage_avg"], bucket["usage_max"]) == (10.0, 20.0, 30.0)
+        assert bucket["trigger"] == "rollup_10800s"
+
+
+class TestHistoryEndpoint:
+    def teardown_method(self):
+        app.dependency_overrides.pop(require_admin, None)
+
+    def test_H_long_window_reads_hour_buckets(self, db_session, monkeypatch):
+        _raw(db_session, datetime.now(timezone.utc) - timedelta(days=3), 95.0, 70, PoolHealthStatus.CRITICAL)
+        db_session.commit()
+        db_pool_history.roll_up_pool_snapshots(db_session)
+        db_session.commit()
+        app.dependency_overrides[require_admin] = lambda: object()
+        monkeypatch.setattr(main, "get_circuit_breaker_stats", lambda: {})
+
+        body = TestClient(app).get("/api/admin/db-health/history", params={"hours": 30 * 24}).json()
+
+        assert body["resolution_seconds"] == 3600
+        (entry,) = body["snapshots"]
+        assert entry["usage_percent"] == 95.0 and entry["health_status"] == "critical"
+        assert entry["sample_count"] == 1
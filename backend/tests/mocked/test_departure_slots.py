@@ -0,0 +1,390 @@
+"""
+Tests for the materialised drop-off slot catalogue (departure_slots).
+
+Covers db_service.materialize_departure_slots / get_departure_slots_for_date,
+remaining-capacity sync on book/release, the slots surfaced on
+GET /api/flights/departures/{date}, the atomic slot counters under
+concurrent checkouts, and slot release on refund webhooks. Uses the in-memory SQLite db_session, except the
+contention tests which need a file database so each thread gets its own
+connection.
+"""
+import threading
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db_service
+from db_models import DepartureSlot, FlightDeparture
+
+
+FLIGHT_DATE = date(2026, 8, 14)
+
+
+def _departure(db, hhmm="10:00", capacity_tier=4, **kw):
+    h, m = map(int, hhmm.split(":"))
+    row = FlightDeparture(
+        date=kw.pop("flight_date", FLIGHT_DATE),
+        departure_time=time(h, m),
+        flight_number=kw.pop("flight_number", "5523"),
+        airline_code="FR",
+        airline_name="Ryanair",
+        destination_code="KRK",
+        destination_name="Krakow",
+        capacity_tier=capacity_tier,
+        slots_booked_early=kw.pop("slots_booked_early", 0),
+        slots_booked_late=kw.pop("slots_booked_late", 0),
+    )
+    db.add(row)
+    db.flush()
+    return row
+
+
+def _slots(db, departure):
+    return {
+        row.slot_id: row
+        for row in db.query(DepartureSlot).filter(DepartureSlot.departure_id == departure.id)
+    }
+
+
+class TestMaterialize:
+    def test_H_builds_one_row_per_slot_with_remaining(self, db_session):
+        departure = _departure(db_session, slots_booked_late=1)
+
+        assert db_service.materialize_departure_slots(db_session, [departure]) == 1
+        db_session.flush()
+
+        slots = _slots(db_session, departure)
+        assert {k: (v.drop_off_time, v.remaining) for k, v in slots.items()} == {
+            "165": (time(7, 15), 2),
+            "120": (time(8, 0), 1),
+            "90": (time(8, 30), 1),
+        }
+
+    def test_H_unchanged_time_only_refreshes_remaining(self, db_session):
+        departure = _departure(db_session)
+        db_service.materialize_departure_slots(db_session, [departure])
+        db_session.flush()
+        ids_before = {row.id for row in _slots(db_session, departure).values()}
+
+        departure.capacity_tier = 8
+        assert db_service.materialize_departure_slots(db_session, [departure]) == 0
+        db_session.flush()
+
+        slots = _slots(db_session, departure)
+        assert {row.id for row in slots.values()} == ids_before
+        assert slots["165"].remaining == 4
+
+    def test_H_time_change_rebuilds_rows(self, db_session):
+        departure = _departure(db_session)
+        db_service.materialize_departure_slots(db_session, [departure])
+        db_session.flush()
+
+        departure.departure_time = time(6, 20)
+        assert db_service.materialize_departure_slots(db_session, [departure]) == 1
+        db_session.flush()
+
+        early = _slots(db_session, departure)["165"]
+        assert (early.drop_off_time, early.is_clamped, early.departure_time) == (
+            time(4, 0), True, time(6, 20),
+        )
+
+    def test_B_call_us_departure_has_zero_remaining(self, db_session):
+        departure = _departure(db_session, capacity_tier=0)
+        db_service.materialize_departure_slots(db_session, [departure])
+        db_session.flush()
+        assert {row.remaining for row in _slots(db_session, departure).values()} == {0}
+
+
+class TestRemainingSync:
+    def test_H_book_and_release_move_remaining(self, db_session):
+        departure = _departure(db_session)
+        db_service.materialize_departure_slots(db_session, [departure])
+        db_session.commit()
+
+        assert db_service.book_departure_slot(db_session, departure.id, "late")["success"]
+        db_session.expire_all()
+        slots = _slots(db_session, departure)
+        assert (slots["165"].remaining, slots["120"].remaining, slots["90"].remaining) == (2, 1, 1)
+
+        assert db_service.release_departure_slot(db_session, departure.id, "late")["success"]
+        db_session.expire_all()
+        assert _slots(db_session, departure)["90"].remaining == 2
+
+
+class TestAtomicCounters:
+    def test_U_full_slot_is_rejected_by_the_update(self, db_session):
+        departure = _departure(db_session, capacity_tier=2)
+        db_session.commit()
+        # Another checkout took the last early slot after this session read the row.
+        db_session.query(FlightDeparture).filter(FlightDeparture.id == departure.id).update(
+            {FlightDeparture.slots_booked_early: 1}, synchronize_session=False,
+        )
+        db_session.commit()
+
+        result = db_service.book_departure_slot(db_session, departure.id, "early")
+
+        assert result == {"success": False, "message": "No early slots available", "slots_remaining": 0}
+        db_session.refresh(departure)
+        assert departure.slots_booked_early == 1
+
+
+class TestRefundReleasesSlot:
+    """Full refunds reported by Stripe give the booking's slot back, once."""
+
+    @pytest.fixture
+    def refundable(self, db_session, monkeypatch):
+        import main
+        from db_models import Booking, BookingStatus, Customer, Payment, PaymentStatus, Vehicle
+
+        monkeypatch.setattr(main, "is_stripe_configured", lambda: True)
+        departure = _departure(db_session, slots_booked_late=2)
+        customer = Customer(first_name="Ref", last_name="Und", email="refund@tag.test", phone="07700900002")
+        db_session.add(customer)
+        db_session.flush()
+        vehicle = Vehicle(customer_id=customer.id, registration="RF1 UND", make="Ford", model="Ka", colour="Blue")
+        db_session.add(vehicle)
+        db_session.flush()
+        booking = Booking(
+            reference="TAG-REFUND1", customer_id=customer.id, vehicle_id=vehicle.id,
+            status=BookingStatus.CONFIRMED, dropoff_date=FLIGHT_DATE, dropoff_time=time(8, 30),
+            pickup_date=date(2026, 8, 21), departure_id=departure.id, dropoff_slot="90",
+        )
+        db_session.add(booking)
+        db_session.flush()
+        db_session.add(Payment(
+            booking_id=booking.id, stripe_payment_intent_id="pi_refund_slot",
+            amount_pence=9900, status=PaymentStatus.SUCCEEDED,
+        ))
+        db_session.commit()
+        return SimpleNamespace(db=db_session, departure=departure, booking=booking, monkeypatch=monkeypatch)
+
+    def _webhook(self, ctx, event_type, data):
+        import main
+
+        ctx.monkeypatch.setattr(main, "verify_webhook_signature", lambda payload, sig: {
+            "type": event_type, "data": {"object": data},
+        })
+        resp = TestClient(main.app).post("/api/webhooks/stripe", content=b"{}", headers={"Stripe-Signature": "t=1,v1=s"})
+        assert resp.status_code == 200
+
+    def _charge_refunded(self, ctx):
+        self._webhook(ctx, "charge.refunded", {
+            "id": "ch_1", "amount": 9900, "amount_refunded": 9900,
+            "payment_intent": "pi_refund_slot", "metadata": {}, "refunds": SimpleNamespace(data=[{"id": "re_1"}]),
+        })
+
+    def test_H_full_refund_webhook_releases_slot_once(self, refundable):
+        self._charge_refunded(refundable)
+        # Stripe also reports the same refund as a refund event.
+        self._webhook(refundable, "refund.updated", {
+            "id": "re_1", "amount": 9900, "status": "succeeded", "payment_intent": "pi_refund_slot",
+        })
+
+        refundable.db.refresh(refundable.departure)
+        assert refundable.departure.slots_booked_late == 1
+
+    def test_U_partial_refund_keeps_the_slot(self, refundable):
+        self._webhook(refundable, "refund.created", {
+            "id": "re_2", "amount": 4000, "status": "succeeded", "payment_intent": "pi_refund_slot",
+        })
+
+        refundable.db.refresh(refundable.departure)
+        assert refundable.departure.slots_booked_late == 2
+
+    def test_B_cancelled_booking_is_not_released_again(self, refundable):
+        from db_models import BookingStatus
+
+        refundable.booking.status = BookingStatus.CANCELLED
+        refundable.db.commit()
+
+        self._charge_refunded(refundable)
+
+        refundable.db.refresh(refundable.departure)
+        assert refundable.departure.slots_booked_late == 2
+
+
+@pytest.fixture
+def file_sessionmaker(tmp_path):
+    """Sessions on a SQLite file so threads hold separate connections.
+
+    Autocommit makes every statement its own transaction, so a checkout's
+    read and its write can interleave with other threads' the way two
+    Postgres transactions do; only a self-contained UPDATE stays correct.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from database import Base
+    from db_models import FlightDepartureHistory
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'slots.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        isolation_level="AUTOCOMMIT",
+    )
+    tables = [FlightDeparture.__table__, DepartureSlot.__table__, FlightDepartureHistory.__table__]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+def _hammer(make_session, departure_id, slot_type, attempts_per_thread, threads, action):
+    results = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def worker():
+        db = make_session()
+        start.wait()
+        try:
+            for _ in range(attempts_per_thread):
+                result = action(db, departure_id, slot_type)
+                with lock:
+                    results.append(result["success"])
+        finally:
+            db.close()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+class TestSlotCounterContention:
+    def test_H_no_lost_increments_under_contention(self, file_sessionmaker):
+        with file_sessionmaker() as db:
+            departure_id = _departure(db, capacity_tier=400).id
+            db.commit()
+
+        results = _hammer(file_sessionmaker, departure_id, "early", 10, 8, db_service.book_departure_slot)
+
+        assert results.count(True) == 80
+        with file_sessionmaker() as db:
+            departure = db.get(FlightDeparture, departure_id)
+            assert departure.slots_booked_early == 80
+
+    def test_B_concurrent_checkouts_never_oversell(self, file_sessionmaker):
+        with file_sessionmaker() as db:
+            departure_id = _departure(db, capacity_tier=10).id
+            db.commit()
+
+        results = _hammer(file_sessionmaker, departure_id, "late", 4, 6, db_service.book_departure_slot)
+
+        assert results.count(True) == 5
+        with file_sessionmaker() as db:
+            assert db.get(FlightDeparture, departure_id).slots_booked_late == 5
+
+    def test_B_concurrent_releases_stop_at_zero(self, file_sessionmaker):
+        with file_sessionmaker() as db:
+            departure_id = _departure(db, capacity_tier=20, slots_booked_early=6).id
+            db.commit()
+
+        results = _hammer(file_sessionmaker, departure_id, "early", 3, 4, db_service.release_departure_slot)
+
+        assert results.count(True) == 6
+        with file_sessionmaker() as db:
+            assert db.get(FlightDeparture, departure_id).slots_booked_early == 0
+
+
+class TestAvailabilityRead:
+    def test_H_single_select_once_materialised(self, db_session):
+        from sqlalchemy import event
+
+        departures = [_departure(db_session, hhmm) for hhmm in ("06:20", "10:00", "14:00")]
+        db_service.materialize_departure_slots(db_session, departures)
+        db_session.commit()
+        selects = []
+        engine = db_session.get_bind()
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            by_departure = db_service.get_departure_slots_for_date(db_session, FLIGHT_DATE, departures)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(selects) == 1
+        assert sorted(len(rows) for rows in by_departure.values()) == [3, 3, 3]
+
+    def test_H_unmaterialised_departures_are_computed_without_writing(self, db_session):
+        departure = _departure(db_session)
+        db_session.commit()
+
+        by_departure = db_service.get_departure_slots_for_date(db_session, FLIGHT_DATE, [departure])
+
+        assert [row.slot_id for row in by_departure[departure.id]] == ["165", "120", "90"]
+        assert not db_session.new
+        assert db_session.query(DepartureSlot).count() == 0
+
+    def test_B_moved_departure_reads_slots_for_its_new_time(self, db_session):
+        departure = _departure(db_session, "10:00")
+        db_service.materialize_departure_slots(db_session, [departure])
+        db_session.commit()
+        departure.departure_time = time(12, 0)
+        db_session.commit()
+
+        by_departure = db_service.get_departure_slots_for_date(db_session, FLIGHT_DATE, [departure])
+
+        assert {row.departure_time for row in by_departure[departure.id]} == {time(12, 0)}
+        assert {row.departure_time for row in _slots(db_session, departure).values()} == {time(10, 0)}
+
+    def test_H_backfill_materialises_every_stored_departure(self, db_session, monkeypatch):
+        monkeypatch.setattr(db_service, "DEPARTURE_SLOT_BATCH_SIZE", 2)
+        departures = [_departure(db_session, hhmm, flight_number=hhmm) for hhmm in ("06:20", "10:00", "14:00")]
+        db_service.materialize_departure_slots(db_session, departures[:1])
+        db_session.commit()
+
+        assert db_service.backfill_departure_slots(db_session) == 2
+        db_session.commit()
+
+        assert db_session.query(DepartureSlot).count() == 9
+
+    def test_H_departures_endpoint_returns_slots_like_the_frontend(self, db_session):
+        _departure(db_session, "06:20", capacity_tier=2, slots_booked_early=1)
+        db_session.commit()
+        from main import app
+
+        body = TestClient(app).get(f"/api/flights/departures/{FLIGHT_DATE.isoformat()}").json()
+
+        assert body[0]["slots"] == [
+            {"id": "165", "label": "Earliest drop-off", "time": "04:00",
+             "drop_off_date": "2026-08-14", "available": 0, "isLastSlot": False},
+            {"id": "120", "label": "2 hours before", "time": "04:20",
+             "drop_off_date": "2026-08-14", "available": 1, "isLastSlot": True},
+            {"id": "90", "label": "1½ hours before", "time": "04:50",
+             "drop_off_date": "2026-08-14", "available": 1, "isLastSlot": True},
+        ]
+
+
+class TestAdminDepartureWrites:
+    @pytest.fixture
+    def client(self, db_session):
+        from main import app, require_admin
+
+        app.dependency_overrides[require_admin] = lambda: SimpleNamespace(
+            id=1, email="admin@tag.test", is_admin=True,
+        )
+        return TestClient(app)
+
+    def test_H_create_materialises_and_time_edit_rebuilds(self, client, db_session):
+        resp = client.post("/api/admin/flights/departures", json={
+            "date": FLIGHT_DATE.isoformat(), "flight_number": "5523", "airline_code": "FR",
+            "airline_name": "Ryanair", "departure_time": "10:00",
+            "destination_code": "KRK", "destination_name": "Krakow", "capacity_tier": 4,
+        })
+        assert resp.status_code in (200, 201), resp.text
+        departure_id = resp.json()["departure"]["id"]
+        departure = db_session.get(FlightDeparture, departure_id)
+        assert _slots(db_session, departure)["120"].drop_off_time == time(8, 0)
+
+        resp = client.put(f"/api/admin/flights/departures/{departure_id}", json={"departure_time": "11:00"})
+        assert resp.status_code == 200, resp.text
+        db_session.expire_all()
+        assert _slots(db_session, departure)["120"].drop_off_time == time(9, 0)
@@ -180,6 +180,34 @@ def client(mock_db, mock_admin):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def db_client(db_session, mock_admin):
+    """Test client on the in-memory SQLite db_session, for recipient queries."""
+    app.dependency_overrides[require_admin] = lambda: mock_admin
+    yield TestClient(app)
+    app.dependency_overrides.pop(require_admin, None)
+
+
+def seed_subscribers(db):
+    """Two landing-page subscribers (one unsubscribed) and one from the homepage."""
+    rows = [
+        MarketingSubscriber(first_name="Ann", last_name="A", email="ann@test.com", source="landing_page"),
+        MarketingSubscriber(first_name="Bob", last_name="B", email="bob@test.com", source="landing_page",
+                            unsubscribed=True),
+        MarketingSubscriber(first_name="Cat", last_name="C", email="cat@test.com", source="homepage",
+                            promo_10_sent=True),
+    ]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def recipient_ids(db, campaign_id):
+    return sorted(
+        r.subscriber_id for r in db.query(MarketingEmailRecipient).filter_by(campaign_id=campaign_id)
+    )
+
+
 # ============================================================================
 # GET /api/admin/marketing/campaigns Tests
 # ============================================================================
@@ -344,43 +372,45 @@ class TestGetCampaignDetailEndpoint:
 class TestCreateCampaignEndpoint:
     """Integration tests for POST /api/admin/marketing/campaigns."""
 
-    def test_creates_campaign_successfully(self, client, mock_db):
+    def test_creates_campaign_successfully(self, db_client, db_session):
         """Should create campaign and return ID."""
-        subscribers = [
-            create_mock_subscriber(id=1, email="sub1@test.com"),
-            create_mock_subscriber(id=2, email="sub2@test.com"),
-        ]
-
-        # Mock subscriber query
-        sub_query = MagicMock()
-        sub_query.filter.return_value = sub_query
-        sub_query.all.return_value = subscribers
+        ann, bob, cat = seed_subscribers(db_session)
 
-        mock_db.query.return_value = sub_query
+        response = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={
+                "subject": "New Campaign",
+                "message": "Hello {{first_name}}!",
+                "subscriber_ids": [ann.id, cat.id],
+            },
+        )
 
-        # Mock campaign creation
-        mock_db.add = MagicMock()
-        mock_db.flush = MagicMock()
-        mock_db.commit = MagicMock()
+        assert response.status_code == 200
+        campaign = db_session.get(MarketingEmailCampaign, response.json()["id"])
+        assert campaign.total_recipients == 2
+        assert recipient_ids(db_session, campaign.id) == [ann.id, cat.id]
 
-        # Mock the campaign object to have an ID after flush
-        def set_campaign_id(*args, **kwargs):
-            if hasattr(args[0], 'id'):
-                args[0].id = 1
-        mock_db.flush.side_effect = lambda: None
+    def test_creates_campaign_from_a_segment(self, db_client, db_session):
+        """A segment is resolved by the subscriber query, not an ID list."""
+        ann, bob, cat = seed_subscribers(db_session)
 
-        response = client.post(
+        response = db_client.post(
             "/api/admin/marketing/campaigns",
             json={
-                "subject": "New Campaign",
-                "message": "Hello {{first_name}}!",
-                "subscriber_ids": [1, 2],
+                "subject": "Landing page",
+                "message": "Hi",
+                "segment": {"source": "landing_page"},
             },
         )
+        pending = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Pending", "message": "Hi", "segment": {"status": "pending"}},
+        )
 
         assert response.status_code == 200
-        data = response.json()
-        assert "id" in data or "message" in data
+        assert recipient_ids(db_session, response.json()["id"]) == [ann.id]
+        assert recipient_ids(db_session, pending.json()["id"]) == [ann.id]
+        assert "1 recipients" in response.json()["message"]
 
     def test_validates_promo_code_exists(self, client, mock_db):
         """Should return 400 if promo code not found."""
@@ -405,17 +435,11 @@ class TestCreateCampaignEndpoint:
         data = response.json()
         assert "promo code" in data["detail"].lower()
 
-    def test_requires_valid_subscribers(self, client, mock_db):
+    def test_requires_valid_subscribers(self, db_client, db_session):
         """Should return 400 if no valid subscribers selected."""
-        # Mock promo query (first call is for PromoCode if promo_code_id provided)
-        # Mock subscriber query returns empty list
-        sub_query = MagicMock()
-        sub_query.filter.return_value = sub_query
-        sub_query.all.return_value = []
+        seed_subscribers(db_session)
 
-        mock_db.query.return_value = sub_query
-
-        response = client.post(
+        response = db_client.post(
             "/api/admin/marketing/campaigns",
             json={
                 "subject": "Test",
@@ -423,35 +447,39 @@ class TestCreateCampaignEndpoint:
                 "subscriber_ids": [999, 998],
             },
         )
+        empty_segment = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Test", "message": "Test message", "segment": {"source": "nowhere"}},
+        )
+        nothing = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Test", "message": "Test message"},
+        )
 
-        assert response.status_code == 400
-        data = response.json()
-        assert "subscriber" in data["detail"].lower()
+        assert [r.status_code for r in (response, empty_segment, nothing)] == [400, 400, 400]
+        assert "subscriber" in response.json()["detail"].lower()
+        assert db_session.query(MarketingEmailCampaign).count() == 0
 
-    def test_excludes_unsubscribed_users(self, client, mock_db):
+    def test_excludes_unsubscribed_users(self, db_client, db_session):
         """Should filter out unsubscribed users from recipient list."""
-        # Only non-unsubscribed subscriber returned
-        active_subscriber = create_mock_subscriber(id=1, unsubscribed=False)
+        ann, bob, cat = seed_subscribers(db_session)
 
-        sub_query = MagicMock()
-        sub_query.filter.return_value = sub_query
-        sub_query.all.return_value = [active_subscriber]  # Only 1, not 2
-
-        mock_db.query.return_value = sub_query
-        mock_db.add = MagicMock()
-        mock_db.flush = MagicMock()
-        mock_db.commit = MagicMock()
-
-        response = client.post(
+        response = db_client.post(
             "/api/admin/marketing/campaigns",
             json={
                 "subject": "Test",
                 "message": "Test message",
-                "subscriber_ids": [1, 2],  # 2 is unsubscribed (filtered by query)
+                "subscriber_ids": [ann.id, bob.id],
             },
         )
+        segment = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Test", "message": "Test message", "segment": {"unsubscribed": True}},
+        )
 
         assert response.status_code == 200
+        assert recipient_ids(db_session, response.json()["id"]) == [ann.id]
+        assert segment.status_code == 400
 
 
 # ============================================================================
@@ -461,44 +489,30 @@ class TestCreateCampaignEndpoint:
 class TestUpdateCampaignEndpoint:
     """Integration tests for PUT /api/admin/marketing/campaigns/{campaign_id}."""
 
-    def test_updates_draft_campaign_successfully(self, client, mock_db):
+    def test_updates_draft_campaign_successfully(self, db_client, db_session):
         """Should update draft campaign and return success."""
-        campaign = create_mock_campaign(id=1, status=MarketingEmailStatus.DRAFT)
-        subscribers = [
-            create_mock_subscriber(id=1, email="sub1@test.com"),
-            create_mock_subscriber(id=2, email="sub2@test.com"),
-        ]
-
-        campaign_query = MagicMock()
-        campaign_query.filter.return_value = campaign_query
-        campaign_query.first.return_value = campaign
-
-        sub_query = MagicMock()
-        sub_query.filter.return_value = sub_query
-        sub_query.all.return_value = subscribers
-
-        recipient_delete_query = MagicMock()
-        recipient_delete_query.filter.return_value = recipient_delete_query
-        recipient_delete_query.delete.return_value = 0
-
-        mock_db.query.side_effect = [campaign_query, sub_query, recipient_delete_query]
-        mock_db.commit = MagicMock()
+        ann, bob, cat = seed_subscribers(db_session)
+        created = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Old", "message": "Old", "subscriber_ids": [ann.id]},
+        ).json()
 
-        response = client.put(
-            "/api/admin/marketing/campaigns/1",
+        response = db_client.put(
+            f"/api/admin/marketing/campaigns/{created['id']}",
             json={
                 "subject": "Updated Subject",
                 "message": "Updated message",
-                "subscriber_ids": [1, 2],
+                "segment": {"unsubscribed": False},
             },
         )
 
         assert response.status_code == 200
-        data = response.json()
-        assert "id" in data or "message" in data
+        campaign = db_session.get(MarketingEmailCampaign, created["id"])
+        db_session.refresh(campaign)
         assert campaign.subject == "Updated Subject"
         assert campaign.message == "Updated message"
         assert campaign.total_recipients == 2
+        assert recipient_ids(db_session, campaign.id) == [ann.id, cat.id]
 
     def test_returns_404_for_nonexistent_campaign(self, client, mock_db):
         """Should return 404 when campaign not found."""
@@ -568,32 +582,27 @@ class TestUpdateCampaignEndpoint:
         data = response.json()
         assert "promo code" in data["detail"].lower()
 
-    def test_rejects_when_no_valid_subscribers(self, client, mock_db):
+    def test_rejects_when_no_valid_subscribers(self, db_client, db_session):
         """Should return 400 when all subscriber_ids are invalid/unsubscribed."""
-        campaign = create_mock_campaign(id=1, status=MarketingEmailStatus.DRAFT)
-
-        campaign_query = MagicMock()
-        campaign_query.filter.return_value = campaign_query
-        campaign_query.first.return_value = campaign
-
-        sub_query = MagicMock()
-        sub_query.filter.return_value = sub_query
-        sub_query.all.return_value = []
-
-        mock_db.query.side_effect = [campaign_query, sub_query]
+        ann, bob, cat = seed_subscribers(db_session)
+        created = db_client.post(
+            "/api/admin/marketing/campaigns",
+            json={"subject": "Old", "message": "Old", "subscriber_ids": [ann.id]},
+        ).json()
 
-        response = client.put(
-            "/api/admin/marketing/campaigns/1",
+        response = db_client.put(
+            f"/api/admin/marketing/campaigns/{created['id']}",
             json={
                 "subject": "X",
                 "message": "Y",
-                "subscriber_ids": [99, 98],
+                "subscriber_ids": [bob.id, 98],
             },
         )
 
         assert response.status_code == 400
         data = response.json()
         assert "subscriber" in data["detail"].lower()
+        assert recipient_ids(db_session, created["id"]) == [ann.id]
 
 
 # ============================================================================
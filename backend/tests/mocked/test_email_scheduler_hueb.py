@@ -1112,27 +1112,43 @@ class TestStandaloneWrappers:
 # ============================================================================
 
 class TestCleanupOldSnapshots:
+    def _retention(self, monkeypatch, raw_deleted):
+        import db_pool_history
+        calls = []
+        def fake(db):
+            calls.append(db)
+            return {"minute_buckets": 1, "hour_buckets": 1, "raw_deleted": raw_deleted,
+                    "minute_deleted": 0, "hour_deleted": 0}
+        monkeypatch.setattr(db_pool_history, "apply_pool_snapshot_retention", fake)
+        return calls
+
     def test_H_deletes_old_rows(self, monkeypatch):
         db = MagicMock()
-        chain = MagicMock()
-        chain.filter.return_value = chain
-        chain.delete.return_value = 3
-        db.query.return_value = chain
+        calls = self._retention(monkeypatch, raw_deleted=3)
         monkeypatch.setattr(email_scheduler, "get_db", lambda: db)
         email_scheduler.cleanup_old_snapshots()
+        assert calls == [db]
         assert db.commit.called
         assert db.close.called
 
     def test_E_nothing_to_delete(self, monkeypatch):
         db = MagicMock()
-        chain = MagicMock()
-        chain.filter.return_value = chain
-        chain.delete.return_value = 0
-        db.query.return_value = chain
+        self._retention(monkeypatch, raw_deleted=0)
         monkeypatch.setattr(email_scheduler, "get_db", lambda: db)
         email_scheduler.cleanup_old_snapshots()
         assert db.commit.called
 
+    def test_U_retention_failure_closes_session(self, monkeypatch):
+        import db_pool_history
+        db = MagicMock()
+        def boom(db):
+            raise RuntimeError("rollup failed")
+        monkeypatch.setattr(db_pool_history, "apply_pool_snapshot_retention", boom)
+        monkeypatch.setattr(email_scheduler, "get_db", lambda: db)
+        email_scheduler.cleanup_old_snapshots()
+        assert not db.commit.called
+        assert db.close.called
+
     def test_U_exception_does_not_propagate(self, monkeypatch):
         def boom():
             raise RuntimeError("DB down")
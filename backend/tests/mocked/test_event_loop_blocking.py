@@ -0,0 +1,157 @@
+"""
+Tests for keeping blocking work off the event loop (event_loop_guard).
+
+Covers:
+- no async route or async dependency takes a database session, apart from
+  the handlers below that await real async I/O
+- run_blocking runs calls on the dedicated blocking pool, and the Stripe
+  webhook hands its event handling to it
+- LoopLagMonitor logs a stall and names the route that held the loop
+- GET /api/admin/event-loop
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+import event_loop_guard
+import main
+from database import get_db
+from main import app, require_admin
+
+# Async handlers allowed a session: each awaits real async I/O and hands
+# its heavy DB work and blocking SDK calls to run_blocking (or the report
+# cache, which does the same). Anything else that uses the session is a
+# plain `def` so FastAPI runs it on a worker thread.
+ASYNC_SESSION_ROUTES = {
+    # report cache (synchronous computes run on the blocking pool)
+    "get_booking_locations",
+    "get_booking_location_clusters",
+    "get_occupancy_report",
+    "get_popular_airlines_destinations",
+    "get_fun_facts",
+    "get_financial_report",
+    "get_session_tracking_report",
+    "get_abandoned_carts_report",
+    # httpx lookups
+    "lookup_vehicle",
+    "lookup_address",
+    # raw request bodies
+    "stripe_webhook",
+    "webhook_sendgrid",
+    "webhook_sms_delivery",
+    "get_inspections_status_batch",
+    # long-poll / server-sent events
+    "get_employee_flight_board_updates",
+    "stream_employee_flight_board",
+}
+
+
+def _async_session_users():
+    """Names of async endpoints/dependencies that depend on get_db directly."""
+    found = set()
+
+    def visit(dependant):
+        if inspect.iscoroutinefunction(dependant.call) and any(
+            sub.call is get_db for sub in dependant.dependencies
+        ):
+            found.add(dependant.call.__name__)
+        for sub in dependant.dependencies:
+            visit(sub)
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            visit(route.dependant)
+    return found
+
+
+class TestHandlerClassification:
+    def test_U_new_async_route_must_not_take_a_session(self):
+        unexpected = _async_session_users() - ASYNC_SESSION_ROUTES
+        assert not unexpected, (
+            f"async handlers doing sync DB I/O on the event loop: {sorted(unexpected)}; "
+            "declare them with plain `def`, or await their queries through event_loop_guard.run_blocking"
+        )
+
+    def test_B_allowlist_has_no_stale_entries(self):
+        assert ASYNC_SESSION_ROUTES - _async_session_users() == set()
+
+
+class TestRunBlocking:
+    async def test_H_runs_on_the_blocking_pool(self):
+        name = await event_loop_guard.run_blocking(lambda: threading.current_thread().name)
+        assert name.startswith("blocking")
+
+    async def test_H_passes_arguments_through(self):
+        assert await event_loop_guard.run_blocking(int, "ff", base=16) == 255
+
+
+    def test_H_stripe_event_is_handled_on_the_blocking_pool(self, db_session, monkeypatch):
+        threads = []
+
+        def verify(payload, signature):
+            threads.append(threading.current_thread().name)
+            return {"type": "customer.created", "data": {"object": {}}}
+
+        monkeypatch.setattr(main, "is_stripe_configured", lambda: True)
+        monkeypatch.setattr(main, "verify_webhook_signature", verify)
+
+        response = TestClient(app).post("/api/webhooks/stripe", content=b"{}", headers={"Stripe-Signature": "sig"})
+
+        assert response.json() == {"status": "received", "type": "customer.created"}
+        assert threads[0].startswith("blocking")
+
+
+async def slow_handler():
+    time.sleep(0.3)  # a synchronous query holding the loop
+
+
+class TestLoopLagMonitor:
+    async def test_H_stall_is_logged_with_the_blocking_route(self, caplog):
+        monitor = event_loop_guard.LoopLagMonitor(threshold_ms=50, interval=0.02)
+        monitor.register_routes([SimpleNamespace(endpoint=slow_handler, path="/api/slow", methods={"GET"})])
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            with caplog.at_level(logging.WARNING, logger="event_loop_guard"):
+                await slow_handler()
+                await asyncio.sleep(0.1)
+        finally:
+            monitor.stop()
+
+        assert monitor.stalls == 1
+        assert monitor.last_stall["route"] == "GET /api/slow"
+        assert monitor.last_stall["location"].startswith("test_event_loop_blocking.py:")
+        assert monitor.last_stall["lag_ms"] >= 250
+        assert "GET /api/slow" in caplog.text
+
+    async def test_B_short_pauses_are_not_stalls(self):
+        monitor = event_loop_guard.LoopLagMonitor(threshold_ms=200, interval=0.02)
+        monitor.start()
+        try:
+            time.sleep(0.05)
+            await asyncio.sleep(0.1)
+        finally:
+            monitor.stop()
+
+        assert monitor.stalls == 0
+        assert monitor.status()["stalls_by_route"] == {}
+
+
+class TestEventLoopEndpoint:
+    def teardown_method(self):
+        app.dependency_overrides.pop(require_admin, None)
+
+    def test_H_returns_monitor_status(self):
+        app.dependency_overrides[require_admin] = lambda: object()
+
+        body = TestClient(app).get("/api/admin/event-loop").json()
+
+        assert body["threshold_ms"] == event_loop_guard.LOOP_LAG_THRESHOLD_MS
+        assert body["blocking_threads"] == event_loop_guard.BLOCKING_THREADS
+        assert "stalls_by_route" in body
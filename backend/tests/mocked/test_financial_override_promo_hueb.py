@@ -380,11 +380,11 @@ class TestUnmarkPromotionsAttribution:
 
 class TestFinancialReportEditFields:
     def setup_method(self):
-        main._financial_cache = {"data": None, "cached_at": None}
+        main.report_cache.clear()
 
     def teardown_method(self):
         app.dependency_overrides.clear()
-        main._financial_cache = {"data": None, "cached_at": None}
+        main.report_cache.clear()
 
     def _report(self, booking):
         db = _model_db({
@@ -425,11 +425,11 @@ class TestFinancialReportCancelledEditable:
     (2026-06-12: cancelled online rows had no edit affordance at all)."""
 
     def setup_method(self):
-        main._financial_cache = {"data": None, "cached_at": None}
+        main.report_cache.clear()
 
     def teardown_method(self):
         app.dependency_overrides.clear()
-        main._financial_cache = {"data": None, "cached_at": None}
+        main.report_cache.clear()
 
     def _report(self, booking):
         db = _model_db({
@@ -0,0 +1,189 @@
+"""
+Golden tests for GET /api/admin/reports/financial.
+
+The report is aggregated with grouped date_trunc queries (day/week/month in
+UK time). tests/mocked/golden/financial_report.json pins the full JSON for
+a synthetic dataset that exercises refunds, every promo source, overrides,
+free bookings, a BST cross-midnight payment and an ISO week that starts in
+the previous calendar year; any change to the payload shows up as a diff.
+
+Uses the in-memory SQLite db_session (the mocked conftest registers
+date_trunc/timezone for it).
+"""
+import json
+from datetime import datetime, date, time, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app, require_admin
+from db_models import (
+    Booking,
+    BookingStatus,
+    Customer,
+    MarketingSubscriber,
+    Payment,
+    PaymentStatus,
+    PromoCode,
+    PromoCodeUsage,
+    Promotion,
+    Vehicle,
+)
+
+
+GOLDEN = Path(__file__).parent / "golden" / "financial_report.json"
+FIXED_NOW = datetime(2026, 6, 17, 12, 0, tzinfo=ZoneInfo("Europe/London"))
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def _seed(db):
+    customers = []
+    for i, (first, last) in enumerate([("Ada", "Lovelace"), ("Brian", "Kernighan"), ("Cleo", "Moss")]):
+        customer = Customer(first_name=first, last_name=last, email=f"fin{i}@example.test", phone=f"0770090010{i}")
+        db.add(customer)
+        db.flush()
+        db.add(Vehicle(customer_id=customer.id, registration=f"FN{i} AAA", make="Ford", model="Focus", colour="Red"))
+        db.flush()
+        customers.append(customer)
+    vehicle_ids = {v.customer_id: v.id for v in db.query(Vehicle).all()}
+
+    refs = iter(range(100, 999))
+
+    def booking(customer, status, paid_at, amount, *, payment_status=PaymentStatus.SUCCEEDED,
+                refund=None, days=7, source="online", override=None):
+        row = Booking(
+            reference=f"TAG-FIN{next(refs)}",
+            customer_id=customer.id,
+            vehicle_id=vehicle_ids[customer.id],
+            status=status,
+            booking_source=source,
+            dropoff_date=date(2026, 7, 1),
+            dropoff_time=time(6, 0),
+            pickup_date=date(2026, 7, 1 + days),
+            pickup_time=time(18, 0),
+            created_at=paid_at or _utc(2026, 6, 1, 9, 0),
+        )
+        if override:
+            row.override_gross_pence, row.override_discount_pence = override
+        db.add(row)
+        db.flush()
+        db.add(Payment(
+            booking_id=row.id,
+            amount_pence=amount,
+            status=payment_status,
+            paid_at=paid_at,
+            refund_amount_pence=refund,
+        ))
+        db.flush()
+        return row
+
+    ada, brian, cleo = customers
+    # ISO 2026-W01 starts on Mon 29 Dec 2025.
+    booking(ada, BookingStatus.COMPLETED, _utc(2025, 12, 29, 10, 0), 8900)
+    booking(brian, BookingStatus.COMPLETED, _utc(2026, 1, 2, 16, 30), 9900, days=14)
+    # 23:12 UTC on 31 May is 00:12 BST on 1 June.
+    cross = booking(cleo, BookingStatus.CONFIRMED, _utc(2026, 5, 31, 23, 12), 7200)
+    booking(ada, BookingStatus.CONFIRMED, _utc(2026, 6, 8, 9, 0), 12000)
+    refunded = booking(brian, BookingStatus.REFUNDED, _utc(2026, 6, 9, 14, 0), 9000,
+                       payment_status=PaymentStatus.PARTIALLY_REFUNDED, refund=3000)
+    booking(cleo, BookingStatus.CANCELLED, _utc(2026, 6, 15, 8, 0), 6000,
+            payment_status=PaymentStatus.REFUNDED, refund=6000)
+    free = booking(ada, BookingStatus.CONFIRMED, _utc(2026, 6, 16, 10, 0), 0, source="manual")
+    booking(brian, BookingStatus.CONFIRMED, _utc(2026, 6, 17, 9, 30), 10800, source="manual",
+            override=(13500, 2700))
+    promo_usage = booking(cleo, BookingStatus.CONFIRMED, _utc(2026, 6, 17, 11, 0), 8500)
+    # Excluded: pending booking, unpaid payment, payment with no paid_at.
+    booking(ada, BookingStatus.PENDING, _utc(2026, 6, 10, 9, 0), 5000)
+    booking(brian, BookingStatus.CONFIRMED, _utc(2026, 6, 11, 9, 0), 5000, payment_status=PaymentStatus.PENDING)
+    booking(cleo, BookingStatus.CONFIRMED, None, 4000)
+
+    promotion = Promotion(name="Spring", discount_percent=20, code_prefix="TAG")
+    db.add(promotion)
+    db.flush()
+    db.add(PromoCode(promotion_id=promotion.id, code="TAG-SPRG-0001", is_used=True, booking_id=cross.id))
+    usage_code = PromoCode(promotion_id=promotion.id, code="TAG-MULT-0001", is_used=False)
+    db.add(usage_code)
+    db.flush()
+    db.add(PromoCodeUsage(promo_code_id=usage_code.id, booking_id=promo_usage.id, discount_percent=15))
+    db.add(MarketingSubscriber(
+        first_name="Mia", last_name="Sub", email="mia@example.test",
+        promo_10_code="TAG-TENP-0001", promo_10_used=True, promo_10_used_booking_id=refunded.id,
+    ))
+    db.add(MarketingSubscriber(
+        first_name="Fred", last_name="Free", email="fred@example.test",
+        promo_free_code="TAG-FREE-0001", promo_free_used=True, promo_free_used_booking_id=free.id,
+    ))
+    db.commit()
+
+
+@pytest.fixture
+def report(db_session):
+    _seed(db_session)
+    app.dependency_overrides[require_admin] = lambda: SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+    client = TestClient(app)
+
+    def _get(**params):
+        with patch("main.get_uk_now", return_value=FIXED_NOW):
+            resp = client.get("/api/admin/reports/financial", params={"refresh": True, **params})
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    yield _get
+    main.report_cache.clear()
+
+
+class TestFinancialReportGolden:
+    @pytest.mark.parametrize("variant, params", [
+        ("default", {}),
+        ("completed", {"status_filter": "completed"}),
+        ("refunded", {"status_filter": "refunded"}),
+        ("promo_yes", {"promo_filter": "yes"}),
+        ("promo_no_june", {"promo_filter": "no", "from_date": "01/06/2026", "to_date": "30/06/2026"}),
+    ])
+    def test_H_payload_matches_golden(self, report, variant, params):
+        golden = json.loads(GOLDEN.read_text())
+        assert report(**params) == golden[variant]
+
+    def test_B_week_key_follows_iso_year(self, report):
+        weeks = [w["week"] for w in report()["chartData"]["weekly"]]
+        assert weeks[0] == "2026-W01"
+
+    def test_H_report_issues_constant_queries(self, report, db_session):
+        from sqlalchemy import event
+
+        engine = db_session.get_bind()
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            report()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        # Rows (with customer), three grouped revenue views, six promo sources.
+        assert len(selects) == 10
+
+
+class TestFinancialReportCache:
+    def test_U_cache_can_be_switched_off(self, report, monkeypatch):
+        monkeypatch.setattr(main, "FINANCIAL_REPORT_CACHE_ENABLED", False)
+        main.report_cache.store("financial", None, {"stale": True})
+
+        with patch("main.get_uk_now", return_value=FIXED_NOW):
+            body = TestClient(app).get("/api/admin/reports/financial").json()
+
+        assert body["cached"] is False
+        assert body["summary"]["totalBookings"] == 10
+        assert main.report_cache.peek("financial") == {"stale": True}
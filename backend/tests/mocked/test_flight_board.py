@@ -17,12 +17,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from fastapi.testclient import TestClient
 
+from db_models import FlightBoardSnapshot, FlightScheduleHistory
 from flight_board_scraper import (
     parse_board_hhmm,
     parse_boh_flight_board,
     resolve_board_date,
 )
-from flight_board_service import build_history_rows, process_flight_board_scrape
+from flight_board_service import (
+    board_content_hash,
+    build_history_rows,
+    diff_boards,
+    live_flight_board,
+    process_flight_board_scrape,
+)
 
 
 # =============================================================================
@@ -114,6 +121,37 @@ FIXTURE_HTML = """
 """
 
 
+def _store_snapshot(db, board, **columns):
+    """Commit an ok snapshot row holding `board`."""
+    values = {
+        "status": "ok",
+        "content_hash": board_content_hash(board),
+        "created_at": datetime.now(timezone.utc),
+    }
+    values.update(columns)
+    snapshot = FlightBoardSnapshot(
+        arrivals_json=board["arrivals"], departures_json=board["departures"], **values
+    )
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def _worker_returns(monkeypatch, board):
+    monkeypatch.setattr(
+        "airport_quote_worker_client.get_airport_quote_worker_url",
+        lambda: "http://worker",
+    )
+    monkeypatch.setattr(
+        "airport_quote_worker_client.fetch_flight_board_via_worker",
+        lambda url: board,
+    )
+
+
+def _newest_snapshot(db):
+    return db.query(FlightBoardSnapshot).order_by(FlightBoardSnapshot.id.desc()).first()
+
+
 # =============================================================================
 # Parser
 # =============================================================================
@@ -278,25 +316,18 @@ class TestProcessFlightBoardScrape:
         db = MagicMock()
         return db, (lambda: db)
 
-    def test_H_ok_scrape_stores_snapshot_and_history(self, monkeypatch):
-        db, factory = self._session_factory()
+    def test_H_ok_scrape_stores_snapshot_and_history(self, db_session, monkeypatch):
         board = parse_boh_flight_board(FIXTURE_HTML)
         board["source_url"] = "https://www.bournemouthairport.com/arrivals-departures/"
-        monkeypatch.setattr(
-            "airport_quote_worker_client.get_airport_quote_worker_url",
-            lambda: "http://worker",
-        )
-        monkeypatch.setattr(
-            "airport_quote_worker_client.fetch_flight_board_via_worker",
-            lambda url: board,
-        )
-        process_flight_board_scrape(factory)
-        assert db.add.call_count == 1
-        snapshot = db.add.call_args[0][0]
+        _worker_returns(monkeypatch, board)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        snapshot = db_session.query(FlightBoardSnapshot).one()
         assert snapshot.status == "ok"
         assert len(snapshot.arrivals_json) == 4
-        assert db.execute.called  # history upsert issued
-        assert db.commit.called
+        assert db_session.query(FlightScheduleHistory).count() == 7
+        assert live_flight_board.version == snapshot.id
 
     def test_U_worker_failure_stores_error_snapshot_only(self, monkeypatch):
         db, factory = self._session_factory()
@@ -327,77 +358,279 @@ class TestProcessFlightBoardScrape:
         assert not db.add.called
 
 
+# =============================================================================
+# Change detection — identical re-scrapes only bump last_seen_at
+# =============================================================================
+
+class TestBoardChangeDetection:
+    def _board(self):
+        return parse_boh_flight_board(FIXTURE_HTML)
+
+    def test_H_hash_ignores_row_order_whitespace_and_source_url(self):
+        board = self._board()
+        shuffled = self._board()
+        shuffled["arrivals"].reverse()
+        shuffled["arrivals"][0]["status"] = "  " + shuffled["arrivals"][0]["status"] + " "
+        shuffled["source_url"] = "https://elsewhere"
+        assert board_content_hash(board) == board_content_hash(shuffled)
+
+    def test_U_status_change_changes_hash(self):
+        board = self._board()
+        moved = self._board()
+        moved["arrivals"][2]["status"] = "Expected 20:40"
+        assert board_content_hash(board) != board_content_hash(moved)
+
+    def test_H_diff_reports_status_and_time_changes_per_flight(self):
+        before = self._board()
+        after = self._board()
+        after["arrivals"][2]["status"] = "Expected 20:40"   # FR3945
+        after["departures"][1]["scheduled"] = "21:15"       # FR3944
+        changes = diff_boards(before, after)
+        assert changes == [
+            {
+                "direction": "arrival", "date": "02/07", "flight": "FR3945",
+                "change": "changed",
+                "fields": {"status": {"from": "Expected 20:00", "to": "Expected 20:40"}},
+            },
+            {
+                "direction": "departure", "date": "02/07", "flight": "FR3944",
+                "change": "changed",
+                "fields": {"scheduled": {"from": "20:45", "to": "21:15"}},
+            },
+        ]
+
+    def test_H_diff_reports_added_and_removed_flights(self):
+        before = self._board()
+        after = self._board()
+        dropped = after["arrivals"].pop(0)
+        after["departures"].append({**after["departures"][0], "flight": "TOM9999"})
+        changes = {(c["flight"], c["change"]) for c in diff_boards(before, after)}
+        assert changes == {(dropped["flight"], "removed"), ("TOM9999", "added")}
+
+    def test_B_identical_boards_have_empty_diff(self):
+        assert diff_boards(self._board(), self._board()) == []
+
+    def test_H_unchanged_board_only_bumps_last_seen_at(self, db_session, monkeypatch):
+        board = self._board()
+        previous = _store_snapshot(db_session, board)
+        _worker_returns(monkeypatch, board)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        assert db_session.query(FlightBoardSnapshot).count() == 1
+        assert db_session.query(FlightScheduleHistory).count() == 0  # no history upsert
+        assert db_session.get(FlightBoardSnapshot, previous.id).last_seen_at is not None
+
+    def test_H_legacy_snapshot_without_hash_is_hashed_from_its_json(self, db_session, monkeypatch):
+        board = self._board()
+        _store_snapshot(db_session, board, content_hash=None)
+        _worker_returns(monkeypatch, board)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        assert db_session.query(FlightBoardSnapshot).count() == 1
+
+    def test_H_changed_board_stores_hash_and_diff(self, db_session, monkeypatch):
+        before = self._board()
+        after = self._board()
+        after["arrivals"][3]["status"] = "Delayed"
+        _store_snapshot(db_session, before)
+        _worker_returns(monkeypatch, after)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        snapshot = _newest_snapshot(db_session)
+        assert snapshot.content_hash == board_content_hash(after)
+        assert [c["flight"] for c in snapshot.diff_json] == ["LS3628"]
+        assert snapshot.last_seen_at is not None
+        assert db_session.query(FlightScheduleHistory).count() == 7
+
+    def test_H_first_snapshot_has_no_diff(self, db_session, monkeypatch):
+        _worker_returns(monkeypatch, self._board())
+        process_flight_board_scrape(lambda: db_session)
+        assert db_session.query(FlightBoardSnapshot).one().diff_json is None
+
+
+# =============================================================================
+# Live board — in-memory, versioned per changed scrape
+# =============================================================================
+
+class TestLiveFlightBoard:
+    def _board(self):
+        return parse_boh_flight_board(FIXTURE_HTML)
+
+    def _now(self):
+        return datetime.now(timezone.utc)
+
+    def test_H_changes_since_returns_only_moved_flights_with_rows(self):
+        before, after = self._board(), self._board()
+        after["arrivals"][2]["status"] = "Expected 20:40"
+        live_flight_board.publish(1, before, self._now(), None)
+        live_flight_board.publish(2, after, self._now(), diff_boards(before, after))
+
+        changes = live_flight_board.changes_since(1)
+
+        assert [(c["flight"], c["change"]) for c in changes] == [("FR3945", "changed")]
+        assert changes[0]["row"]["status"] == "Expected 20:40"
+        assert live_flight_board.changes_since(2) == []
+
+    def test_H_changes_chain_across_versions(self):
+        b1, b2, b3 = self._board(), self._board(), self._board()
+        b2["arrivals"][2]["status"] = "Expected 20:40"
+        b3["arrivals"][2]["status"] = "Expected 20:40"
+        b3["departures"].pop(0)
+        live_flight_board.publish(1, b1, self._now(), None)
+        live_flight_board.publish(2, b2, self._now(), diff_boards(b1, b2))
+        live_flight_board.publish(3, b3, self._now(), diff_boards(b2, b3))
+
+        changes = live_flight_board.changes_since(1)
+
+        assert [(c["flight"], c["change"]) for c in changes] == [
+            ("FR3945", "changed"), ("TOM6472", "removed"),
+        ]
+        assert "row" not in changes[1]
+
+    def test_U_unknown_or_missing_version_needs_resync(self):
+        live_flight_board.publish(5, self._board(), self._now(), None)
+        assert live_flight_board.changes_since(None) is None
+        assert live_flight_board.changes_since(4) is None
+        assert live_flight_board.changes_since(99) is None
+
+    def test_B_older_publish_and_foreign_touch_are_ignored(self):
+        seen = self._now()
+        live_flight_board.publish(5, self._board(), seen, None)
+        live_flight_board.publish(4, {"arrivals": [], "departures": []}, self._now(), None)
+        live_flight_board.touch(4, seen + timedelta(minutes=30))
+        state = live_flight_board.state()
+        assert state["version"] == 5
+        assert len(state["arrivals"]) == 4
+        assert state["scraped_at"] == seen
+
+    def _previous(self, db, board):
+        return _store_snapshot(
+            db, board, last_seen_at=self._now() - timedelta(minutes=30)
+        )
+
+    def test_H_changed_scrape_publishes_after_commit(self, db_session, monkeypatch):
+        before, after = self._board(), self._board()
+        after["arrivals"][3]["status"] = "Delayed"
+        previous = self._previous(db_session, before)
+        _worker_returns(monkeypatch, after)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        assert live_flight_board.version == _newest_snapshot(db_session).id
+        assert [c["flight"] for c in live_flight_board.changes_since(previous.id)] == ["LS3628"]
+
+    def test_H_unchanged_scrape_refreshes_age_not_version(self, db_session, monkeypatch):
+        board = self._board()
+        previous = self._previous(db_session, board)
+        seen = previous.last_seen_at
+        live_flight_board.prime(previous)
+        _worker_returns(monkeypatch, board)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        assert live_flight_board.version == previous.id
+        assert live_flight_board.state()["scraped_at"] > seen
+
+    def test_H_changed_scrape_hands_diff_to_propagation(self, db_session, monkeypatch):
+        before, after = self._board(), self._board()
+        after["arrivals"][3]["status"] = "Delayed"
+        self._previous(db_session, before)
+        _worker_returns(monkeypatch, after)
+        calls = []
+
+        def _propagate(db, **kwargs):
+            calls.append(kwargs)
+            raise RuntimeError("planner tables missing")
+
+        monkeypatch.setattr("flight_delay_propagation.propagate_board_changes", _propagate)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        snapshot = _newest_snapshot(db_session)
+        assert calls[0]["snapshot_id"] == snapshot.id
+        assert [c["flight"] for c in calls[0]["diff"]] == ["LS3628"]
+        # A propagation failure rolls back only its own work.
+        assert db_session.query(FlightBoardSnapshot).count() == 2
+        assert live_flight_board.version == snapshot.id
+
+    def test_U_failed_commit_publishes_nothing(self, db_session, monkeypatch):
+        before, after = self._board(), self._board()
+        after["arrivals"][3]["status"] = "Delayed"
+        previous_id = self._previous(db_session, before).id
+        _worker_returns(monkeypatch, after)
+
+        def _commit():
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(db_session, "commit", _commit)
+
+        process_flight_board_scrape(lambda: db_session)
+
+        assert live_flight_board.version == previous_id
+        assert db_session.query(FlightBoardSnapshot).count() == 1
+
+
 # =============================================================================
 # Employee endpoint — served from the latest ok snapshot
 # =============================================================================
 
 class TestEmployeeFlightBoardEndpoint:
-    def _client_with_snapshot(self, snapshot):
+    BOARD = {"arrivals": [{"flight": "TOM6457"}], "departures": [{"flight": "TOM6472"}]}
+
+    @pytest.fixture
+    def client(self, db_session):
         import main
-        from database import get_db
         from main import app
 
-        db = MagicMock()
-        chain = MagicMock()
-        chain.filter.return_value = chain
-        chain.order_by.return_value = chain
-        chain.first.return_value = snapshot
-        db.query.return_value = chain
-
-        def _get_db():
-            yield db
-
         user = MagicMock()
         user.id = 7
         user.is_admin = False
-        app.dependency_overrides[get_db] = _get_db
         app.dependency_overrides[main.get_current_user] = lambda: user
-        return TestClient(app), app
-
-    def _teardown(self, app):
-        app.dependency_overrides.clear()
-
-    def _mk_snapshot(self, *, age_minutes):
-        snapshot = MagicMock()
-        snapshot.status = "ok"
-        snapshot.arrivals_json = [{"flight": "TOM6457"}]
-        snapshot.departures_json = [{"flight": "TOM6472"}]
-        snapshot.created_at = datetime.now(timezone.utc) - timedelta(minutes=age_minutes)
-        return snapshot
-
-    def test_H_returns_latest_snapshot(self):
-        client, app = self._client_with_snapshot(self._mk_snapshot(age_minutes=10))
-        try:
-            resp = client.get("/api/employee/flight-board")
-            assert resp.status_code == 200, resp.json()
-            body = resp.json()
-            assert body["available"] is True
-            assert body["arrivals"] == [{"flight": "TOM6457"}]
-            assert body["departures"] == [{"flight": "TOM6472"}]
-            assert body["age_minutes"] == 10
-            assert body["stale"] is False
-        finally:
-            self._teardown(app)
-
-    def test_H_stale_boundary_at_45_minutes(self):
+        return TestClient(app)
+
+    def _store(self, db, *, age_minutes, **columns):
+        # Callers hold the returned row: the session's identity map then
+        # serves it with its aware datetimes, which SQLite reads back naive.
+        created_at = datetime.now(timezone.utc) - timedelta(minutes=age_minutes)
+        return _store_snapshot(db, self.BOARD, created_at=created_at, **columns)
+
+    def test_H_returns_latest_snapshot(self, client, db_session):
+        snapshot = self._store(db_session, age_minutes=10)
+        resp = client.get("/api/employee/flight-board")
+        assert resp.status_code == 200, resp.json()
+        body = resp.json()
+        assert body["available"] is True
+        assert body["arrivals"] == [{"flight": "TOM6457"}]
+        assert body["departures"] == [{"flight": "TOM6472"}]
+        assert body["age_minutes"] == 10
+        assert body["stale"] is False
+        assert body["version"] == snapshot.id
+
+    @pytest.mark.parametrize("age, expected_stale", [(44, False), (45, False), (46, True)])
+    def test_H_stale_boundary_at_45_minutes(self, client, db_session, age, expected_stale):
         # t: exactly 45 -> not stale; t+eps: 46 -> stale
-        for age, expected_stale in ((44, False), (45, False), (46, True)):
-            client, app = self._client_with_snapshot(self._mk_snapshot(age_minutes=age))
-            try:
-                body = client.get("/api/employee/flight-board").json()
-                assert body["stale"] is expected_stale, f"age={age}"
-            finally:
-                self._teardown(app)
-
-    def test_U_no_snapshot_yet(self):
-        client, app = self._client_with_snapshot(None)
-        try:
-            body = client.get("/api/employee/flight-board").json()
-            assert body["available"] is False
-            assert body["arrivals"] == []
-            assert body["stale"] is True
-        finally:
-            self._teardown(app)
+        snapshot = self._store(db_session, age_minutes=age)
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["stale"] is expected_stale
+
+    def test_H_age_runs_from_last_seen_at(self, client, db_session):
+        last_seen_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        snapshot = self._store(db_session, age_minutes=300, last_seen_at=last_seen_at)
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["age_minutes"] == 5
+        assert body["stale"] is False
+        assert body["scraped_at"] == last_seen_at.isoformat()
+
+    def test_U_no_snapshot_yet(self, client):
+        body = client.get("/api/employee/flight-board").json()
+        assert body["available"] is False
+        assert body["arrivals"] == []
+        assert body["stale"] is True
 
     def test_U_requires_auth(self):
         import main
@@ -407,6 +640,120 @@ class TestEmployeeFlightBoardEndpoint:
         resp = TestClient(app).get("/api/employee/flight-board")
         assert resp.status_code in (401, 403)
 
+    def test_H_warm_board_is_served_without_a_query(self, client):
+        board = parse_boh_flight_board(FIXTURE_HTML)
+        live_flight_board.publish(9, board, datetime.now(timezone.utc), None)
+        body = client.get("/api/employee/flight-board").json()
+        assert body["available"] is True
+        assert body["version"] == 9
+        assert len(body["departures"]) == 3
+
+    def test_H_cold_board_is_primed_once_from_the_db(self, client, db_session):
+        snapshot = self._store(db_session, age_minutes=10)
+        client.get("/api/employee/flight-board")
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["age_minutes"] == 10
+        assert live_flight_board.version == snapshot.id
+
+
+class TestEmployeeFlightBoardUpdates:
+    def _client(self):
+        import main
+        from database import get_db
+        from main import app
+
+        db = MagicMock()
+        db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
+
+        def _get_db():
+            yield db
+
+        app.dependency_overrides[get_db] = _get_db
+        app.dependency_overrides[main.get_current_user] = lambda: MagicMock(id=7)
+        return TestClient(app)
+
+    def _publish_two(self):
+        before = parse_boh_flight_board(FIXTURE_HTML)
+        after = parse_boh_flight_board(FIXTURE_HTML)
+        after["departures"][1]["status"] = "Gate Closed"
+        now = datetime.now(timezone.utc)
+        live_flight_board.publish(1, before, now, None)
+        live_flight_board.publish(2, after, now, diff_boards(before, after))
+
+    def test_H_long_poll_returns_only_changed_flights(self):
+        self._publish_two()
+        body = self._client().get(
+            "/api/employee/flight-board/updates", params={"since": 1, "wait": 0},
+        ).json()
+        assert body["resync"] is False
+        assert body["version"] == 2
+        assert [c["flight"] for c in body["changes"]] == ["FR3944"]
+        assert body["changes"][0]["row"]["status"] == "Gate Closed"
+        assert "arrivals" not in body
+
+    def test_U_unknown_version_gets_full_board(self):
+        self._publish_two()
+        body = self._client().get(
+            "/api/employee/flight-board/updates", params={"since": 77, "wait": 0},
+        ).json()
+        assert body["resync"] is True
+        assert body["version"] == 2
+        assert len(body["arrivals"]) == 4
+
+    def test_B_current_version_times_out_with_no_changes(self):
+        self._publish_two()
+        body = self._client().get(
+            "/api/employee/flight-board/updates", params={"since": 2, "wait": 0},
+        ).json()
+        assert body == {
+            "resync": False, "changes": [], "version": 2,
+            "scraped_at": body["scraped_at"], "age_minutes": 0, "stale": False,
+        }
+
+    def test_U_wait_is_capped(self):
+        resp = self._client().get(
+            "/api/employee/flight-board/updates", params={"wait": 600},
+        )
+        assert resp.status_code == 422
+
+    def test_H_stream_pushes_board_then_changes(self, monkeypatch):
+        import asyncio
+        import json
+        import main
+
+        before = parse_boh_flight_board(FIXTURE_HTML)
+        after = parse_boh_flight_board(FIXTURE_HTML)
+        after["arrivals"][0]["status"] = "Diverted"
+        live_flight_board.publish(1, before, datetime.now(timezone.utc), None)
+        monkeypatch.setattr(main, "FLIGHT_BOARD_STREAM_CHECK_SECONDS", 0)
+
+        class _Request:
+            polls = 0
+
+            async def is_disconnected(self):
+                self.polls += 1
+                if self.polls == 2:
+                    live_flight_board.publish(
+                        2, after, datetime.now(timezone.utc), diff_boards(before, after),
+                    )
+                return self.polls > 3
+
+        async def _collect():
+            response = await main.stream_employee_flight_board(
+                request=_Request(), since=None, db=MagicMock(), current_user=MagicMock(),
+            )
+            return [chunk async for chunk in response.body_iterator]
+
+        chunks = asyncio.run(_collect())
+
+        assert len(chunks) == 2
+        assert chunks[0].startswith("event: board\n")
+        assert chunks[1].startswith("event: changes\n")
+        payload = json.loads(chunks[1].split("data: ", 1)[1])
+        assert payload["version"] == 2
+        assert [c["flight"] for c in payload["changes"]] == ["TOM6457"]
+
 
 # =============================================================================
 # Worker endpoint
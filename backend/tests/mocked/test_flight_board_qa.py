@@ -28,6 +28,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from fastapi.testclient import TestClient
 
 import airport_quote_worker_client as worker_client
+from db_models import FlightBoardSnapshot, FlightScheduleHistory
 from flight_board_scraper import parse_boh_flight_board
 from flight_board_service import (
     build_history_rows,
@@ -213,9 +214,11 @@ class TestProcessScrapeFailureModes:
         assert "429" in snapshot.error
         assert not db.execute.called
 
-    def test_U_commit_failure_rolls_back_and_never_raises(self, monkeypatch):
-        db = MagicMock()
-        db.commit.side_effect = RuntimeError("db down")
+    def test_U_commit_failure_rolls_back_and_never_raises(self, db_session, monkeypatch):
+        def _commit():
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(db_session, "commit", _commit)
         self._worker_env(monkeypatch)
         board = {"arrivals": [_row()], "departures": [], "source_url": "u"}
         monkeypatch.setattr(
@@ -223,9 +226,9 @@ class TestProcessScrapeFailureModes:
             lambda url: board,
         )
         # Background scheduler job: must swallow the persistence failure.
-        process_flight_board_scrape(lambda: db)
-        assert db.rollback.called
-        assert db.close.called
+        process_flight_board_scrape(lambda: db_session)
+        assert db_session.query(FlightBoardSnapshot).count() == 0
+        assert db_session.query(FlightScheduleHistory).count() == 0
 
     def test_U_error_text_is_truncated_to_2000_chars(self, monkeypatch):
         db = MagicMock()
@@ -242,10 +245,9 @@ class TestProcessScrapeFailureModes:
         assert snapshot.status == "error"
         assert len(snapshot.error) == 2000
 
-    def test_U_ok_board_with_no_parseable_rows_still_stores_snapshot(self, monkeypatch):
+    def test_U_ok_board_with_no_parseable_rows_still_stores_snapshot(self, db_session, monkeypatch):
         """Live board rows with TBA date/time can't enter history but the
         snapshot (drivers' live view) must still be stored as ok."""
-        db = MagicMock()
         self._worker_env(monkeypatch)
         board = {
             "arrivals": [_row(board_date="TBA", scheduled="TBA")],
@@ -256,12 +258,11 @@ class TestProcessScrapeFailureModes:
             "airport_quote_worker_client.fetch_flight_board_via_worker",
             lambda url: board,
         )
-        process_flight_board_scrape(lambda: db)
-        snapshot = db.add.call_args[0][0]
+        process_flight_board_scrape(lambda: db_session)
+        snapshot = db_session.query(FlightBoardSnapshot).one()
         assert snapshot.status == "ok"
         assert len(snapshot.arrivals_json) == 1
-        assert not db.execute.called  # zero history rows -> no upsert statement
-        assert db.commit.called
+        assert db_session.query(FlightScheduleHistory).count() == 0
 
     @pytest.mark.xfail(
         strict=False,
@@ -458,104 +459,85 @@ class TestParserMalformedRows:
 # =============================================================================
 
 class TestEmployeeEndpointHardening:
-    def _client(self, snapshot):
+    @pytest.fixture
+    def client(self, db_session):
         import main
-        from database import get_db
         from main import app
 
-        db = MagicMock()
-        chain = MagicMock()
-        chain.filter.return_value = chain
-        chain.order_by.return_value = chain
-        chain.first.return_value = snapshot
-        db.query.return_value = chain
-
-        def _get_db():
-            yield db
-
         user = MagicMock()
         user.id = 7
         user.is_admin = False
-        app.dependency_overrides[get_db] = _get_db
         app.dependency_overrides[main.get_current_user] = lambda: user
-        return TestClient(app), app, chain
-
-    def _teardown(self, app):
-        app.dependency_overrides.clear()
-
-    def _snapshot(self, created_at):
-        snapshot = MagicMock()
-        snapshot.status = "ok"
-        snapshot.arrivals_json = [{"flight": "TOM6457"}]
-        snapshot.departures_json = []
-        snapshot.created_at = created_at
+        return TestClient(app)
+
+    def _snapshot(self, db, created_at, *, status="ok", arrivals=None, departures=None):
+        # Callers hold the returned row: the session's identity map then
+        # serves it with its aware datetimes, which SQLite reads back naive.
+        snapshot = FlightBoardSnapshot(
+            status=status,
+            arrivals_json=[{"flight": "TOM6457"}] if arrivals is None else arrivals,
+            departures_json=[] if departures is None else departures,
+            created_at=created_at,
+        )
+        db.add(snapshot)
+        db.commit()
         return snapshot
 
-    def test_H_query_serves_only_ok_snapshots_newest_first(self):
-        """Error snapshots must never blank the board: the query itself has to
-        filter status == 'ok' and order created_at DESC."""
-        client, app, chain = self._client(None)
-        try:
-            client.get("/api/employee/flight-board")
-            criterion = chain.filter.call_args[0][0]
-            assert "status" in str(criterion)
-            assert criterion.right.value == "ok"
-            order = chain.order_by.call_args[0][0]
-            assert "created_at" in str(order)
-            assert "DESC" in str(order)
-        finally:
-            self._teardown(app)
-
-    def test_U_snapshot_without_created_at_reports_stale(self):
-        client, app, _ = self._client(self._snapshot(created_at=None))
-        try:
-            body = client.get("/api/employee/flight-board").json()
-            assert body["available"] is True
-            assert body["scraped_at"] is None
-            assert body["age_minutes"] is None
-            assert body["stale"] is True
-        finally:
-            self._teardown(app)
-
-    def test_U_future_created_at_clamps_age_to_zero(self):
+    def test_H_query_serves_only_ok_snapshots_newest_first(self, client, db_session):
+        """Error snapshots must never blank the board: the newest ok snapshot
+        is served even when a failed scrape landed after it."""
+        now = datetime.now(timezone.utc)
+        self._snapshot(db_session, now - timedelta(minutes=40), arrivals=[{"flight": "OLD1"}])
+        latest_ok = self._snapshot(db_session, now - timedelta(minutes=10))
+        self._snapshot(db_session, now, status="error", arrivals=[])
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == latest_ok.id
+        assert body["arrivals"] == [{"flight": "TOM6457"}]
+
+    def test_U_snapshot_without_created_at_reports_stale(self, client, db_session):
+        snapshot = self._snapshot(db_session, created_at=None)
+        # The column's server default fills an omitted value; clear it after.
+        db_session.query(FlightBoardSnapshot).update({FlightBoardSnapshot.created_at: None})
+        db_session.commit()
+        db_session.refresh(snapshot)
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["available"] is True
+        assert body["scraped_at"] is None
+        assert body["age_minutes"] is None
+        assert body["stale"] is True
+
+    def test_U_future_created_at_clamps_age_to_zero(self, client, db_session):
         # Clock skew between DB server and API must not produce negative ages.
-        client, app, _ = self._client(
-            self._snapshot(datetime.now(timezone.utc) + timedelta(minutes=5))
-        )
-        try:
-            body = client.get("/api/employee/flight-board").json()
-            assert body["age_minutes"] == 0
-            assert body["stale"] is False
-        finally:
-            self._teardown(app)
-
-    def test_H_stale_boundary_at_seconds_granularity(self):
+        snapshot = self._snapshot(db_session, datetime.now(timezone.utc) + timedelta(minutes=5))
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["age_minutes"] == 0
+        assert body["stale"] is False
+
+    @pytest.mark.parametrize("offset, expected_stale", [
+        (timedelta(minutes=45, seconds=30), False),
+        (timedelta(minutes=46, seconds=30), True),
+    ])
+    def test_H_stale_boundary_at_seconds_granularity(self, client, db_session, offset, expected_stale):
         # Age floors to whole minutes: 45m30s -> 45 (fresh), 46m30s -> 46 (stale).
-        for offset, expected_stale in (
-            (timedelta(minutes=45, seconds=30), False),
-            (timedelta(minutes=46, seconds=30), True),
-        ):
-            client, app, _ = self._client(
-                self._snapshot(datetime.now(timezone.utc) - offset)
-            )
-            try:
-                body = client.get("/api/employee/flight-board").json()
-                assert body["stale"] is expected_stale, offset
-            finally:
-                self._teardown(app)
-
-    def test_U_null_json_columns_serialise_as_empty_lists(self):
-        snapshot = self._snapshot(datetime.now(timezone.utc))
-        snapshot.arrivals_json = None
-        snapshot.departures_json = None
-        client, app, _ = self._client(snapshot)
-        try:
-            body = client.get("/api/employee/flight-board").json()
-            assert body["available"] is True
-            assert body["arrivals"] == []
-            assert body["departures"] == []
-        finally:
-            self._teardown(app)
+        snapshot = self._snapshot(db_session, datetime.now(timezone.utc) - offset)
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["stale"] is expected_stale
+
+    def test_U_null_json_columns_serialise_as_empty_lists(self, client, db_session):
+        snapshot = FlightBoardSnapshot(
+            status="ok", arrivals_json=None, departures_json=None,
+            created_at=datetime.now(timezone.utc),
+        )
+        db_session.add(snapshot)
+        db_session.commit()
+        body = client.get("/api/employee/flight-board").json()
+        assert body["version"] == snapshot.id
+        assert body["available"] is True
+        assert body["arrivals"] == []
+        assert body["departures"] == []
 
 
 # =============================================================================
@@ -0,0 +1,281 @@
+"""
+Tests for flight_delay_propagation — board diffs -> booking/shift impacts.
+
+Uses the in-memory SQLite db_session so the flight/date matching query, the
+previous-impact lookup and the shift-link join run as real SQL.
+"""
+from datetime import date, datetime, time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from db_models import (
+    Booking,
+    BookingStatus,
+    Customer,
+    FlightDelayImpact,
+    RosterShift,
+    ShiftBookingLink,
+    ShiftStatus,
+    ShiftType,
+    Vehicle,
+)
+from flight_board_service import diff_boards
+from flight_delay_propagation import (
+    board_flight_candidates,
+    parse_board_arrival_status,
+    propagate_board_changes,
+    revised_arrival_at,
+)
+
+
+TODAY = date(2026, 7, 2)
+
+
+def _board(status="Expected 20:20", scheduled="20:20", flight="FR3945"):
+    return {
+        "arrivals": [
+            {"place": "Faro", "airline": "Ryanair", "flight": flight, "date": "02/07",
+             "scheduled": scheduled, "status": status},
+            {"place": "Ibiza", "airline": "Jet2", "flight": "LS3628", "date": "02/07",
+             "scheduled": "22:00", "status": "As Scheduled"},
+        ],
+        "departures": [
+            {"place": "Faro", "airline": "Ryanair", "flight": "FR3944", "date": "02/07",
+             "scheduled": "20:45", "status": "As Scheduled"},
+        ],
+    }
+
+
+def _propagate(db, before, after, snapshot_id=None):
+    summary = propagate_board_changes(
+        db, snapshot_id=snapshot_id, board=after, diff=diff_boards(before, after), today=TODAY,
+    )
+    db.commit()
+    return summary
+
+
+@pytest.fixture
+def customer(db_session):
+    customer = Customer(first_name="Ada", last_name="Delay", email="delay@example.test", phone="07700900001")
+    db_session.add(customer)
+    db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, registration="DL1 AY", make="Ford", model="Fiesta", colour="Red")
+    db_session.add(vehicle)
+    db_session.flush()
+    return SimpleNamespace(id=customer.id, vehicle_id=vehicle.id)
+
+
+_refs = iter(range(1000, 9999))
+
+
+def _booking(db, customer, *, flight="FR3945", landing=time(20, 20), landing_date=TODAY,
+             status=BookingStatus.CONFIRMED, airline_code=None, legacy=False):
+    booking = Booking(
+        reference=f"TAG-DLY{next(_refs)}",
+        customer_id=customer.id,
+        vehicle_id=customer.vehicle_id,
+        status=status,
+        dropoff_date=date(2026, 6, 25),
+        dropoff_time=time(6, 0),
+        pickup_date=landing_date,
+        pickup_time=time(20, 50),
+        pickup_flight_number=flight,
+        pickup_airline_code=airline_code,
+        flight_arrival_time=landing,
+        flight_arrival_date=None if legacy else landing_date,
+    )
+    db.add(booking)
+    db.flush()
+    return booking
+
+
+def _shift(db, start, end, *bookings):
+    shift = RosterShift(
+        date=TODAY, end_date=TODAY, start_time=start, end_time=end,
+        shift_type=ShiftType.EVENING, status=ShiftStatus.SCHEDULED,
+    )
+    db.add(shift)
+    db.flush()
+    for booking in bookings:
+        db.add(ShiftBookingLink(shift_id=shift.id, booking_id=booking.id))
+    db.flush()
+    return shift
+
+
+def _impacts(db, impact_type):
+    return (
+        db.query(FlightDelayImpact)
+        .filter(FlightDelayImpact.impact_type == impact_type)
+        .order_by(FlightDelayImpact.id)
+        .all()
+    )
+
+
+class TestParsing:
+    def test_H_expected_and_landed_times(self):
+        assert parse_board_arrival_status("Expected 21:00") == (time(21, 0), None)
+        assert parse_board_arrival_status("Landed 14:41") == (time(14, 41), None)
+        assert parse_board_arrival_status("As Scheduled") == (None, None)
+
+    def test_U_cancelled_and_diverted_carry_no_time(self):
+        assert parse_board_arrival_status("Cancelled") == (None, "cancelled")
+        assert parse_board_arrival_status("Diverted 21:10") == (None, "diverted")
+
+    def test_B_revised_time_crosses_midnight_both_ways(self):
+        assert revised_arrival_at(TODAY, time(23, 50), time(0, 30)) == datetime(2026, 7, 3, 0, 30)
+        assert revised_arrival_at(TODAY, time(0, 10), time(23, 55)) == datetime(2026, 7, 1, 23, 55)
+        assert revised_arrival_at(TODAY, time(20, 20), None) == datetime(2026, 7, 2, 20, 20)
+
+    def test_H_candidates_cover_spacing_alias_and_bare_number(self):
+        assert board_flight_candidates("TOM6457") == [
+            "6457", "BY 6457", "BY6457", "TOM 6457", "TOM6457",
+        ]
+
+
+class TestBookingImpacts:
+    def test_H_forty_minute_delay_writes_booking_impact(self, db_session, customer):
+        booking = _booking(db_session, customer)
+        _booking(db_session, customer, flight="FR9999")  # other flight, untouched
+
+        summary = _propagate(db_session, _board(), _board(status="Expected 21:00"), snapshot_id=None)
+
+        assert summary == {"flights": 1, "bookings": 1, "shifts": 0}
+        (impact,) = _impacts(db_session, "booking")
+        assert impact.booking_id == booking.id
+        assert impact.delay_minutes == 40
+        assert impact.revised_arrival_at == datetime(2026, 7, 2, 21, 0)
+        assert impact.detail_json["revised_pickup_at"] == "2026-07-02T21:30:00"
+
+    def test_B_small_drift_below_threshold_is_ignored(self, db_session, customer):
+        _booking(db_session, customer)
+        summary = _propagate(db_session, _board(), _board(status="Expected 20:30"))
+        assert summary["bookings"] == 0
+        assert _impacts(db_session, "booking") == []
+
+    def test_H_cancellation_is_always_an_impact(self, db_session, customer):
+        _booking(db_session, customer)
+        _propagate(db_session, _board(), _board(status="Cancelled"))
+        (impact,) = _impacts(db_session, "booking")
+        assert impact.revised_arrival_at is None
+        assert impact.delay_minutes is None
+        assert impact.detail_json["flag"] == "cancelled"
+
+    def test_H_delay_clearing_back_to_time_is_reported(self, db_session, customer):
+        _booking(db_session, customer)
+        _propagate(db_session, _board(), _board(status="Expected 21:00"))
+        _propagate(db_session, _board(status="Expected 21:00"), _board(status="Expected 20:25"))
+        impacts = _impacts(db_session, "booking")
+        assert [i.delay_minutes for i in impacts] == [40, 5]
+
+    def test_U_only_confirmed_bookings_on_the_same_day_match(self, db_session, customer):
+        _booking(db_session, customer, status=BookingStatus.CANCELLED)
+        _booking(db_session, customer, landing_date=date(2026, 7, 9))
+        summary = _propagate(db_session, _board(), _board(status="Expected 21:00"))
+        assert summary["bookings"] == 0
+
+    def test_H_alias_and_bare_number_bookings_match(self, db_session, customer):
+        by = _booking(db_session, customer, flight="BY6457")
+        bare = _booking(db_session, customer, flight="6457", airline_code="TOM")
+        _booking(db_session, customer, flight="6457")  # no carrier: ambiguous, skipped
+
+        _propagate(
+            db_session,
+            _board(flight="TOM6457"),
+            _board(flight="TOM6457", status="Expected 21:30"),
+        )
+
+        assert {i.booking_id for i in _impacts(db_session, "booking")} == {by.id, bare.id}
+
+    def test_H_legacy_booking_without_arrival_date_matches(self, db_session, customer):
+        booking = _booking(db_session, customer, legacy=True)
+        _propagate(db_session, _board(), _board(status="Expected 21:00"))
+        assert [i.booking_id for i in _impacts(db_session, "booking")] == [booking.id]
+
+    def test_B_departure_changes_and_gate_only_changes_are_skipped(self, db_session, customer):
+        _booking(db_session, customer)
+        after = _board()
+        after["departures"][0]["status"] = "Delayed 22:00"
+        assert _propagate(db_session, _board(), after)["flights"] == 0
+
+
+class TestShiftImpacts:
+    def test_H_shift_overrun_is_reported_once_for_all_its_bookings(self, db_session, customer):
+        first = _booking(db_session, customer)
+        second = _booking(db_session, customer)
+        shift = _shift(db_session, time(19, 0), time(21, 15), first, second)
+
+        summary = _propagate(db_session, _board(), _board(status="Expected 21:00"))
+
+        assert summary["shifts"] == 1
+        (impact,) = _impacts(db_session, "shift")
+        assert impact.shift_id == shift.id
+        assert impact.still_covered is False
+        assert impact.overrun_minutes == 15  # handoff 21:30 vs shift end 21:15
+        assert [b["booking_id"] for b in impact.detail_json["bookings"]] == [first.id, second.id]
+
+    def test_H_shift_that_still_covers_says_so(self, db_session, customer):
+        booking = _booking(db_session, customer)
+        _shift(db_session, time(19, 0), time(23, 0), booking)
+        _propagate(db_session, _board(), _board(status="Expected 21:00"))
+        (impact,) = _impacts(db_session, "shift")
+        assert impact.still_covered is True
+        assert impact.overrun_minutes == 0
+
+    def test_U_cancelled_shifts_are_not_impacted(self, db_session, customer):
+        booking = _booking(db_session, customer)
+        shift = _shift(db_session, time(19, 0), time(21, 0), booking)
+        shift.status = ShiftStatus.CANCELLED
+        db_session.flush()
+        assert _propagate(db_session, _board(), _board(status="Expected 21:00"))["shifts"] == 0
+
+    def test_B_query_count_is_constant(self, db_session, customer):
+        from sqlalchemy import event
+
+        for _ in range(6):
+            booking = _booking(db_session, customer)
+            _shift(db_session, time(19, 0), time(21, 0), booking)
+        db_session.commit()
+        engine = db_session.get_bind()
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            propagate_board_changes(
+                db_session, snapshot_id=None, board=_board(status="Expected 21:00"),
+                diff=diff_boards(_board(), _board(status="Expected 21:00")), today=TODAY,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(selects) == 3
+
+
+class TestFlightImpactEndpoints:
+    @pytest.fixture
+    def client(self, db_session):
+        from main import app
+        from routers.roster import require_admin
+
+        app.dependency_overrides[require_admin] = lambda: SimpleNamespace(id=1, is_admin=True)
+        return TestClient(app)
+
+    def test_H_list_then_consume(self, client, db_session, customer):
+        _booking(db_session, customer)
+        _propagate(db_session, _board(), _board(status="Expected 21:00"))
+
+        body = client.get("/api/admin/roster/flight-impacts").json()
+        assert [(i["impact_type"], i["delay_minutes"]) for i in body["impacts"]] == [("booking", 40)]
+
+        ids = [i["id"] for i in body["impacts"]]
+        assert client.post("/api/admin/roster/flight-impacts/consume", json={"impact_ids": ids}).json() == {"consumed": 1}
+        assert client.get("/api/admin/roster/flight-impacts").json() == {"impacts": []}
+
+    def test_U_consume_requires_ids(self, client):
+        resp = client.post("/api/admin/roster/flight-impacts/consume", json={"impact_ids": []})
+        assert resp.status_code == 422
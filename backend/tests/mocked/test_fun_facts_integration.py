@@ -85,9 +85,21 @@ def create_mock_booking(
     booking.customer_first_name = customer_first_name
     booking.customer_last_name = customer_last_name
     booking.customer = None  # No linked customer object
+    # The report streams flat rows: payment columns sit on the row itself.
+    booking.paid_at = booking.payment.paid_at if booking.payment else None
+    booking.amount_pence = booking.payment.amount_pence if booking.payment else None
+    booking.pickup_origin = None
+    booking.dropoff_airline_name = None
+    booking.pickup_airline_name = None
     return booking
 
 
+def stream_rows(mock_db, rows):
+    """Serve rows from the highlights query chain (joins, filter, order, yield_per)."""
+    query = mock_db.query.return_value.outerjoin.return_value.outerjoin.return_value
+    query.filter.return_value.order_by.return_value.yield_per.return_value = rows
+
+
 # =============================================================================
 # Integration Tests - Happy Path
 # =============================================================================
@@ -105,7 +117,7 @@ class TestFunFactsIntegrationHappyPath:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -142,7 +154,7 @@ class TestFunFactsIntegrationHappyPath:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -174,7 +186,7 @@ class TestFunFactsIntegrationHappyPath:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -206,7 +218,7 @@ class TestFunFactsIntegrationHappyPath:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -242,7 +254,7 @@ class TestFunFactsIntegrationHappyPath:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -276,7 +288,7 @@ class TestFunFactsIntegrationEmptyCases:
     def test_no_bookings_returns_null_values(self, mock_admin_user):
         """Should return null values when no bookings exist."""
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = []
+        stream_rows(mock_db, [])
 
         def mock_get_db():
             yield mock_db
@@ -309,7 +321,7 @@ class TestFunFactsIntegrationEmptyCases:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -354,7 +366,7 @@ class TestFunFactsIntegrationEdgeCases:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -392,7 +404,7 @@ class TestFunFactsIntegrationEdgeCases:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -426,7 +438,7 @@ class TestFunFactsIntegrationEdgeCases:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -473,7 +485,7 @@ class TestFunFactsIntegrationAuth:
         from fastapi import HTTPException
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = []
+        stream_rows(mock_db, [])
 
         def mock_get_db():
             yield mock_db
@@ -508,7 +520,7 @@ class TestFunFactsIntegrationDateFormatting:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -546,7 +558,7 @@ class TestFunFactsIntegrationDateFormatting:
         ]
 
         mock_db = MagicMock()
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+        stream_rows(mock_db, mock_bookings)
 
         def mock_get_db():
             yield mock_db
@@ -584,7 +596,7 @@ class TestFunFactsIntegrationDateFormatting:
 def _override_admin_and_bookings(mock_admin_user, mock_bookings):
     """Wire up the admin + DB overrides used by every Busiest Month test."""
     mock_db = MagicMock()
-    mock_db.query.return_value.filter.return_value.all.return_value = mock_bookings
+    stream_rows(mock_db, mock_bookings)
 
     def mock_get_db():
         yield mock_db
@@ -0,0 +1,160 @@
+"""
+Tests for the materialised booking funnel (funnel_sessions).
+
+Covers live tracking on commit (first-step timestamps, webhook
+confirmations linked by booking reference, ghosts, payment failures,
+rollback), the backfill matching live tracking, and the session-tracking
+report reading the table with one grouped query per step.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import event
+
+import funnel_sessions as fs
+import main
+from db_models import AuditLog, AuditLogEvent, FunnelSession
+
+
+T0 = datetime(2026, 6, 10, 9, 0)
+
+
+def _log(event_, session_id=None, ref=None, minutes=0):
+    return AuditLog(session_id=session_id, booking_reference=ref, event=event_, created_at=T0 + timedelta(minutes=minutes))
+
+
+def _journey():
+    """A browser session paid through Stripe, a second one that failed to pay,
+    an abandoned one, a webhook-only confirmation and a ghost."""
+    return [
+        _log(AuditLogEvent.DATES_SELECTED, "s1"),
+        _log(AuditLogEvent.FLIGHT_SELECTED, "s1", minutes=1),
+        _log(AuditLogEvent.DATES_SELECTED, "s1", minutes=2),  # repeat
+        _log(AuditLogEvent.CUSTOMER_ENTERED, "s1", minutes=3),
+        _log(AuditLogEvent.PAYMENT_INITIATED, "s1", "TAG-FS001", minutes=4),
+        _log(AuditLogEvent.BOOKING_CONFIRMED, None, "TAG-FS001", minutes=5),
+        _log(AuditLogEvent.DATES_SELECTED, "s2", minutes=10),
+        _log(AuditLogEvent.PAYMENT_INITIATED, "s2", "TAG-FS002", minutes=11),
+        _log(AuditLogEvent.PAYMENT_FAILED, None, "TAG-FS002", minutes=12),
+        _log(AuditLogEvent.DATES_SELECTED, "s3", minutes=20),
+        _log(AuditLogEvent.BOOKING_CONFIRMED, None, "TAG-FS003", minutes=30),
+        _log(AuditLogEvent.BOOKING_CONFIRMED, None, None, minutes=31),
+        _log(AuditLogEvent.BOOKING_STARTED, "s4", minutes=32),
+    ]
+
+
+def _snapshot(db):
+    return {
+        row.session_key: (
+            row.source, row.outcome, row.booking_reference,
+            [getattr(row, column) is not None for column in fs.STAGE_COLUMNS.values()],
+        )
+        for row in db.query(FunnelSession).all()
+    }
+
+
+EXPECTED = {
+    "s1": ("web", "confirmed", "TAG-FS001", [True, True, True, True, True]),
+    "s2": ("web", "payment_failed", "TAG-FS002", [True, False, False, True, False]),
+    "s3": ("web", "open", None, [True, False, False, False, False]),
+    "ref_TAG-FS003": ("webhook", "confirmed", "TAG-FS003", [False, False, False, False, True]),
+}
+
+
+@pytest.fixture
+def tracked(db_session):
+    fs.install_funnel_tracking(db_session)
+    return db_session
+
+
+class TestLiveTracking:
+    def test_H_commits_fold_events_into_sessions(self, tracked):
+        for log in _journey():
+            tracked.add(log)
+            tracked.commit()
+
+        assert _snapshot(tracked) == EXPECTED
+        s1 = tracked.query(FunnelSession).filter_by(session_key="s1").one()
+        assert s1.dates_selected_at.replace(tzinfo=None) == T0
+        assert s1.last_event_at.replace(tzinfo=None) == T0 + timedelta(minutes=5)
+
+    def test_U_rolled_back_events_are_not_tracked(self, tracked):
+        tracked.add(_log(AuditLogEvent.DATES_SELECTED, "s9"))
+        tracked.flush()
+        tracked.rollback()
+        tracked.commit()
+
+        assert tracked.query(FunnelSession).count() == 0
+
+    def test_E_tracking_failure_keeps_the_audit_row(self, tracked, monkeypatch):
+        def boom(*args, **kwargs):
+            raise RuntimeError("bad row")
+
+        logger = MagicMock()
+        monkeypatch.setattr(fs, "apply_funnel_event", boom)
+        monkeypatch.setattr(fs, "logger", logger)
+        tracked.add(_log(AuditLogEvent.DATES_SELECTED, "s9"))
+        tracked.commit()
+
+        assert tracked.query(AuditLog).count() == 1
+        assert tracked.query(FunnelSession).count() == 0
+        assert "funnel_sessions update skipped" in logger.warning.call_args.args[0]
+
+
+class TestBackfill:
+    def test_H_backfill_matches_live_tracking(self, db_session):
+        db_session.add_all(_journey())
+        db_session.commit()
+
+        result = fs.backfill_funnel_sessions(db_session)
+        db_session.commit()
+
+        assert _snapshot(db_session) == EXPECTED
+        assert result == {"sessions": 4, "events": 11}
+
+    def test_B_backfill_replaces_existing_rows(self, tracked):
+        tracked.add_all(_journey())
+        tracked.commit()
+        tracked.add(FunnelSession(session_key="stale", source="web", outcome="open",
+                                  first_event_at=T0, last_event_at=T0))
+        tracked.commit()
+
+        fs.backfill_funnel_sessions(tracked)
+        tracked.commit()
+
+        assert _snapshot(tracked) == EXPECTED
+
+
+class TestSessionTrackingReport:
+    def test_H_report_counts_sessions_per_step_with_grouped_queries(self, tracked):
+        now = datetime.utcnow() - timedelta(hours=1)
+        for log in _journey():
+            log.created_at = now
+            tracked.add(log)
+        tracked.commit()
+
+        engine = tracked.get_bind()
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            report = main._session_tracking_report(tracked, "weekly")
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        counts = report["cumulative"]["counts"]
+        assert counts == {
+            "dates_selected": 3,
+            "flight_selected": 1,
+            "customer_entered": 1,
+            "payment_initiated": 2,
+            "booking_confirmed": 2,
+        }
+        assert sum(p["counts"]["dates_selected"] for p in report["periods"]) == 3
+        # Five funnel steps, then the manual and free booking lookups.
+        assert len(selects) == 7
@@ -0,0 +1,193 @@
+"""
+Tests for the streaming departures importer (import_departures_capacity).
+
+Covers per-row validation with sheet/row error reporting, bounded batch
+writes, the dry-run diff, and xlsx streaming through openpyxl read-only
+mode. Uses the in-memory SQLite db_session passed straight to
+import_departure_rows.
+"""
+import io
+from datetime import date, time
+
+import pytest
+
+import import_departures_capacity as importer
+from db_models import DepartureSlot, FlightDeparture
+
+
+HEADER = "Date\tDay\tOp Al\tDest\tFlight\tDep Time\tForming Service Arr Time\t0 Spaces\t2 Spaces\t4 Spaces\t6 Spaces\t8 Spaces"
+
+
+def _line(day="2026-02-07", flight="6764", dep="06:40", dest="Gran Canaria Airport", tiers="FALSE\tFALSE\tTRUE\tFALSE\tFALSE"):
+    return f"{day}\tSaturday\tFR : Ryanair\t{dest}\t{flight}\t{dep}\t10:50\t{tiers}"
+
+
+def _tsv(*lines):
+    return "\n".join([HEADER, *lines])
+
+
+def _run(db, tsv, **kw):
+    rows = importer.iter_delimited_rows(io.StringIO(tsv), delimiter="\t", sheet="TSV")
+    return importer.import_departure_rows(rows, db=db, **kw)
+
+
+class TestImportRows:
+    def test_H_imports_rows_and_materialises_slots(self, db_session):
+        result = _run(db_session, _tsv(_line(), _line(flight="5955", dep="07:55", dest="Málaga-Costa del Sol Airport")))
+
+        assert result["departures_imported"] == 2
+        assert result["errors"] == []
+        departures = db_session.query(FlightDeparture).order_by(FlightDeparture.departure_time).all()
+        assert [(d.flight_number, d.airline_code, d.destination_code, d.capacity_tier) for d in departures] == [
+            ("6764", "FR", "LPA", 4), ("5955", "FR", "AGP", 4),
+        ]
+        assert db_session.query(DepartureSlot).count() == 6
+
+    def test_U_bad_rows_are_reported_by_sheet_and_row(self, db_session):
+        result = _run(db_session, _tsv(
+            _line(),
+            _line(day="07/02/2026", flight="1"),
+            _line(flight="2", dep=""),
+            _line(flight="3", tiers="TRUE\tFALSE\tTRUE\tFALSE\tFALSE"),
+            _line(),
+            _line(flight="4", dep="7.55"),
+        ))
+
+        assert result["departures_imported"] == 1
+        assert result["error_count"] == 5
+        assert result["errors_by_sheet"] == {"TSV": 5}
+        assert result["errors"] == [
+            "TSV row 3: Invalid Date '07/02/2026' (expected YYYY-MM-DD)",
+            "TSV row 4: Missing Dep Time",
+            "TSV row 5: More than one capacity column is TRUE (0 Spaces, 4 Spaces)",
+            "TSV row 6: Duplicate of TSV row 2",
+            "TSV row 7: Invalid Dep Time '7.55' (expected HH:MM)",
+        ]
+
+    def test_B_no_capacity_column_true_is_call_us(self, db_session):
+        _run(db_session, _tsv(_line(tiers="FALSE\tFALSE\tFALSE\tFALSE\tFALSE")))
+        assert db_session.query(FlightDeparture).one().capacity_tier == 0
+
+    def test_H_writes_in_bounded_batches(self, db_session, monkeypatch):
+        sizes = []
+        write_batch = importer._write_batch
+
+        def spy(db, batch):
+            sizes.append(len(batch))
+            write_batch(db, batch)
+
+        monkeypatch.setattr(importer, "_write_batch", spy)
+        lines = [_line(flight=str(1000 + i)) for i in range(5)]
+
+        result = _run(db_session, _tsv(*lines), batch_size=2)
+
+        assert sizes == [2, 2, 1]
+        assert result["departures_imported"] == 5
+        assert db_session.query(FlightDeparture).count() == 5
+
+    def test_H_clear_existing_replaces_the_table(self, db_session):
+        _run(db_session, _tsv(_line(flight="1111")))
+        _run(db_session, _tsv(_line(flight="2222")))
+        assert [d.flight_number for d in db_session.query(FlightDeparture)] == ["2222"]
+
+        _run(db_session, _tsv(_line(flight="3333")), clear_existing=False)
+        assert db_session.query(FlightDeparture).count() == 2
+
+    def test_U_header_without_required_columns(self, db_session):
+        result = _run(db_session, "Date\tDay\tOp Al\n2026-02-07\tSaturday\tFR : Ryanair")
+        assert result["errors"] == ["TSV row 1: Header is missing Flight, Dep Time"]
+        assert result["departures_imported"] == 0
+
+
+class TestDryRun:
+    def test_H_diff_against_existing_without_writing(self, db_session):
+        _run(db_session, _tsv(
+            _line(flight="1111"),
+            _line(flight="2222", dep="09:00"),
+            _line(flight="3333"),
+        ))
+
+        result = _run(db_session, _tsv(
+            _line(flight="1111"),
+            _line(flight="2222", dep="09:30"),
+            _line(flight="4444"),
+            _line(flight="5555", dep="bad"),
+        ), dry_run=True)
+
+        assert result["departures_imported"] == 0
+        assert result["departures_valid"] == 3
+        assert result["would_delete"] == 3
+        assert result["error_count"] == 1
+        diff = result["diff"]
+        assert (diff["new"], diff["changed"], diff["unchanged"], diff["missing_from_file"]) == (1, 1, 1, 1)
+        assert diff["changes"] == [{
+            "flight": "FR2222", "date": "2026-02-07",
+            "before": "09:00 LPA tier 4", "after": "09:30 LPA tier 4",
+        }]
+        assert sorted(d.flight_number for d in db_session.query(FlightDeparture)) == ["1111", "2222", "3333"]
+
+    def test_H_summary_prints(self, db_session, capsys):
+        result = _run(db_session, _tsv(_line()), dry_run=True)
+        importer.print_dry_run_summary(result)
+        out = capsys.readouterr().out
+        assert "Dry run - nothing was written." in out
+        assert "New: 1  Changed: 0  Unchanged: 0" in out
+
+
+class TestXlsxStreaming:
+    @pytest.fixture
+    def workbook_path(self, tmp_path):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        schedule = workbook.active
+        schedule.title = "Schedule"
+        schedule.append(HEADER.split("\t"))
+        schedule.append(["2026-02-07", "Saturday", "FR : Ryanair", "Faro Airport", 6764, time(6, 40), "10:50",
+                         False, False, False, True, False])
+        schedule.append([None] * 12)
+        schedule.append([date(2026, 2, 8), "Sunday", "LS : Jet2", "Faro Airport", "123", "7:05", "11:00",
+                         False, True, False, False, False])
+        schedule.append(["2026-02-09", "Monday", "FR : Ryanair", "Faro Airport", None, "08:00", "11:00",
+                         False, True, False, False, False])
+        notes = workbook.create_sheet("Notes")
+        notes.append(["Remark"])
+        notes.append(["Summer timetable"])
+        path = tmp_path / "schedule.xlsx"
+        workbook.save(path)
+        return str(path)
+
+    def test_H_streams_typed_cells_and_reports_per_sheet(self, db_session, workbook_path):
+        result = importer.import_departure_rows(importer.iter_xlsx_rows(workbook_path), db=db_session)
+
+        assert result["departures_imported"] == 2
+        assert result["errors"] == [
+            "Schedule row 5: Missing Flight",
+            "Notes row 1: Header is missing Date, Flight, Dep Time",
+        ]
+        assert result["errors_by_sheet"] == {"Schedule": 1, "Notes": 1}
+        rows = db_session.query(FlightDeparture).order_by(FlightDeparture.date).all()
+        assert [(r.date, r.flight_number, r.departure_time, r.capacity_tier) for r in rows] == [
+            (date(2026, 2, 7), "6764", time(6, 40), 6),
+            (date(2026, 2, 8), "123", time(7, 5), 2),
+        ]
+
+    def test_H_workbook_opened_read_only(self, workbook_path, monkeypatch):
+        import openpyxl
+
+        calls = []
+        load_workbook = openpyxl.load_workbook
+
+        def spy(path, **kw):
+            calls.append(kw)
+            return load_workbook(path, **kw)
+
+        monkeypatch.setattr(openpyxl, "load_workbook", spy)
+        assert len(list(importer.iter_xlsx_rows(workbook_path))) == 4
+        assert calls == [{"read_only": True, "data_only": True}]
+
+    def test_U_unreadable_workbook_is_a_clean_error(self, tmp_path):
+        path = tmp_path / "broken.xlsx"
+        path.write_bytes(b"not a zip")
+        result = importer.import_from_xlsx(str(path))
+        assert result["error"].startswith("Failed to read Excel file")
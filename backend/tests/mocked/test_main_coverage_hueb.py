@@ -4,7 +4,7 @@ These tests avoid live services and drive endpoints directly with tiny DB
 stubs. The goal is to keep the large ``main.py`` module covered where previous
 scheduled runs showed sizeable missed blocks.
 """
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, time, timedelta, timezone
 from types import SimpleNamespace
 from unittest.mock import MagicMock, mock_open
 
@@ -32,6 +32,9 @@ class QueryStub:
     def join(self, *_, **__):
         return self
 
+    def outerjoin(self, *_, **__):
+        return self
+
     def options(self, *_, **__):
         return self
 
@@ -50,6 +53,9 @@ class QueryStub:
     def offset(self, *_, **__):
         return self
 
+    def yield_per(self, *_, **__):
+        return list(self.rows)
+
     def all(self):
         return list(self.rows)
 
@@ -192,7 +198,7 @@ class TestAdminFlightReferenceCoverage:
         )
         db = _db_from_sequence([[dep]])
 
-        result = await main.get_admin_departures(
+        result = main.get_admin_departures(
             sort_order="asc",
             destination=None,
             airline=None,
@@ -200,6 +206,9 @@ class TestAdminFlightReferenceCoverage:
             month=None,
             year=None,
             start_date=None,
+            capacity_state=None,
+            limit=None,
+            cursor=None,
             refresh=False,
             db=db,
             current_user=_user(),
@@ -208,7 +217,7 @@ class TestAdminFlightReferenceCoverage:
         assert result["departures"][0]["departure_time"] == "13:45"
         assert result["cached"] is False
 
-        cached = await main.get_admin_departures(
+        cached = main.get_admin_departures(
             sort_order="asc",
             destination=None,
             airline=None,
@@ -216,6 +225,9 @@ class TestAdminFlightReferenceCoverage:
             month=None,
             year=None,
             start_date=None,
+            capacity_state=None,
+            limit=None,
+            cursor=None,
             refresh=False,
             db=_db_from_sequence([[]]),
             current_user=_user(),
@@ -240,7 +252,7 @@ class TestAdminFlightReferenceCoverage:
         )
         db = _db_from_sequence([[arr]])
 
-        result = await main.get_admin_arrivals(
+        result = main.get_admin_arrivals(
             sort_order="desc",
             origin="Malaga",
             airline="easy",
@@ -248,6 +260,8 @@ class TestAdminFlightReferenceCoverage:
             month=7,
             year=2026,
             start_date=date(2026, 7, 1),
+            limit=None,
+            cursor=None,
             refresh=True,
             db=db,
             current_user=_user(),
@@ -255,7 +269,7 @@ class TestAdminFlightReferenceCoverage:
         assert result["total"] == 1
         assert result["arrivals"][0]["arrival_time"] == "12:15"
 
-        exported = await main.export_admin_flights(
+        exported = main.export_admin_flights(
             flight_type="arrivals",
             db=_db_from_sequence([[arr]]),
             current_user=_user(),
@@ -265,26 +279,28 @@ class TestAdminFlightReferenceCoverage:
         assert "departures" not in exported
 
     async def test_H_filters_combines_and_caches_reference_data(self):
-        db = _db_from_sequence([
-            [("BY", "TUI")],
-            [("EZY", "easyJet"), ("BY", "TUI")],
-            [("PMI", "Palma"), ("AGP", "Malaga")],
-            [("IBZ", "Ibiza")],
-            [(7, 2026)],
-            [(8, 2026)],
-        ])
+        db = _db_from_sequence([])
+        # (kind, airline_code, airline_name, place_code, place_name, year, month, capacity_state, n)
+        db.execute.return_value.all.return_value = [
+            ("departure", "BY", "TUI", "PMI", "Palma", 2026, 7, "available", 3),
+            ("departure", "EZY", "easyJet", "AGP", "Malaga", 2026, 7, "full", 1),
+            ("arrival", "EZY", "easyJet", "IBZ", "Ibiza", 2026, 8, None, 2),
+            ("arrival", "BY", "TUI", "IBZ", "Ibiza", 2026, 8, None, 1),
+        ]
 
-        result = await main.get_admin_flight_filters(refresh=True, db=db, current_user=_user())
+        result = main.get_admin_flight_filters(refresh=True, db=db, current_user=_user())
+        assert db.execute.call_count == 1
         assert result["airlines"] == [
-            {"code": "BY", "name": "TUI"},
-            {"code": "EZY", "name": "easyJet"},
+            {"code": "BY", "name": "TUI", "count": 4},
+            {"code": "EZY", "name": "easyJet", "count": 3},
         ]
+        assert result["origins"] == [{"code": "IBZ", "name": "Ibiza", "count": 3}]
         assert result["months"] == [
-            {"year": 2026, "month": 7, "label": "Jul 2026"},
-            {"year": 2026, "month": 8, "label": "Aug 2026"},
+            {"year": 2026, "month": 7, "label": "Jul 2026", "count": 4},
+            {"year": 2026, "month": 8, "label": "Aug 2026", "count": 3},
         ]
 
-        cached = await main.get_admin_flight_filters(
+        cached = main.get_admin_flight_filters(
             refresh=False,
             db=_db_from_sequence([]),
             current_user=_user(),
@@ -296,26 +312,31 @@ class TestAdminFlightReferenceCoverage:
 class TestAdminAnalyticsUtilityCoverage:
     async def test_H_abandoned_carts_aggregates_destinations_days_and_recent(self):
         now = datetime.utcnow()
+        # Completed sessions are excluded in SQL; rows carry the event_data
+        # fields extracted by the query.
         selected = SimpleNamespace(
             session_id="sess-1",
             created_at=now - timedelta(days=1),
             event=AuditLogEvent.FLIGHT_SELECTED,
-            event_data={
-                "dropoff_date": "2026-07-01",
-                "pickup_date": "2026-07-08",
-                "departure_time": "13:45",
-                "arrival_time": "12:15",
-                "departure_destination": "Palma",
-                "departure_airline": "TUI",
-            },
-        )
-        completed = SimpleNamespace(
-            session_id="sess-2",
+            destination="Palma",
+            dropoff_date="2026-07-01",
+            pickup_date="2026-07-08",
+            departure_time="13:45",
+            arrival_time="12:15",
+            airline="TUI",
+        )
+        searched = SimpleNamespace(
+            session_id="sess-1",
             created_at=now - timedelta(days=2),
             event=AuditLogEvent.DATES_SELECTED,
-            event_data='{"dropoff_date":"2026-07-01","pickup_date":"2026-07-04","departure_destination":"Ibiza"}',
+            destination="Palma",
+            dropoff_date="2026-07-01",
+            pickup_date="not-a-date",
+            departure_time=None,
+            arrival_time=None,
+            airline=None,
         )
-        db = _db_from_sequence([[selected, completed], [("sess-2",)]])
+        db = _db_from_sequence([[selected, searched]])
 
         result = await main.get_abandoned_carts_report(
             period="weekly",
@@ -340,7 +361,7 @@ class TestAdminAnalyticsUtilityCoverage:
         subscriber = SimpleNamespace(id=2, first_name="ALICE", last_name="mCdonald")
         db = _db_from_sequence([[customer], [booking], [subscriber]])
 
-        result = await main.fix_customer_names_endpoint(
+        result = main.fix_customer_names_endpoint(
             dry_run=False,
             db=db,
             current_user=_user(),
@@ -467,7 +488,7 @@ class TestCreatePaymentAdditionalBranches:
         )
         monkeypatch.setattr(main.stripe.PaymentIntent, "retrieve", lambda *_: intent)
 
-        response = await main.create_payment(
+        response = main.create_payment(
             _request({"session_id": "sess-reuse"}),
             _http_request(),
             BackgroundTasks(),
@@ -512,7 +533,7 @@ class TestCreatePaymentAdditionalBranches:
             discount_type="percentage",
         )
 
-        response = await main.create_payment(
+        response = main.create_payment(
             _request({"session_id": "sess-change", "promo_code": "new10"}),
             _http_request(),
             BackgroundTasks(),
@@ -567,7 +588,7 @@ class TestCreatePaymentAdditionalBranches:
             discount_type="free_100",
         )
 
-        response = await main.create_payment(
+        response = main.create_payment(
             _request({"promo_code": "free100"}),
             _http_request(),
             BackgroundTasks(),
@@ -609,7 +630,7 @@ class TestCreatePaymentAdditionalBranches:
         )
         db = PaymentDb(departure=departure)
 
-        response = await main.create_payment(
+        response = main.create_payment(
             _request({
                 "customer_id": 10,
                 "vehicle_id": 20,
@@ -674,7 +695,7 @@ def test_H_run_migrations_executes_idempotent_upgrade_paths(monkeypatch):
 
 @pytest.mark.asyncio
 class TestStatsExportWebhookCoverage:
-    async def test_H_booking_stats_builds_growth_revenue_search_and_bid_sections(self):
+    async def test_H_booking_stats_builds_growth_revenue_search_and_bid_sections(self, monkeypatch):
         today = date.today()
         created_recent = datetime.combine(today, time(9, 30))
         created_last_week = datetime.combine(today - timedelta(days=8), time(20, 15))
@@ -715,9 +736,22 @@ class TestStatsExportWebhookCoverage:
             SimpleNamespace(created_at=created_recent + timedelta(hours=1), event=AuditLogEvent.DATES_SELECTED),
             SimpleNamespace(created_at=created_last_week, event=AuditLogEvent.DATES_SELECTED),
         ]
-        db = _db_from_sequence([bookings, searches])
+        import booking_stats
 
-        result = await main.get_booking_stats(db=db, current_user=_user())
+        rollup = booking_stats._stats_rows(booking_stats.build_buckets(
+            SimpleNamespace(
+                status=b.status, created_at=b.created_at, paid_at=None,
+                amount_pence=b.payment.amount_pence if b.payment else None,
+                dropoff_date=b.dropoff_date, pickup_date=b.pickup_date,
+                dropoff_time=b.dropoff_time, pickup_time=b.pickup_time,
+            )
+            for b in bookings
+        ))
+        monkeypatch.setattr(booking_stats, "load_booking_stats_rows", lambda db: rollup)
+        successful = [b for b in bookings if b.status != BookingStatus.CANCELLED]
+        db = _db_from_sequence([searches, successful])
+
+        result = main.get_booking_stats(db=db, current_user=_user())
 
         assert result["total_bookings"] == 3
         assert result["total_successful"] == 2
@@ -772,7 +806,7 @@ class TestStatsExportWebhookCoverage:
         )
         db = _db_from_sequence([[booking], [], [payment], [subscriber]])
 
-        result = await main.mark_booking_paid(
+        result = main.mark_booking_paid(
             booking_id=55,
             background_tasks=BackgroundTasks(),
             db=db,
@@ -875,11 +909,12 @@ class TestStatsExportWebhookCoverage:
         )
         db = _db_from_sequence([[booking], [promo], [], [], [], []])
 
-        response = await main.export_financial_report(
+        response = main.export_financial_report(
             from_date="01/06/2026",
             to_date="30/06/2026",
             status_filter="confirmed",
             promo_filter="yes",
+            gzip=False,
             db=db,
             current_user=_user(),
         )
@@ -955,7 +990,7 @@ class TestStatsExportWebhookCoverage:
             notes="phone booking",
         )
 
-        result = await main.create_manual_booking(request=request, db=db, current_user=_user())
+        result = main.create_manual_booking(request=request, db=db, current_user=_user())
 
         assert result["success"] is True
         assert result["booking_reference"] == "TAG-ABCDEFGH"
@@ -999,7 +1034,7 @@ class TestStatsExportWebhookCoverage:
             return QueryStub(rows=[1, 2, 3])
         db.query.side_effect = _query
 
-        result = await main.update_promo_modal(
+        result = main.update_promo_modal(
             modal_id=1,
             request=main.PromoModalUpdate(
                 type="promo_section",
@@ -1041,9 +1076,10 @@ class TestStatsExportWebhookCoverage:
         )
         db = _db_from_sequence([[(source, customer)]])
 
-        response = await main.export_marketing_sources_csv(
+        response = main.export_marketing_sources_csv(
             from_date="01/06/2026",
             to_date="30/06/2026",
+            gzip=False,
             db=db,
             current_user=_user(),
         )
@@ -1093,15 +1129,15 @@ class TestParkingSeedSmsAndReferralCoverage:
             flight_number="EZY456",
         )
 
-        departures = await main.get_departures_for_date(
+        departures = main.get_departures_for_date(
             flight_date=flight_date,
             db=_db_from_sequence([[blocked_dropoff], [departure]]),
         )
-        arrivals = await main.get_arrivals_for_date(
+        arrivals = main.get_arrivals_for_date(
             flight_date=flight_date,
             db=_db_from_sequence([[blocked_pickup], [arrival]]),
         )
-        schedule = await main.get_schedule_for_date(
+        schedule = main.get_schedule_for_date(
             flight_date=flight_date,
             db=_db_from_sequence([[departure], [arrival]]),
         )
@@ -1131,7 +1167,7 @@ class TestParkingSeedSmsAndReferralCoverage:
     async def test_H_import_departures_capacity_success_error_and_secret_paths(self, monkeypatch):
         monkeypatch.setattr(main.os, "getenv", lambda *a, **kw: "secret")
         with pytest.raises(main.HTTPException) as exc:
-            await main.import_departures_with_capacity(
+            main.import_departures_with_capacity(
                 request=main.ImportDeparturesRequest(tsv_data="bad"),
                 secret="wrong",
                 db=MagicMock(),
@@ -1141,18 +1177,18 @@ class TestParkingSeedSmsAndReferralCoverage:
 
         module = SimpleNamespace(import_from_tsv_string=MagicMock(return_value={"imported": 2}))
         monkeypatch.setitem(sys.modules, "import_departures_capacity", module)
-        result = await main.import_departures_with_capacity(
+        result = main.import_departures_with_capacity(
             request=main.ImportDeparturesRequest(tsv_data="rows", clear_existing=False),
             secret="secret",
             db=MagicMock(),
             current_user=_user(),
         )
         assert result == {"imported": 2}
-        module.import_from_tsv_string.assert_called_once_with("rows", False)
+        module.import_from_tsv_string.assert_called_once_with("rows", False, dry_run=False)
 
         module.import_from_tsv_string = MagicMock(return_value={"error": "bad tsv"})
         with pytest.raises(main.HTTPException) as bad_exc:
-            await main.import_departures_with_capacity(
+            main.import_departures_with_capacity(
                 request=main.ImportDeparturesRequest(tsv_data="bad"),
                 secret="secret",
                 db=MagicMock(),
@@ -1177,7 +1213,7 @@ class TestParkingSeedSmsAndReferralCoverage:
             id=20, reference="TAG-COV20",
             override_gross_pence=None, override_discount_pence=None,
         )
-        result = await main.update_booking_financial_override(
+        result = main.update_booking_financial_override(
             booking_id=20,
             gross_pence=15000,
             discount_pence=3000,
@@ -1188,7 +1224,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         assert booking.override_discount_pence == 3000
 
         with pytest.raises(main.HTTPException) as missing:
-            await main.update_booking_financial_override(
+            main.update_booking_financial_override(
                 booking_id=21,
                 gross_pence=15000,
                 discount_pence=3000,
@@ -1215,7 +1251,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         send = MagicMock(return_value=True)
         monkeypatch.setattr("email_scheduler.send_parking_update_for_booking", send)
 
-        result = await main.send_parking_update_endpoint(
+        result = main.send_parking_update_endpoint(
             booking_id=70,
             db=db,
             current_user=_user(),
@@ -1229,14 +1265,14 @@ class TestParkingSeedSmsAndReferralCoverage:
         monkeypatch.setattr("email_scheduler.send_parking_update_for_booking", MagicMock(side_effect=SQLAlchemyError()))
         db_error = _db_from_sequence([[booking]])
         with pytest.raises(main.HTTPException) as exc:
-            await main.send_parking_update_endpoint(booking_id=70, db=db_error, current_user=_user())
+            main.send_parking_update_endpoint(booking_id=70, db=db_error, current_user=_user())
         assert exc.value.status_code == 500
         db_error.rollback.assert_called_once()
 
     async def test_H_seed_flights_validates_secret_and_loads_departures_arrivals(self, monkeypatch):
         monkeypatch.setattr(main.os, "getenv", lambda *a, **kw: "secret")
         with pytest.raises(main.HTTPException) as exc:
-            await main.seed_flights(secret="wrong", clear_existing=True, db=MagicMock(), current_user=_user())
+            main.seed_flights(secret="wrong", clear_existing=True, db=MagicMock(), current_user=_user())
         assert exc.value.status_code == 403
 
         flights = [
@@ -1266,7 +1302,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         monkeypatch.setattr(main, "load_flight_schedule_json", lambda: flights)
         db = _db_from_sequence([[], []])
 
-        result = await main.seed_flights(secret="secret", clear_existing=True, db=db, current_user=_user())
+        result = main.seed_flights(secret="secret", clear_existing=True, db=db, current_user=_user())
 
         assert result == {"success": True, "departures": 1, "arrivals": 1, "total": 2}
         assert db.add.call_count == 2
@@ -1286,10 +1322,10 @@ class TestParkingSeedSmsAndReferralCoverage:
             updated_at=now,
         )
         db = _db_from_sequence([[template], [template], [template]])
-        templates = await main.get_sms_templates(current_user=_user(), db=db)
+        templates = main.get_sms_templates(current_user=_user(), db=db)
         assert templates[0]["created_at"] == now.isoformat()
 
-        created = await main.create_sms_template(
+        created = main.create_sms_template(
             data={
                 "name": "Pickup",
                 "content": "Meet soon",
@@ -1304,7 +1340,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         assert created["name"] == "Pickup"
         db.add.assert_called_once()
 
-        updated = await main.update_sms_template(
+        updated = main.update_sms_template(
             template_id=1,
             data={
                 "name": "Arrival updated",
@@ -1320,12 +1356,12 @@ class TestParkingSeedSmsAndReferralCoverage:
         assert updated["name"] == "Arrival updated"
         assert template.trigger_event == "arrival"
 
-        deleted = await main.delete_sms_template(template_id=1, current_user=_user(), db=db)
+        deleted = main.delete_sms_template(template_id=1, current_user=_user(), db=db)
         assert deleted["success"] is True
         db.delete.assert_called_once_with(template)
 
         monkeypatch.setattr(main.sms_service, "get_template_variables_list", lambda: ["first_name", "booking_reference"])
-        assert await main.get_sms_template_variables(current_user=_user()) == ["first_name", "booking_reference"]
+        assert main.get_sms_template_variables(current_user=_user()) == ["first_name", "booking_reference"]
 
         message = SimpleNamespace(
             id=10,
@@ -1344,7 +1380,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         )
         messages_db = MagicMock()
         messages_db.query.return_value = QueryStub(rows=[message], count_value=1)
-        result = await main.get_sms_messages(
+        result = main.get_sms_messages(
             phone="7700",
             booking_id=22,
             direction=SMSDirection.OUTBOUND.value,
@@ -1357,7 +1393,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         assert result["total"] == 1
         assert result["messages"][0]["booking_reference"] == "TAG-SMS22"
 
-    async def test_H_sms_threads_conversation_resend_delete_and_bulk_actions(self, monkeypatch):
+    def test_H_sms_threads_conversation_resend_delete_and_bulk_actions(self, monkeypatch):
         now = datetime(2026, 6, 2, 8, 0)
         thread_row = SimpleNamespace(
             phone_number="+447700900001",
@@ -1406,20 +1442,20 @@ class TestParkingSeedSmsAndReferralCoverage:
         db.query.side_effect = _query
         monkeypatch.setattr(main.sms_service, "format_phone_number", lambda phone: "+447700900001")
 
-        threads = await main.get_sms_threads(current_user=_user(), db=db)
+        threads = main.get_sms_threads(current_user=_user(), db=db)
         assert threads["total_unread"] == 2
         assert threads["threads"][0]["last_message"]["content"].endswith("...")
 
-        assert await main.mark_thread_as_read("+44 7700 900001", current_user=_user(), db=db) == {"marked_read": 4}
-        assert await main.delete_sms_thread("+44 7700 900001", current_user=_user(), db=db) == {"deleted": 2}
-        bulk = await main.bulk_delete_sms_threads(
+        assert main.mark_thread_as_read("+44 7700 900001", current_user=_user(), db=db) == {"marked_read": 4}
+        assert main.delete_sms_thread("+44 7700 900001", current_user=_user(), db=db) == {"deleted": 2}
+        bulk = main.bulk_delete_sms_threads(
             request=main.BulkDeleteThreadsRequest(phone_numbers=["07700900001", "07700900002"]),
             current_user=_user(),
             db=db,
         )
         assert bulk == {"deleted": 4, "threads_removed": 2}
 
-        conversation = await main.get_sms_conversation("+44 7700 900001", mark_read=True, current_user=_user(), db=db)
+        conversation = main.get_sms_conversation("+44 7700 900001", mark_read=True, current_user=_user(), db=db)
         assert conversation["customer"]["email"] == "thread@tag.test"
         assert conversation["messages"][0]["booking_reference"] == "TAG-THREAD55"
 
@@ -1436,11 +1472,11 @@ class TestParkingSeedSmsAndReferralCoverage:
         async def _send_sms(**kwargs):
             return {"success": True, "message_id": 99}
         monkeypatch.setattr(main.sms_service, "send_sms", _send_sms)
-        resent = await main.resend_sms_message(message_id=9, current_user=_user(), db=resend_db)
+        resent = main.resend_sms_message(message_id=9, current_user=_user(), db=resend_db)
         assert resent["new_message_id"] == 99
 
         delete_db = _db_from_sequence([[outbound]])
-        deleted = await main.delete_sms_message(message_id=9, current_user=_user(), db=delete_db)
+        deleted = main.delete_sms_message(message_id=9, current_user=_user(), db=delete_db)
         assert deleted["success"] is True
 
     async def test_H_referral_admin_actions_commit_and_format_program(self, monkeypatch):
@@ -1466,20 +1502,20 @@ class TestParkingSeedSmsAndReferralCoverage:
         db = _db_from_sequence([[referral], [referral], [referral]])
 
         monkeypatch.setattr("referral_service.cancel_referral_code", lambda *_: SimpleNamespace(code="REF123"))
-        cancelled = await main.admin_cancel_customer_referral_code(10, db=db, current_user=_user())
+        cancelled = main.admin_cancel_customer_referral_code(10, db=db, current_user=_user())
         assert cancelled["success"] is True
         assert cancelled["referral_program"]["referral_code"] == "REF123"
 
         monkeypatch.setattr("referral_service.generate_replacement_referral_code", lambda *_: SimpleNamespace(code="REF456"))
-        generated = await main.admin_generate_customer_referral_code(10, db=db, current_user=_user())
+        generated = main.admin_generate_customer_referral_code(10, db=db, current_user=_user())
         assert "REF456 generated" in generated["message"]
 
         monkeypatch.setattr("referral_service.resend_referral_code", lambda *_: SimpleNamespace(code="REF456"))
-        resent = await main.admin_resend_customer_referral_code(10, db=db, current_user=_user())
+        resent = main.admin_resend_customer_referral_code(10, db=db, current_user=_user())
         assert "REF456 resent" in resent["message"]
         assert db.commit.call_count == 3
 
-    async def test_H_sms_send_bulk_status_and_refresh_endpoints(self, monkeypatch):
+    def test_H_sms_send_bulk_status_and_refresh_endpoints(self, monkeypatch):
         template = SimpleNamespace(id=1, content="Hi {{first_name}}")
         booking = SimpleNamespace(
             id=7,
@@ -1499,7 +1535,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         monkeypatch.setattr(main.sms_service, "send_bulk_sms", _send_bulk_sms)
         monkeypatch.setattr(main.sms_service, "refresh_message_statuses", _refresh)
 
-        sent = await main.send_sms_message(
+        sent = main.send_sms_message(
             data={"phone": "+447700900777", "content": "Fallback", "booking_id": 7, "customer_id": 9, "template_id": 1},
             current_user=_user(),
             db=_db_from_sequence([[template], [booking]]),
@@ -1507,7 +1543,7 @@ class TestParkingSeedSmsAndReferralCoverage:
         assert sent["message_id"] == 10
         assert send_sms.call_args.kwargs["content"] == "Hi Bulk"
 
-        bulk = await main.send_bulk_sms(
+        bulk = main.send_bulk_sms(
             data={"booking_ids": [7, 8], "template_id": 1},
             current_user=_user(),
             db=_db_from_sequence([[template], [booking], []]),
@@ -1520,45 +1556,42 @@ class TestParkingSeedSmsAndReferralCoverage:
             status_detail="ok",
             delivered_at=datetime(2026, 6, 2, 9, 0),
         )
-        status = await main.get_sms_status(message_id=10, current_user=_user(), db=_db_from_sequence([[status_message]]))
+        status = main.get_sms_status(message_id=10, current_user=_user(), db=_db_from_sequence([[status_message]]))
         assert status["status"] == "delivered"
-        assert await main.refresh_sms_statuses(current_user=_user(), db=MagicMock()) == {"refreshed": 2}
+        assert main.refresh_sms_statuses(current_user=_user(), db=MagicMock()) == {"refreshed": 2}
 
         with pytest.raises(main.HTTPException) as missing_phone:
-            await main.send_sms_message(data={"content": "No phone"}, current_user=_user(), db=MagicMock())
+            main.send_sms_message(data={"content": "No phone"}, current_user=_user(), db=MagicMock())
         assert missing_phone.value.status_code == 400
 
-    async def test_H_session_tracking_monthly_counts_ghosts_manual_free_and_cache(self):
-        main._session_tracking_cache = {"data": None, "cached_at": None}
+    async def test_H_session_tracking_monthly_counts_stages_manual_free_and_cache(self):
+        main.report_cache.clear()
         log_month = datetime(2026, 5, 4, 10, 0)
-        logs = [
-            SimpleNamespace(id=1, created_at=log_month, event=AuditLogEvent.DATES_SELECTED, session_id="s1", booking_reference=None),
-            SimpleNamespace(id=2, created_at=log_month, event=AuditLogEvent.FLIGHT_SELECTED, session_id="s1", booking_reference=None),
-            SimpleNamespace(id=3, created_at=log_month, event=AuditLogEvent.CUSTOMER_ENTERED, session_id="s1", booking_reference=None),
-            SimpleNamespace(id=4, created_at=log_month, event=AuditLogEvent.PAYMENT_INITIATED, session_id="s1", booking_reference="TAG-ONE"),
-            SimpleNamespace(id=5, created_at=log_month, event=AuditLogEvent.BOOKING_CONFIRMED, session_id=None, booking_reference="TAG-ONE"),
-            SimpleNamespace(id=6, created_at=log_month, event=AuditLogEvent.BOOKING_CONFIRMED, session_id=None, booking_reference=None),
-        ]
+        # One grouped (day, sessions) query per funnel stage, from funnel_sessions.
+        stage_days = [[(datetime(2026, 5, 4), 3)], [(datetime(2026, 5, 4), 2)], [(datetime(2026, 5, 5), 2)],
+                      [(datetime(2026, 5, 5), 1)], [(datetime(2026, 5, 5), 1)]]
         manual_booking = SimpleNamespace(created_at=log_month)
         free_booking = SimpleNamespace(created_at=log_month)
 
         result = await main.get_session_tracking_report(
             period="monthly",
             refresh=True,
-            db=_db_from_sequence([logs, [manual_booking], [free_booking]]),
+            db=_db_from_sequence([*stage_days, [manual_booking], [free_booking]]),
             current_user=_user(),
         )
 
         assert result["period_type"] == "monthly"
         assert result["periods"][0]["label"] == "May 2026"
+        assert result["periods"][0]["counts"]["dates_selected"] == 3
         assert result["periods"][0]["manual_bookings"] == 1
         assert result["periods"][0]["free_bookings"] == 1
         assert result["cumulative"]["counts"]["booking_confirmed"] == 1
+        assert result["cumulative"]["overall_conversion"] == 33.3
 
         daily = await main.get_session_tracking_report(
             period="daily",
             refresh=True,
-            db=_db_from_sequence([logs, [], []]),
+            db=_db_from_sequence([*stage_days, [], []]),
             current_user=_user(),
         )
         cached = await main.get_session_tracking_report(
@@ -1567,11 +1600,12 @@ class TestParkingSeedSmsAndReferralCoverage:
             db=_db_from_sequence([]),
             current_user=_user(),
         )
+        assert [p["period"] for p in daily["periods"]] == ["2026-05-04", "2026-05-05"]
         assert daily["cached"] is False
         assert cached["cached"] is True
 
     async def test_H_bookings_forecast_scores_history_searches_and_cache(self):
-        main._forecast_cache = {"data": None, "cached_at": None}
+        main.report_cache.clear()
         now = main.get_uk_now()
         today = now.date()
         booking = SimpleNamespace(
@@ -1586,33 +1620,40 @@ class TestParkingSeedSmsAndReferralCoverage:
         abandoned_logs = [
             SimpleNamespace(
                 session_id="search-1",
-                event_data={
-                    "departure_destination": "Emerging",
-                    "dropoff_date": (today + timedelta(days=3)).isoformat(),
-                    "departure_airline": "Ryanair UK Ltd",
-                },
+                destination="Emerging",
+                dropoff_date=(today + timedelta(days=3)).isoformat(),
+                airline="Ryanair UK Ltd",
             ),
             SimpleNamespace(
                 session_id="search-2",
-                event_data='{"departure_destination":"Emerging","dropoff_date":"%s","departure_airline":"Jet2"}' % (today + timedelta(days=4)).isoformat(),
+                destination="Emerging",
+                dropoff_date=(today + timedelta(days=4)).isoformat(),
+                airline="Jet2",
             ),
-            SimpleNamespace(session_id="done", event_data={"departure_destination": "Ignored"}),
-            SimpleNamespace(session_id="broken", event_data="{not json"),
+            SimpleNamespace(session_id="no-data", destination=None, dropoff_date="bad", airline=None),
         ]
 
-        result = await main.get_bookings_forecast(
-            refresh=True,
-            db=_db_from_sequence([[booking], abandoned_logs, [("done",)]]),
-            current_user=_user(),
-        )
+        history = [(booking.dropoff_date, booking.created_at, None)]
+        db = _db_from_sequence([[booking], abandoned_logs, history])
+
+        result = main.get_bookings_forecast(refresh=True, db=db, current_user=_user())
         assert result["cached"] is False
         assert result["destinations"][0]["destination"] in {"Emerging", "Ryanair City"}
         assert result["airlines"][0]["airline"] == "Ryanair"
         assert result["upcoming_demand"]
         assert result["opportunity_gaps"][0]["destination"] == "Emerging"
+        assert result["projection"]["days"][3]["on_books"] == 1
+        [stored] = [call.args[0] for call in db.add.call_args_list]
+        assert stored.payload["projection"] == result["projection"]
+        db.commit.assert_called_once()
 
-        cached = await main.get_bookings_forecast(refresh=False, db=_db_from_sequence([]), current_user=_user())
+        stored.generated_at = datetime.now(timezone.utc) - timedelta(minutes=30)
+        cached = main.get_bookings_forecast(
+            refresh=False, db=_db_from_sequence([[stored]]), current_user=_user()
+        )
         assert cached["cached"] is True
+        assert cached["cache_age_minutes"] == 30.0
+        assert cached["projection"] == result["projection"]
 
 
 def test_H_send_campaign_emails_marks_success_failure_and_skips_unsubscribed(monkeypatch):
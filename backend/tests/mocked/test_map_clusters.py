@@ -0,0 +1,125 @@
+"""
+Tests for server-side clustering of the booking-locations map.
+
+Covers:
+- map_clusters tile maths, grid bucketing and bounding-box trimming
+- GET /api/admin/reports/booking-locations/clusters, built from the cached
+  booking-locations report and cached per (map_type, zoom)
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import map_clusters
+from main import app, require_admin, get_db, report_cache
+
+
+# Bournemouth/Poole points a few hundred metres apart, and one in London.
+BH7 = {"id": 1, "lat": 50.7192, "lng": -1.8808}
+BH1 = {"id": 2, "lat": 50.7201, "lng": -1.8765}
+BH1_AGAIN = {"id": 3, "lat": 50.7201, "lng": -1.8765}
+LONDON = {"id": 4, "lat": 51.5074, "lng": -0.1278}
+POINTS = [BH7, BH1, BH1_AGAIN, LONDON]
+UK_BBOX = dict(west=-6.0, south=49.5, east=2.0, north=56.0)
+
+
+class TestTileMaths:
+    def test_zoom_zero_is_one_tile(self):
+        assert map_clusters.tiles_for_bbox(0, -180, -85, 180, 85) == [(0, 0)]
+
+    def test_tile_bounds_contain_their_points(self):
+        px, py = map_clusters._world_position(BH7["lat"], BH7["lng"], 10)
+        west, south, east, north = map_clusters.tile_bounds(10, int(px), int(py))
+        assert west <= BH7["lng"] <= east and south <= BH7["lat"] <= north
+
+    def test_bbox_tiles_cover_the_box(self):
+        tiles = map_clusters.tiles_for_bbox(6, **UK_BBOX)
+        for lat, lng in ((49.5, -6.0), (56.0, 2.0), (BH7["lat"], BH7["lng"])):
+            px, py = map_clusters._world_position(lat, lng, 6)
+            assert (int(px), int(py)) in tiles
+
+    def test_rejects_inverted_or_oversized_box(self):
+        with pytest.raises(ValueError):
+            map_clusters.tiles_for_bbox(6, west=2.0, south=49.5, east=-6.0, north=56.0)
+        with pytest.raises(ValueError):
+            map_clusters.tiles_for_bbox(12, **UK_BBOX)
+
+
+class TestClusterTiles:
+    def _tile(self, zoom, point):
+        px, py = map_clusters._world_position(point["lat"], point["lng"], zoom)
+        return int(px), int(py)
+
+    def test_nearby_points_share_a_cell_at_low_zoom(self):
+        tiles = map_clusters.cluster_tiles(POINTS, 8)
+        clusters = tiles[self._tile(8, BH7)]
+        assert clusters[0]["count"] == 3
+        assert "id" not in clusters[0]
+        assert sum(c["count"] for c in clusters) == 3  # London is another tile
+        assert tiles[self._tile(8, LONDON)] == [{"lat": 51.5074, "lng": -0.1278, "count": 1, "id": 4}]
+
+    def test_only_tiles_holding_points_are_returned(self):
+        assert set(map_clusters.cluster_tiles(POINTS, 8)) == {self._tile(8, BH7), self._tile(8, LONDON)}
+
+    def test_points_split_apart_at_high_zoom(self):
+        tiles = map_clusters.cluster_tiles(POINTS, 16)
+        assert tiles[self._tile(16, BH7)] == [{"lat": 50.7192, "lng": -1.8808, "count": 1, "id": 1}]
+
+    def test_centroid_is_mean_of_points(self):
+        clusters = map_clusters.cluster_tiles([BH7, BH1], 6)[self._tile(6, BH7)]
+        assert clusters[0]["lat"] == pytest.approx((BH7["lat"] + BH1["lat"]) / 2, abs=1e-6)
+
+    def test_merge_trims_to_bbox(self):
+        tiles = [[{"lat": 50.7, "lng": -1.9, "count": 3}], [{"lat": 51.5, "lng": -0.1, "count": 1}]]
+        assert map_clusters.merge_tiles(tiles, (-2.5, 50.0, -1.0, 51.0)) == [{"lat": 50.7, "lng": -1.9, "count": 3}]
+
+
+class TestClustersEndpoint:
+    def setup_method(self):
+        report_cache.clear()
+        report_cache.store(
+            "booking_locations", "bookings",
+            {"count": len(POINTS), "locations": POINTS, "map_type": "bookings"},
+            tags=("bookings", "customers"),
+        )
+        app.dependency_overrides[require_admin] = lambda: object()
+        app.dependency_overrides[get_db] = lambda: None
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+        report_cache.clear()
+
+    def test_returns_counts_per_cell_for_the_viewport(self):
+        resp = TestClient(app).get("/api/admin/reports/booking-locations/clusters", params={"zoom": 6, **UK_BBOX})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["count"] == 4
+        assert [c["count"] for c in body["clusters"]] == [3, 1]
+        assert body["clusters"][1]["id"] == 4
+
+    def test_tile_index_is_built_once_per_zoom(self, monkeypatch):
+        client = TestClient(app)
+        calls = []
+        cluster_tiles = map_clusters.cluster_tiles
+        monkeypatch.setattr(map_clusters, "cluster_tiles", lambda points, zoom: calls.append(zoom) or cluster_tiles(points, zoom))
+
+        client.get("/api/admin/reports/booking-locations/clusters", params={"zoom": 6, **UK_BBOX})
+        client.get("/api/admin/reports/booking-locations/clusters", params={"zoom": 6, **UK_BBOX, "east": 0.0})
+        client.get("/api/admin/reports/booking-locations/clusters", params={"zoom": 7, **UK_BBOX})
+
+        assert calls == [6, 7]
+        stats = report_cache.stats()["reports"]["booking_location_tiles"]
+        assert [e["key"] for e in stats["entries"]] == [("bookings", 6), ("bookings", 7)]
+        assert stats["hits"] == 1
+
+    def test_booking_write_invalidates_tiles(self):
+        client = TestClient(app)
+        params = {"zoom": 6, **UK_BBOX}
+        client.get("/api/admin/reports/booking-locations/clusters", params=params)
+        assert report_cache.invalidate_tag("bookings") > 0
+        stats = report_cache.stats()["reports"]["booking_location_tiles"]
+        assert stats["entries"] == []
+        assert stats["invalidations"] > 0
+
+    def test_rejects_too_many_tiles(self):
+        resp = TestClient(app).get("/api/admin/reports/booking-locations/clusters", params={"zoom": 14, **UK_BBOX})
+        assert resp.status_code == 400
@@ -298,7 +298,7 @@ class TestAdminRefund:
             refund_id=None, refund_amount_pence=None, refund_reason=None,
             refunded_at=None,
         )
-        booking = SimpleNamespace(id=42, reference="TAG-1")
+        booking = SimpleNamespace(id=42, reference="TAG-1", status=None, departure_id=None, dropoff_slot=None)
         _override_admin(self._refund_db(payment, booking))
         resp = TestClient(app).post("/api/admin/refund/pi_123")
         assert resp.status_code == 200
@@ -39,18 +39,7 @@ def _clear():
 
 
 def _reset_caches():
-    try:
-        main._booking_locations_cache = {"bookings": {}, "origins": {}}
-    except Exception:
-        pass
-    try:
-        main._occupancy_cache = {}
-    except Exception:
-        pass
-    try:
-        main._popular_cache = {"data": None, "cached_at": None}
-    except Exception:
-        pass
+    main.report_cache.clear()
 
 
 def _patch_httpx(monkeypatch, json_body=None, status=200):
@@ -72,6 +61,13 @@ def _patch_httpx(monkeypatch, json_body=None, status=200):
 # ============================================================================
 
 class TestBookingLocations:
+    @pytest.fixture(autouse=True)
+    def _empty_geocode_cache(self, monkeypatch):
+        # The MagicMock session cannot hold postcode_geocodes rows.
+        import postcode_geocoder
+        monkeypatch.setattr(postcode_geocoder, "load_cached_geocodes", lambda db, keys: {})
+        monkeypatch.setattr(postcode_geocoder, "_upsert", lambda db, rows: None)
+
     def setup_method(self):
         _reset_caches()
 
@@ -160,10 +156,7 @@ class TestBookingLocations:
     # both paths.
 
     def test_E_cache_hit(self, monkeypatch):
-        main._booking_locations_cache["bookings"] = {
-            "data": {"count": 0, "locations": [], "map_type": "bookings"},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("booking_locations", "bookings", {"count": 0, "locations": [], "map_type": "bookings"})
         _patch_httpx(monkeypatch)
         _override(self._wire(bookings=[]))
         resp = TestClient(app).get("/api/admin/reports/booking-locations")
@@ -171,10 +164,7 @@ class TestBookingLocations:
         assert resp.json().get("cached") is True
 
     def test_E_refresh_bypasses_cache(self, monkeypatch):
-        main._booking_locations_cache["bookings"] = {
-            "data": {"count": 99, "locations": [], "map_type": "bookings"},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("booking_locations", "bookings", {"count": 99, "locations": [], "map_type": "bookings"})
         _patch_httpx(monkeypatch)
         _override(self._wire(bookings=[]))
         resp = TestClient(app).get("/api/admin/reports/booking-locations?refresh=true")
@@ -324,13 +314,8 @@ class TestOccupancyReport:
         assert resp.status_code == 400
 
     def test_E_cache_hit(self):
-        main._occupancy_cache = {
-            "daily": {
-                "data": {"view": "daily", "data": [], "max_capacity": 64,
-                         "start_date": "2026-05-15", "end_date": "2026-05-25"},
-                "cached_at": datetime.now(UK),
-            },
-        }
+        main.report_cache.store("occupancy", "daily", {"view": "daily", "data": [], "max_capacity": 64,
+                                                       "start_date": "2026-05-15", "end_date": "2026-05-25"})
         _override(self._wire([]))
         # No start_date/end_date params = default request → cache hit
         resp = TestClient(app).get("/api/admin/reports/occupancy")
@@ -340,13 +325,8 @@ class TestOccupancyReport:
         """Regression (2026-06-13): a single shared cache slot served the
         cached DAILY payload to weekly/monthly requests, so the Occupancy
         view switcher appeared to do nothing for up to an hour."""
-        main._occupancy_cache = {
-            "daily": {
-                "data": {"view": "daily", "data": [], "max_capacity": 64,
-                         "start_date": "2026-05-15", "end_date": "2026-05-25"},
-                "cached_at": datetime.now(UK),
-            },
-        }
+        main.report_cache.store("occupancy", "daily", {"view": "daily", "data": [], "max_capacity": 64,
+                                                       "start_date": "2026-05-15", "end_date": "2026-05-25"})
         _override(self._wire([]))
         resp = TestClient(app).get("/api/admin/reports/occupancy?view=weekly")
         body = resp.json()
@@ -354,7 +334,7 @@ class TestOccupancyReport:
         assert body["view"] == "weekly"          # NOT the cached daily payload
         assert body.get("cached") is not True    # freshly computed
         # And the weekly result now occupies its own cache slot.
-        assert "weekly" in main._occupancy_cache
+        assert main.report_cache.peek("occupancy", "weekly") is not None
 
     def test_B_second_request_for_same_view_hits_its_own_slot(self):
         _override(self._wire([]))
@@ -379,10 +359,10 @@ class TestPopularReport:
     def _wire(self, bookings):
         db = MagicMock()
         chain = MagicMock()
+        chain.outerjoin.return_value = chain
         chain.filter.return_value = chain
-        chain.options.return_value = chain
         chain.order_by.return_value = chain
-        chain.all.return_value = bookings
+        chain.yield_per.return_value = bookings
         db.query.return_value = chain
         return db
 
@@ -405,17 +385,21 @@ class TestPopularReport:
             pickup_origin="Tenerife",
             status=BookingStatus.CONFIRMED,
             created_at=datetime(2026, 4, 1),
-            payment=None,
+            reference="TAG-1", dropoff_time=None, paid_at=None, amount_pence=None,
         )
         _override(self._wire([b]))
         resp = TestClient(app).get("/api/admin/reports/popular")
         assert resp.status_code == 200
+        body = resp.json()
+        assert body["meta"]["totalBookings"] == 1
+        assert body["popularAirlines"] == [{"airlineName": "TUI Airways", "count": 1, "percent": 100.0}]
+        assert body["popularRoutes"][0]["route"] == "TUI Airways to Tenerife"
 
     def test_E_cache_hit(self):
-        main._popular_cache = {
-            "data": {"top_destinations": [], "top_airlines": []},
-            "cached_at": datetime.now(UK),
-        }
+        main.report_cache.store("booking_highlights", (None, None), {
+            "startDate": None, "endDate": None, "totalBookings": 0,
+            "airlines": [], "destinations": [], "routes": [], "funFacts": {},
+        })
         _override(self._wire([]))
         resp = TestClient(app).get("/api/admin/reports/popular")
         assert resp.json().get("cached") is True
@@ -0,0 +1,197 @@
+"""
+Tests for the intraday occupancy timeline (occupancy_timeline).
+
+Uses the in-memory SQLite db_session with timeline tracking installed on it,
+so booking inserts and changes recompute the days they touch on commit
+exactly as request sessions do. The clock is frozen on 2026-07-01 so the
+rolling window is fixed.
+"""
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+
+import occupancy_timeline
+from db_models import Booking, BookingStatus, Customer, OccupancyTimeline, User, Vehicle
+from main import app, get_current_user
+
+TODAY = date(2026, 7, 1)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock():
+    with freeze_time(datetime(2026, 7, 1, 11, 0)):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def default_secondary_window(monkeypatch):
+    for name in ("SECONDARY_CARPARK_WINDOW_START", "SECONDARY_CARPARK_WINDOW_END", "SECONDARY_CARPARK_CAPACITY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def tracked(db_session):
+    occupancy_timeline.install_occupancy_timeline_tracking(db_session)
+    customer = Customer(first_name="Ada", last_name="Park", email="park@example.test", phone="07700900003")
+    db_session.add(customer)
+    db_session.flush()
+    vehicle = Vehicle(customer_id=customer.id, registration="0CC 1", make="Ford", model="Focus", colour="Blue")
+    db_session.add(vehicle)
+    db_session.commit()
+    return SimpleNamespace(db=db_session, customer_id=customer.id, vehicle_id=vehicle.id)
+
+
+_refs = iter(range(1000, 9999))
+
+
+def _booking(ctx, dropoff, dropoff_time, pickup, pickup_time, status=BookingStatus.CONFIRMED):
+    booking = Booking(
+        reference=f"TAG-OCC{next(_refs)}",
+        customer_id=ctx.customer_id,
+        vehicle_id=ctx.vehicle_id,
+        status=status,
+        dropoff_date=dropoff,
+        dropoff_time=dropoff_time,
+        pickup_date=pickup,
+        pickup_time=pickup_time,
+    )
+    ctx.db.add(booking)
+    ctx.db.commit()
+    return booking
+
+
+def _row(db, day):
+    return db.query(OccupancyTimeline).filter(OccupancyTimeline.timeline_date == day).one_or_none()
+
+
+def _slot(hh, mm):
+    return (hh * 60 + mm) // occupancy_timeline.SLOT_MINUTES
+
+
+class TestComputeDay:
+    def test_H_slots_count_cars_on_site_at_slot_start(self):
+        b = SimpleNamespace(
+            dropoff_date=TODAY, dropoff_time=time(10, 7),
+            pickup_date=TODAY + timedelta(days=1), pickup_time=time(8, 0),
+        )
+        values = occupancy_timeline.compute_day([b], TODAY, {"window_start": time(9), "window_end": time(21), "capacity": 20})
+        total = values["total_json"]
+        assert len(total) == occupancy_timeline.SLOTS_PER_DAY
+        # Arrives 10:07: not there at 10:00, there from 10:15 to the end of the day.
+        assert total[_slot(10, 0)] == 0 and total[_slot(10, 15)] == 1 and total[-1] == 1
+        # Pickup 08:00 is outside the window, so it never counts as secondary.
+        assert values["secondary_json"] == [0] * occupancy_timeline.SLOTS_PER_DAY
+
+    def test_B_pickup_frees_the_slot_it_starts(self):
+        b = SimpleNamespace(
+            dropoff_date=TODAY - timedelta(days=2), dropoff_time=time(12, 0),
+            pickup_date=TODAY, pickup_time=time(14, 0),
+        )
+        values = occupancy_timeline.compute_day([b], TODAY, {"window_start": time(9), "window_end": time(21), "capacity": 20})
+        assert values["total_json"][_slot(13, 45)] == 1
+        assert values["total_json"][_slot(14, 0)] == 0
+        assert values["secondary_pickups"] == 1 and values["secondary_dropoffs"] == 0
+
+    def test_E_missing_times_are_worst_cased(self):
+        b = SimpleNamespace(dropoff_date=TODAY, dropoff_time=None, pickup_date=TODAY, pickup_time=None)
+        values = occupancy_timeline.compute_day([b], TODAY, {"window_start": time(9), "window_end": time(21), "capacity": 20})
+        assert values["total_json"][0] == 1 and values["total_json"][-1] == 1
+        assert values["peak_secondary"] == 0
+
+
+class TestIncrementalMaintenance:
+    def test_H_commit_stores_every_day_of_the_stay(self, tracked):
+        _booking(tracked, TODAY + timedelta(days=1), time(10, 0), TODAY + timedelta(days=3), time(18, 0))
+
+        stored = {row.timeline_date: row for row in tracked.db.query(OccupancyTimeline).all()}
+        assert sorted(stored) == [TODAY + timedelta(days=n) for n in (1, 2, 3)]
+        assert stored[TODAY + timedelta(days=2)].peak_secondary == 1
+        assert stored[TODAY + timedelta(days=1)].secondary_dropoffs == 1
+
+    def test_H_date_change_recomputes_old_and_new_days(self, tracked):
+        booking = _booking(tracked, TODAY + timedelta(days=1), time(10, 0), TODAY + timedelta(days=2), time(18, 0))
+
+        booking.dropoff_date = TODAY + timedelta(days=5)
+        booking.pickup_date = TODAY + timedelta(days=6)
+        tracked.db.commit()
+
+        assert _row(tracked.db, TODAY + timedelta(days=1)).peak_total == 0
+        assert _row(tracked.db, TODAY + timedelta(days=5)).peak_total == 1
+
+    def test_U_cancelled_booking_leaves_the_timeline(self, tracked):
+        booking = _booking(tracked, TODAY, time(10, 0), TODAY + timedelta(days=1), time(18, 0))
+        booking.status = BookingStatus.CANCELLED
+        tracked.db.commit()
+
+        assert _row(tracked.db, TODAY).peak_total == 0
+
+    def test_B_days_outside_the_window_are_not_stored(self, tracked):
+        far = TODAY + timedelta(days=occupancy_timeline.TIMELINE_FUTURE_DAYS + 10)
+        _booking(tracked, far, time(10, 0), far + timedelta(days=1), time(18, 0))
+
+        assert tracked.db.query(OccupancyTimeline).count() == 0
+        assert occupancy_timeline.load_timeline(tracked.db, far)["peak_total"] == 1
+        assert tracked.db.query(OccupancyTimeline).count() == 0
+
+
+    def test_H_recompute_upserts_days_already_stored(self, tracked):
+        _booking(tracked, TODAY + timedelta(days=1), time(10, 0), TODAY + timedelta(days=2), time(18, 0))
+
+        written = occupancy_timeline.recompute_timeline_days(tracked.db, [TODAY + timedelta(days=1)])
+        tracked.db.commit()
+
+        assert written == 1
+        assert tracked.db.query(OccupancyTimeline).count() == 2
+        assert _row(tracked.db, TODAY + timedelta(days=1)).peak_total == 1
+
+
+class TestLoadTimelines:
+    def test_B_missing_days_are_computed_without_writing(self, tracked):
+        _booking(tracked, TODAY, time(10, 0), TODAY + timedelta(days=1), time(18, 0))
+        tracked.db.query(OccupancyTimeline).delete()
+        tracked.db.commit()
+
+        payloads = occupancy_timeline.load_timelines(tracked.db, TODAY, TODAY + timedelta(days=1))
+
+        assert [p["peak_total"] for p in payloads.values()] == [1, 1]
+        assert [p["computed_at"] for p in payloads.values()] == [None, None]
+        assert tracked.db.query(OccupancyTimeline).count() == 0
+
+
+class TestRebuild:
+    def test_H_rebuild_fills_the_window_and_prunes_old_rows(self, tracked):
+        old = TODAY - timedelta(days=occupancy_timeline.TIMELINE_PAST_DAYS + 1)
+        tracked.db.add(OccupancyTimeline(
+            timeline_date=old, slot_minutes=15, total_json=[], secondary_json=[],
+            computed_at=datetime(2026, 6, 1),
+        ))
+        tracked.db.commit()
+
+        result = occupancy_timeline.rebuild_timeline_window(tracked.db)
+        tracked.db.commit()
+
+        first, last = occupancy_timeline.timeline_window()
+        assert result == {"rows": (last - first).days + 1, "pruned": 1}
+        assert _row(tracked.db, old) is None
+
+
+class TestTimelineEndpoint:
+    def teardown_method(self):
+        app.dependency_overrides.pop(get_current_user, None)
+
+    def test_H_returns_compact_payload_for_the_day(self, tracked):
+        _booking(tracked, TODAY, time(9, 30), TODAY + timedelta(days=2), time(12, 0))
+        _booking(tracked, TODAY, time(11, 0), TODAY + timedelta(days=1), time(22, 0))
+        app.dependency_overrides[get_current_user] = lambda: User(email="driver@example.test", is_admin=False)
+
+        resp = TestClient(app).get(f"/api/employee/occupancy-timeline/{TODAY.isoformat()}")
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["slot_minutes"] == 15 and len(body["total"]) == 96
+        assert body["peak_total"] == 2 and body["peak_total_at"] == "11:00"
+        assert body["peak_secondary"] == 1 and body["peak_secondary_at"] == "09:30"
+        assert body["secondary_capacity"] == 20
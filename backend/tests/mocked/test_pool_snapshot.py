@@ -179,24 +179,17 @@ class TestCleanupOldSnapshots:
     """Tests for the cleanup_old_snapshots function."""
 
     @patch('email_scheduler.get_db')
-    def test_deletes_snapshots_older_than_7_days(self, mock_get_db):
-        """Deletes snapshots older than 7 days."""
+    def test_rolls_up_and_prunes_snapshots(self, mock_get_db):
+        """Rolls snapshots up, applies retention and commits."""
         mock_db = MagicMock()
-        mock_query = MagicMock()
-        mock_filter = MagicMock()
-        mock_filter.delete.return_value = 100  # 100 records deleted
-
-        mock_query.filter.return_value = mock_filter
-        mock_db.query.return_value = mock_query
         mock_get_db.return_value = mock_db
 
-        from email_scheduler import cleanup_old_snapshots
-        cleanup_old_snapshots()
+        with patch('db_pool_history.apply_pool_snapshot_retention',
+                   return_value={"raw_deleted": 100}) as mock_retention:
+            from email_scheduler import cleanup_old_snapshots
+            cleanup_old_snapshots()
 
-        # Verify query was executed
-        mock_db.query.assert_called_once()
-        mock_query.filter.assert_called_once()
-        mock_filter.delete.assert_called_once()
+        mock_retention.assert_called_once_with(mock_db)
         mock_db.commit.assert_called_once()
         mock_db.close.assert_called_once()
 
@@ -355,8 +348,8 @@ class TestSchedulerJobConfiguration:
         assert 'record_pool_snapshot' not in job_ids
 
     @patch('email_scheduler.scheduler')
-    def test_cleanup_runs_daily(self, mock_scheduler):
-        """Cleanup job is configured to run daily."""
+    def test_cleanup_runs_every_few_minutes(self, mock_scheduler):
+        """Cleanup job runs on the rollup interval."""
         mock_scheduler.running = False
 
         from email_scheduler import start_scheduler
@@ -366,7 +359,7 @@ class TestSchedulerJobConfiguration:
         for call in mock_scheduler.add_job.call_args_list:
             if call[1].get('id') == 'cleanup_pool_snapshots':
                 trigger = call[1].get('trigger')
-                assert trigger.interval.total_seconds() == 86400  # 24 hours
+                assert trigger.interval.total_seconds() == 5 * 60
 
 
 class TestUsageThresholds:
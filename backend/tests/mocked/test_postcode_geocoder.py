@@ -0,0 +1,162 @@
+"""
+Tests for the persistent postcode geocode cache (postcode_geocoder).
+
+Runs on the in-memory SQLite db_session with httpx.AsyncClient replaced by
+a fake postcodes.io that records every bulk request.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import postcode_geocoder as pg
+from db_models import Booking, BookingStatus, Customer, PostcodeGeocode, Vehicle
+
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def postcodes_io(monkeypatch):
+    """Fake bulk endpoint: knows every postcode except those starting "ZZ"."""
+    requests = []
+
+    async def _post(url, json, timeout):
+        requests.append(list(json["postcodes"]))
+        result = [
+            {"query": pc, "result": None if pc.startswith("ZZ") else {
+                "latitude": 50.0 + len(requests) / 100, "longitude": -1.9, "admin_district": "BCP",
+            }}
+            for pc in json["postcodes"]
+        ]
+        return SimpleNamespace(status_code=200, json=lambda: {"status": 200, "result": result})
+
+    client = MagicMock()
+    client.post = AsyncMock(side_effect=_post)
+    cm = MagicMock()
+    cm.__aenter__ = AsyncMock(return_value=client)
+    cm.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(pg.httpx, "AsyncClient", MagicMock(return_value=cm))
+    return SimpleNamespace(requests=requests, client=client)
+
+
+def _outward(db, code, lat, lng):
+    db.add(PostcodeGeocode(postcode=code, kind=pg.KIND_OUTWARD, latitude=lat, longitude=lng,
+                           source=pg.SOURCE_CENTROID_CSV, fetched_at=NOW, expires_at=None))
+    db.commit()
+
+
+class TestNormalise:
+    def test_U_spacing_case_and_outward_codes(self):
+        assert pg.normalise_postcode(" bh76aw ") == "BH7 6AW"
+        assert pg.normalise_postcode("SW1A  1AA") == "SW1A 1AA"
+        assert pg.normalise_postcode("bh7") == "BH7"
+        assert pg.normalise_postcode("INVALID123") is None
+        assert pg.normalise_postcode(None) is None
+
+
+class TestGeocodePostcodes:
+    async def test_H_first_lookup_is_stored_and_the_next_is_offline(self, db_session, postcodes_io):
+        first = await pg.geocode_postcodes(db_session, ["bh7 6aw", "ZZ9 9ZZ"], now=NOW)
+        second = await pg.geocode_postcodes(db_session, ["BH76AW", "ZZ9 9ZZ"], now=NOW + timedelta(days=1))
+
+        assert postcodes_io.requests == [["BH7 6AW", "ZZ9 9ZZ"]]
+        assert first["bh7 6aw"]["precision"] == "postcode"
+        assert second["BH76AW"]["lat"] == first["bh7 6aw"]["lat"]
+        assert "ZZ9 9ZZ" not in second
+        miss = db_session.get(PostcodeGeocode, "ZZ9 9ZZ")
+        assert miss.latitude is None
+        assert miss.expires_at.replace(tzinfo=timezone.utc) == NOW + timedelta(days=pg.NOT_FOUND_TTL_DAYS)
+
+    async def test_B_lookups_go_in_batches_of_one_hundred(self, db_session, postcodes_io):
+        postcodes = [f"BH{n // 100 + 1} {n % 10}{'ABCDEFGHJK'[n // 10 % 10]}{'ABCDEFGHJK'[n % 10]}" for n in range(250)]
+
+        result = await pg.geocode_postcodes(db_session, postcodes, now=NOW)
+
+        assert [len(batch) for batch in postcodes_io.requests] == [100, 100, 50]
+        assert len(result) == 250
+
+    async def test_E_failed_refresh_serves_stale_rows_then_the_outward_centroid(self, db_session, postcodes_io):
+        await pg.geocode_postcodes(db_session, ["BH7 6AW"], now=NOW)
+        _outward(db_session, "BH1", 50.72, -1.87)
+        postcodes_io.client.post.side_effect = RuntimeError("network down")
+        errors = []
+
+        later = NOW + timedelta(days=pg.POSTCODE_TTL_DAYS + 1)
+        result = await pg.geocode_postcodes(db_session, ["BH7 6AW", "BH1 1AA", "BH2 2BB"], on_error=errors.append, now=later)
+
+        assert len(errors) == 1
+        assert result["BH7 6AW"]["precision"] == "postcode"
+        assert result["BH1 1AA"] == {"lat": 50.72, "lng": -1.87, "admin_district": None, "precision": "outward"}
+        assert "BH2 2BB" not in result
+
+    async def test_U_failed_store_leaves_the_callers_session_alone(self, db_session, postcodes_io, monkeypatch):
+        pending = Customer(first_name="Ada", last_name="Lovelace", email="geo@example.test", phone="07700900997")
+        db_session.add(pending)
+        db_session.flush()
+
+        def _broken_upsert(db, rows):
+            db.add(PostcodeGeocode(postcode="BH7 6AW"))  # kind is NOT NULL
+            db.flush()
+
+        monkeypatch.setattr(pg, "_upsert", _broken_upsert)
+
+        result = await pg.geocode_postcodes(db_session, ["BH7 6AW"], now=NOW)
+
+        assert result["BH7 6AW"]["precision"] == "postcode"
+        assert pending in db_session
+        db_session.commit()
+        assert db_session.query(Customer).filter_by(email="geo@example.test").count() == 1
+        assert db_session.query(PostcodeGeocode).count() == 0
+
+
+class TestImportCentroids:
+    def test_H_import_upserts_outward_rows_that_never_expire(self, db_session, tmp_path):
+        path = tmp_path / "outcodes.csv"
+        path.write_text("id,postcode,lat,lng\n1,BH7,50.73,-1.83\n2,bh1,50.72,-1.87\n3,NOT A CODE,1,2\n4,BH2,,\n")
+        _outward(db_session, "BH1", 0.0, 0.0)
+
+        result = pg.import_outward_centroids(db_session, str(path), now=NOW)
+
+        assert result == {"imported": 2, "skipped": 2}
+        bh1 = db_session.get(PostcodeGeocode, "BH1")
+        assert (bh1.latitude, bh1.longitude, bh1.expires_at) == (50.72, -1.87, None)
+
+    def test_E_missing_coordinate_columns(self, db_session, tmp_path):
+        path = tmp_path / "outcodes.csv"
+        path.write_text("outcode,easting,northing\nBH7,410000,93000\n")
+
+        with pytest.raises(ValueError, match="latitude"):
+            pg.import_outward_centroids(db_session, str(path))
+
+
+class TestBookingLocationsEndpoint:
+    def test_H_steady_state_map_refresh_makes_no_network_calls(self, db_session, postcodes_io):
+        customer = Customer(first_name="Map", last_name="Pin", email="pin@example.test", phone="07700900005",
+                            billing_postcode="bh7 6aw", billing_city="Bournemouth")
+        db_session.add(customer)
+        db_session.flush()
+        vehicle = Vehicle(customer_id=customer.id, registration="MAP1 PIN", make="Ford", model="Focus", colour="Red")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(Booking(
+            reference="TAG-MAP1", customer_id=customer.id, vehicle_id=vehicle.id, status=BookingStatus.CONFIRMED,
+            dropoff_date=date(2026, 11, 1), dropoff_time=time(6, 0), pickup_date=date(2026, 11, 8), pickup_time=time(20, 0),
+        ))
+        db_session.commit()
+        main.report_cache.clear()
+        main.app.dependency_overrides[main.require_admin] = lambda: SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+        try:
+            client = TestClient(main.app)
+            first = client.get("/api/admin/reports/booking-locations", params={"refresh": True}).json()
+            second = client.get("/api/admin/reports/booking-locations", params={"refresh": True}).json()
+        finally:
+            main.app.dependency_overrides.pop(main.require_admin, None)
+            main.report_cache.clear()
+
+        assert len(postcodes_io.requests) == 1
+        assert first["count"] == second["count"] == 1
+        assert second["locations"][0]["lat"] == first["locations"][0]["lat"]
@@ -2226,7 +2226,7 @@ class TestSharedOnSocialsAPI:
         # Call the endpoint
         with patch('main.get_db', return_value=iter([mock_db])):
             with patch('main.require_admin', return_value=mock_admin_user):
-                result = await mark_code_shared_on_socials(
+                result = mark_code_shared_on_socials(
                     code_id=1,
                     db=mock_db,
                     current_user=mock_admin_user
@@ -2252,7 +2252,7 @@ class TestSharedOnSocialsAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Call the endpoint (should toggle off)
-        result = await mark_code_shared_on_socials(
+        result = mark_code_shared_on_socials(
             code_id=1,
             db=mock_db,
             current_user=mock_admin_user
@@ -2272,7 +2272,7 @@ class TestSharedOnSocialsAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = None
 
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_on_socials(
+            mark_code_shared_on_socials(
                 code_id=9999,
                 db=mock_db,
                 current_user=mock_admin_user
@@ -2436,7 +2436,7 @@ class TestMutualExclusivityAPI:
 
         # Attempt to share on socials should fail
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_on_socials(code_id=1, db=mock_db, current_user=mock_admin_user)
+            mark_code_shared_on_socials(code_id=1, db=mock_db, current_user=mock_admin_user)
 
         assert exc_info.value.status_code == 400
         assert "already shared privately" in exc_info.value.detail
@@ -2460,7 +2460,7 @@ class TestMutualExclusivityAPI:
 
         # Attempt to share privately should fail
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_privately(code_id=1, db=mock_db, current_user=mock_admin_user)
+            mark_code_shared_privately(code_id=1, db=mock_db, current_user=mock_admin_user)
 
         assert exc_info.value.status_code == 400
         assert "already shared on socials" in exc_info.value.detail
@@ -2482,7 +2482,7 @@ class TestMutualExclusivityAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Should be able to toggle off
-        result = await mark_code_shared_on_socials(code_id=1, db=mock_db, current_user=mock_admin_user)
+        result = mark_code_shared_on_socials(code_id=1, db=mock_db, current_user=mock_admin_user)
 
         assert result["success"] is True
         assert mock_code.shared_on_socials is False
@@ -2504,7 +2504,7 @@ class TestMutualExclusivityAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Should be able to toggle off
-        result = await mark_code_shared_privately(code_id=1, db=mock_db, current_user=mock_admin_user)
+        result = mark_code_shared_privately(code_id=1, db=mock_db, current_user=mock_admin_user)
 
         assert result["success"] is True
         assert mock_code.shared_privately is False
@@ -2546,7 +2546,7 @@ class TestSharedPrivatelyAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Call the endpoint
-        result = await mark_code_shared_privately(
+        result = mark_code_shared_privately(
             code_id=1,
             db=mock_db,
             current_user=mock_admin_user
@@ -2573,7 +2573,7 @@ class TestSharedPrivatelyAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Call the endpoint (should toggle off)
-        result = await mark_code_shared_privately(
+        result = mark_code_shared_privately(
             code_id=1,
             db=mock_db,
             current_user=mock_admin_user
@@ -2593,7 +2593,7 @@ class TestSharedPrivatelyAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = None
 
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_privately(
+            mark_code_shared_privately(
                 code_id=9999,
                 db=mock_db,
                 current_user=mock_admin_user
@@ -2618,7 +2618,7 @@ class TestSharedPrivatelyAPI:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_privately(
+            mark_code_shared_privately(
                 code_id=1,
                 db=mock_db,
                 current_user=mock_admin_user
@@ -2924,7 +2924,7 @@ class TestUsedCodesCannotBeMarkedAsShared:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_on_socials(
+            mark_code_shared_on_socials(
                 code_id=1,
                 db=mock_db,
                 current_user=mock_admin_user
@@ -2948,7 +2948,7 @@ class TestUsedCodesCannotBeMarkedAsShared:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         with pytest.raises(HTTPException) as exc_info:
-            await mark_code_shared_privately(
+            mark_code_shared_privately(
                 code_id=1,
                 db=mock_db,
                 current_user=mock_admin_user
@@ -2973,7 +2973,7 @@ class TestUsedCodesCannotBeMarkedAsShared:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_code
 
         # Should be able to toggle off (unmark)
-        result = await mark_code_shared_on_socials(
+        result = mark_code_shared_on_socials(
             code_id=1,
             db=mock_db,
             current_user=mock_admin_user
@@ -11,7 +11,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 import sys
@@ -1371,6 +1371,100 @@ class TestAdminReferralsDashboard:
             db.close()
 
 
+    def _seed_referrers(self, db, count):
+        promotion = Promotion(
+            name=referral_service.FRIEND_PROMOTION_NAME,
+            discount_percent=10,
+            discount_type="percentage",
+            code_prefix="REF",
+        )
+        db.add(promotion)
+        db.flush()
+        for n in range(count):
+            referrer = Customer(first_name="Ref", last_name=f"Number{n}", email=f"ref{n}@example.com", phone=f"0770090{n:04d}")
+            friend = Customer(first_name="Friend", last_name=f"Number{n}", email=f"friend{n}@example.com", phone=f"0770091{n:04d}")
+            db.add_all([referrer, friend])
+            db.flush()
+            vehicle = Vehicle(customer_id=friend.id, registration=f"QC{n:04d}", make="Kia", model="Niro", colour="Red")
+            code = PromoCode(promotion_id=promotion.id, code=f"REF-QC-{n:04d}", customer_id=referrer.id, max_uses=0)
+            db.add_all([vehicle, code])
+            db.flush()
+            program = ReferralProgram(
+                customer_id=referrer.id,
+                status=referral_service.PROGRAM_STATUS_OPTED_IN,
+                invite_sent_at=datetime(2026, 6, 1, tzinfo=timezone.utc),
+                referral_code_id=code.id,
+            )
+            booking = Booking(
+                reference=f"QCBOOK{n:04d}",
+                customer_id=friend.id,
+                vehicle_id=vehicle.id,
+                status=BookingStatus.CONFIRMED,
+                dropoff_date=date(2026, 6, 10),
+                dropoff_time=time(9, 0),
+                pickup_date=date(2026, 6, 17),
+                pickup_time=time(12, 0),
+            )
+            db.add_all([program, booking])
+            db.flush()
+            db.add_all([
+                PromoCodeUsage(
+                    promo_code_id=code.id,
+                    booking_id=booking.id,
+                    discount_percent=10,
+                    discount_amount_pence=1000,
+                    used_at=datetime(2026, 6, 3, tzinfo=timezone.utc),
+                ),
+                ReferralAttribution(
+                    referral_program_id=program.id,
+                    referrer_customer_id=referrer.id,
+                    referred_customer_id=friend.id,
+                    booking_id=booking.id,
+                    promo_code_id=code.id,
+                    is_self_use=False,
+                    status=referral_service.ATTRIBUTION_STATUS_PENDING,
+                ),
+            ])
+        db.commit()
+
+    def _count_selects(self, db, **kwargs):
+        from main import build_referrals_dashboard_data
+
+        selects = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            dashboard = build_referrals_dashboard_data(db, **kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        return len(selects), dashboard
+
+    def test_H_query_count_does_not_grow_with_referrers(self):
+        small = self._session()
+        large = self._session()
+        try:
+            self._seed_referrers(small, 1)
+            self._seed_referrers(large, 12)
+
+            small_count, _ = self._count_selects(small)
+            large_count, dashboard = self._count_selects(large, customer_limit=50, usage_limit=50)
+
+            assert small_count == large_count == 10
+            assert dashboard["stats"]["invites_sent"] == 12
+            assert dashboard["stats"]["referral_code_bookings_created"] == 12
+            assert len(dashboard["customers"]) == 12
+            assert all(row["uses"] == 1 and row["has_self_use_only"] is False for row in dashboard["customers"])
+            assert all(row["referrer"].startswith("Ref Number") for row in dashboard["code_usage"])
+        finally:
+            small.close()
+            large.close()
+
+
 class TestReferralAdminActions:
     def test_cancel_referral_code_expires_unlimited_code(self):
         now = datetime(2026, 6, 2, 12, 0, tzinfo=timezone.utc)
@@ -20,7 +20,7 @@ import main
 import stripe_service
 from main import app, require_admin
 from database import get_db
-from db_models import Booking, Payment, PaymentStatus
+from db_models import Booking, BookingStatus, Payment, PaymentStatus
 
 from fastapi.testclient import TestClient
 
@@ -56,6 +56,9 @@ def _booking(payment=None, **kw):
     base = dict(
         id=42,
         reference="TAG-2NSWW130",
+        status=BookingStatus.CONFIRMED,
+        departure_id=None,
+        dropoff_slot=None,
         payment=payment if payment is not None else _payment(),
     )
     base.update(kw)
@@ -0,0 +1,308 @@
+"""
+Tests for the shared admin report cache (report_cache).
+
+Covers TTL hits and misses, single-flight computation, stale-while-
+revalidate serving, per-key and tag invalidation (including the session
+hook driven by booking writes) and the per-report metrics.
+"""
+import asyncio
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import report_cache as rc
+from db_models import Booking, BookingStatus, Customer, Vehicle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return rc.ReportCache(ttl=60, stale_seconds=30, clock=clock)
+
+
+def _counter(payload=None):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return dict(payload or {"n": len(calls)})
+
+    return compute, calls
+
+
+class TestGetOrCompute:
+    async def test_H_miss_then_hit_within_ttl(self, cache, clock):
+        compute, calls = _counter()
+
+        first = await cache.get_or_compute("popular", None, compute)
+        clock.now += 59
+        second = await cache.get_or_compute("popular", None, compute)
+
+        assert first == {"n": 1, "cached": False}
+        assert second == {"n": 1, "cached": True, "cache_age_minutes": 1.0}
+        assert len(calls) == 1
+
+    async def test_B_expired_entry_is_recomputed(self, cache, clock):
+        compute, calls = _counter()
+        await cache.get_or_compute("popular", None, compute)
+        clock.now += 60
+
+        body = await cache.get_or_compute("popular", None, compute)
+
+        assert body == {"n": 2, "cached": False}
+
+    async def test_H_keys_are_independent(self, cache):
+        await cache.get_or_compute("occupancy", "daily", lambda: {"view": "daily"})
+        body = await cache.get_or_compute("occupancy", "weekly", lambda: {"view": "weekly"})
+
+        assert body == {"view": "weekly", "cached": False}
+        assert cache.peek("occupancy", "daily") == {"view": "daily"}
+
+    async def test_H_refresh_recomputes(self, cache):
+        compute, calls = _counter()
+        await cache.get_or_compute("forecast", None, compute)
+
+        body = await cache.get_or_compute("forecast", None, compute, refresh=True)
+
+        assert body["cached"] is False
+        assert len(calls) == 2
+
+    async def test_H_async_compute_is_awaited(self, cache):
+        async def compute():
+            await asyncio.sleep(0)
+            return {"count": 3}
+
+        assert await cache.get_or_compute("booking_locations", "bookings", compute) == {"count": 3, "cached": False}
+
+    async def test_H_sync_compute_runs_off_the_event_loop(self, cache):
+        import threading
+
+        body = await cache.get_or_compute("occupancy", "daily", lambda: {"thread": threading.current_thread().name})
+
+        assert body["thread"].startswith("blocking")
+
+    async def test_U_failed_compute_is_not_cached_and_releases_the_key(self, cache):
+        def boom():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("financial", None, boom)
+
+        assert cache.peek("financial") is None
+        assert await cache.get_or_compute("financial", None, lambda: {"ok": 1}) == {"ok": 1, "cached": False}
+        assert cache.stats()["reports"]["financial"]["errors"] == 1
+
+    async def test_B_cached_payload_is_not_shared_with_callers(self, cache):
+        body = await cache.get_or_compute("popular", None, lambda: {"items": 1})
+        body["items"] = 99
+
+        assert (await cache.get_or_compute("popular", None, lambda: {}))["items"] == 1
+
+
+class TestSingleFlight:
+    async def test_H_concurrent_misses_compute_once(self, cache):
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"n": len(calls)}
+
+        bodies = await asyncio.gather(*[cache.get_or_compute("forecast", None, slow) for _ in range(5)])
+
+        assert len(calls) == 1
+        assert [b["n"] for b in bodies] == [1] * 5
+        assert sorted(b["cached"] for b in bodies) == [False] + [True] * 4
+        stats = cache.stats()["reports"]["forecast"]
+        assert (stats["misses"], stats["coalesced"], stats["computes"]) == (1, 4, 1)
+
+    async def test_H_stale_entry_served_while_one_caller_recomputes(self, cache, clock):
+        cache.store("financial", None, {"v": "old"})
+        clock.now += 70  # past the 60s TTL, inside the 30s stale window
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return {"v": "new"}
+
+        refresher = asyncio.create_task(cache.get_or_compute("financial", None, slow))
+        await asyncio.sleep(0)
+        stale = await cache.get_or_compute("financial", None, slow)
+        release.set()
+        fresh = await refresher
+
+        assert stale == {"v": "old", "cached": True, "cache_age_minutes": 1.2, "stale": True}
+        assert fresh == {"v": "new", "cached": False}
+        assert cache.stats()["reports"]["financial"]["stale_hits"] == 1
+
+    async def test_B_entry_past_stale_window_waits_for_the_recompute(self, cache, clock):
+        cache.store("financial", None, {"v": "old"})
+        clock.now += 91
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return {"v": "new"}
+
+        refresher = asyncio.create_task(cache.get_or_compute("financial", None, slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("financial", None, slow))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        release.set()
+
+        assert (await waiter)["v"] == "new"
+        assert (await refresher)["v"] == "new"
+
+
+class TestBoundedReports:
+    async def test_H_least_recently_used_entry_is_evicted(self, cache):
+        cache.set_max_entries("tiles", 2)
+        await cache.get_or_compute("tiles", 1, lambda: {"t": 1})
+        await cache.get_or_compute("tiles", 2, lambda: {"t": 2})
+        await cache.get_or_compute("tiles", 1, lambda: {"t": 1})  # hit: 2 is now oldest
+
+        await cache.get_or_compute("tiles", 3, lambda: {"t": 3})
+
+        assert [e["key"] for e in cache.stats()["reports"]["tiles"]["entries"]] == [1, 3]
+        assert cache.stats()["reports"]["tiles"]["evictions"] == 1
+        assert set(cache._locks) == {("tiles", 1), ("tiles", 3)}
+
+
+    def test_U_stats_while_another_thread_stores_and_evicts(self, cache):
+        import threading
+
+        cache.set_max_entries("tiles", 5)
+        done = threading.Event()
+
+        def churn():
+            for key in range(20000):
+                cache.store("tiles", key, {"t": key}, tags=("bookings",))
+            done.set()
+
+        worker = threading.Thread(target=churn)
+        worker.start()
+        snapshots = 0
+        while not done.is_set():
+            assert len(cache.stats()["reports"]["tiles"]["entries"]) <= 6
+            snapshots += 1
+        worker.join()
+
+        assert snapshots > 0
+        assert len(cache.stats()["reports"]["tiles"]["entries"]) == 5
+
+class TestInvalidation:
+    async def test_H_invalidate_one_key(self, cache):
+        cache.store("occupancy", "daily", {"view": "daily"})
+        cache.store("occupancy", "weekly", {"view": "weekly"})
+
+        assert cache.invalidate("occupancy", "daily") == 1
+        daily = await cache.get_or_compute("occupancy", "daily", lambda: {"view": "daily", "fresh": True})
+        weekly = await cache.get_or_compute("occupancy", "weekly", lambda: {"view": "weekly", "fresh": True})
+
+        assert daily["cached"] is False and daily["fresh"] is True
+        assert weekly["cached"] is True
+
+    async def test_H_invalidate_tag(self, cache):
+        cache.store("financial", None, {"r": 1}, tags=("bookings", "payments"))
+        cache.store("fun_facts", None, {"r": 1}, tags=("payments",))
+        cache.store("popular", None, {"r": 1}, tags=("bookings",))
+
+        assert cache.invalidate_tag("payments") == 2
+
+        assert (await cache.get_or_compute("popular", None, dict))["cached"] is True
+        assert (await cache.get_or_compute("financial", None, lambda: {"r": 2}))["r"] == 2
+        assert cache.stats()["reports"]["financial"]["invalidations"] == 1
+
+    async def test_H_bounded_report_drops_entries_on_invalidation(self, cache):
+        cache.set_max_entries("tiles", 10)
+        cache.store("tiles", (6, 31, 21), {"n": 1}, tags=("bookings",))
+        cache.store("popular", None, {"r": 1}, tags=("bookings",))
+
+        assert cache.invalidate_tag("bookings") == 2
+
+        assert cache.peek("tiles", (6, 31, 21)) is None
+        assert cache.peek("popular") == {"r": 1}  # unbounded: kept to serve stale
+        assert cache.invalidate_tag("bookings") == 0
+
+    def test_H_booking_commit_invalidates_tagged_entries(self, db_session, monkeypatch):
+        cache = rc.ReportCache()
+        monkeypatch.setattr(rc, "report_cache", cache)
+        rc.install_report_cache_invalidation(db_session)
+        cache.store("popular", None, {"r": 1}, tags=("bookings",))
+        cache.store("financial", None, {"r": 1}, tags=("payments",))
+
+        customer = Customer(first_name="Ada", last_name="Lovelace", email="cache@example.test", phone="07700900999")
+        db_session.add(customer)
+        db_session.flush()
+        vehicle = Vehicle(customer_id=customer.id, registration="RC1 AAA", make="Ford", model="Focus", colour="Red")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(Booking(
+            reference="TAG-RC001", customer_id=customer.id, vehicle_id=vehicle.id,
+            status=BookingStatus.PENDING, dropoff_date=date(2026, 7, 1), dropoff_time=time(6, 0),
+            pickup_date=date(2026, 7, 8), pickup_time=time(18, 0),
+        ))
+        db_session.commit()
+
+        entries = {name: report["entries"][0]["fresh"] for name, report in cache.stats()["reports"].items()}
+        assert entries == {"popular": False, "financial": True}
+
+    def test_U_rolled_back_write_does_not_invalidate(self, db_session, monkeypatch):
+        cache = rc.ReportCache()
+        monkeypatch.setattr(rc, "report_cache", cache)
+        rc.install_report_cache_invalidation(db_session)
+        cache.store("popular", None, {"r": 1}, tags=("customers",))
+
+        db_session.add(Customer(first_name="Bo", last_name="Roll", email="rollback@example.test", phone="07700900998"))
+        db_session.flush()
+        db_session.rollback()
+        db_session.commit()
+
+        assert cache.stats()["reports"]["popular"]["entries"][0]["fresh"] is True
+
+
+class TestReportEndpoints:
+    @pytest.fixture
+    def client(self):
+        main.report_cache.clear()
+        main.app.dependency_overrides[main.require_admin] = lambda: SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+        yield TestClient(main.app)
+        main.app.dependency_overrides.clear()
+        main.report_cache.clear()
+
+    def test_H_second_request_served_from_cache_and_counted(self, client, db_session):
+        first = client.get("/api/admin/reports/fun-facts").json()
+        second = client.get("/api/admin/reports/fun-facts").json()
+        # The all-time popular report formats the same highlights document.
+        popular = client.get("/api/admin/reports/popular", params={"top": 5}).json()
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert popular["cached"] is True
+        stats = client.get("/api/admin/report-cache").json()
+        highlights = stats["reports"]["booking_highlights"]
+        assert (highlights["hits"], highlights["misses"], highlights["computes"]) == (2, 1, 1)
+        assert highlights["compute_seconds_last"] is not None
+        assert highlights["entries"][0]["tags"] == ["bookings", "payments"]
+
+    def test_B_non_default_requests_bypass_the_cache(self, client, db_session):
+        body = client.get("/api/admin/reports/session-tracking", params={"period": "weekly"}).json()
+
+        assert body["cached"] is False
+        assert "session_tracking" not in client.get("/api/admin/report-cache").json()["reports"]
@@ -0,0 +1,132 @@
+"""
+Tests for the background report warm-up (report_warmup).
+
+The warmer runs against its own ReportCache with a fake clock; the
+endpoint test warms a real registered view on the in-memory SQLite
+db_session and reads it back through the report endpoint.
+"""
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import report_warmup
+from report_cache import ReportCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = self.rolled_back = False
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+def warmer():
+    return report_warmup.ReportWarmer(ReportCache(ttl=3600, clock=FakeClock()))
+
+
+class TestWarm:
+    def test_H_warms_when_missing_then_only_past_the_budget(self, warmer):
+        calls = []
+        spec = warmer.register("occupancy", "daily", lambda db: calls.append(db) or {"n": len(calls)},
+                               tags=("bookings",), budget_seconds=1800)
+        session = FakeSession()
+
+        assert warmer.warm(spec, lambda: session) is True
+        assert warmer.warm(spec, FakeSession) is False
+        warmer.cache.clock.now += 1800
+        assert warmer.warm(spec, FakeSession) is True
+
+        assert len(calls) == 2 and session.closed
+        assert warmer.cache.peek("occupancy", "daily") == {"n": 2}
+        assert spec.warm_runs == 2 and spec.last_compute_seconds is not None
+
+    def test_U_invalidated_entries_are_due_and_awaitables_are_awaited(self, warmer):
+        async def _compute(db):
+            return {"rows": 1}
+
+        spec = warmer.register("booking_locations", "bookings", _compute, tags=("customers",))
+        warmer.warm(spec, FakeSession)
+        warmer.cache.invalidate_tag("customers")
+
+        assert warmer.is_due(spec)
+        assert warmer.warm(spec, FakeSession) is True
+        assert warmer.cache.peek("booking_locations", "bookings") == {"rows": 1}
+
+    def test_E_failures_are_recorded_and_cleared_by_the_next_success(self, warmer):
+        outcomes = [RuntimeError("db gone"), {"ok": True}]
+
+        def _compute(db):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        spec = warmer.register("financial", None, _compute)
+        session = FakeSession()
+
+        assert warmer.warm(spec, lambda: session) is False
+        failed = warmer.status()["reports"][0]
+        assert warmer.warm(spec, FakeSession) is True
+
+        assert session.rolled_back and session.closed
+        assert (failed["failures"], failed["last_error"], failed["age_seconds"]) == (1, "RuntimeError: db gone", None)
+        assert warmer.status()["reports"][0]["last_error"] is None
+
+    def test_B_budget_must_be_below_the_cache_ttl(self, warmer):
+        with pytest.raises(ValueError):
+            warmer.register("occupancy", "weekly", lambda db: {}, budget_seconds=3600)
+
+
+class TestSchedule:
+    def test_H_one_job_per_view_spread_across_the_interval(self, warmer):
+        for key in ("daily", "weekly", "monthly"):
+            warmer.register("occupancy", key, lambda db: {})
+        scheduler = MagicMock()
+
+        assert report_warmup.schedule_report_warmup(scheduler, FakeSession, warmer) == 3
+
+        calls = scheduler.add_job.call_args_list
+        starts = [call.kwargs["next_run_time"] for call in calls]
+        assert [call.kwargs["id"] for call in calls] == [
+            "report_warmup:occupancy:daily", "report_warmup:occupancy:weekly", "report_warmup:occupancy:monthly",
+        ]
+        assert [b - a for a, b in zip(starts, starts[1:])] == [timedelta(seconds=100)] * 2
+
+
+class TestEndpoints:
+    def test_H_warmed_view_is_served_as_a_cache_hit(self, db_session):
+        main.report_cache.clear()
+        main.app.dependency_overrides[main.require_admin] = lambda: SimpleNamespace(id=1, email="admin@tag.test", is_admin=True)
+        spec = next(s for s in main.report_warmer.reports() if (s.report, s.key) == ("occupancy", "weekly"))
+        try:
+            assert main.report_warmer.warm(spec, lambda: db_session) is True
+            client = TestClient(main.app)
+            report = client.get("/api/admin/reports/occupancy", params={"view": "weekly"}).json()
+            status = client.get("/api/admin/report-warmup").json()
+        finally:
+            main.app.dependency_overrides.pop(main.require_admin, None)
+            main.report_cache.clear()
+
+        assert report["cached"] is True
+        views = {(row["report"], str(row["key"])): row for row in status["reports"]}
+        assert {("occupancy", "daily"), ("booking_highlights", "[None, None]"), ("booking_locations", "origins")} <= set(views)
+        weekly = views[("occupancy", "weekly")]
+        assert weekly["within_budget"] is True
+        assert weekly["compute_seconds_last"] is not None
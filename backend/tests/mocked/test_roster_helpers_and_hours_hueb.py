@@ -303,7 +303,7 @@ class TestRosterAuthDependencyHUEB:
             _query(first_result=user),
         ]
 
-        assert await get_current_user("Bearer abc123", db) is user
+        assert get_current_user("Bearer abc123", db) is user
 
     # --- UNHAPPY / EDGE / BOUNDARY ------------------------------------------
 
@@ -318,7 +318,7 @@ class TestRosterAuthDependencyHUEB:
     )
     async def test_U_get_current_user_rejects_missing_or_malformed_headers(self, header, detail):
         with pytest.raises(HTTPException) as exc:
-            await get_current_user(header, MagicMock())
+            get_current_user(header, MagicMock())
         assert exc.value.status_code == 401
         assert exc.value.detail == detail
 
@@ -327,7 +327,7 @@ class TestRosterAuthDependencyHUEB:
         db = MagicMock()
         db.query.return_value = _query(first_result=None)
         with pytest.raises(HTTPException) as expired:
-            await get_current_user("Bearer expired", db)
+            get_current_user("Bearer expired", db)
         assert expired.value.detail == "Invalid or expired session"
 
         db.query.side_effect = [
@@ -335,7 +335,7 @@ class TestRosterAuthDependencyHUEB:
             _query(first_result=None),
         ]
         with pytest.raises(HTTPException) as inactive:
-            await get_current_user("Bearer valid", db)
+            get_current_user("Bearer valid", db)
         assert inactive.value.detail == "User not found or inactive"
 
     @pytest.mark.asyncio
@@ -1792,9 +1792,12 @@ class TestRosterExport:
             q = MagicMock()
             name = model.__name__ if hasattr(model, "__name__") else str(model)
             chain = MagicMock()
+            chain.options.return_value = chain
             chain.filter.return_value = chain
             chain.order_by.return_value = chain
             chain.all.return_value = responses_all.get(name, [])
+            # The export streams rows with yield_per.
+            chain.yield_per.return_value = responses_all.get(name, [])
             chain.first.return_value = responses_first.get(name)
             return chain
 
@@ -1834,6 +1837,7 @@ class TestRosterExport:
         shift.staff = None
         booking = MagicMock()
         booking.reference = "TAG-XYZ123"
+        shift.booking = booking
         _override_db(self._wire(shifts=[shift], booking=booking))
         resp = TestClient(app).get("/api/roster/export?week_start=2026-06-15")
         assert resp.status_code == 200
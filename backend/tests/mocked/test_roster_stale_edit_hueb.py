@@ -50,7 +50,6 @@ from db_models import (
     ShiftStatus,
     ShiftType,
 )
-import json
 
 SHIFT_DAY = date_type(2026, 7, 27)
 # Stamped 19:45 UK on 19 Jul (18:45 UTC) — the admin's original shaping.
@@ -319,7 +318,7 @@ class TestUpdateAuditHUEB:
 
         audits = _update_audits(db)
         assert len(audits) == 1
-        data = json.loads(audits[0].event_data)
+        data = audits[0].event_data
         assert data["shift_id"] == shift.id
         assert data["window_changed"] is True
         assert data["changes"] == {
@@ -336,7 +335,7 @@ class TestUpdateAuditHUEB:
 
         audits = _update_audits(db)
         assert len(audits) == 1
-        data = json.loads(audits[0].event_data)
+        data = audits[0].event_data
         assert data["window_changed"] is False
         assert data["changes"] == {"staff_id": {"from": 15, "to": 14}}
 
@@ -362,7 +361,7 @@ class TestUpdateAuditHUEB:
         r = client.put(f"/api/roster/{shift.id}", json={"staff_id": None})
         assert r.status_code == 200, r.text
 
-        data = json.loads(_update_audits(db)[0].event_data)
+        data = _update_audits(db)[0].event_data
         assert data["changes"] == {"staff_id": {"from": 15, "to": None}}
 
     def test_E_booking_ids_change_audits_old_and_new_sets(self, client, seeded):
@@ -370,7 +369,7 @@ class TestUpdateAuditHUEB:
         r = client.put(f"/api/roster/{shift.id}", json={"booking_ids": [1021]})
         assert r.status_code == 200, r.text
 
-        data = json.loads(_update_audits(db)[0].event_data)
+        data = _update_audits(db)[0].event_data
         assert data["changes"] == {
             "booking_ids": {"from": [912, 1021], "to": [1021]},
         }
@@ -241,11 +241,11 @@ def _wire(bookings):
 
 class TestOccupancyReportSecondarySplit:
     def setup_method(self):
-        main._occupancy_cache = {}
+        main.report_cache.clear()
 
     def teardown_method(self):
         app.dependency_overrides.clear()
-        main._occupancy_cache = {}
+        main.report_cache.clear()
 
     def _bookings(self):
         from datetime import timedelta
@@ -433,3 +433,12 @@ class TestSecondaryCarparkReportEndpoint:
         row = resp.json()["events"][0]
         assert row["car"] is None
         assert row["registration"] is None
+
+    def test_H_daily_usage_runs_from_today_to_the_last_event(self, monkeypatch):
+        resp = self._get([self._full_booking()], monkeypatch)
+        usage = resp.json()["daily_usage"]
+        today = date_type.today()
+        assert [u["date"] for u in usage] == [(today + timedelta(days=n)).isoformat() for n in range(10)]
+        assert usage[2]["peak"] == 1 and usage[2]["dropoffs"] == 1 and usage[2]["peak_at"] == "10:00"
+        assert usage[9]["pickups"] == 1
+        assert not any(u["over_capacity"] for u in usage)
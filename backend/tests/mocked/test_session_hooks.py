@@ -0,0 +1,73 @@
+"""
+Tests for the shared derived-table session hooks (session_hooks).
+
+Covers attribute history inside before_flush, install_session_hooks()
+registering each listener once, and run_locked() committing its work or
+retrying it after a failure.
+"""
+from sqlalchemy import event
+
+import session_hooks
+from db_models import Customer
+
+
+def _customer(db):
+    customer = Customer(first_name="Hook", last_name="Test", email="hooks@example.test", phone="07700900003")
+    db.add(customer)
+    db.commit()
+    return customer
+
+
+class TestHistory:
+    def test_H_changed_and_previous_values_seen_in_before_flush(self, db_session):
+        customer = _customer(db_session)
+        seen = []
+
+        def collect(session, flush_context, instances):
+            for obj in session.dirty:
+                seen.append((session_hooks.changed(obj, ("email",)), sorted(session_hooks.attr_values(obj, "email"))))
+
+        event.listen(db_session, "before_flush", collect)
+        customer.email = "moved@example.test"
+        db_session.flush()
+
+        assert seen == [(True, ["hooks@example.test", "moved@example.test"])]
+
+
+class TestInstall:
+    def test_H_second_install_registers_nothing(self, db_session):
+        calls = []
+
+        def collect(session, flush_context, instances):
+            calls.append("collect")
+
+        def apply(session):
+            calls.append("apply")
+
+        def discard(session):
+            calls.append("discard")
+
+        for _ in range(2):
+            session_hooks.install_session_hooks(db_session, collect, apply, discard)
+        _customer(db_session)
+
+        assert calls == ["collect", "apply"]
+
+
+class TestRunLocked:
+    def test_H_work_is_committed(self, db_session):
+        bind = db_session.get_bind()
+
+        assert session_hooks.run_locked(bind, ["k:1"], _customer, label="test") is True
+        assert db_session.query(Customer).count() == 1
+
+    def test_U_failure_is_retried_then_given_up(self, db_session, caplog):
+        attempts = []
+
+        def work(db):
+            attempts.append(1)
+            raise RuntimeError("deadlock detected")
+
+        assert session_hooks.run_locked(db_session.get_bind(), ["k:1"], work, label="test refresh") is False
+        assert len(attempts) == session_hooks.REFRESH_ATTEMPTS
+        assert "test refresh failed" in caplog.text
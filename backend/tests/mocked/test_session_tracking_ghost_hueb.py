@@ -17,13 +17,13 @@ Background:
 Fixes pinned here:
   A) Stripe webhook (POST /api/webhooks/stripe): skip the two log_audit_event
      calls when `payment is None` (manual-booking-payment-link case).
-  B) GET /api/admin/reports/session-tracking: drop BOOKING_CONFIRMED audit
-     rows where booking_reference is None on read, so the 23 historical
-     ghosts already in the DB stop double-counting on past days.
+  B) GET /api/admin/reports/session-tracking: BOOKING_CONFIRMED audit rows
+     where booking_reference is None never make it into funnel_sessions
+     (live tracking or backfill), so the 23 historical ghosts already in the
+     DB stop double-counting on past days.
 """
 import json
 from datetime import datetime, timedelta, timezone
-from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -264,8 +264,8 @@ class TestStripeWebhookGhostAuditGuard:
 # ============================================================================
 
 def _audit_row(event, *, ref=None, session_id=None, when=None, row_id=1):
-    """Build a fake AuditLog row sufficient for the endpoint's read path."""
-    return SimpleNamespace(
+    """Build an AuditLog row as the funnel events write them."""
+    return AuditLog(
         id=row_id,
         event=event,
         booking_reference=ref,
@@ -274,43 +274,22 @@ def _audit_row(event, *, ref=None, session_id=None, when=None, row_id=1):
     )
 
 
-class _RoutingDB:
-    """Routes db.query(Model) to per-model row lists, so we can return
-    crafted AuditLog rows without disturbing the separate Manual/free
-    Booking queries (which we set to empty)."""
-    def __init__(self, audit_rows):
-        self._audit_rows = audit_rows
+def _seed_funnel(db, rows):
+    """Store the audit rows and rebuild funnel_sessions from them, as the
+    backfill command does for historical rows."""
+    from funnel_sessions import backfill_funnel_sessions
 
-    def query(self, model):
-        name = getattr(model, "__name__", str(model))
-        if name == "AuditLog":
-            return _Chain(self._audit_rows)
-        # Booking queries (manual + free counts) — return empty for these tests
-        return _Chain([])
-
-
-class _Chain:
-    def __init__(self, rows):
-        self._rows = rows
-
-    def filter(self, *a, **kw):
-        return self
-
-    def join(self, *a, **kw):
-        return self
-
-    def order_by(self, *a, **kw):
-        return self
-
-    def all(self):
-        return self._rows
+    db.add_all(rows)
+    db.flush()
+    backfill_funnel_sessions(db)
+    db.commit()
 
 
 @pytest.fixture
 def _admin_client():
     """TestClient with admin auth stubbed.
 
-    Also resets the module-global _session_tracking_cache before each test
+    Also clears the shared report_cache before each test
     so cached responses from a prior test don't bleed into this one (and
     so the cached payload we leave behind doesn't break subsequent files
     like test_session_tracking_integration.py::test_empty_audit_logs)."""
@@ -324,21 +303,21 @@ def _admin_client():
         u.role = "admin"
         return u
 
-    main_mod._session_tracking_cache = {"data": None, "cached_at": None}
+    main_mod.report_cache.clear()
     app.dependency_overrides[require_admin] = _admin
     yield TestClient(app)
     app.dependency_overrides.clear()
-    main_mod._session_tracking_cache = {"data": None, "cached_at": None}
+    main_mod.report_cache.clear()
 
 
 class TestSessionTrackingGhostFilter:
     """Fix B: ghost BOOKING_CONFIRMED rows (booking_reference=None) are
-    excluded from the funnel on read, but everything else is kept."""
+    excluded from the funnel, but everything else is kept."""
 
     def teardown_method(self):
         app.dependency_overrides.clear()
 
-    def test_U_ghost_booking_confirmed_excluded_from_funnel(self, _admin_client):
+    def test_U_ghost_booking_confirmed_excluded_from_funnel(self, _admin_client, db_session):
         """Unhappy: two ghost BOOKING_CONFIRMED rows + two real ones must
         report booking_confirmed=2, not 4."""
         when = datetime.now(timezone.utc) - timedelta(hours=1)
@@ -353,7 +332,7 @@ class TestSessionTrackingGhostFilter:
             _audit_row(AuditLogEvent.BOOKING_CONFIRMED, ref=None,
                        session_id=None, when=when, row_id=4),
         ]
-        _override_db(_RoutingDB(rows))
+        _seed_funnel(db_session, rows)
 
         resp = _admin_client.get(
             "/api/admin/reports/session-tracking?period=daily&refresh=true"
@@ -362,7 +341,7 @@ class TestSessionTrackingGhostFilter:
         body = resp.json()
         assert body["cumulative"]["counts"]["booking_confirmed"] == 2
 
-    def test_H_real_booking_confirmed_with_ref_is_counted(self, _admin_client):
+    def test_H_real_booking_confirmed_with_ref_is_counted(self, _admin_client, db_session):
         """Happy: a normal online BOOKING_CONFIRMED row (ref set) is
         counted — guarantees the filter doesn't over-reach."""
         when = datetime.now(timezone.utc) - timedelta(hours=1)
@@ -370,7 +349,7 @@ class TestSessionTrackingGhostFilter:
             _audit_row(AuditLogEvent.BOOKING_CONFIRMED, ref="TAG-ONL0001",
                        session_id="sess_abc", when=when, row_id=1),
         ]
-        _override_db(_RoutingDB(rows))
+        _seed_funnel(db_session, rows)
 
         resp = _admin_client.get(
             "/api/admin/reports/session-tracking?period=daily&refresh=true"
@@ -378,7 +357,7 @@ class TestSessionTrackingGhostFilter:
         assert resp.status_code == 200, resp.text
         assert resp.json()["cumulative"]["counts"]["booking_confirmed"] == 1
 
-    def test_E_non_booking_confirmed_events_with_no_ref_are_kept(self, _admin_client):
+    def test_E_non_booking_confirmed_events_with_no_ref_are_kept(self, _admin_client, db_session):
         """Edge: upstream funnel events (DATES_SELECTED, FLIGHT_SELECTED,
         CUSTOMER_ENTERED, PAYMENT_INITIATED) legitimately have no
         booking_reference — the booking doesn't exist yet. Filter must
@@ -394,7 +373,7 @@ class TestSessionTrackingGhostFilter:
             _audit_row(AuditLogEvent.PAYMENT_INITIATED, ref=None,
                        session_id="sess_1", when=when, row_id=13),
         ]
-        _override_db(_RoutingDB(rows))
+        _seed_funnel(db_session, rows)
 
         resp = _admin_client.get(
             "/api/admin/reports/session-tracking?period=daily&refresh=true"
@@ -407,7 +386,7 @@ class TestSessionTrackingGhostFilter:
         assert counts["payment_initiated"] == 1
         assert counts["booking_confirmed"] == 0
 
-    def test_B_mixed_ghosts_and_reals_match_screenshot_scenario(self, _admin_client):
+    def test_B_mixed_ghosts_and_reals_match_screenshot_scenario(self, _admin_client, db_session):
         """Boundary: reproduces the 2026-05-22 prod shape — 8 online
         confirmations (ref set) + 2 webhook ghosts (ref None) — and pins
         booking_confirmed=8 after the filter, instead of the buggy 10.
@@ -432,7 +411,7 @@ class TestSessionTrackingGhostFilter:
             _audit_row(AuditLogEvent.BOOKING_CONFIRMED, ref=None,
                        session_id=None, when=when, row_id=301),
         ]
-        _override_db(_RoutingDB(rows))
+        _seed_funnel(db_session, rows)
 
         resp = _admin_client.get(
             "/api/admin/reports/session-tracking?period=daily&refresh=true"
@@ -307,43 +307,45 @@ class TestSessionTrackingReportEndpoint:
 # =============================================================================
 
 class TestSessionTrackingWithData:
-    """Tests for session tracking with audit log data."""
+    """Tests for session tracking with audit log data.
 
-    def test_counts_unique_sessions(self, client, mock_db):
-        """Should count unique sessions, not total events."""
-        import pytz
+    The report reads funnel_sessions, so these store real AuditLog rows in
+    the SQLite db_session and rebuild the table with the backfill.
+    """
+
+    @pytest.fixture
+    def data_client(self, db_session, mock_admin_user):
+        from main import app, require_admin
+
+        app.dependency_overrides[require_admin] = lambda: mock_admin_user
+        yield TestClient(app)
+        app.dependency_overrides.pop(require_admin, None)
+
+    @staticmethod
+    def _seed(db, rows):
         from db_models import AuditLog
+        from funnel_sessions import backfill_funnel_sessions
 
-        uk_tz = pytz.timezone('Europe/London')
-        now = datetime.now(uk_tz)
+        db.add_all(AuditLog(**row) for row in rows)
+        db.flush()
+        backfill_funnel_sessions(db)
+        db.commit()
 
-        # Create mock audit logs with same session appearing multiple times
-        mock_logs = [
-            MagicMock(
-                id=1,
-                session_id="sess_1",
-                event=AuditLogEvent.DATES_SELECTED,
-                created_at=now,
-            ),
-            MagicMock(
-                id=2,
-                session_id="sess_1",  # Same session, different event
-                event=AuditLogEvent.FLIGHT_SELECTED,
-                created_at=now,
-            ),
-            MagicMock(
-                id=3,
-                session_id="sess_2",  # Different session
-                event=AuditLogEvent.DATES_SELECTED,
-                created_at=now,
-            ),
-        ]
+    def test_counts_unique_sessions(self, data_client, db_session):
+        """Should count unique sessions, not total events."""
+        now = datetime.utcnow() - timedelta(minutes=5)
 
-        mock_db.query.return_value.filter.return_value.all.return_value = mock_logs
+        # Same session appearing multiple times
+        self._seed(db_session, [
+            dict(session_id="sess_1", event=AuditLogEvent.DATES_SELECTED, created_at=now),
+            dict(session_id="sess_1", event=AuditLogEvent.FLIGHT_SELECTED, created_at=now),
+            dict(session_id="sess_1", event=AuditLogEvent.DATES_SELECTED, created_at=now),  # repeat
+            dict(session_id="sess_2", event=AuditLogEvent.DATES_SELECTED, created_at=now),
+        ])
 
-        # refresh=true bypasses the module-level _session_tracking_cache populated
+        # refresh=true bypasses the session_tracking report_cache entry populated
         # by earlier tests in this file
-        response = client.get("/api/admin/reports/session-tracking?period=daily&refresh=true")
+        response = data_client.get("/api/admin/reports/session-tracking?period=daily&refresh=true")
 
         assert response.status_code == 200
         data = response.json()
@@ -354,56 +356,18 @@ class TestSessionTrackingWithData:
         assert cumulative["dates_selected"] == 2
         assert cumulative["flight_selected"] == 1
 
-    def test_dedupes_by_booking_reference_when_session_missing(self, client, mock_db):
+    def test_dedupes_by_booking_reference_when_session_missing(self, data_client, db_session):
         """Repeat events with no session_id but the same booking_reference collapse to one."""
-        import pytz
-        from datetime import datetime as dt
-
-        uk_tz = pytz.timezone('Europe/London')
-        now = dt.now(uk_tz)
-
-        mock_logs = [
-            MagicMock(
-                id=101,
-                session_id=None,
-                booking_reference="TAG-DEQ61923",
-                event=AuditLogEvent.BOOKING_CONFIRMED,
-                created_at=now,
-            ),
-            MagicMock(
-                id=102,
-                session_id=None,
-                booking_reference="TAG-DEQ61923",
-                event=AuditLogEvent.BOOKING_CONFIRMED,
-                created_at=now,
-            ),
-            MagicMock(
-                id=103,
-                session_id=None,
-                booking_reference=None,
-                event=AuditLogEvent.BOOKING_CONFIRMED,
-                created_at=now,
-            ),
-            MagicMock(
-                id=104,
-                session_id=None,
-                booking_reference=None,
-                event=AuditLogEvent.BOOKING_CONFIRMED,
-                created_at=now,
-            ),
-        ]
+        now = datetime.utcnow() - timedelta(minutes=5)
 
-        def query_side_effect(model):
-            query_mock = MagicMock()
-            if hasattr(model, '__name__') and model.__name__ == 'Booking':
-                query_mock.filter.return_value.all.return_value = []
-            else:
-                query_mock.filter.return_value.all.return_value = mock_logs
-            return query_mock
+        self._seed(db_session, [
+            dict(session_id=None, booking_reference="TAG-DEQ61923", event=AuditLogEvent.BOOKING_CONFIRMED, created_at=now),
+            dict(session_id=None, booking_reference="TAG-DEQ61923", event=AuditLogEvent.BOOKING_CONFIRMED, created_at=now),
+            dict(session_id=None, booking_reference=None, event=AuditLogEvent.BOOKING_CONFIRMED, created_at=now),
+            dict(session_id=None, booking_reference=None, event=AuditLogEvent.BOOKING_CONFIRMED, created_at=now),
+        ])
 
-        mock_db.query.side_effect = query_side_effect
-
-        response = client.get(
+        response = data_client.get(
             "/api/admin/reports/session-tracking?period=daily&refresh=true"
         )
 
@@ -73,6 +73,7 @@ def _mock_payment(intent_id="pi_test_HUEB", booking_id=1):
     p.refund_amount_pence = None
     p.refunded_at = None
     p.refund_id = None
+    p.booking = None
     return p
 
 
@@ -733,7 +734,8 @@ class TestChargeRefunded:
                 refunds=refund_obj,
             ),
         )
-        _override_db(MagicMock())
+        # No Payment and no booking carries the reference either.
+        _override_db(_wire_payment_lookup(None))
         resp = _post({})
         assert resp.status_code == 200
 
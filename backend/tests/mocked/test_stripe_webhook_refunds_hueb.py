@@ -36,7 +36,7 @@ def _payment(**kw):
         id=1, amount_pence=9900, refund_amount_pence=0,
         status=PaymentStatus.SUCCEEDED,
         stripe_payment_intent_id="pi_1",
-        refunded_at=None, refund_id=None,
+        refunded_at=None, refund_id=None, booking=None,
     )
     base.update(kw)
     return SimpleNamespace(**base)
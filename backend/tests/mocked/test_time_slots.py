@@ -19,6 +19,7 @@ FUTURE_DATE_PREV = FUTURE_DATE - timedelta(days=1)  # Day before FUTURE_DATE
 from time_slots import (
     calculate_drop_off_datetime,
     calculate_all_slots,
+    departure_slot_catalogue,
     format_time_display,
     is_overnight_drop_off,
     get_day_name,
@@ -748,3 +749,32 @@ class TestDropOffFloorHUEB:
         d, t = calculate_drop_off_datetime(FUTURE_DATE, time(3, 0), SlotType.EARLY)
         assert d == FUTURE_DATE
         assert t == time(0, 15)
+
+
+class TestDepartureSlotCatalogue:
+    """departure_slot_catalogue — the rows stored in departure_slots."""
+
+    def test_H_three_slots_with_capacity_keys(self):
+        rows = departure_slot_catalogue(FUTURE_DATE, time(10, 0))
+        assert [(r["slot_id"], r["capacity_key"], r["drop_off_time"]) for r in rows] == [
+            ("165", "early", time(7, 15)),
+            ("120", "late", time(8, 0)),
+            ("90", "late", time(8, 30)),
+        ]
+        assert not any(r["is_clamped"] for r in rows)
+
+    def test_H_floor_clamp_is_flagged_and_relabelled(self):
+        early, standard, late = departure_slot_catalogue(FUTURE_DATE, time(6, 20))
+        assert (early["drop_off_time"], early["is_clamped"], early["label"]) == (
+            time(4, 0), True, "Earliest drop-off",
+        )
+        assert standard["is_clamped"] is False
+        assert late["label"] == "1½ hours before"
+
+    def test_E_previous_evening_slots_match_calculate_drop_off(self):
+        rows = departure_slot_catalogue(FUTURE_DATE, time(0, 35))
+        for row, slot_type in zip(rows, SlotType):
+            assert (row["drop_off_date"], row["drop_off_time"]) == calculate_drop_off_datetime(
+                FUTURE_DATE, time(0, 35), slot_type
+            )
+        assert rows[0]["drop_off_date"] == FUTURE_DATE_PREV
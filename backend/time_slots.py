@@ -137,6 +137,54 @@ def calculate_all_slots(
     return slots
 
 
+# Which FlightDeparture counter each slot draws on: standard and late share
+# the late counter (see FlightDeparture.slots_booked_late).
+SLOT_CAPACITY_KEYS = {
+    SlotType.EARLY: "early",
+    SlotType.STANDARD: "late",
+    SlotType.LATE: "late",
+}
+
+CLAMPED_SLOT_LABEL = "Earliest drop-off"
+
+
+def departure_slot_catalogue(flight_date: date, flight_time: time) -> list[dict]:
+    """
+    Drop-off slot rows for one departure, as stored in departure_slots.
+
+    Same arithmetic as calculate_drop_off_datetime (offsets plus the 04:00
+    floor); a slot raised to the floor is flagged and relabelled the way the
+    frontend's buildDropoffSlots shows it.
+
+    Args:
+        flight_date: The date of the flight departure
+        flight_time: The time of the flight departure
+
+    Returns:
+        List of dicts, one per slot type, in SlotType order
+    """
+    rows = []
+    for slot_type in SlotType:
+        drop_off_date, drop_off_time = calculate_drop_off_datetime(
+            flight_date, flight_time, slot_type
+        )
+        unclamped = datetime.combine(flight_date, flight_time) - timedelta(
+            minutes=SLOT_OFFSETS[slot_type]
+        )
+        is_clamped = datetime.combine(drop_off_date, drop_off_time) != unclamped
+        rows.append({
+            "slot_id": slot_type.value,
+            "capacity_key": SLOT_CAPACITY_KEYS[slot_type],
+            "flight_date": flight_date,
+            "departure_time": flight_time,
+            "drop_off_date": drop_off_date,
+            "drop_off_time": drop_off_time,
+            "label": CLAMPED_SLOT_LABEL if is_clamped else SLOT_LABELS[slot_type],
+            "is_clamped": is_clamped,
+        })
+    return rows
+
+
 def format_time_display(t: time) -> str:
     """
     Format a time object for display.